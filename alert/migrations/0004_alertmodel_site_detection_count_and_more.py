@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2025-06-22 10:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alert', '0003_alter_alertmodel_alert_type_alter_alertmodel_level'),
+        ('detection', '0007_miningsitemodel_detectionmodel_site'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertmodel',
+            name='site',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alerts', to='detection.miningsitemodel'),
+        ),
+        migrations.AddField(
+            model_name='alertmodel',
+            name='detection_count',
+            field=models.PositiveIntegerField(default=1, help_text="Détections regroupées dans l'alerte"),
+        ),
+        migrations.AddField(
+            model_name='alertmodel',
+            name='max_confidence_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='alertmodel',
+            name='last_detected_at',
+            field=models.DateTimeField(blank=True, help_text='Dernière détection regroupée', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='alertmodel',
+            index=models.Index(fields=['site', 'alert_status'], name='mining_alert_site_status_idx'),
+        ),
+    ]
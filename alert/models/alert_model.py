@@ -28,6 +28,13 @@ class AlertModel(NamedDateTimeModel):
     # Relations
     detection = models.ForeignKey('detection.DetectionModel', on_delete=models.CASCADE, related_name='alerts')
     region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE)
+    site = models.ForeignKey('detection.MiningSiteModel', on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='alerts')
+
+    # Regroupement : détections rattachées à l'alerte ouverte de leur site (AlertAggregationService)
+    detection_count = models.PositiveIntegerField(default=1, help_text=_("Détections regroupées dans l'alerte"))
+    max_confidence_score = models.FloatField(default=0.0)
+    last_detected_at = models.DateTimeField(null=True, blank=True, help_text=_("Dernière détection regroupée"))
 
     # Détails alerte
     level = models.CharField(max_length=20, choices=CriticalityLevelChoices.choices, default=CriticalityLevelChoices.MEDIUM)
@@ -50,6 +57,7 @@ class AlertModel(NamedDateTimeModel):
             models.Index(fields=['level', 'alert_status']),
             models.Index(fields=['alert_type', 'region']),
             models.Index(fields=['region', 'sent_at']),
+            models.Index(fields=['site', 'alert_status'], name='mining_alert_site_status_idx'),
         ]
 
     def __str__(self):
@@ -38,47 +38,21 @@ class FinancialRiskModel(DateTimeModel):
         return f"Risque {self.risk_level} - {self.estimated_loss:,.0f} FCFA"
 
     def calculate_estimated_loss(self):
-        """Calcul basé sur configuration centralisée"""
-
-        # Coût de base depuis configuration
-        base_cost = FinancialSettings.DEFAULT_COST_PER_HECTARE
-
-        # Facteur intensité selon indices spectraux
-        intensity_factor = self._calculate_intensity_factor()
-
-        # Calcul base
-        base_loss = self.area_hectares * base_cost * intensity_factor
-
-        # Facteurs distance et récurrence
-        distance_factor = FinancialSettings.get_distance_factor(self.sensitive_zone_distance_km)
-        occurrence_factor = min(self.occurrence_count * 0.2 + 1, 2.0)
-
-        # Résultat final
-        self.estimated_loss = base_loss * distance_factor * occurrence_factor
+        """Calcul basé sur configuration centralisée (FinancialSettings.estimate_losses)"""
+        detection = self.detection
+        self.estimated_loss = float(FinancialSettings.estimate_losses(
+            [self.area_hectares],
+            [detection.ndvi_anomaly_score], [detection.ndwi_anomaly_score], [detection.ndti_anomaly_score],
+            [self.sensitive_zone_distance_km], [self.occurrence_count]
+        )[0])
         return self.estimated_loss
 
     def _calculate_intensity_factor(self) -> float:
         """Calcule facteur intensité selon indices spectraux"""
         detection = self.detection
-        intensity_factor = 1.0
-        settings = FinancialSettings.SPECTRAL_FACTORS
-
-        # NDVI - Déforestation
-        if (hasattr(detection, 'ndvi_anomaly_score') and detection.ndvi_anomaly_score and
-                detection.ndvi_anomaly_score > settings['ndvi_severe_threshold']):
-            intensity_factor += settings['ndvi_factor']
-
-        # NDWI - Pollution eau
-        if (hasattr(detection, 'ndwi_anomaly_score') and detection.ndwi_anomaly_score and
-                detection.ndwi_anomaly_score > settings['ndwi_pollution_threshold']):
-            intensity_factor += settings['ndwi_factor']
-
-        # NDTI - Perturbation sols
-        if (hasattr(detection, 'ndti_anomaly_score') and detection.ndti_anomaly_score and
-                detection.ndti_anomaly_score > settings['ndti_disturbance_threshold']):
-            intensity_factor += settings['ndti_factor']
-
-        return intensity_factor
+        return float(FinancialSettings.get_intensity_factors(
+            [detection.ndvi_anomaly_score], [detection.ndwi_anomaly_score], [detection.ndti_anomaly_score]
+        )[0])
 
     def determine_risk_level(self):
         """Utilise configuration centralisée"""
@@ -1,3 +1,52 @@
-from django.test import TestCase
+import itertools
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from config.financial_settings import FinancialSettings
+
+
+def _legacy_estimated_loss(area_hectares, ndvi_score, ndwi_score, ndti_score, distance_km, occurrence_count):
+    """Calcul scalaire de FinancialRiskModel.calculate_estimated_loss avant la version vectorisée"""
+    settings = FinancialSettings.SPECTRAL_FACTORS
+    intensity_factor = 1.0
+    if ndvi_score and ndvi_score > settings['ndvi_severe_threshold']:
+        intensity_factor += settings['ndvi_factor']
+    if ndwi_score and ndwi_score > settings['ndwi_pollution_threshold']:
+        intensity_factor += settings['ndwi_factor']
+    if ndti_score and ndti_score > settings['ndti_disturbance_threshold']:
+        intensity_factor += settings['ndti_factor']
+
+    base_loss = area_hectares * FinancialSettings.DEFAULT_COST_PER_HECTARE * intensity_factor
+    distance_factor = FinancialSettings.get_distance_factor(distance_km)
+    occurrence_factor = min(occurrence_count * 0.2 + 1, 2.0)
+    return base_loss * distance_factor * occurrence_factor
+
+
+class FinancialSettingsTests(SimpleTestCase):
+
+    def test_estimate_losses_matches_the_scalar_formula(self):
+        scores = [None, 0.0, 0.2, 0.5, 0.6, 0.7, 0.71, 0.95]
+        distances = [0.0, 0.99, 1.0, 2.0, 4.99, 5.0, 12.0]
+        cases = [
+            (area, ndvi, ndwi, ndti, distance, occurrences)
+            for area, (ndvi, ndwi, ndti), distance, occurrences in itertools.product(
+                [0.0, 0.3, 2.5], itertools.product(scores, repeat=3), distances, [0, 1, 3, 5, 8]
+            )
+        ]
+        columns = list(zip(*cases))
+
+        losses = FinancialSettings.estimate_losses(*columns)
+        expected = np.array([_legacy_estimated_loss(*case) for case in cases])
+        np.testing.assert_allclose(losses, expected, rtol=1e-12)
+
+        levels = FinancialSettings.determine_risk_levels_from_losses(losses)
+        self.assertEqual(levels.tolist(), [FinancialSettings.determine_risk_level_from_loss(loss) for loss in expected])
+
+    def test_distance_factors_match_the_scalar_thresholds(self):
+        distances = [0.0, 0.5, 1.0, 3.0, 5.0, 50.0]
+        self.assertEqual(FinancialSettings.get_distance_factors(distances).tolist(),
+                         [FinancialSettings.get_distance_factor(distance) for distance in distances])
+
+    def test_missing_loss_is_low_risk(self):
+        self.assertEqual(FinancialSettings.determine_risk_levels_from_losses([np.nan, 0.0]).tolist(), ['LOW', 'LOW'])
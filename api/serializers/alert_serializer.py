@@ -10,10 +10,12 @@ class AlertSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AlertModel
-        fields = ['id', 'name', 'detection', 'detection_info', 'region', 'region_name',
+        fields = ['id', 'name', 'detection', 'detection_info', 'region', 'region_name', 'site',
                   'level', 'alert_type', 'message', 'alert_status', 'sent_at', 'is_read',
+                  'detection_count', 'max_confidence_score', 'last_detected_at',
                   'assigned_to', 'assigned_to_name', 'time_since_created']
-        read_only_fields = ['id', 'detection_info', 'region_name', 'assigned_to_name',
+        read_only_fields = ['id', 'detection_info', 'region_name', 'site', 'assigned_to_name',
+                            'detection_count', 'max_confidence_score', 'last_detected_at',
                             'sent_at', 'time_since_created']
 
     def get_detection_info(self, obj):
@@ -10,8 +10,8 @@ class ImageSerializer(serializers.ModelSerializer):
         model = ImageModel
         fields = ['id', 'name', 'capture_date', 'satellite_source', 'cloud_coverage',
                   'resolution', 'gee_asset_id', 'gee_collection', 'processing_status',
-                  'processed_at', 'processing_error', 'ndvi_mean', 'ndwi_mean', 'ndti_mean',
+                  'processed_at', 'processing_error', 'detection_status', 'detected_at', 'ndvi_mean', 'ndwi_mean', 'ndti_mean',
                   'region', 'region_name', 'requested_by', 'requested_by_name',
                   'center_lat', 'center_lon', 'created_at']
         read_only_fields = ['id', 'region_name', 'requested_by_name', 'processed_at',
-                            'processing_error', 'ndvi_mean', 'ndwi_mean', 'ndti_mean', 'created_at']
+                            'processing_error', 'detection_status', 'detected_at', 'ndvi_mean', 'ndwi_mean', 'ndti_mean', 'created_at']
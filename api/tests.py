@@ -1,3 +1,78 @@
-from django.test import TestCase
+import math
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+import cv2
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from api.viewsets.spectral_viewsets import SpectralViewSet
+from gee.backends.local_backend import LocalRasterBackend
+from gee.config import GEEConfig
+from gee.services.earth_engine_service import EarthEngineService
+
+ASSET = f"{GEEConfig.SENTINEL2_COLLECTION}/SYNTH_20250105T103000_BDK"
+NDVI_VIS = {'min': -1, 'max': 1, 'palette': ['red', 'yellow', 'green']}
+
+
+def tile_at(latitude, longitude, zoom):
+    """Indices x, y de la tuile Web Mercator contenant le point"""
+    n = 2 ** zoom
+    x = int((longitude + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return x, y
+
+
+class SpectralLocalTileTests(SimpleTestCase):
+    """Cartes du backend local : URL de get_map_url servie par SpectralViewSet.get_local_tile"""
+
+    def setUp(self):
+        self.backend = LocalRasterBackend(data_dir='/nonexistent')
+        patcher = mock.patch.object(SpectralViewSet, 'gee_service', EarthEngineService(backend=self.backend))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(GEEConfig, 'BACKEND', 'local')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.view = SpectralViewSet.as_view({'get': 'get_local_tile'}, **SpectralViewSet.get_local_tile.kwargs)
+
+    def get_tile(self, url, z, x, y):
+        """Requête sur l'URL de tuiles, {z}/{x}/{y} remplacés comme le ferait la carte"""
+        parts = urlsplit(url.format(z=z, x=x, y=y))
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        request = APIRequestFactory().get(parts.path, query)
+        index_name, z, x, y = parts.path.rstrip('/').split('/')[-4:]
+        return self.view(request, index_name=index_name, z=z, x=x, y=y)
+
+    def test_map_url_is_served_by_the_tile_view(self):
+        url = self.backend.get_map_url(ASSET, 'NDVI', NDVI_VIS)
+        self.assertTrue(url.startswith(f"{GEEConfig.LOCAL_TILE_BASE_URL}/NDVI/{{z}}/{{x}}/{{y}}/?"))
+
+        bounds = GEEConfig.BONDOUKOU_BOUNDS
+        x, y = tile_at((bounds['lat_min'] + bounds['lat_max']) / 2, (bounds['lon_min'] + bounds['lon_max']) / 2, 12)
+        response = self.get_tile(url, 12, x, y)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response.content, self.backend.render_tile(ASSET, 'NDVI', NDVI_VIS, 12, x, y))
+
+        rgba = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_UNCHANGED)
+        self.assertEqual(rgba.shape, (256, 256, 4))
+        self.assertTrue((rgba[..., 3] == 255).any())
+
+    def test_tile_outside_the_scene_is_transparent(self):
+        response = self.get_tile(self.backend.get_map_url(ASSET, 'NDWI', NDVI_VIS), 12, 0, 0)
+        self.assertEqual(response.status_code, 200)
+        rgba = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_UNCHANGED)
+        self.assertFalse(rgba[..., 3].any())
+
+    def test_unknown_scene_or_index_is_rejected(self):
+        url = self.backend.get_map_url(f"{GEEConfig.SENTINEL2_COLLECTION}/UNKNOWN", 'NDVI', NDVI_VIS)
+        self.assertEqual(self.get_tile(url, 12, 0, 0).status_code, 400)
+        url = self.backend.get_map_url(ASSET, 'EVI', NDVI_VIS)
+        self.assertEqual(self.get_tile(url, 12, 0, 0).status_code, 400)
+
+    def test_tiles_are_not_served_with_the_earth_engine_backend(self):
+        url = self.backend.get_map_url(ASSET, 'NDVI', NDVI_VIS)
+        with mock.patch.object(GEEConfig, 'BACKEND', 'earthengine'):
+            self.assertEqual(self.get_tile(url, 12, 0, 0).status_code, 404)
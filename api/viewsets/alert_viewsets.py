@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 
 from alert.models.alert_model import AlertModel
@@ -13,6 +14,13 @@ from permissions.IsAdministrateur import IsAdministrateur # Added for potential
 from permissions.IsAgentAnalyste import IsAgentAnalyste # Added for potential broader access later if needed
 
 
+class ActiveAlertPagination(PageNumberPagination):
+    """Pages de /api/alerts/active/ (?page=, ?page_size=)"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class AlertViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsResponsableRegional] # Updated
     """
@@ -71,19 +79,18 @@ class AlertViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='active')
     def active_alerts(self, request):
         """
-        Alertes actives non lues
-        GET /api/alerts/active/
+        Alertes actives non lues, paginées
+        GET /api/alerts/active/?page=1&page_size=50
         """
         active_alerts = self.queryset.filter(
             alert_status__in=['ACTIVE', 'ACKNOWLEDGED'],
             is_read=False
-        ).order_by('-sent_at')
+        ).select_related('detection', 'region', 'assigned_to').order_by('-sent_at', '-id')
 
-        serializer = self.get_serializer(active_alerts, many=True)
-        return Response({
-            'count': active_alerts.count(),
-            'results': serializer.data
-        })
+        paginator = ActiveAlertPagination()
+        page = paginator.paginate_queryset(active_alerts, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='critical')
     def critical_alerts(self, request):
@@ -1,3 +1,4 @@
+from django.http import HttpResponse
 from rest_framework import viewsets, status, permissions # Updated import
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -13,9 +14,62 @@ class SpectralViewSet(viewsets.ViewSet):
     """ViewSet pour les cartes d'indices spectraux"""
     permission_classes = [permissions.IsAuthenticated, IsAgentAnalyste] # Updated
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.gee_service = EarthEngineService()
+    @property
+    def gee_service(self):
+        # Service léger : le backend et la session GEE sont partagés par le processus,
+        # aucune ré-authentification par requête
+        if not hasattr(self, '_gee_service'):
+            self._gee_service = EarthEngineService()
+        return self._gee_service
+
+    @action(detail=False, methods=['get'], url_path='gee-status')
+    def get_gee_status(self, request):
+        """
+        État de la session Google Earth Engine du processus (contrôle de santé inclus)
+        et du gouverneur de quota partagé (attentes par opération, niveau de recul)
+        """
+        from gee.config import GEEConfig
+        from gee.services.ee_session import get_ee_session
+        from gee.services.quota_governor import get_quota_governor
+
+        if GEEConfig.BACKEND == 'local':
+            return Response({'backend': 'local', 'healthy': True}, status=status.HTTP_200_OK)
+
+        force = request.query_params.get('force') == 'true'
+        session_stats = dict(get_ee_session().health_check(force=force), backend=GEEConfig.BACKEND,
+                             quota=get_quota_governor().stats())
+        http_status = status.HTTP_200_OK if session_stats['healthy'] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(session_stats, status=http_status)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny],
+            url_path=r'local-tiles/(?P<index_name>[A-Z]+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)')
+    def get_local_tile(self, request, index_name=None, z=None, x=None, y=None):
+        """
+        Tuile PNG d'un indice rendue par le backend local (URLs de cartes en mode local)
+
+        Sans authentification, comme les URLs de tuiles GEE : les couches de tuiles
+        de la carte ne transmettent pas le jeton JWT.
+        """
+        from gee.config import GEEConfig
+
+        if GEEConfig.BACKEND != 'local':
+            return Response({'error': 'Tuiles locales indisponibles avec ce backend'}, status=status.HTTP_404_NOT_FOUND)
+
+        asset_id = request.query_params.get('asset')
+        if not asset_id or index_name not in GEEConfig.SPECTRAL_INDICES:
+            return Response({'error': 'Scène ou indice invalide'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            vis_params = {
+                'min': float(request.query_params.get('min', -1)),
+                'max': float(request.query_params.get('max', 1)),
+                'palette': request.query_params.get('palette', 'black,white').split(','),
+            }
+            png = self.gee_service.backend.render_tile(asset_id, index_name, vis_params, int(z), int(x), int(y))
+        except (KeyError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return HttpResponse(png, content_type='image/png')
 
     @action(detail=False, methods=['get'], url_path='maps/(?P<image_id>[^/.]+)')
     def get_spectral_maps(self, request, image_id=None):
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 # Définir le module de settings par défaut pour Celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -15,4 +16,23 @@ app.autodiscover_tasks()
 
 @app.task(bind=True)
 def debug_task(self):
-    print(f'Request: {self.request!r}')
\ No newline at end of file
+    print(f'Request: {self.request!r}')
+
+@worker_process_init.connect
+def preload_ai_models(**kwargs):
+    """Charge et préchauffe les modèles IA une fois par processus worker, avant la première tâche"""
+    from django.conf import settings
+    from gee.services.model_registry import get_model_registry
+
+    if settings.AI_PRELOAD_MODELS:
+        get_model_registry().preload(settings.AI_PRELOAD_MODELS)
+
+
+@worker_init.connect
+def preload_ai_models_without_child_processes(sender=None, **kwargs):
+    """Pools threads/solo : pas de processus enfant (worker_process_init non émis), préchargement dans le worker"""
+    from celery.concurrency import get_implementation
+    from celery.concurrency.prefork import TaskPool as PreforkPool
+
+    if not issubclass(get_implementation(sender.pool_cls), PreforkPool):
+        preload_ai_models()
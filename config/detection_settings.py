@@ -29,15 +29,74 @@ class DetectionConfig:
     COMBINED_CONFIDENCE_WEIGHT_TF: float = 0.4      # Weight for the TensorFlow prediction part
 
     # Thresholds for determining alert criticality based on the final detection.confidence_score
-    # As used in MiningDetectionService._generate_alert_and_risk
+    # As used in AlertAggregationService.alert_level
     ALERT_CRITICALITY_THRESHOLD_CRITICAL: float = 0.8 # Score >= this is CRITICAL
     ALERT_CRITICALITY_THRESHOLD_HIGH: float = 0.6    # Score >= this (and < CRITICAL_THRESHOLD) is HIGH
                                                      # Score < HIGH_THRESHOLD is MEDIUM (implicitly)
 
-    # Example of how to potentially make the area estimation configurable too
-    # (Currently, _estimate_affected_area in MiningDetectionService uses a simple logic)
-    # MAX_AFFECTED_AREA_ESTIMATE_HECTARES: float = 50.0
-    # SCORE_TO_HECTARES_MULTIPLIER: float = 50.0
+    # Tiled scanning of the whole image footprint (MiningDetectionService / TileScanService)
+    # Tiles of SCAN_TILE_SIZE_PIXELS x SCAN_TILE_SIZE_PIXELS pixels at SCAN_SCALE_METERS,
+    # overlapping by SCAN_TILE_OVERLAP (fraction of the tile size, 0 <= overlap < 1).
+    SCAN_TILE_SIZE_PIXELS: int = 48     # Must match the model input size
+    SCAN_SCALE_METERS: int = 10         # Sentinel-2 resolution for the B3/B4/B8/B11/B12 indices
+    SCAN_TILE_OVERLAP: float = 0.25
+    SCAN_TILES_PER_BLOCK: int = 24      # Tiles per side fetched in a single pixel block request
+    SCAN_FETCH_WORKERS: int = 4         # Concurrent block requests
+    SCAN_MAX_HOT_TILES: int = 50        # Cap on detections created per image (highest scores kept)
+
+    # Micro-batched inference (BatchedInferenceService): queued patches are flushed as one
+    # forward pass when INFERENCE_MAX_BATCH_SIZE are waiting or the oldest has waited
+    # INFERENCE_MAX_WAIT_MS milliseconds.
+    INFERENCE_MAX_BATCH_SIZE: int = 256
+    INFERENCE_MAX_WAIT_MS: float = 10.0
+
+    # Per-image detection claim (ImageModel.detection_status): a RUNNING claim older than this
+    # is considered abandoned (worker lost) and can be taken over by another task.
+    DETECTION_CLAIM_TIMEOUT_SECONDS: int = 30 * 60
+
+    # Seasonal spectral baselines (SpectralBaselineService): anomalies are scored against the
+    # region's statistics for the scene's calendar month once it has BASELINE_MIN_SAMPLES scenes,
+    # otherwise against the all-months statistics. The scale is the larger of the mean in-scene
+    # stddev and the robust (MAD) spread of scene means, never below BASELINE_MIN_SCALE.
+    BASELINE_MIN_SAMPLES: int = 3
+    BASELINE_RESERVOIR_SIZE: int = 64   # Scene means kept per baseline for the median / MAD
+    BASELINE_MIN_SCALE: float = 0.01
+
+    # Per-pixel change detection (imagery backend detect_change_zones): each index of the scene is
+    # compared, pixel by pixel, with the mean / stddev composite of the CHANGE_BASELINE_MAX_SCENES
+    # most recent scenes acquired between CHANGE_BASELINE_DAYS and CHANGE_BASELINE_GAP_DAYS days
+    # before it. Pixels with |z| >= CHANGE_Z_THRESHOLD on any index are connected (8-neighbourhood)
+    # and vectorised into zones; zones smaller than CHANGE_MIN_PIXELS pixels are dropped.
+    CHANGE_DETECTION_ENABLED: bool = True
+    CHANGE_SCALE_METERS: int = 20
+    CHANGE_BASELINE_DAYS: int = 365
+    CHANGE_BASELINE_GAP_DAYS: int = 30      # Keeps a recently opened site out of its own reference
+    CHANGE_BASELINE_MAX_SCENES: int = 12
+    CHANGE_MIN_BASELINE_SCENES: int = 3     # Fewer reference scenes: no change detection for the scene
+    CHANGE_MIN_STDDEV: float = 0.02         # Per-pixel stddev floor (stable reference pixels)
+    CHANGE_Z_THRESHOLD: float = 3.0
+    CHANGE_Z_SATURATION: float = 6.0        # Mean |z| of a zone mapped to an anomaly score of 1.0
+    CHANGE_MIN_PIXELS: int = 5
+    CHANGE_MAX_ZONES: int = 200             # Largest zones kept per scene
+
+    # Area measurement of TF hot tiles (TileScanService): disturbed ground is NDVI below
+    # AREA_DISTURBED_NDVI_MAX outside open water (NDWI below AREA_DISTURBED_NDWI_MAX); a tile's
+    # area is that of the connected disturbed component under its centre (8-neighbourhood).
+    AREA_DISTURBED_NDVI_MAX: float = 0.15
+    AREA_DISTURBED_NDWI_MAX: float = 0.2
+
+    # Site tracking (SiteTrackingService): a detection within SITE_MATCH_RADIUS_METERS of a known
+    # site of its region joins that site's time series; only detections opening a new site raise
+    # an investigation.
+    SITE_MATCH_RADIUS_METERS: float = 250.0
+
+    # Alert aggregation (AlertAggregationService): a detection is folded into the open alert of its
+    # site while that alert's last detection is less than ALERT_COALESCE_WINDOW_HOURS old (sliding
+    # window), escalating its level when the score rises. At most ALERT_MAX_NEW_PER_REGION_PER_HOUR
+    # site alerts are opened per region per hour; beyond that, detections are folded into one
+    # regional summary alert per hour.
+    ALERT_COALESCE_WINDOW_HOURS: int = 24 * 30
+    ALERT_MAX_NEW_PER_REGION_PER_HOUR: int = 20
 
     # Placeholder for any other detection-related settings
     # For example, parameters for patch extraction if they need to be centralized
@@ -2,6 +2,9 @@
 Configuration centralisée des coûts financiers pour détection orpaillage
 Basé sur données ministère ivoirien : 3000 milliards FCFA/an
 """
+import numpy as np
+
+
 class FinancialSettings:
     """Configuration coûts et paramètres financiers"""
 
@@ -23,6 +26,9 @@ class FinancialSettings:
         'normal': 1.0  # > 5km
     }
 
+    # Distance retenue tant qu'aucune couche de zones sensibles n'est importée (load_sensitive_zones)
+    DEFAULT_SENSITIVE_ZONE_DISTANCE_KM = 2.0
+
     # Seuils niveaux de risque (FCFA)
     RISK_THRESHOLDS = {
         'CRITICAL': 10_000_000,  # 10M FCFA
@@ -51,6 +57,59 @@ class FinancialSettings:
         else:
             return cls.DISTANCE_FACTORS['normal']
 
+    @classmethod
+    def get_distance_factors(cls, distances_km) -> np.ndarray:
+        """Version vectorisée de get_distance_factor"""
+        distances_km = np.asarray(distances_km, dtype=np.float64)
+        return np.select(
+            [distances_km < 1, distances_km < 5],
+            [cls.DISTANCE_FACTORS['very_sensitive'], cls.DISTANCE_FACTORS['sensitive']],
+            cls.DISTANCE_FACTORS['normal']
+        )
+
+    @classmethod
+    def get_intensity_factors(cls, ndvi_scores, ndwi_scores, ndti_scores) -> np.ndarray:
+        """Facteur intensité selon les scores d'anomalie spectrale (None = pas d'anomalie)"""
+        factors = cls.SPECTRAL_FACTORS
+        # None devient NaN : toute comparaison est fausse
+        ndvi = np.asarray(ndvi_scores, dtype=np.float64)
+        ndwi = np.asarray(ndwi_scores, dtype=np.float64)
+        ndti = np.asarray(ndti_scores, dtype=np.float64)
+        return (1.0
+                + factors['ndvi_factor'] * (ndvi > factors['ndvi_severe_threshold'])  # Déforestation
+                + factors['ndwi_factor'] * (ndwi > factors['ndwi_pollution_threshold'])  # Pollution eau
+                + factors['ndti_factor'] * (ndti > factors['ndti_disturbance_threshold']))  # Perturbation sols
+
+    @staticmethod
+    def get_occurrence_factors(occurrence_counts) -> np.ndarray:
+        """Facteur récurrence : +20 % par occurrence, plafonné à 2"""
+        return np.minimum(np.asarray(occurrence_counts, dtype=np.float64) * 0.2 + 1, 2.0)
+
+    @classmethod
+    def estimate_losses(cls, areas_hectares, ndvi_scores, ndwi_scores, ndti_scores,
+                        distances_km, occurrence_counts) -> np.ndarray:
+        """
+        Pertes estimées (FCFA) d'un ensemble de risques, tableaux alignés
+
+        surface x coût par hectare x facteur intensité x facteur distance x facteur récurrence
+        """
+        return (np.asarray(areas_hectares, dtype=np.float64)
+                * cls.DEFAULT_COST_PER_HECTARE
+                * cls.get_intensity_factors(ndvi_scores, ndwi_scores, ndti_scores)
+                * cls.get_distance_factors(distances_km)
+                * cls.get_occurrence_factors(occurrence_counts))
+
+    @classmethod
+    def determine_risk_levels_from_losses(cls, estimated_losses) -> np.ndarray:
+        """Version vectorisée de determine_risk_level_from_loss"""
+        losses = np.nan_to_num(np.asarray(estimated_losses, dtype=np.float64))
+        return np.select(
+            [losses >= cls.RISK_THRESHOLDS['CRITICAL'], losses >= cls.RISK_THRESHOLDS['HIGH'],
+             losses >= cls.RISK_THRESHOLDS['MEDIUM']],
+            ['CRITICAL', 'HIGH', 'MEDIUM'],
+            'LOW'
+        )
+
     @classmethod
     def determine_risk_level_from_loss(cls, estimated_loss: float) -> str:
         """Détermine niveau risque selon perte estimée"""
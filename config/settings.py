@@ -169,6 +169,25 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache (URLs de tuiles GEE, verrous anti-stampede) : Redis partagé si REDIS_URL est défini,
+# sinon cache mémoire local au processus
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Celery Configuration
 # Import crontab for scheduling
 from celery.schedules import crontab
@@ -180,6 +199,40 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE # Use Django's timezone
 
+# Files par classe de charge, chacune consommée par son propre worker (voir docker-compose.yml) :
+#   gee_io      : appels Earth Engine (I/O, pool threads), orchestration du pipeline d'analyse
+#   inference   : détection TensorFlow (CPU, pool threads : modèle et micro-lots partagés par les tâches)
+#   reports     : génération de rapports
+#   maintenance : tâches planifiées et toute tâche non routée
+from kombu import Queue
+
+CELERY_TASK_QUEUES = (
+    Queue('gee_io'),
+    Queue('inference'),
+    Queue('reports'),
+    Queue('maintenance'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+CELERY_TASK_ROUTES = {
+    'gee.tasks.process_gee_image_task': {'queue': 'gee_io'},
+    'gee.tasks.start_analysis_run_task': {'queue': 'gee_io'},
+    'gee.tasks.analysis_image_indices_task': {'queue': 'gee_io'},
+    'gee.tasks.start_detection_stage_task': {'queue': 'gee_io'},
+    'gee.tasks.finalize_analysis_run_task': {'queue': 'gee_io'},
+    'gee.tasks.detect_mining_activity_task': {'queue': 'inference'},
+    'gee.tasks.analysis_image_detection_task': {'queue': 'inference'},
+    'report.tasks.generate_report_task': {'queue': 'reports'},
+    'update_dashboard_statistics': {'queue': 'maintenance'},
+}
+# Préchargement minimal par défaut : une tâche longue (inférence, rapport) ne doit pas
+# en retenir d'autres ; le worker gee_io l'augmente en ligne de commande (--prefetch-multiplier)
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.getenv('CELERY_WORKER_PREFETCH_MULTIPLIER', '1'))
+
+# Modèles IA (ai/models/<nom>.h5), chargés à la demande par gee.services.model_registry
+AI_MODELS_DIR = os.path.join(BASE_DIR, 'ai', 'models')
+# Modèles préchargés par chaque processus worker Celery (voir config/celery.py) ; vide = aucun
+AI_PRELOAD_MODELS = [name for name in os.getenv('AI_PRELOAD_MODELS', 'ghana_mining_detector').split(',') if name]
+
 CELERY_BEAT_SCHEDULE = {
     'update-dashboard-statistics-daily': {
         'task': 'update_dashboard_statistics',  # Name of the task in tasks.py
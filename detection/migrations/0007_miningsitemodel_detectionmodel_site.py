@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2025-06-20 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0006_investigationmodel_assigned_at_and_more'),
+        ('image', '0005_imagemodel_baseline_applied_at'),
+        ('region', '0003_remove_regionmodel_geographic_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MiningSiteModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('grid_key', models.BigIntegerField(help_text="Cellule de la grille d'indexation spatiale")),
+                ('first_seen_date', models.DateField(help_text='Date de capture de la première image détectant le site')),
+                ('last_seen_date', models.DateField(help_text='Date de capture de la dernière image détectant le site')),
+                ('occurrence_count', models.PositiveIntegerField(default=0, help_text="Nombre d'images distinctes détectant le site")),
+                ('max_confidence_score', models.FloatField(default=0.0)),
+                ('max_area_hectares', models.FloatField(default=0.0)),
+                ('last_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='image.imagemodel')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mining_sites', to='region.regionmodel')),
+            ],
+            options={
+                'db_table': 'mining_sites',
+                'ordering': ['-last_seen_date'],
+                'indexes': [models.Index(fields=['region', 'grid_key'], name='mining_site_region_grid_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='detectionmodel',
+            name='site',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detections', to='detection.miningsitemodel'),
+        ),
+    ]
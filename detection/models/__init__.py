@@ -1,3 +1,4 @@
 from . import detection_model
 from . import detection_feedback_model
-from . import investigation_model
\ No newline at end of file
+from . import investigation_model
+from . import mining_site_model
\ No newline at end of file
@@ -21,6 +21,8 @@ class DetectionModel(DateTimeModel):
     # Relations
     image = models.ForeignKey('image.ImageModel', on_delete=models.CASCADE, related_name='detections')
     region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE)
+    site = models.ForeignKey('detection.MiningSiteModel', on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='detections')
 
     # Coordonnées précises
     latitude = models.FloatField()
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from base.models.helpers.date_time_model import DateTimeModel
+
+
+class MiningSiteModel(DateTimeModel):
+    """
+    Site minier suivi dans le temps
+
+    Regroupe les détections successives d'un même site (rayon DetectionConfig.SITE_MATCH_RADIUS_METERS) :
+    chaque image qui le détecte ajoute une détection à sa série temporelle (related_name 'detections')
+    au lieu d'ouvrir un nouveau site. grid_key est la cellule de la grille d'indexation spatiale
+    (SiteTrackingService) contenant le centroïde.
+    """
+
+    region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE, related_name='mining_sites')
+
+    # Centroïde : moyenne des positions détectées, une par image
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    grid_key = models.BigIntegerField(help_text=_("Cellule de la grille d'indexation spatiale"))
+
+    # Série temporelle
+    first_seen_date = models.DateField(help_text=_("Date de capture de la première image détectant le site"))
+    last_seen_date = models.DateField(help_text=_("Date de capture de la dernière image détectant le site"))
+    occurrence_count = models.PositiveIntegerField(default=0, help_text=_("Nombre d'images distinctes détectant le site"))
+    last_image = models.ForeignKey('image.ImageModel', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+')
+
+    max_confidence_score = models.FloatField(default=0.0)
+    max_area_hectares = models.FloatField(default=0.0)
+
+    class Meta:
+        db_table = 'mining_sites'
+        ordering = ['-last_seen_date']
+        indexes = [
+            models.Index(fields=['region', 'grid_key'], name='mining_site_region_grid_idx'),
+        ]
+
+    def __str__(self):
+        return f"Site {self.id} - {self.latitude:.4f}, {self.longitude:.4f} ({self.occurrence_count} détections)"
@@ -16,12 +16,16 @@ export interface Alert {
   };
   region: number;
   region_name: string;
+  site: number | null; // Site suivi (null : alerte de synthèse régionale)
   level: string;
   alert_type: string;
   message: string;
   alert_status: string;
   sent_at: string;
   is_read: boolean;
+  detection_count: number; // Détections regroupées dans l'alerte
+  max_confidence_score: number;
+  last_detected_at: string | null;
   assigned_to: number | null;
   assigned_to_name: string | null;
   time_since_created: string;
@@ -50,9 +54,15 @@ class AlertService {
     return response.data;
   }
 
-  async getActiveAlerts(): Promise<{ count: number; results: Alert[] }> {
+  async getActiveAlerts(params?: { page?: number; page_size?: number }): Promise<{
+    count: number;
+    next: string | null;
+    previous: string | null;
+    results: Alert[];
+  }> {
     const response = await axios.get(`${API_URL}/alerts/active/`, {
       headers: this.getHeaders(),
+      params,
     });
     return response.data;
   }
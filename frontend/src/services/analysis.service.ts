@@ -3,17 +3,57 @@ import { authService } from './auth.service'; // Corrected import
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1';
 
-export interface AnalysisResult {
+export type AnalysisRunStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'ERROR';
+
+export interface AnalysisRunLaunch {
   success: boolean;
   message: string;
-  data?: {
-    images_processed: number;
-    detections_found: number;
-    alerts_generated: number;
-    investigations_created: number;
-    analysis_date: string;
-  };
-  errors?: string[];
+  run_id: number;
+  status: AnalysisRunStatus;
+  status_url: string;
+}
+
+export interface AnalysisStageProgress {
+  stage: 'FETCH' | 'INDICES' | 'DETECTION' | 'ALERTING';
+  status: 'PENDING' | 'RUNNING' | 'COMPLETED';
+  started_at?: string;
+  finished_at?: string;
+  duration_seconds?: number;
+  done?: number;
+  total?: number;
+  cumulated_seconds?: number;
+}
+
+export interface AnalysisResult {
+  success: boolean;
+  images_processed: number;
+  detections_found: number;
+  alerts_generated: number;
+  alerts_escalated: number;
+  investigations_created: number;
+  tiles_scanned: number;
+  scan_tiles_per_second: number;
+  errors_count: number;
+}
+
+export interface AnalysisRun {
+  run_id: number;
+  status: AnalysisRunStatus;
+  current_stage: string;
+  months_back: number;
+  images_total: number;
+  images_indexed: number;
+  images_failed: number;
+  images_analyzed: number;
+  detections_found: number;
+  tiles_scanned: number;
+  stages: AnalysisStageProgress[];
+  results: Partial<AnalysisResult>;
+  errors: string[];
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  elapsed_seconds: number | null;
 }
 
 class AnalysisService {
@@ -24,7 +64,7 @@ class AnalysisService {
     };
   }
 
-  async runAnalysis(monthsBack: number = 3): Promise<AnalysisResult> {
+  async runAnalysis(monthsBack: number = 3): Promise<AnalysisRunLaunch> {
     const response = await axios.post(
       `${API_URL}/analysis/run/`,
       { months_back: monthsBack },
@@ -32,6 +72,37 @@ class AnalysisService {
     );
     return response.data;
   }
+
+  async getRun(runId: number): Promise<AnalysisRun> {
+    const response = await axios.get(`${API_URL}/analysis/runs/${runId}/`, {
+      headers: this.getHeaders(),
+    });
+    return response.data;
+  }
+
+  async getRecentRuns(limit: number = 20): Promise<AnalysisRun[]> {
+    const response = await axios.get(`${API_URL}/analysis/runs/`, {
+      headers: this.getHeaders(),
+      params: { limit },
+    });
+    return response.data.results;
+  }
+
+  // Interroge l'exécution jusqu'à ce qu'elle soit terminée (ou en erreur)
+  async waitForRun(
+    runId: number,
+    onProgress?: (run: AnalysisRun) => void,
+    intervalMs: number = 3000
+  ): Promise<AnalysisRun> {
+    for (;;) {
+      const run = await this.getRun(runId);
+      onProgress?.(run);
+      if (run.status === 'COMPLETED' || run.status === 'ERROR') {
+        return run;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  }
 }
 
-export default new AnalysisService(); 
\ No newline at end of file
+export default new AnalysisService();
@@ -12,6 +12,9 @@ export interface Detection {
   region_name: string;
   latitude: number;
   longitude: number;
+  zone_geometry: { type: 'Polygon'; coordinates: number[][][] } | null; // Zone détectée (GeoJSON)
+  site: number | null; // Site suivi auquel la détection est rattachée
+  site_occurrence_count: number | null; // Images distinctes ayant détecté le site
   detection_type: string;
   confidence_score: number;
   area_hectares: number;
@@ -1,5 +1,6 @@
 import axios from 'axios';
 import { authService } from './auth.service'; // Corrected import
+import type { AnalysisRunLaunch } from './analysis.service';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1';
 
@@ -57,18 +58,7 @@ class ImageService {
     return response.data;
   }
 
-  async runAnalysis(monthsBack: number = 3): Promise<{
-    success: boolean;
-    message: string;
-    data?: {
-      images_processed: number;
-      detections_found: number;
-      alerts_generated: number;
-      investigations_created: number;
-      analysis_date: string;
-    };
-    errors?: string[];
-  }> {
+  async runAnalysis(monthsBack: number = 3): Promise<AnalysisRunLaunch> {
     const response = await axios.post(
       `${API_URL}/analysis/run/`,
       { months_back: monthsBack },
@@ -0,0 +1,31 @@
+import threading
+
+from gee.config import GEEConfig
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_imagery_backend(name: str = None):
+    """
+    Backend d'imagerie configuré (GEEConfig.BACKEND par défaut), partagé par le processus
+
+    Args:
+        name: 'earthengine' ou 'local'
+    """
+    name = name or GEEConfig.BACKEND
+
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = _create_backend(name)  # Un échec n'est pas mémorisé : nouvel essai au prochain appel
+        return _backends[name]
+
+
+def _create_backend(name: str):
+    if name == 'local':
+        from gee.backends.local_backend import LocalRasterBackend
+        return LocalRasterBackend()
+
+    from gee.backends.earth_engine_backend import EarthEngineBackend
+    return EarthEngineBackend()
@@ -0,0 +1,120 @@
+import math
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+
+METERS_PER_DEGREE = 111_320.0
+
+
+class BaseImageryBackend:
+    """
+    Interface commune des sources d'imagerie utilisées par EarthEngineService
+
+    Conventions partagées par toutes les implémentations :
+    - les statistiques d'indices sont renvoyées à plat, clés '<INDICE>_mean',
+      '<INDICE>_stdDev', '<INDICE>_min', '<INDICE>_max', '<INDICE>_p<N>' et
+      '<INDICE>_count' (format de sortie de reduceRegion sur une image multi-bandes) ;
+    - les patchs sont renvoyés au format getRegion (en-tête puis une ligne par pixel)
+      par get_spectral_patch, ou directement en tableau (taille, taille, 3) float32
+      [NDVI, NDWI, NDTI] par get_spectral_patch_array.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.initialized = True
+
+    def list_images(self, start_date: datetime, end_date: datetime,
+                    exclude_asset_ids: Optional[set] = None,
+                    min_time_start: Optional[int] = None) -> List[Dict]:
+        """
+        Liste les scènes de la zone sur la période (couverture nuageuse filtrée)
+
+        min_time_start (ms) restreint aux scènes strictement plus récentes (curseur d'ingestion).
+
+        Returns:
+            Liste de {'gee_asset_id', 'time_start', 'cloud_coverage', 'properties'}
+        """
+        raise NotImplementedError
+
+    def get_image_properties(self, asset_id: str) -> Dict:
+        """Retourne les propriétés d'une scène (dont 'system:time_start' et 'CLOUDY_PIXEL_PERCENTAGE')"""
+        raise NotImplementedError
+
+    def compute_index_statistics(self, asset_id: str) -> Dict:
+        """Statistiques de tous les indices configurés sur la zone, à plat"""
+        raise NotImplementedError
+
+    def compute_collection_index_statistics(self, start_date: datetime, end_date: datetime,
+                                            exclude_asset_ids: Optional[set] = None,
+                                            min_time_start: Optional[int] = None) -> List[Dict]:
+        """
+        Statistiques des indices pour toutes les scènes de la période (mêmes filtres que list_images)
+
+        Returns:
+            Liste de dictionnaires à plat contenant en plus 'gee_asset_id',
+            'time_start' et 'cloud_coverage'
+        """
+        raise NotImplementedError
+
+    def get_spectral_patch(self, point_coords: Tuple[float, float], asset_id: str,
+                           patch_size_pixels: int = 48, scale: int = 10) -> Optional[List]:
+        """Patch NDVI/NDWI/NDTI centré sur (longitude, latitude), au format getRegion"""
+        raise NotImplementedError
+
+    def get_spectral_patch_array(self, point_coords: Tuple[float, float], asset_id: str,
+                                 patch_size_pixels: int = 48, scale: int = 10) -> Optional[np.ndarray]:
+        """Patch NDVI/NDWI/NDTI centré sur (longitude, latitude), en tableau (taille, taille, 3) float32"""
+        raise NotImplementedError
+
+    def get_spectral_block(self, asset_id: str, lon_min: float, lat_max: float, width: int, height: int,
+                           pixel_width: float, pixel_height: float) -> Optional[np.ndarray]:
+        """
+        Bloc NDVI/NDWI/NDTI sur une grille EPSG:4326 alignée sur le coin nord-ouest (lon_min, lat_max)
+
+        Returns:
+            Tableau (height, width, 3) float32, pixels sans donnée à 0
+        """
+        raise NotImplementedError
+
+    def detect_change_zones(self, asset_id: str, bounds: Dict, scale: float) -> Optional[List[Dict]]:
+        """
+        Zones de changement de la scène par rapport à un composite de référence par pixel
+
+        z-score de chaque indice contre la moyenne / l'écart-type par pixel des scènes
+        de référence (DetectionConfig.CHANGE_*), seuillage, regroupement des pixels
+        connexes puis vectorisation.
+
+        Returns:
+            Liste de {'rings', 'centroid', 'area_hectares', 'pixel_count', 'z_scores'}
+            par surface décroissante : anneaux [[lon, lat], ...] (extérieur puis trous),
+            centroïde (lon, lat), |z| moyen par indice ('ndvi', 'ndwi', 'ndti') ;
+            None si la scène a trop peu de scènes de référence
+        """
+        raise NotImplementedError
+
+    def get_transfer_stats(self) -> Dict:
+        """Cumul des transferts de patchs : nombre de patchs, octets reçus et temps de décodage"""
+        return dict(getattr(self, '_transfer_stats', None) or
+                    {'patches': 0, 'bytes': 0, 'decode_seconds': 0.0})
+
+    def _record_transfer(self, num_bytes: int, decode_seconds: float):
+        stats = getattr(self, '_transfer_stats', None)
+        if stats is None:
+            stats = self._transfer_stats = {'patches': 0, 'bytes': 0, 'decode_seconds': 0.0}
+        stats['patches'] += 1
+        stats['bytes'] += num_bytes
+        stats['decode_seconds'] += decode_seconds
+
+    def get_map_url(self, asset_id: str, index_name: str, vis_params: Dict) -> str:
+        """URL de tuiles (format {z}/{x}/{y}) pour un indice de la scène"""
+        raise NotImplementedError
+
+
+def pixel_size_degrees(latitude: float, scale: float) -> Tuple[float, float]:
+    """Largeur et hauteur en degrés d'un pixel de `scale` mètres à la latitude donnée"""
+    pixel_height = scale / METERS_PER_DEGREE
+    pixel_width = scale / (METERS_PER_DEGREE * math.cos(math.radians(latitude)))
+    return pixel_width, pixel_height
@@ -0,0 +1,320 @@
+import io
+import time
+import ee
+import numpy as np
+from numpy.lib import recfunctions
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from config.detection_settings import DetectionConfig
+from gee.config import GEEConfig
+from gee.backends.base_backend import BaseImageryBackend, pixel_size_degrees
+from gee.services.ee_session import get_ee_session
+from gee.services.quota_governor import get_quota_governor
+
+
+class EarthEngineBackend(BaseImageryBackend):
+    """Backend Google Earth Engine (appels ee en direct)"""
+
+    name = 'earthengine'
+
+    def __init__(self):
+        # Session partagée du processus : l'authentification n'a lieu qu'une fois
+        self.session = get_ee_session()
+        # Débit et concurrence des appels EE régulés pour l'ensemble des workers
+        self.governor = get_quota_governor()
+        if not self.session.ensure_initialized():
+            raise Exception("Impossible d'initialiser Google Earth Engine")
+
+    @property
+    def initialized(self) -> bool:
+        return self.session.ensure_initialized()
+
+    def list_images(self, start_date: datetime, end_date: datetime,
+                    exclude_asset_ids: Optional[set] = None,
+                    min_time_start: Optional[int] = None) -> List[Dict]:
+        collection = self._build_collection(start_date, end_date, exclude_asset_ids, min_time_start)
+
+        # Récupération métadonnées (une seule requête ; le nombre d'images en découle)
+        image_list = self.governor.call('list_images', collection.getInfo)
+        print(f"Images trouvées: {len(image_list.get('features', []))}")
+
+        return [
+            {
+                'gee_asset_id': img_info['id'],
+                'time_start': img_info['properties']['system:time_start'],
+                'cloud_coverage': img_info['properties'].get('CLOUDY_PIXEL_PERCENTAGE', 0),
+                'properties': img_info['properties'],
+            }
+            for img_info in image_list.get('features', [])
+        ]
+
+    def get_image_properties(self, asset_id: str) -> Dict:
+        return self.governor.call('image_properties', ee.Image(asset_id).getInfo)['properties'] # Peut lever une ee.EEException
+
+    def compute_index_statistics(self, asset_id: str) -> Dict:
+        # Chargement image
+        image = ee.Image(asset_id)
+        bondoukou_geom = GEEConfig.get_bondoukou_geometry()
+
+        # Clip sur zone Bondoukou puis empilement de tous les indices
+        image_clipped = image.clip(bondoukou_geom)
+        indices_image = self.build_indices_image(image_clipped)
+
+        # Statistiques de tous les indices en une seule requête
+        stats = indices_image.reduceRegion(
+            reducer=self.build_stats_reducer(),
+            geometry=bondoukou_geom,
+            scale=GEEConfig.STATS_SCALE,
+            maxPixels=GEEConfig.STATS_MAX_PIXELS
+        )
+        return self.governor.call('index_statistics', stats.getInfo)
+
+    def compute_collection_index_statistics(self, start_date: datetime, end_date: datetime,
+                                            exclude_asset_ids: Optional[set] = None,
+                                            min_time_start: Optional[int] = None) -> List[Dict]:
+        bondoukou_geom = GEEConfig.get_bondoukou_geometry()
+        collection = self._build_collection(start_date, end_date, exclude_asset_ids, min_time_start)
+
+        reducer = self.build_stats_reducer()
+        build_indices_image = self.build_indices_image
+
+        def image_to_stats_feature(image):
+            stats = build_indices_image(image.clip(bondoukou_geom)).reduceRegion(
+                reducer=reducer,
+                geometry=bondoukou_geom,
+                scale=GEEConfig.STATS_SCALE,
+                maxPixels=GEEConfig.STATS_MAX_PIXELS
+            )
+            return ee.Feature(None, stats).set({
+                'gee_asset_id': image.get('system:id'),
+                'time_start': image.get('system:time_start'),
+                'cloud_coverage': image.get('CLOUDY_PIXEL_PERCENTAGE'),
+            })
+
+        stats_collection = collection.map(image_to_stats_feature)
+        total = self.governor.call('collection_statistics', stats_collection.size().getInfo)
+        print(f"Calcul groupé des indices pour {total} nouvelles scènes")
+
+        rows = []
+        page_size = GEEConfig.BATCH_PAGE_SIZE
+        for offset in range(0, total, page_size):
+            page = self.governor.call('collection_statistics',
+                                      ee.FeatureCollection(stats_collection.toList(page_size, offset)).getInfo)
+            rows.extend(feature['properties'] for feature in page.get('features', []))
+
+        return rows
+
+    def get_spectral_patch(self, point_coords: Tuple[float, float], asset_id: str,
+                           patch_size_pixels: int = 48, scale: int = 10) -> Optional[List]:
+        image = ee.Image(asset_id)
+
+        # Définir le point central
+        point = ee.Geometry.Point(point_coords)
+
+        # Calculer la taille du buffer en mètres pour obtenir un carré
+        # La moitié de la taille totale du patch en mètres
+        buffer_radius_meters = (patch_size_pixels * scale) / 2
+
+        # Créer une géométrie carrée (patch)
+        # buffer().bounds() est une bonne approximation pour un carré autour d'un point.
+        patch_geometry = point.buffer(buffer_radius_meters).bounds(proj='EPSG:4326', maxError=1)
+
+        # Calculer les indices spectraux (sans clip initial à une grande région)
+        # et les empiler en une seule image à 3 bandes, dans l'ordre attendu par le modèle
+        stacked_indices = self.build_indices_image(image, ['NDVI', 'NDWI', 'NDTI'])
+
+        # Extraire les données pour la région du patch
+        # getRegion retourne une liste de listes, la première ligne est l'en-tête.
+        region = stacked_indices.getRegion(geometry=patch_geometry, scale=scale)
+        return self.governor.call('spectral_patch', region.getInfo) # getInfo() exécute le calcul et récupère les données côté client
+
+    def get_spectral_patch_array(self, point_coords: Tuple[float, float], asset_id: str,
+                                 patch_size_pixels: int = 48, scale: int = 10) -> Optional[np.ndarray]:
+        # Grille du patch : patch_size_pixels pixels de `scale` mètres centrés sur le point
+        lon, lat = point_coords
+        pixel_width, pixel_height = pixel_size_degrees(lat, scale)
+        return self.get_spectral_block(
+            asset_id,
+            lon_min=lon - pixel_width * patch_size_pixels / 2,
+            lat_max=lat + pixel_height * patch_size_pixels / 2,
+            width=patch_size_pixels,
+            height=patch_size_pixels,
+            pixel_width=pixel_width,
+            pixel_height=pixel_height
+        )
+
+    def get_spectral_block(self, asset_id: str, lon_min: float, lat_max: float, width: int, height: int,
+                           pixel_width: float, pixel_height: float) -> Optional[np.ndarray]:
+        names = ['NDVI', 'NDWI', 'NDTI']
+        stacked_indices = self.build_indices_image(ee.Image(asset_id), names).toFloat()
+
+        grid = {
+            'dimensions': {'width': width, 'height': height},
+            'affineTransform': {
+                'scaleX': pixel_width,
+                'shearX': 0,
+                'translateX': lon_min,
+                'shearY': 0,
+                'scaleY': -pixel_height,
+                'translateY': lat_max,
+            },
+            'crsCode': 'EPSG:4326',
+        }
+
+        # Bloc de pixels brut au format NPY (un seul appel, pas de ligne JSON par pixel)
+        raw_bytes = self.governor.call('compute_pixels', ee.data.computePixels, {
+            'expression': stacked_indices,
+            'fileFormat': 'NPY',
+            'grid': grid,
+        })
+
+        started = time.perf_counter()
+        block = self.decode_npy_patch(raw_bytes, names)
+        self._record_transfer(len(raw_bytes), time.perf_counter() - started)
+        return block
+
+    def detect_change_zones(self, asset_id: str, bounds: Dict, scale: float) -> Optional[List[Dict]]:
+        names = list(GEEConfig.SPECTRAL_INDICES.keys())
+        z_names = [f'{name.lower()}_z' for name in names]
+        geometry = ee.Geometry.Rectangle([bounds['lon_min'], bounds['lat_min'], bounds['lon_max'], bounds['lat_max']])
+
+        # Composite de référence : scènes récentes antérieures à la scène, hors fenêtre de garde
+        image = ee.Image(asset_id)
+        scene_date = ee.Date(image.get('system:time_start'))
+        reference = (ee.ImageCollection(GEEConfig.SENTINEL2_COLLECTION)
+                     .filterBounds(geometry)
+                     .filterDate(scene_date.advance(-DetectionConfig.CHANGE_BASELINE_DAYS, 'day'),
+                                 scene_date.advance(-DetectionConfig.CHANGE_BASELINE_GAP_DAYS, 'day'))
+                     .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', GEEConfig.MAX_CLOUD_COVERAGE))
+                     .sort('system:time_start', False)
+                     .limit(DetectionConfig.CHANGE_BASELINE_MAX_SCENES))
+
+        build_indices_image = self.build_indices_image
+        composite = reference.map(lambda reference_image: build_indices_image(reference_image, names)).reduce(
+            ee.Reducer.mean().combine(ee.Reducer.stdDev(), sharedInputs=True)
+        )
+        mean = composite.select([f'{name}_mean' for name in names], names)
+        stddev = composite.select([f'{name}_stdDev' for name in names], names).max(DetectionConfig.CHANGE_MIN_STDDEV)
+
+        # |z| par pixel et par indice, puis masque des pixels anormaux sur au moins un indice
+        z_scores = self.build_indices_image(image, names).subtract(mean).divide(stddev).abs().rename(z_names)
+        changed = z_scores.reduce(ee.Reducer.max()).gte(DetectionConfig.CHANGE_Z_THRESHOLD).selfMask()
+        changed = changed.updateMask(
+            changed.connectedPixelCount(DetectionConfig.CHANGE_MIN_PIXELS, True).gte(DetectionConfig.CHANGE_MIN_PIXELS)
+        )
+
+        # Un polygone par groupe de pixels connexes, en une seule réduction : surface réelle
+        # (somme de ee.Image.pixelArea sur les pixels de la composante) et |z| moyen par indice
+        zones = changed.toInt().addBands(ee.Image.pixelArea().rename('area_m2')).addBands(z_scores).reduceToVectors(
+            reducer=ee.Reducer.sum().setOutputs(['area_m2']).combine(ee.Reducer.mean().forEach(z_names)),
+            geometry=geometry,
+            scale=scale,
+            geometryType='polygon',
+            eightConnected=True,
+            labelProperty='zone',
+            maxPixels=GEEConfig.STATS_MAX_PIXELS,
+            tileScale=4
+        )
+        zones = zones.map(lambda zone: zone.set({
+            'centroid': zone.geometry().centroid(1).coordinates(),
+        })).sort('area_m2', False).limit(DetectionConfig.CHANGE_MAX_ZONES)
+
+        enough_reference = reference.size().gte(DetectionConfig.CHANGE_MIN_BASELINE_SCENES)
+        result = self.governor.call('change_zones', ee.Dictionary({
+            'reference_scenes': reference.size(),
+            'zones': ee.Algorithms.If(enough_reference, zones, None),
+        }).getInfo)
+
+        if result.get('zones') is None:
+            print(f"{asset_id}: {result.get('reference_scenes', 0)} scènes de référence, détection de changement ignorée")
+            return None
+
+        change_zones = []
+        for feature in result['zones'].get('features', []):
+            geometry_info = feature.get('geometry') or {}
+            rings = geometry_info.get('coordinates') or []
+            if geometry_info.get('type') == 'MultiPolygon':
+                rings = rings[0] if rings else []
+            if not rings:
+                continue
+
+            properties = feature['properties']
+            change_zones.append({
+                'rings': rings,
+                'centroid': tuple(properties['centroid']),
+                'area_hectares': properties['area_m2'] / 10_000,
+                'pixel_count': int(round(properties['area_m2'] / (scale * scale))),
+                'z_scores': {name[:-2]: properties.get(name) or 0.0 for name in z_names},
+            })
+        return change_zones
+
+    def get_map_url(self, asset_id: str, index_name: str, vis_params: Dict) -> str:
+        image_clipped = ee.Image(asset_id).clip(GEEConfig.get_bondoukou_geometry())
+        index_image = self.build_indices_image(image_clipped, [index_name])
+        return self.governor.call('map_id', index_image.getMapId, vis_params)['tile_fetcher'].url_format
+
+    @staticmethod
+    def _build_collection(start_date: datetime, end_date: datetime,
+                          exclude_asset_ids: Optional[set] = None,
+                          min_time_start: Optional[int] = None):
+        """Collection Sentinel-2 filtrée sur Bondoukou, la période et la couverture nuageuse"""
+        collection = (ee.ImageCollection(GEEConfig.SENTINEL2_COLLECTION)
+                      .filterBounds(GEEConfig.get_bondoukou_geometry())
+                      .filterDate(start_date.strftime('%Y-%m-%d'),
+                                  end_date.strftime('%Y-%m-%d'))
+                      .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE',
+                                           GEEConfig.MAX_CLOUD_COVERAGE)))
+
+        # Curseur d'ingestion : uniquement les scènes postérieures à la dernière vue
+        if min_time_start is not None:
+            collection = collection.filter(ee.Filter.gt('system:time_start', min_time_start))
+
+        # Exclusion des assets déjà connus (filtre sur system:index = dernier segment de l'ID)
+        if exclude_asset_ids:
+            known_indexes = [asset_id.split('/')[-1] for asset_id in exclude_asset_ids]
+            collection = collection.filter(
+                ee.Filter.inList('system:index', known_indexes).Not()
+            )
+
+        return collection
+
+    @staticmethod
+    def decode_npy_patch(raw_bytes: bytes, band_names: List[str]) -> np.ndarray:
+        """
+        Décode un bloc NPY de computePixels en tableau (hauteur, largeur, bandes) float32
+
+        computePixels renvoie un tableau structuré (un champ par bande) ; les champs
+        sont réordonnés selon band_names et les pixels masqués ou NaN mis à 0.
+        """
+        structured = np.load(io.BytesIO(raw_bytes), allow_pickle=False)
+        patch = recfunctions.structured_to_unstructured(structured[band_names], dtype=np.float32)
+        return np.nan_to_num(patch, nan=0.0)
+
+    @staticmethod
+    def build_indices_image(image, index_names: Optional[List[str]] = None):
+        """
+        Construit une image multi-bandes contenant un indice normalisé par bande
+
+        Args:
+            image: ee.Image source (bandes Sentinel-2)
+            index_names: Indices à calculer (défaut: tous ceux de GEEConfig.SPECTRAL_INDICES)
+
+        Returns:
+            ee.Image avec une bande par indice, nommée d'après l'indice
+        """
+        names = index_names or list(GEEConfig.SPECTRAL_INDICES.keys())
+        bands = [
+            image.normalizedDifference(list(GEEConfig.SPECTRAL_INDICES[name])).rename(name)
+            for name in names
+        ]
+        return ee.Image.cat(bands)
+
+    @staticmethod
+    def build_stats_reducer():
+        """Reducer combiné : moyenne, écart-type, min/max, percentiles et nombre de pixels"""
+        return (ee.Reducer.mean()
+                .combine(ee.Reducer.stdDev(), sharedInputs=True)
+                .combine(ee.Reducer.minMax(), sharedInputs=True)
+                .combine(ee.Reducer.percentile(GEEConfig.STATS_PERCENTILES), sharedInputs=True)
+                .combine(ee.Reducer.count(), sharedInputs=True))
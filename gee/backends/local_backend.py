@@ -0,0 +1,624 @@
+import os
+import json
+import math
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import cv2
+import numpy as np
+
+from config.detection_settings import DetectionConfig
+from gee.config import GEEConfig
+from gee.backends.base_backend import BaseImageryBackend, METERS_PER_DEGREE, pixel_size_degrees
+from gee.services.area_measurement import measure_components, row_pixel_area_hectares
+
+
+SENTINEL2_BANDS = ('B3', 'B4', 'B8', 'B11', 'B12')
+
+# Réflectances de référence (x10000, comme Sentinel-2 SR) : végétation, sol nu, site minier, eau
+ENDMEMBERS = {
+    'B3': (700, 1200, 1600, 900),
+    'B4': (400, 1600, 2200, 700),
+    'B8': (3800, 2600, 2400, 300),
+    'B11': (1900, 3000, 3600, 200),
+    'B12': (900, 2200, 3100, 100),
+}
+
+# Couleurs nommées utilisées par les palettes de visualisation (RGB)
+NAMED_COLORS = {
+    'red': (255, 0, 0), 'yellow': (255, 255, 0), 'green': (0, 128, 0),
+    'white': (255, 255, 255), 'blue': (0, 0, 255), 'black': (0, 0, 0),
+}
+
+
+class LocalScene:
+    """Scène raster locale : emprise lon/lat, grille de pixels et lecture de fenêtres de bandes"""
+
+    def __init__(self, asset_id: str, time_start: int, cloud_coverage: float,
+                 bounds: Dict, shape: Tuple[int, int]):
+        self.asset_id = asset_id
+        self.time_start = time_start
+        self.cloud_coverage = cloud_coverage
+        self.bounds = bounds
+        self.rows, self.cols = shape
+        self.pixel_height_deg = (bounds['lat_max'] - bounds['lat_min']) / self.rows
+        self.pixel_width_deg = (bounds['lon_max'] - bounds['lon_min']) / self.cols
+
+    def properties(self) -> Dict:
+        return {
+            'system:index': self.asset_id.split('/')[-1],
+            'system:time_start': self.time_start,
+            'CLOUDY_PIXEL_PERCENTAGE': self.cloud_coverage,
+        }
+
+    def read_window(self, bands, row0: int, row1: int, col0: int, col1: int) -> Dict[str, np.ndarray]:
+        """Lit une fenêtre [row0:row1, col0:col1] ; les pixels hors scène valent NaN"""
+        height, width = row1 - row0, col1 - col0
+        r0, r1 = max(row0, 0), min(row1, self.rows)
+        c0, c1 = max(col0, 0), min(col1, self.cols)
+
+        window = {band: np.full((height, width), np.nan, dtype=np.float32) for band in bands}
+        if r0 >= r1 or c0 >= c1:
+            return window
+
+        data = self._read(bands, r0, r1, c0, c1)
+        for band in bands:
+            window[band][r0 - row0:r1 - row0, c0 - col0:c1 - col0] = data[band]
+        return window
+
+    def sample_points(self, bands, lons: np.ndarray, lats: np.ndarray) -> Dict[str, np.ndarray]:
+        """Valeurs des bandes au plus proche voisin pour des tableaux de coordonnées"""
+        rows = np.floor((self.bounds['lat_max'] - lats) / self.pixel_height_deg).astype(np.int64)
+        cols = np.floor((lons - self.bounds['lon_min']) / self.pixel_width_deg).astype(np.int64)
+
+        row0, row1 = int(rows.min()), int(rows.max()) + 1
+        col0, col1 = int(cols.min()), int(cols.max()) + 1
+        window = self.read_window(bands, row0, row1, col0, col1)
+
+        return {band: window[band][rows - row0, cols - col0] for band in bands}
+
+    def pixel_window_for_bounds(self, bounds: Dict) -> Tuple[int, int, int, int]:
+        """Fenêtre de pixels (row0, row1, col0, col1) couvrant une emprise lon/lat"""
+        row0 = int(math.floor((self.bounds['lat_max'] - bounds['lat_max']) / self.pixel_height_deg))
+        row1 = int(math.ceil((self.bounds['lat_max'] - bounds['lat_min']) / self.pixel_height_deg))
+        col0 = int(math.floor((bounds['lon_min'] - self.bounds['lon_min']) / self.pixel_width_deg))
+        col1 = int(math.ceil((bounds['lon_max'] - self.bounds['lon_min']) / self.pixel_width_deg))
+        return max(row0, 0), min(row1, self.rows), max(col0, 0), min(col1, self.cols)
+
+    def _read(self, bands, r0: int, r1: int, c0: int, c1: int) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+
+class RecordedScene(LocalScene):
+    """
+    Scène enregistrée sur disque : <dossier>/metadata.json + un fichier <bande>.npy par bande
+
+    metadata.json contient 'time_start' (ms), 'cloud_coverage' et 'bounds'
+    (lat_min, lat_max, lon_min, lon_max). Les bandes sont ouvertes en mémoire mappée.
+    """
+
+    def __init__(self, asset_id: str, scene_dir: str):
+        with open(os.path.join(scene_dir, 'metadata.json'), 'r') as f:
+            metadata = json.load(f)
+
+        self.scene_dir = scene_dir
+        self._bands = {}
+        shape = self._band('B4').shape
+        super().__init__(asset_id, metadata['time_start'], metadata.get('cloud_coverage', 0),
+                         metadata['bounds'], shape)
+
+    def _band(self, band: str) -> np.ndarray:
+        if band not in self._bands:
+            self._bands[band] = np.load(os.path.join(self.scene_dir, f'{band}.npy'), mmap_mode='r')
+        return self._bands[band]
+
+    def _read(self, bands, r0, r1, c0, c1):
+        return {band: np.asarray(self._band(band)[r0:r1, c0:c1], dtype=np.float32) for band in bands}
+
+
+class SyntheticScene(LocalScene):
+    """
+    Scène Sentinel-2 synthétique générée de façon procédurale et déterministe
+
+    Le paysage (couvert végétal, cours d'eau, sites miniers) est fixé par
+    GEEConfig.LOCAL_SYNTHETIC_SEED ; chaque scène ajoute sa saisonnalité et son
+    bruit. Les sites miniers apparaissent et s'étendent au fil du temps. Toute
+    fenêtre est calculable sans générer la scène entière.
+    """
+
+    def __init__(self, asset_id: str, time_start: int, cloud_coverage: float, seed: int):
+        bounds = GEEConfig.BONDOUKOU_BOUNDS
+        scale = GEEConfig.STATS_SCALE
+        mid_lat = (bounds['lat_min'] + bounds['lat_max']) / 2
+        rows = int(round((bounds['lat_max'] - bounds['lat_min']) * METERS_PER_DEGREE / scale))
+        cols = int(round((bounds['lon_max'] - bounds['lon_min'])
+                         * METERS_PER_DEGREE * math.cos(math.radians(mid_lat)) / scale))
+        super().__init__(asset_id, time_start, cloud_coverage, bounds, (rows, cols))
+        self.seed = seed
+
+        landscape = np.random.default_rng(GEEConfig.LOCAL_SYNTHETIC_SEED)
+        self._veg_waves = (landscape.uniform(0.002, 0.02, size=(6, 2)), landscape.uniform(0, 2 * np.pi, 6))
+        self._river_waves = landscape.uniform(0.0005, 0.003, size=3)
+
+        # Sites miniers : centre, rayon final, date d'apparition
+        n_sites = GEEConfig.LOCAL_SYNTHETIC_SITES
+        anchor_ms = GEEConfig.LOCAL_SYNTHETIC_ANCHOR.timestamp() * 1000
+        self._sites = np.column_stack([
+            landscape.uniform(0, rows, n_sites),
+            landscape.uniform(0, cols, n_sites),
+            landscape.uniform(5, 25, n_sites),
+            landscape.uniform(anchor_ms, anchor_ms + 730 * 86_400_000, n_sites),
+        ])
+
+    def _read(self, bands, r0, r1, c0, c1):
+        rows = np.arange(r0, r1, dtype=np.float32)
+        cols = np.arange(c0, c1, dtype=np.float32)
+        rr, cc = np.meshgrid(rows, cols, indexing='ij')
+
+        # Couvert végétal : champ lisse + saisonnalité (saison sèche en début d'année)
+        # sin(a*r + b*c + p) = sin(a*r)cos(b*c + p) + cos(a*r)sin(b*c + p) : produits extérieurs 1-D
+        freqs, phases = self._veg_waves
+        field = np.zeros_like(rr)
+        for (fy, fx), ph in zip(freqs, phases):
+            field += np.outer(np.sin(rows * fy), np.cos(cols * fx + ph))
+            field += np.outer(np.cos(rows * fy), np.sin(cols * fx + ph))
+        field /= len(phases)
+        day_of_year = datetime.fromtimestamp(self.time_start / 1000, tz=dt_timezone.utc).timetuple().tm_yday
+        season = 0.85 + 0.15 * math.cos(2 * math.pi * (day_of_year - 250) / 365)
+        vegetation = np.clip((0.65 + 0.3 * field) * season, 0, 1)
+
+        # Cours d'eau : lignes sinueuses
+        f1, f2, f3 = self._river_waves
+        meander = cols * f2 + 0.5 * np.sin(cols * f3)
+        river_wave = np.outer(np.sin(rows * f1), np.cos(meander)) + np.outer(np.cos(rows * f1), np.sin(meander))
+        water = (np.abs(river_wave) < 0.015).astype(np.float32)
+
+        # Sites miniers actifs à la date de la scène, rayon croissant avec l'âge
+        mining = np.zeros_like(rr)
+        for site_row, site_col, max_radius, start_ms in self._sites:
+            if self.time_start < start_ms:
+                continue
+            age_days = (self.time_start - start_ms) / 86_400_000
+            radius = max_radius * min(1.0, 0.2 + age_days / 120)
+            if site_row + radius < r0 or site_row - radius >= r1 or site_col + radius < c0 or site_col - radius >= c1:
+                continue
+            # Calcul restreint à la boîte englobante du site
+            sr0, sr1 = max(int(site_row - radius), r0), min(int(site_row + radius) + 1, r1)
+            sc0, sc1 = max(int(site_col - radius), c0), min(int(site_col + radius) + 1, c1)
+            disk = ((rows[sr0 - r0:sr1 - r0, None] - site_row) ** 2 +
+                    (cols[None, sc0 - c0:sc1 - c0] - site_col) ** 2) <= radius ** 2
+            mining[sr0 - r0:sr1 - r0, sc0 - c0:sc1 - c0][disk] = 1.0
+
+        # Fractions de couverture par pixel
+        water = water * (1 - mining)
+        veg = vegetation * (1 - water) * (1 - mining)
+        soil = 1 - veg - water - mining
+
+        noise = self._hash_noise(rr, cc)
+        data = {}
+        for band in bands:
+            veg_r, soil_r, mine_r, water_r = ENDMEMBERS[band]
+            reflectance = veg * veg_r + soil * soil_r + mining * mine_r + water * water_r
+            data[band] = (reflectance * (1 + 0.03 * noise)).astype(np.float32)
+        return data
+
+    def _hash_noise(self, rr: np.ndarray, cc: np.ndarray) -> np.ndarray:
+        """Bruit pixel déterministe dans [-1, 1] (hash entier des coordonnées)"""
+        h = (rr.astype(np.uint64) * np.uint64(0x9E3779B1)) ^ (cc.astype(np.uint64) * np.uint64(0x85EBCA77))
+        h ^= np.uint64(self.seed)
+        h ^= h >> np.uint64(15)
+        h *= np.uint64(0x2C1B3C6D)
+        h ^= h >> np.uint64(12)
+        return ((h & np.uint64(0xFFFFFF)).astype(np.float32) / 0xFFFFFF) * 2 - 1
+
+
+class LocalRasterBackend(BaseImageryBackend):
+    """
+    Backend hors ligne : bandes Sentinel-2 servies depuis le disque en tableaux NumPy
+
+    Les scènes enregistrées sont lues dans GEEConfig.LOCAL_DATA_DIR (un sous-dossier
+    par scène, voir RecordedScene). Si le dossier est vide et que
+    GEEConfig.LOCAL_SYNTHETIC est actif, une scène synthétique est générée tous les
+    5 jours sur la période demandée. Permet de benchmarker le pipeline complet
+    (tâches Celery du pipeline d'analyse) sans réseau ni quota GEE.
+    """
+
+    name = 'local'
+
+    SYNTHETIC_REVISIT_DAYS = 5
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.initialized = True
+        self.data_dir = data_dir or GEEConfig.LOCAL_DATA_DIR
+        self._recorded = self._discover_recorded_scenes()
+        self._synthetic = {}
+
+    def list_images(self, start_date: datetime, end_date: datetime,
+                    exclude_asset_ids: Optional[set] = None,
+                    min_time_start: Optional[int] = None) -> List[Dict]:
+        exclude_asset_ids = exclude_asset_ids or set()
+        start_ms = _as_utc(start_date).timestamp() * 1000
+        if min_time_start is not None:
+            start_ms = max(start_ms, min_time_start + 1)
+        end_ms = _as_utc(end_date).timestamp() * 1000
+
+        return [
+            {
+                'gee_asset_id': scene.asset_id,
+                'time_start': scene.time_start,
+                'cloud_coverage': scene.cloud_coverage,
+                'properties': scene.properties(),
+            }
+            for scene in self._scenes_between(start_date, end_date)
+            if start_ms <= scene.time_start < end_ms
+            and scene.cloud_coverage < GEEConfig.MAX_CLOUD_COVERAGE
+            and scene.asset_id not in exclude_asset_ids
+        ]
+
+    def get_image_properties(self, asset_id: str) -> Dict:
+        return self._get_scene(asset_id).properties()
+
+    def compute_index_statistics(self, asset_id: str) -> Dict:
+        scene = self._get_scene(asset_id)
+        row0, row1, col0, col1 = scene.pixel_window_for_bounds(GEEConfig.BONDOUKOU_BOUNDS)
+
+        names = list(GEEConfig.SPECTRAL_INDICES.keys())
+        bands = sorted({band for name in names for band in GEEConfig.SPECTRAL_INDICES[name]})
+        accumulators = {name: _StreamingStats() for name in names}
+
+        # Lecture par bandes de lignes pour borner la mémoire sur les grandes scènes
+        chunk_rows = max(1, GEEConfig.LOCAL_CHUNK_PIXELS // max(col1 - col0, 1))
+        for chunk_start in range(row0, row1, chunk_rows):
+            window = scene.read_window(bands, chunk_start, min(chunk_start + chunk_rows, row1), col0, col1)
+            for name in names:
+                band_a, band_b = GEEConfig.SPECTRAL_INDICES[name]
+                accumulators[name].update(normalized_difference(window[band_a], window[band_b]))
+
+        stats = {}
+        for name, accumulator in accumulators.items():
+            stats.update(accumulator.as_reduce_region_output(name))
+        return stats
+
+    def compute_collection_index_statistics(self, start_date: datetime, end_date: datetime,
+                                            exclude_asset_ids: Optional[set] = None,
+                                            min_time_start: Optional[int] = None) -> List[Dict]:
+        rows = []
+        for image_info in self.list_images(start_date, end_date, exclude_asset_ids, min_time_start):
+            stats = self.compute_index_statistics(image_info['gee_asset_id'])
+            stats.update({
+                'gee_asset_id': image_info['gee_asset_id'],
+                'time_start': image_info['time_start'],
+                'cloud_coverage': image_info['cloud_coverage'],
+            })
+            rows.append(stats)
+        return rows
+
+    def get_spectral_patch(self, point_coords: Tuple[float, float], asset_id: str,
+                           patch_size_pixels: int = 48, scale: int = 10) -> Optional[List]:
+        scene = self._get_scene(asset_id)
+        lons, lats = patch_grid(point_coords, patch_size_pixels, scale)
+        names = ['NDVI', 'NDWI', 'NDTI']
+        indices = self._sample_indices(scene, names, lons, lats)
+
+        # Format getRegion : en-tête puis une ligne par pixel (nord -> sud, ouest -> est)
+        header = ['id', 'longitude', 'latitude', 'time'] + names
+        columns = [lons.ravel(), lats.ravel()] + [indices[name].ravel() for name in names]
+        region = [header]
+        for values in zip(*columns):
+            lon, lat = values[0], values[1]
+            region.append([scene.asset_id.split('/')[-1], float(lon), float(lat), scene.time_start] +
+                          [None if np.isnan(v) else float(v) for v in values[2:]])
+        return region
+
+    def get_spectral_patch_array(self, point_coords: Tuple[float, float], asset_id: str,
+                                 patch_size_pixels: int = 48, scale: int = 10) -> Optional[np.ndarray]:
+        # Les rasters sont déjà en mémoire : pas de format intermédiaire
+        scene = self._get_scene(asset_id)
+        lons, lats = patch_grid(point_coords, patch_size_pixels, scale)
+        names = ['NDVI', 'NDWI', 'NDTI']
+        indices = self._sample_indices(scene, names, lons, lats)
+        patch = np.stack([indices[name] for name in names], axis=-1).astype(np.float32)
+        return np.nan_to_num(patch, nan=0.0)
+
+    def get_spectral_block(self, asset_id: str, lon_min: float, lat_max: float, width: int, height: int,
+                           pixel_width: float, pixel_height: float) -> Optional[np.ndarray]:
+        scene = self._get_scene(asset_id)
+        lons, lats = np.meshgrid(lon_min + (np.arange(width) + 0.5) * pixel_width,
+                                 lat_max - (np.arange(height) + 0.5) * pixel_height)
+        names = ['NDVI', 'NDWI', 'NDTI']
+        indices = self._sample_indices(scene, names, lons, lats)
+        block = np.stack([indices[name] for name in names], axis=-1).astype(np.float32)
+        return np.nan_to_num(block, nan=0.0)
+
+    def detect_change_zones(self, asset_id: str, bounds: Dict, scale: float) -> Optional[List[Dict]]:
+        scene = self._get_scene(asset_id)
+        reference = self._reference_scenes(scene)
+        if len(reference) < DetectionConfig.CHANGE_MIN_BASELINE_SCENES:
+            print(f"{asset_id}: {len(reference)} scènes de référence, détection de changement ignorée")
+            return None
+
+        # Grille de calcul à `scale` mètres (centres de pixels) sur l'emprise
+        mid_lat = (bounds['lat_min'] + bounds['lat_max']) / 2
+        pixel_width, pixel_height = pixel_size_degrees(mid_lat, scale)
+        height = int(math.ceil((bounds['lat_max'] - bounds['lat_min']) / pixel_height))
+        width = int(math.ceil((bounds['lon_max'] - bounds['lon_min']) / pixel_width))
+        lons, lats = np.meshgrid(bounds['lon_min'] + (np.arange(width) + 0.5) * pixel_width,
+                                 bounds['lat_max'] - (np.arange(height) + 0.5) * pixel_height)
+        names = list(GEEConfig.SPECTRAL_INDICES.keys())
+
+        # Composite de référence par pixel : moyenne et écart-type cumulés scène par scène
+        total = np.zeros((len(names), height, width), dtype=np.float64)
+        total_sq = np.zeros_like(total)
+        count = np.zeros_like(total)
+        for reference_scene in reference:
+            values = self._index_grid(reference_scene, names, lons, lats)
+            valid = ~np.isnan(values)
+            values = np.where(valid, values, 0.0)
+            total += values
+            total_sq += values * values
+            count += valid
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            stddev = np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0))
+            z_scores = np.abs(self._index_grid(scene, names, lons, lats) - mean) / np.maximum(
+                stddev, DetectionConfig.CHANGE_MIN_STDDEV)
+        z_scores = np.nan_to_num(z_scores, nan=0.0, posinf=0.0).astype(np.float32)
+
+        # Pixels anormaux sur au moins un indice, regroupés en composantes 8-connexes
+        # (surface réelle de chaque composante : pixels pondérés par leur surface à leur latitude)
+        changed = (z_scores.max(axis=0) >= DetectionConfig.CHANGE_Z_THRESHOLD).astype(np.uint8)
+        components = measure_components(changed, row_pixel_area_hectares(lats[:, 0], pixel_width, pixel_height))
+        n_labels, labels = components['count'] + 1, components['labels']
+        stats, centroids = components['stats'], components['centroids']
+        pixel_counts, areas_hectares = components['pixel_counts'], components['areas_hectares']
+
+        # |z| moyen par composante et par indice (une passe bincount par indice)
+        flat_labels = labels.ravel()
+        z_means = np.stack([
+            np.bincount(flat_labels, weights=z_scores[i].ravel(), minlength=n_labels) / np.maximum(pixel_counts, 1)
+            for i in range(len(names))
+        ], axis=-1)
+
+        # Contour extérieur de chaque composante (un seul appel), rattaché à son étiquette
+        contours, _ = cv2.findContours(changed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contour_by_label = {int(labels[c[0, 0, 1], c[0, 0, 0]]): c[:, 0, :] for c in contours}
+
+        kept = np.flatnonzero(pixel_counts >= DetectionConfig.CHANGE_MIN_PIXELS)
+        kept = kept[kept != 0]  # Étiquette 0 : fond
+        kept = kept[np.argsort(pixel_counts[kept])[::-1]][:DetectionConfig.CHANGE_MAX_ZONES]
+
+        def to_lon_lat(points: np.ndarray) -> List[List[float]]:
+            ring = np.column_stack([bounds['lon_min'] + (points[:, 0] + 0.5) * pixel_width,
+                                    bounds['lat_max'] - (points[:, 1] + 0.5) * pixel_height])
+            return np.vstack([ring, ring[:1]]).tolist()
+
+        change_zones = []
+        for label in kept:
+            points = contour_by_label.get(int(label))
+            if points is None or len(points) < 3:
+                # Composante linéaire : polygone de sa boîte englobante
+                left, top, box_width, box_height = stats[label, :4]
+                points = np.array([[left, top], [left + box_width - 1, top],
+                                   [left + box_width - 1, top + box_height - 1], [left, top + box_height - 1]])
+            centroid_x, centroid_y = centroids[label]
+            change_zones.append({
+                'rings': [to_lon_lat(points)],
+                'centroid': (float(bounds['lon_min'] + (centroid_x + 0.5) * pixel_width),
+                             float(bounds['lat_max'] - (centroid_y + 0.5) * pixel_height)),
+                'area_hectares': float(areas_hectares[label]),
+                'pixel_count': int(pixel_counts[label]),
+                'z_scores': {name.lower(): float(z_means[label, i]) for i, name in enumerate(names)},
+            })
+        return change_zones
+
+    def _reference_scenes(self, scene: LocalScene) -> List[LocalScene]:
+        """Scènes de référence de la détection de changement (plus récentes d'abord)"""
+        scene_date = datetime.fromtimestamp(scene.time_start / 1000, tz=dt_timezone.utc)
+        start = scene_date - timedelta(days=DetectionConfig.CHANGE_BASELINE_DAYS)
+        end = scene_date - timedelta(days=DetectionConfig.CHANGE_BASELINE_GAP_DAYS)
+        candidates = [
+            candidate for candidate in self._scenes_between(start, end)
+            if start.timestamp() * 1000 <= candidate.time_start < end.timestamp() * 1000
+            and candidate.cloud_coverage < GEEConfig.MAX_CLOUD_COVERAGE
+            and candidate.asset_id != scene.asset_id
+        ]
+        candidates.sort(key=lambda candidate: candidate.time_start, reverse=True)
+        return candidates[:DetectionConfig.CHANGE_BASELINE_MAX_SCENES]
+
+    def _index_grid(self, scene: LocalScene, names: List[str], lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Indices (len(names), hauteur, largeur) aux centres de la grille, lus par bandes de lignes"""
+        height, width = lons.shape
+        grid = np.empty((len(names), height, width), dtype=np.float32)
+        chunk_rows = max(1, GEEConfig.LOCAL_CHUNK_PIXELS // max(width, 1))
+        for row0 in range(0, height, chunk_rows):
+            row1 = min(row0 + chunk_rows, height)
+            indices = self._sample_indices(scene, names, lons[row0:row1], lats[row0:row1])
+            for i, name in enumerate(names):
+                grid[i, row0:row1] = indices[name]
+        return grid
+
+    def get_map_url(self, asset_id: str, index_name: str, vis_params: Dict) -> str:
+        # Tuiles rendues à la demande par render_tile() derrière l'endpoint local-tiles de l'API ;
+        # la scène et la palette voyagent dans l'URL (pas d'état côté serveur)
+        query = urlencode({
+            'asset': asset_id,
+            'min': vis_params.get('min', -1),
+            'max': vis_params.get('max', 1),
+            'palette': ','.join(vis_params.get('palette', ['black', 'white'])),
+        })
+        return f"{GEEConfig.LOCAL_TILE_BASE_URL}/{index_name}/{{z}}/{{x}}/{{y}}/?{query}"
+
+    def render_tile(self, asset_id: str, index_name: str, vis_params: Dict,
+                    z: int, x: int, y: int, tile_size: int = 256) -> bytes:
+        """Rendu PNG d'une tuile Web Mercator {z}/{x}/{y} d'un indice, palette de vis_params"""
+        scene = self._get_scene(asset_id)
+        world_size = tile_size * (2 ** z)
+        px = (x * tile_size + np.arange(tile_size) + 0.5) / world_size
+        py = (y * tile_size + np.arange(tile_size) + 0.5) / world_size
+        lons = np.broadcast_to(px * 360.0 - 180.0, (tile_size, tile_size))
+        lats = np.broadcast_to(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py))))[:, None],
+                               (tile_size, tile_size))
+
+        inside = ((lons >= scene.bounds['lon_min']) & (lons < scene.bounds['lon_max']) &
+                  (lats > scene.bounds['lat_min']) & (lats <= scene.bounds['lat_max']))
+        values = np.full((tile_size, tile_size), np.nan, dtype=np.float32)
+        if inside.any():
+            values[inside] = self._sample_indices(scene, [index_name], lons[inside], lats[inside])[index_name]
+
+        rgba = colorize(values, vis_params)
+        ok, png = cv2.imencode('.png', rgba[..., [2, 1, 0, 3]])  # OpenCV attend du BGRA
+        return png.tobytes() if ok else b''
+
+    @staticmethod
+    def _sample_indices(scene: LocalScene, names: List[str], lons: np.ndarray, lats: np.ndarray) -> Dict:
+        bands = sorted({band for name in names for band in GEEConfig.SPECTRAL_INDICES[name]})
+        samples = scene.sample_points(bands, lons, lats)
+        return {
+            name: normalized_difference(samples[GEEConfig.SPECTRAL_INDICES[name][0]],
+                                        samples[GEEConfig.SPECTRAL_INDICES[name][1]])
+            for name in names
+        }
+
+    def _discover_recorded_scenes(self) -> Dict[str, RecordedScene]:
+        scenes = {}
+        if not os.path.isdir(self.data_dir):
+            return scenes
+
+        for scene_id in sorted(os.listdir(self.data_dir)):
+            scene_dir = os.path.join(self.data_dir, scene_id)
+            if os.path.isfile(os.path.join(scene_dir, 'metadata.json')):
+                asset_id = f"{GEEConfig.SENTINEL2_COLLECTION}/{scene_id}"
+                scenes[asset_id] = RecordedScene(asset_id, scene_dir)
+        return scenes
+
+    def _scenes_between(self, start_date: datetime, end_date: datetime) -> List[LocalScene]:
+        if self._recorded or not GEEConfig.LOCAL_SYNTHETIC:
+            return list(self._recorded.values())
+
+        # Dates de passage alignées sur une grille fixe pour que les IDs soient stables
+        anchor = GEEConfig.LOCAL_SYNTHETIC_ANCHOR
+        first = max(0, math.ceil((_as_utc(start_date) - anchor).days / self.SYNTHETIC_REVISIT_DAYS))
+        last = (_as_utc(end_date) - anchor).days // self.SYNTHETIC_REVISIT_DAYS
+
+        return [
+            self._get_scene(self._synthetic_asset_id(anchor + timedelta(days=step * self.SYNTHETIC_REVISIT_DAYS)))
+            for step in range(first, last + 1)
+        ]
+
+    @staticmethod
+    def _synthetic_asset_id(acquisition: datetime) -> str:
+        return f"{GEEConfig.SENTINEL2_COLLECTION}/SYNTH_{acquisition.strftime('%Y%m%dT%H%M%S')}_BDK"
+
+    def _get_scene(self, asset_id: str) -> LocalScene:
+        if asset_id in self._recorded:
+            return self._recorded[asset_id]
+
+        if asset_id not in self._synthetic:
+            scene_id = asset_id.split('/')[-1]
+            if not scene_id.startswith('SYNTH_'):
+                raise ValueError(f"Scène locale inconnue: {asset_id}")
+
+            acquisition = datetime.strptime(scene_id.split('_')[1], '%Y%m%dT%H%M%S').replace(tzinfo=dt_timezone.utc)
+            seed = int(hashlib.md5(scene_id.encode()).hexdigest()[:8], 16)
+            self._synthetic[asset_id] = SyntheticScene(
+                asset_id,
+                time_start=int(acquisition.timestamp() * 1000),
+                cloud_coverage=(seed % 100) * 0.4,
+                seed=seed
+            )
+        return self._synthetic[asset_id]
+
+
+class _StreamingStats:
+    """Statistiques cumulées par blocs (moyenne, écart-type, min/max, percentiles sur histogramme)"""
+
+    HISTOGRAM_BINS = 2000  # Précision des percentiles : 0.001 sur [-1, 1]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.histogram = np.zeros(self.HISTOGRAM_BINS, dtype=np.int64)
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)].astype(np.float64)
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.total += values.sum()
+        self.total_sq += np.square(values).sum()
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        self.histogram += np.histogram(values, bins=self.HISTOGRAM_BINS, range=(-1.0, 1.0))[0]
+
+    def as_reduce_region_output(self, name: str) -> Dict:
+        if self.count == 0:
+            output = {f'{name}_{key}': None for key in ('mean', 'stdDev', 'min', 'max')}
+            output.update({f'{name}_p{p}': None for p in GEEConfig.STATS_PERCENTILES})
+            output[f'{name}_count'] = 0
+            return output
+
+        mean = self.total / self.count
+        variance = max(self.total_sq / self.count - mean ** 2, 0.0)
+        cumulative = np.cumsum(self.histogram)
+        bin_width = 2.0 / self.HISTOGRAM_BINS
+
+        output = {
+            f'{name}_mean': float(mean),
+            f'{name}_stdDev': float(math.sqrt(variance)),
+            f'{name}_min': float(self.minimum),
+            f'{name}_max': float(self.maximum),
+            f'{name}_count': int(self.count),
+        }
+        for p in GEEConfig.STATS_PERCENTILES:
+            bin_index = int(np.searchsorted(cumulative, self.count * p / 100.0))
+            output[f'{name}_p{p}'] = float(-1.0 + (bin_index + 0.5) * bin_width)
+        return output
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Les dates naïves sont interprétées en UTC (comme filterDate côté GEE)"""
+    return value.replace(tzinfo=dt_timezone.utc) if value.tzinfo is None else value
+
+
+def normalized_difference(band_a: np.ndarray, band_b: np.ndarray) -> np.ndarray:
+    """(A - B) / (A + B) ; NaN là où le dénominateur est nul ou la donnée absente"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = band_a + band_b
+        result = (band_a - band_b) / total
+    result[total == 0] = np.nan
+    return result.astype(np.float32)
+
+
+def patch_grid(point_coords: Tuple[float, float], patch_size_pixels: int, scale: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Centres lon/lat (patch_size x patch_size) d'un patch carré de `scale` mètres par pixel"""
+    lon, lat = point_coords
+    pixel_width, pixel_height = pixel_size_degrees(lat, scale)
+    offsets = np.arange(patch_size_pixels) - (patch_size_pixels - 1) / 2
+    lons, lats = np.meshgrid(lon + offsets * pixel_width, lat - offsets * pixel_height)
+    return lons, lats
+
+
+def colorize(values: np.ndarray, vis_params: Dict) -> np.ndarray:
+    """Applique une palette min/max à un tableau d'indices -> RGBA uint8 (NaN transparent)"""
+    palette = np.array([
+        NAMED_COLORS[color] if color in NAMED_COLORS
+        else tuple(int(color.lstrip('#')[i:i + 2], 16) for i in (0, 2, 4))
+        for color in vis_params.get('palette', ['black', 'white'])
+    ], dtype=np.float32)
+
+    vmin, vmax = vis_params.get('min', -1), vis_params.get('max', 1)
+    position = np.clip((np.nan_to_num(values, nan=vmin) - vmin) / (vmax - vmin), 0, 1) * (len(palette) - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, len(palette) - 1)
+    weight = (position - lower)[..., None]
+
+    rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = (palette[lower] * (1 - weight) + palette[upper] * weight).astype(np.uint8)
+    rgba[..., 3] = np.where(np.isnan(values), 0, 255)
+    return rgba
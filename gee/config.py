@@ -1,5 +1,6 @@
 import os
 import json
+from datetime import datetime, timezone
 import ee
 from django.conf import settings
 
@@ -18,6 +19,9 @@ class GEEConfig:
         'lon_max': -2.6
     }
 
+    # Centre de la zone (longitude, latitude)
+    BONDOUKOU_CENTER = (-2.8, 8.05)
+
     # Collections satellites
     SENTINEL2_COLLECTION = 'COPERNICUS/S2_SR_HARMONIZED'
     LANDSAT8_COLLECTION = 'LANDSAT/LC08/C02/T1_L2'
@@ -25,6 +29,82 @@ class GEEConfig:
     # Paramètres filtrage
     MAX_CLOUD_COVERAGE = 20  # 20% max
 
+    # Indices spectraux calculés : nom -> bandes (A, B) pour (A - B) / (A + B)
+    # Ajouter une entrée ici suffit pour que l'indice soit calculé dans la même requête GEE
+    SPECTRAL_INDICES = {
+        'NDVI': ('B8', 'B4'),    # (NIR - Red) / (NIR + Red)
+        'NDWI': ('B3', 'B8'),    # (Green - NIR) / (Green + NIR)
+        'NDTI': ('B11', 'B12'),  # (SWIR1 - SWIR2) / (SWIR1 + SWIR2)
+    }
+
+    # Statistiques calculées par indice
+    STATS_PERCENTILES = [10, 25, 50, 75, 90]
+    STATS_SCALE = 10  # Résolution Sentinel-2 (mètres)
+    STATS_MAX_PIXELS = 1e9
+
+    # Ingestion par lots : nombre de scènes ramenées par requête FeatureCollection
+    BATCH_PAGE_SIZE = 100
+
+    # Analyse complète : nombre d'images les plus récentes traitées par exécution
+    ANALYSIS_MAX_IMAGES = 5
+
+    # Source d'imagerie : 'earthengine' (GEE en direct) ou 'local' (rasters NumPy hors ligne)
+    BACKEND = os.getenv('GEE_BACKEND', 'earthengine')
+
+    # Backend local : scènes enregistrées (<dossier>/<scene_id>/metadata.json + <bande>.npy)
+    LOCAL_DATA_DIR = os.getenv('GEE_LOCAL_DATA_DIR', os.path.join(settings.BASE_DIR, 'data', 'local_gee'))
+    # Scènes synthétiques générées si aucun enregistrement n'est présent
+    LOCAL_SYNTHETIC = os.getenv('GEE_LOCAL_SYNTHETIC', 'true').lower() == 'true'
+    LOCAL_SYNTHETIC_SEED = 42
+    LOCAL_SYNTHETIC_SITES = 40
+    LOCAL_SYNTHETIC_ANCHOR = datetime(2024, 1, 1, 10, 30, tzinfo=timezone.utc)
+    LOCAL_CHUNK_PIXELS = 1_000_000  # Pixels lus par bloc pour les statistiques
+    # Tuiles des cartes servies par l'API (SpectralViewSet.get_local_tile), URL vue par le navigateur
+    LOCAL_TILE_BASE_URL = os.getenv('GEE_LOCAL_TILE_BASE_URL', 'http://localhost:8000/api/v1/spectral/local-tiles')
+
+    # Cache disque des patchs spectraux (partagé par les workers d'un même hôte)
+    PATCH_CACHE_ENABLED = os.getenv('PATCH_CACHE_ENABLED', 'true').lower() == 'true'
+    PATCH_CACHE_DIR = os.getenv('PATCH_CACHE_DIR', os.path.join(settings.BASE_DIR, 'data', 'patch_cache'))
+    PATCH_CACHE_MAX_PATCHES = int(os.getenv('PATCH_CACHE_MAX_PATCHES', 20000))  # ~27 Ko par patch 48x48x3
+    PATCH_CACHE_RETRY_SECONDS = int(os.getenv('PATCH_CACHE_RETRY_SECONDS', 60))  # Délai avant de retenter l'ouverture
+
+    # Transfert des patchs : 'npy' (bloc binaire computePixels) ou 'getregion' (JSON pixel par pixel)
+    PATCH_TRANSFER_MODE = os.getenv('PATCH_TRANSFER_MODE', 'npy').lower()
+
+    # Session GEE partagée par processus (voir gee.services.ee_session)
+    EE_HEALTH_CHECK_INTERVAL = int(os.getenv('EE_HEALTH_CHECK_INTERVAL', 300))  # secondes
+    EE_INIT_RETRY_SECONDS = int(os.getenv('EE_INIT_RETRY_SECONDS', 30))  # délai avant nouvelle tentative après échec
+
+    # Gouverneur de quota EE partagé par les workers (voir gee.services.quota_governor)
+    EE_QUOTA_ENABLED = os.getenv('EE_QUOTA_ENABLED', 'true').lower() == 'true'
+    EE_REQUESTS_PER_SECOND = float(os.getenv('EE_REQUESTS_PER_SECOND', 10))  # débit soutenu, tous workers confondus
+    EE_BURST = int(os.getenv('EE_BURST', 20))  # rafale maximale (capacité du seau à jetons)
+    EE_MAX_CONCURRENT = int(os.getenv('EE_MAX_CONCURRENT', 16))  # requêtes EE simultanées
+    EE_CONCURRENCY_LEASE_SECONDS = 300  # Un créneau non libéré (worker tué) expire après ce délai
+    EE_ACQUIRE_TIMEOUT_SECONDS = int(os.getenv('EE_ACQUIRE_TIMEOUT_SECONDS', 120))
+    EE_BACKOFF_BASE_SECONDS = 2.0  # Pause après la première erreur de quota, doublée à chaque niveau
+    EE_BACKOFF_MAX_SECONDS = 120.0
+    EE_BACKOFF_MAX_LEVEL = 6
+
+    # Relances des tâches Celery GEE selon la classe d'erreur (voir gee.services.task_retry_policy)
+    TASK_RETRY_BASE_SECONDS = 30  # Premier délai pour une erreur transitoire, doublé à chaque relance
+    TASK_RETRY_MAX_SECONDS = 30 * 60
+    TASK_MAX_TRANSIENT_RETRIES = 5
+    TASK_QUOTA_MIN_DELAY_SECONDS = 60  # Report minimal (et gigue maximale) après une erreur de quota
+    TASK_MAX_QUOTA_RETRIES = 10
+
+    # Déduplication du traitement par asset (voir gee.services.asset_lock)
+    IMAGE_SUBMIT_LOCK_TIMEOUT = 60  # Verrou de soumission (vérification + création + mise en file)
+    IMAGE_SUBMIT_WAIT_SECONDS = 10  # Attente de l'enregistrement créé par une soumission concurrente
+    IMAGE_TASK_LEASE_SECONDS = 15 * 60  # Bail du verrou d'exécution ; au-delà, une réservation PROCESSING est reprise
+    IMAGE_DUPLICATE_POLL_SECONDS = 30  # Pipeline d'analyse : attente d'un calcul d'indices mené par une autre tâche
+
+    # Cache des URLs de tuiles (map IDs) : durée de vie des jetons de carte GEE, moins une marge
+    MAP_ID_TOKEN_LIFETIME = int(os.getenv('MAP_ID_TOKEN_LIFETIME', 4 * 3600))  # secondes
+    MAP_ID_EXPIRY_MARGIN = int(os.getenv('MAP_ID_EXPIRY_MARGIN', 600))
+    MAP_ID_LOCK_TIMEOUT = 60  # Durée max du verrou anti-stampede (secondes)
+    MAP_ID_LOCK_WAIT = 20  # Attente max de la publication par le détenteur du verrou
+
     @classmethod
     def initialize_ee(cls):
         """Initialise Earth Engine avec service account"""
@@ -6,14 +6,19 @@ from gee.services.earth_engine_service import EarthEngineService
 class Command(BaseCommand):
     help = 'Scans for recent GEE images for the configured region and queues them for processing if not already processed.'
 
-    # def add_arguments(self, parser):
-    #     parser.add_argument(
-    #         '--months_back',
-    #         type=int,
-    #         default=3, # Default to 3 months as in EarthEngineService
-    #         help='Number of months back to scan for recent GEE images.'
-    #     )
-    #     # Add other arguments as needed, e.g., cloud_cover_max
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months_back',
+            type=int,
+            default=3, # Default to 3 months as in EarthEngineService
+            help='Number of months back to scan for recent GEE images.'
+        )
+        parser.add_argument(
+            '--batch',
+            action='store_true',
+            help='Compute indices for the whole collection on the GEE side in a few requests '
+                 'and bulk-insert the ImageModel rows instead of queueing one task per image.'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.HTTP_INFO("Starting scan for recent GEE images..."))
@@ -24,22 +29,32 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Failed to initialize EarthEngineService: {e}"))
             return
 
-        # months_back_arg = options.get('months_back')
-        # For now, using the default in get_recent_images.
-        # If arguments were added, they would be passed here:
-        # recent_assets = gee_service.get_recent_images(months_back=months_back_arg)
+        months_back_arg = options.get('months_back')
+
+        if options.get('batch'):
+            self._handle_batch(gee_service, months_back_arg)
+            return
 
         try:
-            recent_assets = gee_service.get_recent_images() # Uses default months_back from the service
+            # Only scenes newer than the ingestion cursor (months_back window on the first scan)
+            cursor, recent_assets = gee_service.get_new_images(months_back=months_back_arg)
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Failed to get recent images from GEE: {e}"))
             return
 
         if not recent_assets:
-            self.stdout.write(self.style.NOTICE("No recent GEE image assets found."))
+            gee_service.advance_ingestion_cursor(cursor, [])
+            self.stdout.write(self.style.NOTICE(
+                f"No new GEE image assets since cursor {cursor.last_time_start or 'start'}."))
             return
 
-        self.stdout.write(self.style.SUCCESS(f"Found {len(recent_assets)} recent GEE assets. Checking against database..."))
+        self.stdout.write(self.style.SUCCESS(f"Found {len(recent_assets)} new GEE assets. Checking against database..."))
+
+        # Known assets resolved with a single query
+        known_statuses = gee_service.get_known_image_statuses(
+            asset_info['gee_asset_id'] for asset_info in recent_assets if asset_info.get('gee_asset_id')
+        )
+        failed_asset_ids = set()
 
         queued_count = 0
         skipped_completed_count = 0
@@ -53,18 +68,18 @@ class Command(BaseCommand):
                 continue
 
             try:
-                existing_image = ImageModel.objects.filter(gee_asset_id=gee_asset_id).first()
+                existing_status = known_statuses.get(gee_asset_id)
 
-                if existing_image:
-                    if existing_image.processing_status == ImageModel.ProcessingStatus.COMPLETED:
+                if existing_status:
+                    if existing_status == ImageModel.ProcessingStatus.COMPLETED:
                         self.stdout.write(self.style.NOTICE(f"Image {gee_asset_id} already COMPLETED. Skipping."))
                         skipped_completed_count += 1
                         continue
-                    elif existing_image.processing_status in [ImageModel.ProcessingStatus.PROCESSING, ImageModel.ProcessingStatus.PENDING]:
-                        self.stdout.write(self.style.NOTICE(f"Image {gee_asset_id} already {existing_image.processing_status}. Skipping."))
+                    elif existing_status in [ImageModel.ProcessingStatus.PROCESSING, ImageModel.ProcessingStatus.PENDING]:
+                        self.stdout.write(self.style.NOTICE(f"Image {gee_asset_id} already {existing_status}. Skipping."))
                         skipped_processing_count += 1
                         continue
-                    elif existing_image.processing_status == ImageModel.ProcessingStatus.ERROR:
+                    elif existing_status == ImageModel.ProcessingStatus.ERROR:
                         self.stdout.write(self.style.WARNING(f"Image {gee_asset_id} previously ERRORED. Attempting to re-queue for processing..."))
                         # The process_image_complete method now handles re-queueing or creating new if needed
                         # It also checks if an image is already PENDING/PROCESSING for this asset_id
@@ -76,6 +91,7 @@ class Command(BaseCommand):
                              self.stdout.write(self.style.NOTICE(f"Re-queue attempt for errored image {gee_asset_id} resulted in status {image_record.processing_status}."))
                         else:
                             self.stderr.write(self.style.ERROR(f"Failed to re-queue errored image {gee_asset_id}."))
+                            failed_asset_ids.add(gee_asset_id)
                         continue
 
                 # If not existing_image or if we decided to create a new one for an errored one (handled by process_image_complete's logic)
@@ -90,14 +106,40 @@ class Command(BaseCommand):
                      # This case might be covered by the checks above, but process_image_complete has its own logic
                 else:
                     self.stderr.write(self.style.ERROR(f"Failed to queue image {gee_asset_id} for processing."))
+                    failed_asset_ids.add(gee_asset_id)
 
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"An error occurred while processing asset {gee_asset_id}: {e}"))
+                failed_asset_ids.add(gee_asset_id)
+
+        # The cursor stops before the first failed asset so it is listed again next time
+        cursor = gee_service.advance_ingestion_cursor(
+            cursor, [asset for asset in recent_assets if asset.get('gee_asset_id')], failed_asset_ids)
 
         self.stdout.write(self.style.SUCCESS(
             f"Scan complete. "
             f"{queued_count} new images queued. "
             f"{requeued_error_count} errored images re-queued. "
             f"{skipped_completed_count} already completed. "
-            f"{skipped_processing_count} already processing/pending."
+            f"{skipped_processing_count} already processing/pending. "
+            f"Cursor at {cursor.last_time_start}."
+        ))
+
+    def _handle_batch(self, gee_service, months_back):
+        """Batch mode: one mapped reducer over the collection, then bulk insert."""
+        self.stdout.write(self.style.HTTP_INFO(f"Batch ingestion over the last {months_back} months..."))
+
+        try:
+            summary = gee_service.ingest_collection_batch(months_back=months_back, user_id=None)
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Batch ingestion failed: {e}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Batch scan complete. "
+            f"{summary['created']} new images stored. "
+            f"{summary['updated']} errored images recomputed. "
+            f"{summary['skipped_existing']} already known. "
+            f"{summary['incomplete']} scenes without usable pixels. "
+            f"{summary['detections_queued']} detections queued."
         ))
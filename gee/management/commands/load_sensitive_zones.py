@@ -0,0 +1,29 @@
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException
+from django.core.management.base import BaseCommand, CommandError
+
+from gee.services.sensitive_zone_service import SensitiveZoneService
+from region.models.sensitive_zone_model import SensitiveZoneModel
+
+
+class Command(BaseCommand):
+    help = 'Loads a sensitive-zone layer (rivers, protected forests, villages) from a local GeoJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoJSON FeatureCollection in WGS84 (EPSG:4326).')
+        parser.add_argument('--kind', required=True, choices=SensitiveZoneModel.KindChoices.values,
+                            help='Kind of sensitive zone of every feature in the file.')
+        parser.add_argument('--name-property', default='name', help='Feature property used as the zone name.')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete the zones of this kind previously loaded from the same file.')
+
+    def handle(self, *args, **options):
+        try:
+            loaded = SensitiveZoneService.load_geojson(
+                options['path'], options['kind'], name_property=options['name_property'], replace=options['replace']
+            )
+        except (OSError, ValueError, GDALException, GEOSException) as e:
+            raise CommandError(f"Could not load {options['path']}: {e}")
+
+        total = SensitiveZoneModel.objects.filter(kind=options['kind'], status=True).count()
+        self.stdout.write(self.style.SUCCESS(f"{loaded} {options['kind']} zones loaded ({total} in total)."))
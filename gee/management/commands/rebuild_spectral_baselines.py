@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from gee.models.spectral_baseline_model import SpectralBaselineModel
+from gee.services.spectral_baseline_service import SpectralBaselineService
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the seasonal spectral baselines (per region and calendar month) from the images with computed indices.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region-id', type=int, help='Only rebuild the baselines of this region.')
+
+    def handle(self, *args, **options):
+        region_id = options.get('region_id')
+        added = SpectralBaselineService.rebuild(region_id)
+        self.stdout.write(self.style.SUCCESS(f"{added} images folded into the spectral baselines."))
+
+        baselines = SpectralBaselineModel.objects.select_related('region').order_by('region__name', 'month', 'index_name')
+        if region_id is not None:
+            baselines = baselines.filter(region_id=region_id)
+        for baseline in baselines:
+            median = f"{baseline.median:.4f}" if baseline.median is not None else '-'
+            self.stdout.write(
+                f"  {baseline.region.name:<20} month {baseline.month:>2} {baseline.index_name:<5} "
+                f"n={baseline.sample_count:<4} mean={baseline.mean:.4f} std={baseline.stddev:.4f} median={median}"
+            )
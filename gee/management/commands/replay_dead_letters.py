@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from gee.models.dead_letter_task_model import DeadLetterTaskModel
+from gee.services.task_retry_policy import DeadLetterService
+
+
+class Command(BaseCommand):
+    help = 'Lists, replays or discards GEE tasks abandoned by the retry policy (dead letters).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', help='Only dead letters of this task name (e.g. gee.tasks.process_gee_image_task).')
+        parser.add_argument('--error-class', choices=DeadLetterTaskModel.ErrorClassChoices.values,
+                            help='Only dead letters of this error class.')
+        parser.add_argument('--since-hours', type=int, help='Only dead letters recorded in the last N hours.')
+        parser.add_argument('--limit', type=int, default=500, help='Maximum number of dead letters to act on.')
+        parser.add_argument('--replay', action='store_true', help='Re-queue the matching pending dead letters.')
+        parser.add_argument('--discard', action='store_true', help='Mark the matching pending dead letters as discarded.')
+
+    def handle(self, *args, **options):
+        queryset = DeadLetterTaskModel.objects.filter(status=DeadLetterTaskModel.StatusChoices.PENDING)
+        if options.get('task'):
+            queryset = queryset.filter(task_name=options['task'])
+        if options.get('error_class'):
+            queryset = queryset.filter(error_class=options['error_class'])
+        if options.get('since_hours'):
+            queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(hours=options['since_hours']))
+
+        selected_ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        selected = DeadLetterTaskModel.objects.filter(id__in=selected_ids)
+
+        if not selected_ids:
+            self.stdout.write(self.style.NOTICE("No pending dead letters match these filters."))
+            return
+
+        if options.get('replay'):
+            replayed = DeadLetterService.replay(selected)
+            self.stdout.write(self.style.SUCCESS(f"{replayed} dead letters re-queued."))
+            return
+
+        if options.get('discard'):
+            discarded = DeadLetterService.discard(selected)
+            self.stdout.write(self.style.SUCCESS(f"{discarded} dead letters discarded."))
+            return
+
+        # Inspection (default): summary by task and error class, then the most recent entries
+        self.stdout.write(self.style.HTTP_INFO(f"{len(selected_ids)} pending dead letters:"))
+        summary = selected.values('task_name', 'error_class').annotate(total=Count('id')).order_by('-total')
+        for row in summary:
+            self.stdout.write(f"  {row['total']:>5}  {row['error_class']:<10} {row['task_name']}")
+
+        self.stdout.write("")
+        for dead_letter in selected.order_by('-created_at')[:20]:
+            self.stdout.write(
+                f"  #{dead_letter.id} {dead_letter.created_at:%Y-%m-%d %H:%M} {dead_letter.task_name}{dead_letter.args} "
+                f"[{dead_letter.error_class}] {dead_letter.exception_type}: {dead_letter.error_message[:120]}"
+            )
+        self.stdout.write(self.style.NOTICE("Use --replay to re-queue them or --discard to drop them."))
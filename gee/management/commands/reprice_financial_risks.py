@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from gee.services.financial_risk_repricing_service import FinancialRiskRepricingService
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the estimated loss and risk level of every financial risk with the current '
+            'FinancialSettings (BASE_COSTS, SPECTRAL_FACTORS, RISK_THRESHOLDS, distance factors).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the differences, write nothing.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Financial risks read per query.')
+        parser.add_argument('--region-id', type=int, help='Only reprice the risks of this region.')
+        parser.add_argument('--show', type=int, default=10, help='Number of largest loss changes listed.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        report = FinancialRiskRepricingService.reprice(
+            chunk_size=options['chunk_size'], dry_run=dry_run, region_id=options.get('region_id'),
+            sample_size=options['show']
+        )
+
+        verb = 'would change' if dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['scanned']} financial risks scanned, {report['changed']} {verb}."
+        ))
+        self.stdout.write(
+            f"  Total estimated loss: {report['loss_before']:,.0f} -> {report['loss_after']:,.0f} FCFA "
+            f"({report['loss_after'] - report['loss_before']:+,.0f})"
+        )
+        for (level_before, level_after), count in sorted(report['level_changes'].items()):
+            self.stdout.write(f"  {level_before:<8} -> {level_after:<8} {count}")
+        if report['largest_changes']:
+            self.stdout.write("  Largest loss changes:")
+            for change in report['largest_changes']:
+                self.stdout.write(
+                    f"    risk {change['id']:<8} {change['loss_before']:>16,.0f} -> {change['loss_after']:>16,.0f} FCFA "
+                    f"({change['level_before']} -> {change['level_after']})"
+                )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2025-06-12 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('region', '0003_remove_regionmodel_geographic_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionCursorModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('collection', models.CharField(help_text='Collection GEE (ex: COPERNICUS/S2_SR_HARMONIZED)', max_length=100)),
+                ('last_time_start', models.BigIntegerField(blank=True, help_text='system:time_start (ms) de la scène la plus récente traitée', null=True)),
+                ('last_asset_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('last_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('scenes_ingested', models.PositiveIntegerField(default=0)),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_cursors', to='region.regionmodel')),
+            ],
+            options={
+                'db_table': 'gee_ingestion_cursors',
+                'constraints': [models.UniqueConstraint(fields=('region', 'collection'), name='unique_ingestion_cursor_per_collection')],
+            },
+        ),
+    ]
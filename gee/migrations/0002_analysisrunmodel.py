@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2025-06-13 10:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gee', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisRunModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'En cours'), ('COMPLETED', 'Terminée'), ('ERROR', 'Erreur')], default='PENDING', max_length=20)),
+                ('current_stage', models.CharField(choices=[('FETCH', 'Récupération des images'), ('INDICES', 'Calcul des indices'), ('DETECTION', 'Détection'), ('ALERTING', 'Alertes et investigations'), ('DONE', 'Terminé')], default='FETCH', max_length=20)),
+                ('months_back', models.PositiveSmallIntegerField(default=3)),
+                ('celery_task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('images_total', models.PositiveIntegerField(default=0)),
+                ('images_indexed', models.PositiveIntegerField(default=0)),
+                ('images_failed', models.PositiveIntegerField(default=0)),
+                ('images_analyzed', models.PositiveIntegerField(default=0)),
+                ('detections_found', models.PositiveIntegerField(default=0)),
+                ('tiles_scanned', models.PositiveIntegerField(default=0)),
+                ('indices_seconds', models.FloatField(default=0.0, help_text='Temps cumulé de calcul des indices (toutes images)')),
+                ('detection_seconds', models.FloatField(default=0.0, help_text='Temps cumulé de détection (toutes images)')),
+                ('image_ids', models.JSONField(blank=True, default=list)),
+                ('stage_timings', models.JSONField(blank=True, default=dict, help_text='Début, fin et durée (s) de chaque étape')),
+                ('results', models.JSONField(blank=True, default=dict)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='analysis_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'gee_analysis_runs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='gee_analysi_status_5c4d4f_idx')],
+            },
+        ),
+    ]
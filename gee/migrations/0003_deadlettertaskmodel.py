@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2025-06-15 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gee', '0002_analysisrunmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetterTaskModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('task_name', models.CharField(max_length=255)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('error_class', models.CharField(choices=[('TRANSIENT', 'Transitoire (réseau, EE indisponible)'), ('QUOTA', 'Quota Earth Engine'), ('PERMANENT', 'Permanente')], max_length=20)),
+                ('exception_type', models.CharField(max_length=255)),
+                ('error_message', models.TextField(blank=True)),
+                ('traceback', models.TextField(blank=True)),
+                ('retries', models.PositiveIntegerField(default=0, help_text="Relances effectuées avant l'abandon")),
+                ('status', models.CharField(choices=[('PENDING', 'À traiter'), ('REPLAYED', 'Relancée'), ('DISCARDED', 'Abandonnée')], default='PENDING', max_length=20)),
+                ('replay_count', models.PositiveIntegerField(default=0)),
+                ('replayed_at', models.DateTimeField(blank=True, null=True)),
+                ('replay_task_id', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'gee_dead_letter_tasks',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'task_name'], name='gee_dead_le_status_97d722_idx'), models.Index(fields=['error_class', 'created_at'], name='gee_dead_le_error_c_8e444d_idx')],
+            },
+        ),
+    ]
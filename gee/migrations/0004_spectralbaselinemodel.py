@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2025-06-17 10:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gee', '0003_deadlettertaskmodel'),
+        ('image', '0005_imagemodel_baseline_applied_at'),
+        ('region', '0003_remove_regionmodel_geographic_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpectralBaselineModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('month', models.PositiveSmallIntegerField(help_text='Mois calendaire 1-12 (0 = tous les mois)')),
+                ('index_name', models.CharField(help_text='Indice spectral (ndvi, ndwi, ndti)', max_length=20)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0.0)),
+                ('m2', models.FloatField(default=0.0)),
+                ('median', models.FloatField(blank=True, null=True)),
+                ('mad', models.FloatField(blank=True, help_text='Écart absolu médian des moyennes de scène', null=True)),
+                ('reservoir', models.JSONField(blank=True, default=list, help_text='Échantillon uniforme borné des moyennes de scène')),
+                ('pixel_stddev_mean', models.FloatField(blank=True, null=True)),
+                ('last_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='image.imagemodel')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spectral_baselines', to='region.regionmodel')),
+            ],
+            options={
+                'db_table': 'gee_spectral_baselines',
+                'constraints': [models.UniqueConstraint(fields=('region', 'month', 'index_name'), name='unique_spectral_baseline')],
+            },
+        ),
+    ]
@@ -0,0 +1,4 @@
+from . import ingestion_cursor_model
+from . import analysis_run_model
+from . import dead_letter_task_model
+from . import spectral_baseline_model
@@ -0,0 +1,63 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from base.models.helpers.date_time_model import DateTimeModel
+
+
+class AnalysisRunModel(DateTimeModel):
+    """
+    Exécution d'une analyse complète lancée depuis /api/analysis/run/
+
+    L'analyse tourne dans les workers Celery (récupération des images, indices
+    par image, détection, alertes) ; cet enregistrement porte l'avancement et
+    les durées de chaque étape pour le suivi par polling.
+    """
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', _('En attente')
+        RUNNING = 'RUNNING', _('En cours')
+        COMPLETED = 'COMPLETED', _('Terminée')
+        ERROR = 'ERROR', _('Erreur')
+
+    class StageChoices(models.TextChoices):
+        FETCH = 'FETCH', _('Récupération des images')
+        INDICES = 'INDICES', _('Calcul des indices')
+        DETECTION = 'DETECTION', _('Détection')
+        ALERTING = 'ALERTING', _('Alertes et investigations')
+        DONE = 'DONE', _('Terminé')
+
+    status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    current_stage = models.CharField(max_length=20, choices=StageChoices.choices, default=StageChoices.FETCH)
+    months_back = models.PositiveSmallIntegerField(default=3)
+    requested_by = models.ForeignKey('account.UserModel', on_delete=models.SET_NULL,
+                                     null=True, blank=True, related_name='analysis_runs')
+    celery_task_id = models.CharField(max_length=255, null=True, blank=True)
+
+    # Avancement par image (incrémenté par les tâches Celery concurrentes)
+    images_total = models.PositiveIntegerField(default=0)
+    images_indexed = models.PositiveIntegerField(default=0)
+    images_failed = models.PositiveIntegerField(default=0)
+    images_analyzed = models.PositiveIntegerField(default=0)
+    detections_found = models.PositiveIntegerField(default=0)
+    tiles_scanned = models.PositiveIntegerField(default=0)
+    indices_seconds = models.FloatField(default=0.0, help_text="Temps cumulé de calcul des indices (toutes images)")
+    detection_seconds = models.FloatField(default=0.0, help_text="Temps cumulé de détection (toutes images)")
+
+    image_ids = models.JSONField(default=list, blank=True)
+    stage_timings = models.JSONField(default=dict, blank=True,
+                                     help_text="Début, fin et durée (s) de chaque étape")
+    results = models.JSONField(default=dict, blank=True)
+    errors = models.JSONField(default=list, blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'gee_analysis_runs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Analyse {self.id} - {self.status} ({self.current_stage})"
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from base.models.helpers.date_time_model import DateTimeModel
+
+
+class DeadLetterTaskModel(DateTimeModel):
+    """
+    Tâche Celery GEE abandonnée (erreur permanente ou relances épuisées)
+
+    Conserve le nom de la tâche et ses arguments pour inspection puis relance
+    groupée (commande replay_dead_letters) une fois la cause corrigée.
+    """
+
+    class ErrorClassChoices(models.TextChoices):
+        TRANSIENT = 'TRANSIENT', _('Transitoire (réseau, EE indisponible)')
+        QUOTA = 'QUOTA', _('Quota Earth Engine')
+        PERMANENT = 'PERMANENT', _('Permanente')
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', _('À traiter')
+        REPLAYED = 'REPLAYED', _('Relancée')
+        DISCARDED = 'DISCARDED', _('Abandonnée')
+
+    task_name = models.CharField(max_length=255)
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    error_class = models.CharField(max_length=20, choices=ErrorClassChoices.choices)
+    exception_type = models.CharField(max_length=255)
+    error_message = models.TextField(blank=True)
+    traceback = models.TextField(blank=True)
+    retries = models.PositiveIntegerField(default=0, help_text="Relances effectuées avant l'abandon")
+
+    status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    replay_count = models.PositiveIntegerField(default=0)
+    replayed_at = models.DateTimeField(null=True, blank=True)
+    replay_task_id = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        db_table = 'gee_dead_letter_tasks'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'task_name']),
+            models.Index(fields=['error_class', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} {self.args} - {self.error_class} ({self.status})"
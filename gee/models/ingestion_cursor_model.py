@@ -0,0 +1,27 @@
+from django.db import models
+from base.models.helpers.date_time_model import DateTimeModel
+
+
+class IngestionCursorModel(DateTimeModel):
+    """
+    Curseur d'ingestion par région et collection GEE : plus grand system:time_start
+    déjà traité, pour ne lister que les scènes plus récentes au scan suivant
+    """
+
+    region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE, related_name='ingestion_cursors')
+    collection = models.CharField(max_length=100, help_text="Collection GEE (ex: COPERNICUS/S2_SR_HARMONIZED)")
+
+    last_time_start = models.BigIntegerField(null=True, blank=True,
+                                             help_text="system:time_start (ms) de la scène la plus récente traitée")
+    last_asset_id = models.CharField(max_length=200, null=True, blank=True)
+    last_scan_at = models.DateTimeField(null=True, blank=True)
+    scenes_ingested = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'gee_ingestion_cursors'
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'collection'], name='unique_ingestion_cursor_per_collection'),
+        ]
+
+    def __str__(self):
+        return f"{self.region.name} - {self.collection} - {self.last_time_start}"
@@ -0,0 +1,50 @@
+import math
+
+from django.db import models
+from base.models.helpers.date_time_model import DateTimeModel
+
+
+class SpectralBaselineModel(DateTimeModel):
+    """
+    Référence saisonnière d'un indice spectral pour une région et un mois calendaire
+
+    Statistiques des moyennes de scène mises à jour à chaque image analysée :
+    moyenne et variance en ligne (Welford), médiane et MAD sur un réservoir
+    borné de moyennes, moyenne des écarts-types intra-scène. Le mois 0 agrège
+    tous les mois (repli tant que le mois de la scène compte trop peu d'images).
+    """
+
+    ALL_MONTHS = 0
+
+    region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE, related_name='spectral_baselines')
+    month = models.PositiveSmallIntegerField(help_text="Mois calendaire 1-12 (0 = tous les mois)")
+    index_name = models.CharField(max_length=20, help_text="Indice spectral (ndvi, ndwi, ndti)")
+
+    # Moyennes de scène : moyenne et somme des carrés des écarts (algorithme de Welford)
+    sample_count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    m2 = models.FloatField(default=0.0)
+
+    # Statistiques robustes, recalculées sur le réservoir à chaque mise à jour
+    median = models.FloatField(null=True, blank=True)
+    mad = models.FloatField(null=True, blank=True, help_text="Écart absolu médian des moyennes de scène")
+    reservoir = models.JSONField(default=list, blank=True, help_text="Échantillon uniforme borné des moyennes de scène")
+
+    # Dispersion spatiale : moyenne des écarts-types intra-scène
+    pixel_stddev_mean = models.FloatField(null=True, blank=True)
+
+    last_image = models.ForeignKey('image.ImageModel', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+')
+
+    class Meta:
+        db_table = 'gee_spectral_baselines'
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'month', 'index_name'], name='unique_spectral_baseline'),
+        ]
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.m2 / (self.sample_count - 1)) if self.sample_count > 1 else 0.0
+
+    def __str__(self):
+        return f"{self.region.name} - mois {self.month} - {self.index_name} ({self.sample_count} images)"
@@ -0,0 +1,175 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from django.db.models import Count
+from django.utils import timezone
+
+from alert.models.alert_model import AlertModel
+from config.detection_settings import DetectionConfig
+from detection.models.detection_model import DetectionModel
+
+OPEN_STATUSES = [AlertModel.AlertStatusChoices.ACTIVE, AlertModel.AlertStatusChoices.ACKNOWLEDGED]
+LEVEL_RANK = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3}
+
+# Issue du regroupement d'une détection
+CREATED, FOLDED, ESCALATED = 'CREATED', 'FOLDED', 'ESCALATED'
+
+
+class AlertAggregationService:
+    """
+    Regroupement des détections en alertes par site et fenêtre de temps
+
+    Une détection rejoint l'alerte ouverte (ACTIVE / ACCUSÉE) de son site tant que la dernière
+    détection de cette alerte date de moins de DetectionConfig.ALERT_COALESCE_WINDOW_HOURS ; le
+    niveau de l'alerte monte avec le score maximal (l'alerte redevient non lue). Sinon une alerte
+    est ouverte, dans la limite de ALERT_MAX_NEW_PER_REGION_PER_HOUR par région et par heure :
+    au-delà, les détections rejoignent l'alerte de synthèse horaire de la région (sans site).
+
+    Les lignes de région sont déjà verrouillées par SiteTrackingService dans la même transaction :
+    deux analyses d'une même région ne regroupent pas en parallèle.
+    """
+
+    def __init__(self):
+        self.now = timezone.now()
+
+    @staticmethod
+    def alert_level(confidence_score: float) -> Tuple[str, str]:
+        """(type d'alerte, criticité) selon le score de confiance, seuils DetectionConfig"""
+        if confidence_score >= DetectionConfig.ALERT_CRITICALITY_THRESHOLD_CRITICAL:
+            return 'CLANDESTINE_SITE', 'CRITICAL'
+        if confidence_score >= DetectionConfig.ALERT_CRITICALITY_THRESHOLD_HIGH:
+            return 'SUSPICIOUS_ACTIVITY', 'HIGH'
+        return 'SUSPICIOUS_ACTIVITY', 'MEDIUM'  # Scores sous le seuil HIGH
+
+    def aggregate(self, detections: List[DetectionModel]) -> List[Tuple[AlertModel, str]]:
+        """
+        Rattache chaque détection enregistrée (site renseigné) à une alerte, créée ou mise à jour en lot
+
+        Returns:
+            Pour chaque détection, (alerte, CREATED | FOLDED | ESCALATED)
+        """
+        if not detections:
+            return []
+
+        region_ids = {detection.region_id for detection in detections}
+        open_alerts = self._open_site_alerts({detection.site_id for detection in detections})
+        summary_alerts = self._open_summary_alerts(region_ids)
+        created_counts = self._alerts_created_last_hour(region_ids)
+
+        new_alerts, updated_alerts = [], {}
+        outcomes: Dict[int, Tuple[AlertModel, str]] = {}
+
+        # Scores décroissants : le plafond horaire retient les détections les plus sévères
+        for position in sorted(range(len(detections)), key=lambda i: -detections[i].confidence_score):
+            detection = detections[position]
+            alert = open_alerts.get(detection.site_id)
+            if alert is None and created_counts[detection.region_id] >= DetectionConfig.ALERT_MAX_NEW_PER_REGION_PER_HOUR:
+                alert = summary_alerts.get(detection.region_id)
+                if alert is None:
+                    alert = self._build_alert(detection, site=None)
+                    summary_alerts[detection.region_id] = alert
+                    new_alerts.append(alert)
+                    outcomes[position] = (alert, CREATED)
+                    continue
+            elif alert is None:
+                alert = self._build_alert(detection, site=detection.site)
+                open_alerts[detection.site_id] = alert
+                created_counts[detection.region_id] += 1
+                new_alerts.append(alert)
+                outcomes[position] = (alert, CREATED)
+                continue
+
+            escalated = self._fold(alert, detection)
+            if alert.pk is not None:
+                updated_alerts[alert.pk] = alert
+            outcomes[position] = (alert, ESCALATED if escalated else FOLDED)
+
+        AlertModel.objects.bulk_create(new_alerts)
+        AlertModel.objects.bulk_update(
+            list(updated_alerts.values()),
+            ['detection_count', 'max_confidence_score', 'last_detected_at', 'level', 'alert_type',
+             'message', 'is_read', 'updated_at']
+        )
+
+        print(f"Alertes: {len(new_alerts)} créées, {len(updated_alerts)} mises à jour "
+              f"pour {len(detections)} détections")
+        return [outcomes[position] for position in range(len(detections))]
+
+    def _open_site_alerts(self, site_ids) -> Dict[int, AlertModel]:
+        """Alerte ouverte la plus récente de chaque site dans la fenêtre de regroupement"""
+        window_start = self.now - timedelta(hours=DetectionConfig.ALERT_COALESCE_WINDOW_HOURS)
+        alerts = AlertModel.objects.filter(
+            site_id__in=site_ids, alert_status__in=OPEN_STATUSES, last_detected_at__gte=window_start
+        ).order_by('site_id', '-last_detected_at')
+        open_alerts = {}
+        for alert in alerts:
+            open_alerts.setdefault(alert.site_id, alert)
+        return open_alerts
+
+    def _open_summary_alerts(self, region_ids) -> Dict[int, AlertModel]:
+        """Alerte de synthèse (sans site) ouverte dans l'heure pour chaque région"""
+        alerts = AlertModel.objects.filter(
+            region_id__in=region_ids, site__isnull=True, alert_status__in=OPEN_STATUSES,
+            sent_at__gte=self.now - timedelta(hours=1)
+        ).order_by('region_id', '-sent_at')
+        summary_alerts = {}
+        for alert in alerts:
+            summary_alerts.setdefault(alert.region_id, alert)
+        return summary_alerts
+
+    def _alerts_created_last_hour(self, region_ids) -> Counter:
+        rows = (AlertModel.objects
+                .filter(region_id__in=region_ids, site__isnull=False, sent_at__gte=self.now - timedelta(hours=1))
+                .values('region_id').annotate(count=Count('id')))
+        return Counter({row['region_id']: row['count'] for row in rows})
+
+    def _build_alert(self, detection: DetectionModel, site) -> AlertModel:
+        alert_type, criticality = self.alert_level(detection.confidence_score)
+        alert = AlertModel(
+            name=self._name(detection, summary=site is None),
+            detection=detection,
+            region=detection.region,
+            site=site,
+            level=criticality,
+            alert_type=alert_type,
+            alert_status='ACTIVE',
+            detection_count=1,
+            max_confidence_score=detection.confidence_score,
+            last_detected_at=self.now,
+        )
+        alert.message = self._message(alert, detection)
+        return alert
+
+    def _fold(self, alert: AlertModel, detection: DetectionModel) -> bool:
+        """Ajoute la détection à l'alerte ; retourne True si le niveau monte"""
+        alert.detection_count += 1
+        alert.last_detected_at = self.now
+        alert.updated_at = self.now  # bulk_update ne déclenche pas auto_now
+        alert.max_confidence_score = max(alert.max_confidence_score, detection.confidence_score)
+
+        alert_type, criticality = self.alert_level(alert.max_confidence_score)
+        escalated = LEVEL_RANK[criticality] > LEVEL_RANK.get(alert.level, 0)
+        if escalated:
+            alert.level = criticality
+            alert.alert_type = alert_type
+            alert.is_read = False  # Signalée à nouveau dans /api/alerts/active/
+        alert.message = self._message(alert, detection)
+        return escalated
+
+    @staticmethod
+    def _name(detection: DetectionModel, summary: bool) -> str:
+        date = timezone.localdate().strftime('%Y-%m-%d')
+        if summary:
+            return f"Détections groupées - {detection.region.name} - {date}"
+        return f"Détection orpaillage - {date}"
+
+    @staticmethod
+    def _message(alert: AlertModel, detection: DetectionModel) -> str:
+        if alert.detection_count == 1:
+            return (f"Activité d'orpaillage détectée avec un score de confiance de {detection.confidence_score:.2f}. "
+                    f"Surface estimée: {detection.area_hectares:.1f} hectares.")
+        scope = "sur ce site" if alert.site_id else "dans la région (plafond horaire d'alertes atteint)"
+        return (f"{alert.detection_count} détections d'orpaillage {scope}, score de confiance maximal "
+                f"{alert.max_confidence_score:.2f}. Dernière détection: score {detection.confidence_score:.2f}, "
+                f"surface estimée {detection.area_hectares:.1f} hectares.")
@@ -0,0 +1,113 @@
+import time
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from gee.models.analysis_run_model import AnalysisRunModel
+
+
+class AnalysisRunService:
+    """
+    Suivi d'une exécution d'analyse (AnalysisRunModel) par les tâches du pipeline
+
+    Les compteurs par image sont incrémentés par des UPDATE atomiques (F()) car
+    plusieurs workers traitent les images d'une même exécution en parallèle ;
+    les durées d'étape ne sont écrites que par les tâches de transition, une
+    seule à la fois.
+    """
+
+    STAGE_ORDER = [
+        AnalysisRunModel.StageChoices.FETCH,
+        AnalysisRunModel.StageChoices.INDICES,
+        AnalysisRunModel.StageChoices.DETECTION,
+        AnalysisRunModel.StageChoices.ALERTING,
+    ]
+
+    @staticmethod
+    def start_stage(run: AnalysisRunModel, stage: str):
+        run.current_stage = stage
+        run.stage_timings[stage] = {'started_at': timezone.now().isoformat(), '_started': time.time()}
+        run.save(update_fields=['current_stage', 'stage_timings', 'updated_at'])
+
+    @staticmethod
+    def finish_stage(run: AnalysisRunModel, stage: str):
+        timing = run.stage_timings.setdefault(stage, {})
+        timing['finished_at'] = timezone.now().isoformat()
+        if '_started' in timing:
+            timing['duration_seconds'] = round(time.time() - timing.pop('_started'), 3)
+        run.save(update_fields=['stage_timings', 'updated_at'])
+
+    @staticmethod
+    def increment(run_id: int, **counters):
+        """Incrément atomique de compteurs (images_indexed=1, detection_seconds=2.5, ...)"""
+        AnalysisRunModel.objects.filter(id=run_id).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in counters.items()}
+        )
+
+    @staticmethod
+    def add_error(run_id: int, message: str):
+        # Verrou de ligne : plusieurs tâches d'image peuvent signaler une erreur en même temps
+        with transaction.atomic():
+            run = AnalysisRunModel.objects.select_for_update().get(id=run_id)
+            run.errors.append(message)
+            run.save(update_fields=['errors', 'updated_at'])
+
+    @staticmethod
+    def fail(run: AnalysisRunModel, message: str):
+        run.status = AnalysisRunModel.StatusChoices.ERROR
+        run.errors.append(message)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'errors', 'finished_at', 'updated_at'])
+
+    @classmethod
+    def progress(cls, run: AnalysisRunModel) -> Dict:
+        """Avancement et durées par étape pour l'endpoint de suivi"""
+        stages: List[Dict] = []
+        per_image = {
+            AnalysisRunModel.StageChoices.INDICES: (run.images_indexed + run.images_failed, run.indices_seconds),
+            AnalysisRunModel.StageChoices.DETECTION: (run.images_analyzed, run.detection_seconds),
+        }
+
+        for stage in cls.STAGE_ORDER:
+            timing = {key: value for key, value in run.stage_timings.get(stage, {}).items()
+                      if not key.startswith('_')}
+            if 'finished_at' in timing:
+                stage_status = 'COMPLETED'
+            elif 'started_at' in timing:
+                stage_status = 'RUNNING'
+            else:
+                stage_status = 'PENDING'
+
+            entry = {'stage': stage, 'status': stage_status, **timing}
+            if stage in per_image:
+                done, cumulated_seconds = per_image[stage]
+                entry.update({'done': done, 'total': run.images_total,
+                              'cumulated_seconds': round(cumulated_seconds, 3)})
+            stages.append(entry)
+
+        elapsed = None
+        if run.started_at:
+            elapsed = round(((run.finished_at or timezone.now()) - run.started_at).total_seconds(), 3)
+
+        return {
+            'run_id': run.id,
+            'status': run.status,
+            'current_stage': run.current_stage,
+            'months_back': run.months_back,
+            'images_total': run.images_total,
+            'images_indexed': run.images_indexed,
+            'images_failed': run.images_failed,
+            'images_analyzed': run.images_analyzed,
+            'detections_found': run.detections_found,
+            'tiles_scanned': run.tiles_scanned,
+            'stages': stages,
+            'results': run.results,
+            'errors': run.errors,
+            'created_at': run.created_at.isoformat(),
+            'started_at': run.started_at.isoformat() if run.started_at else None,
+            'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+            'elapsed_seconds': elapsed,
+        }
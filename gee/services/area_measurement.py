@@ -0,0 +1,59 @@
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from config.detection_settings import DetectionConfig
+from gee.backends.base_backend import METERS_PER_DEGREE
+
+
+def row_pixel_area_hectares(latitudes: np.ndarray, pixel_width_deg: float, pixel_height_deg: float) -> np.ndarray:
+    """Surface (ha) d'un pixel de grille EPSG:4326 pour chaque latitude de rangée"""
+    width_m = pixel_width_deg * METERS_PER_DEGREE * np.cos(np.radians(latitudes))
+    height_m = pixel_height_deg * METERS_PER_DEGREE
+    return width_m * height_m / 10_000
+
+
+def measure_components(mask: np.ndarray, row_area_hectares: np.ndarray, connectivity: int = 8) -> Dict:
+    """
+    Étiquetage en composantes connexes d'un masque et surface de chaque composante
+
+    Un seul passage OpenCV (connectedComponentsWithStats) puis une somme pondérée
+    par étiquette (bincount) : le coût ne dépend pas du nombre de composantes.
+
+    Args:
+        mask: Masque 2-D (non nul = pixel retenu)
+        row_area_hectares: Surface d'un pixel par rangée (hauteur du masque), ou scalaire
+
+    Returns:
+        {'count', 'labels', 'pixel_counts', 'areas_hectares', 'stats', 'centroids'} ;
+        l'étiquette 0 est le fond, les tableaux par composante sont indexés par étiquette
+    """
+    n_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
+        (mask != 0).astype(np.uint8), connectivity=connectivity
+    )
+
+    row_area = np.broadcast_to(np.asarray(row_area_hectares, dtype=np.float64), (mask.shape[0],))
+    pixel_area = np.broadcast_to(row_area[:, None], mask.shape)
+    areas = np.bincount(labels.ravel(), weights=pixel_area.ravel(), minlength=n_labels)
+    areas[0] = 0.0
+
+    return {
+        'count': n_labels - 1,
+        'labels': labels,
+        'pixel_counts': stats[:, cv2.CC_STAT_AREA],
+        'areas_hectares': areas,
+        'stats': stats,
+        'centroids': centroids,
+    }
+
+
+def disturbed_ground_mask(pixels: np.ndarray) -> np.ndarray:
+    """
+    Masque sol remanié / site minier d'un bloc (hauteur, largeur, 3) [NDVI, NDWI, NDTI]
+
+    Végétation absente (NDVI bas) hors eau libre (NDWI élevé) ; pixels sans donnée exclus.
+    """
+    ndvi, ndwi = pixels[..., 0], pixels[..., 1]
+    has_data = pixels.any(axis=-1)
+    return has_data & (ndvi < DetectionConfig.AREA_DISTURBED_NDVI_MAX) & (ndwi < DetectionConfig.AREA_DISTURBED_NDWI_MAX)
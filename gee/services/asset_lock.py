@@ -0,0 +1,56 @@
+import time
+import uuid
+from typing import Optional
+
+from django.core.cache import caches
+
+
+class AssetLock:
+    """
+    Verrou à bail par asset GEE, dans le cache partagé (Redis en production)
+
+    Posé avec cache.add (atomique) et libéré seulement par son détenteur ; si le
+    détenteur disparaît, le verrou expire de lui-même à la fin du bail. `scope`
+    distingue les usages (soumission, exécution de la tâche) d'un même asset.
+    """
+
+    KEY_PREFIX = 'gee:asset-lock'
+
+    def __init__(self, asset_id: str, scope: str, lease: int, cache_alias: str = 'default'):
+        self.cache = caches[cache_alias]
+        self.key = f"{self.KEY_PREFIX}:{scope}:{asset_id}"
+        self.lease = lease
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    def acquire(self) -> bool:
+        self.acquired = bool(self.cache.add(self.key, self.token, timeout=self.lease))
+        return self.acquired
+
+    def release(self):
+        if self.acquired and self.cache.get(self.key) == self.token:
+            self.cache.delete(self.key)
+        self.acquired = False
+
+    def holder(self) -> Optional[str]:
+        return self.cache.get(self.key)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+def wait_for(predicate, timeout: float, initial_delay: float = 0.05, max_delay: float = 0.5):
+    """Appelle predicate() à intervalle croissant jusqu'à un résultat non nul ou l'expiration du délai"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        result = predicate()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, max_delay)
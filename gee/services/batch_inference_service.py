@@ -0,0 +1,172 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from config.detection_settings import DetectionConfig
+
+
+class _Histogram:
+    """Histogramme cumulatif à bornes fixes (compte, somme, max)"""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Dernier compartiment : au-delà de la dernière borne
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = int(np.searchsorted(self.bounds, value, side='left'))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict:
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets['inf'] = self.counts[-1]
+        return {
+            'buckets': buckets,
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0.0,
+            'max': round(self.max, 3),
+        }
+
+
+class BatchedInferenceService:
+    """
+    Inférence TensorFlow par micro-lots
+
+    Les patchs soumis par les analyses et balayages concurrents sont mis en file ;
+    un thread unique les regroupe en un seul passage avant (forward pass) dès que
+    max_batch_size patchs sont en attente ou que le plus ancien attend depuis
+    max_wait_ms. Chaque soumission reçoit un Future résolu avec son score.
+    """
+
+    LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+    def __init__(self, model, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        self.model = model
+        self.max_batch_size = max_batch_size or DetectionConfig.INFERENCE_MAX_BATCH_SIZE
+        self.max_wait = (DetectionConfig.INFERENCE_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        batch_bounds = [2 ** i for i in range(int(np.log2(self.max_batch_size)) + 1)]
+        if batch_bounds[-1] < self.max_batch_size:
+            batch_bounds.append(self.max_batch_size)
+        self.batch_size_histogram = _Histogram(batch_bounds)
+        self.latency_histogram = _Histogram(self.LATENCY_BUCKETS_MS)
+
+    def submit(self, patch: np.ndarray) -> Future:
+        """Met un patch (taille, taille, canaux) en file ; le Future renvoie son score (float)"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((patch, future, time.perf_counter()))
+        return future
+
+    def submit_many(self, patches: np.ndarray) -> List[Future]:
+        """Met en file un lot de patchs (n, taille, taille, canaux), un Future par patch"""
+        self._ensure_worker()
+        submitted_at = time.perf_counter()
+        futures = []
+        for patch in patches:
+            future = Future()
+            self._queue.put((patch, future, submitted_at))
+            futures.append(future)
+        return futures
+
+    def predict(self, patch: np.ndarray, timeout: Optional[float] = None) -> float:
+        """Score d'un patch (bloquant)"""
+        return self.submit(patch).result(timeout=timeout)
+
+    def predict_many(self, patches: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Scores d'un lot de patchs (bloquant), dans l'ordre de soumission"""
+        return gather_scores(self.submit_many(patches), timeout=timeout)
+
+    def stats(self) -> Dict:
+        """Histogrammes de taille de lot et de latence (ms, de la soumission au résultat)"""
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queued': self._queue.qsize(),
+                'batch_size': self.batch_size_histogram.as_dict(),
+                'latency_ms': self.latency_histogram.as_dict(),
+            }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='batched-inference', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+
+            # Regroupement jusqu'à max_batch_size ou jusqu'à l'échéance du plus ancien
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    # Échéance dépassée : on prend encore ce qui est déjà en file, sans attendre
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List):
+        patches = [item[0] for item in batch]
+        futures = [item[1] for item in batch]
+
+        try:
+            inputs = np.stack(patches).astype(np.float32, copy=False)
+            scores = np.asarray(self.model.predict_on_batch(inputs)).reshape(len(batch), -1)[:, 0]
+            scores = np.clip(scores, 0.0, 1.0)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        finished_at = time.perf_counter()
+        with self._stats_lock:
+            self.batch_size_histogram.observe(len(batch))
+            for _, _, submitted_at in batch:
+                self.latency_histogram.observe((finished_at - submitted_at) * 1000)
+
+        for future, score in zip(futures, scores):
+            future.set_result(float(score))
+
+
+def gather_scores(futures: List[Future], timeout: Optional[float] = None) -> np.ndarray:
+    """Attend une liste de Futures de score et retourne un tableau float32"""
+    return np.array([future.result(timeout=timeout) for future in futures], dtype=np.float32)
+
+
+_inference_services = {}
+_inference_services_lock = threading.Lock()
+
+
+def get_inference_service(model_name: str, model) -> BatchedInferenceService:
+    """
+    Service d'inférence partagé du processus pour un modèle
+
+    Toutes les analyses et tous les balayages d'un même processus alimentent la
+    même file, ce qui permet de regrouper leurs patchs dans les mêmes lots.
+    """
+    with _inference_services_lock:
+        if model_name not in _inference_services:
+            _inference_services[model_name] = BatchedInferenceService(model)
+        return _inference_services[model_name]
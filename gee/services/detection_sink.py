@@ -0,0 +1,168 @@
+from typing import List, Optional, Tuple
+
+from django.db import transaction
+
+from alert.models.alert_model import AlertModel
+from alert.models.financial_risk_model import FinancialRiskModel
+from config.financial_settings import FinancialSettings
+from detection.models.detection_model import DetectionModel
+from detection.models.investigation_model import InvestigationModel
+from gee.services.alert_aggregation_service import CREATED, ESCALATED, AlertAggregationService
+from gee.services.sensitive_zone_service import SensitiveZoneService
+from gee.services.site_tracking_service import SiteTrackingService
+from report.services.event_log_service import EventLogService
+
+
+class DetectionSink:
+    """
+    Accumule les détections d'une analyse et écrit toutes les lignes liées d'un coup
+
+    Détections, alertes, risques financiers, investigations et événements sont
+    insérés par bulk_create dans une seule transaction : le nombre d'allers-retours
+    ne dépend pas du nombre de détections (une requête par table). Les clés
+    primaires renvoyées par PostgreSQL relient les lignes entre elles.
+
+    Chaque détection est rattachée à un site suivi (SiteTrackingService) : seules
+    celles qui ouvrent un nouveau site génèrent une investigation, les autres
+    complètent la série temporelle du site. Les alertes regroupent les détections
+    par site et fenêtre de temps (AlertAggregationService).
+    """
+
+    def __init__(self):
+        self.detections: List[DetectionModel] = []
+
+    def add(self, detection: DetectionModel):
+        """Détection non enregistrée, score de confiance déjà calculé"""
+        self.detections.append(detection)
+
+    def __len__(self):
+        return len(self.detections)
+
+    def flush(self) -> List[DetectionModel]:
+        """Écrit les détections accumulées et leurs effets de bord ; retourne les détections créées"""
+        detections, self.detections = self.detections, []
+        if not detections:
+            return []
+
+        with transaction.atomic():
+            opened = SiteTrackingService().assign(detections)
+            DetectionModel.objects.bulk_create(detections)
+
+            alert_outcomes = AlertAggregationService().aggregate(detections)
+
+            # Distances aux zones sensibles de toutes les détections en une requête
+            distances_km = SensitiveZoneService.nearest_distances_km(
+                [detection.latitude for detection in detections], [detection.longitude for detection in detections]
+            )
+            risks = [
+                self._build_financial_risk(detection, distance_km)
+                for detection, distance_km in zip(detections, distances_km.tolist())
+            ]
+            self._price_financial_risks(detections, risks)
+            FinancialRiskModel.objects.bulk_create(risks)
+
+            investigations = [
+                self._build_investigation(detection) if is_new else None for detection, is_new in zip(detections, opened)
+            ]
+            InvestigationModel.objects.bulk_create([investigation for investigation in investigations if investigation is not None])
+
+            events = []
+            for detection, alert_outcome, risk, investigation in zip(detections, alert_outcomes, risks, investigations):
+                events.extend(self._build_events(detection, alert_outcome, risk, investigation))
+            EventLogService.log_events(events)
+
+        new_sites = sum(opened)
+        print(f"{len(detections)} détections enregistrées ({new_sites} nouveaux sites avec investigation, "
+              f"{len(detections) - new_sites} sur des sites déjà suivis)")
+        return detections
+
+    @staticmethod
+    def _build_financial_risk(detection: DetectionModel, sensitive_zone_distance_km: float) -> FinancialRiskModel:
+        return FinancialRiskModel(
+            detection=detection,
+            area_hectares=detection.area_hectares,
+            cost_per_hectare=FinancialSettings.DEFAULT_COST_PER_HECTARE,
+            sensitive_zone_distance_km=round(sensitive_zone_distance_km, 3),
+            occurrence_count=detection.site.occurrence_count  # Images distinctes ayant détecté le site
+        )
+
+    @staticmethod
+    def _price_financial_risks(detections: List[DetectionModel], risks: List[FinancialRiskModel]):
+        """Perte et niveau de risque de tout le lot calculés avant l'insertion (pas de second UPDATE)"""
+        losses = FinancialSettings.estimate_losses(
+            [risk.area_hectares for risk in risks],
+            [detection.ndvi_anomaly_score for detection in detections],
+            [detection.ndwi_anomaly_score for detection in detections],
+            [detection.ndti_anomaly_score for detection in detections],
+            [risk.sensitive_zone_distance_km for risk in risks],
+            [risk.occurrence_count for risk in risks],
+        )
+        levels = FinancialSettings.determine_risk_levels_from_losses(losses)
+        for risk, loss, level in zip(risks, losses.tolist(), levels.tolist()):
+            risk.estimated_loss = loss
+            risk.risk_level = level
+
+    @staticmethod
+    def _build_investigation(detection: DetectionModel) -> InvestigationModel:
+        return InvestigationModel(
+            detection=detection,
+            target_coordinates=f"{detection.latitude:.4f}, {detection.longitude:.4f}",
+            access_instructions=f"Zone Bondoukou - Coordonnées GPS: {detection.latitude:.4f}, {detection.longitude:.4f}. "
+                                f"Surface estimée: {detection.area_hectares:.1f} hectares. "
+                                f"Confidence IA: {detection.confidence_score:.2f}",
+            priority=DetectionSink._investigation_priority(detection.confidence_score),
+            status='PENDING'
+        )
+
+    @staticmethod
+    def _investigation_priority(confidence_score: float) -> str:
+        """Priorité de l'investigation selon le score de confiance de la détection"""
+        if confidence_score >= 0.8:
+            return 'HIGH'
+        if confidence_score >= 0.6:
+            return 'MEDIUM'
+        return 'LOW'
+
+    @staticmethod
+    def _build_events(detection: DetectionModel, alert_outcome: Tuple[AlertModel, str],
+                      financial_risk: FinancialRiskModel, investigation: Optional[InvestigationModel]) -> List:
+        events = [
+            EventLogService.build_event(
+                'DETECTION_CREATED',
+                f"Détection créée: {detection.detection_type} (score: {detection.confidence_score:.2f}, "
+                f"site {detection.site_id}, occurrence {detection.site.occurrence_count})",
+                detection=detection,
+                region=detection.region,
+                metadata={'site_id': detection.site_id, 'occurrence_count': detection.site.occurrence_count}
+            ),
+        ]
+        alert, outcome = alert_outcome
+        if outcome == CREATED:
+            events.append(EventLogService.build_event(
+                'ALERT_GENERATED',
+                f"Alerte {alert.level} générée pour détection {detection.id}",
+                detection=detection,
+                alert=alert
+            ))
+        elif outcome == ESCALATED:
+            events.append(EventLogService.build_event(
+                'ALERT_ESCALATED',
+                f"Alerte {alert.id} passée au niveau {alert.level} ({alert.detection_count} détections regroupées)",
+                detection=detection,
+                alert=alert,
+                metadata={'level': alert.level, 'detection_count': alert.detection_count}
+            ))
+        events.append(EventLogService.build_event(
+            'FINANCIAL_RISK_CALCULATED',
+            f"Risque financier calculé: {financial_risk.estimated_loss:,.0f} FCFA",
+            detection=detection,
+            metadata={'risk_level': financial_risk.risk_level, 'amount': financial_risk.estimated_loss}
+        ))
+        if investigation is not None:
+            events.append(EventLogService.build_event(
+                'INVESTIGATION_CREATED',
+                f"Investigation créée automatiquement pour détection {detection.id}",
+                detection=detection,
+                metadata={'investigation_id': investigation.id}
+            ))
+        return events
@@ -1,29 +1,45 @@
-import ee
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
+from config.detection_settings import DetectionConfig
 from gee.config import GEEConfig
+from gee.backends import get_imagery_backend
+from gee.services.patch_cache import get_patch_cache
+from gee.services.map_cache import SpectralMapCache
+from gee.services.asset_lock import AssetLock, wait_for
+from gee.models.ingestion_cursor_model import IngestionCursorModel
 from image.models.image_model import ImageModel
 from region.models.region_model import RegionModel
-from ..tasks import process_gee_image_task # Import the new Celery task
+from ..tasks import process_gee_image_task, detect_mining_activity_task # Import the new Celery task
 
 
 class EarthEngineService:
-    """Service principal pour interactions avec Google Earth Engine"""
+    """
+    Service principal pour interactions avec Google Earth Engine
 
-    def __init__(self):
-        self.initialized = GEEConfig.initialize_ee()
-        if not self.initialized:
-            raise Exception("Impossible d'initialiser Google Earth Engine")
+    Les appels d'imagerie passent par un backend (GEE en direct ou rasters
+    locaux, voir gee.backends) ; ce service garde la mise en forme des
+    résultats et la persistance.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_imagery_backend()
+        self.initialized = self.backend.initialized
 
-    def get_recent_images(self, months_back: int = 3) -> List[Dict]:
+    def get_recent_images(self, months_back: int = 3, min_time_start: Optional[int] = None) -> List[Dict]:
         """
         Récupère les images satellites récentes pour Bondoukou
 
         Args:
             months_back: Nombre de mois en arrière (défaut: 3)
+            min_time_start: Si fourni (ms), seules les scènes strictement plus récentes
+                sont listées, quelle que soit la fenêtre months_back
 
         Returns:
             Liste des images disponibles avec métadonnées
@@ -31,41 +47,25 @@ class EarthEngineService:
         try:
             # Calcul période
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=months_back * 30)
-
-            # Zone Bondoukou
-            bondoukou_geom = GEEConfig.get_bondoukou_geometry()
-
-            # Collection Sentinel-2
-            # Ajout debug
-            print(f"Recherche images du {start_date} au {end_date}")
-            print(f"Zone: {bondoukou_geom.getInfo()}")
-
-            collection = (ee.ImageCollection(GEEConfig.SENTINEL2_COLLECTION)
-                          .filterBounds(bondoukou_geom)
-                          .filterDate(start_date.strftime('%Y-%m-%d'),
-                                      end_date.strftime('%Y-%m-%d'))
-                          .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE',
-                                               GEEConfig.MAX_CLOUD_COVERAGE)))
+            if min_time_start is not None:
+                start_date = datetime.fromtimestamp(min_time_start / 1000)
+            else:
+                start_date = end_date - timedelta(days=months_back * 30)
 
-            print(f"Images trouvées: {collection.size().getInfo()}")
-
-            # Récupération métadonnées
-            image_list = collection.getInfo()
+            print(f"Recherche images du {start_date} au {end_date} (backend: {self.backend.name})")
 
             images_data = []
-            for img_info in image_list.get('features', []):
-                properties = img_info['properties']
-
+            for img_info in self.backend.list_images(start_date, end_date, min_time_start=min_time_start):
                 images_data.append({
-                    'gee_asset_id': img_info['id'],
+                    'gee_asset_id': img_info['gee_asset_id'],
+                    'time_start': img_info['time_start'],
                     'capture_date': datetime.fromtimestamp(
-                        properties['system:time_start'] / 1000
+                        img_info['time_start'] / 1000
                     ).date(),
-                    'cloud_coverage': properties.get('CLOUDY_PIXEL_PERCENTAGE', 0),
+                    'cloud_coverage': img_info['cloud_coverage'],
                     'satellite_source': 'SENTINEL2',
                     'resolution': 10,  # Sentinel-2 10m
-                    'properties': properties
+                    'properties': img_info['properties']
                 })
 
             return images_data
@@ -74,82 +74,303 @@ class EarthEngineService:
             print(f"Erreur récupération images: {e}")
             return []
 
-    def calculate_spectral_indices(self, gee_asset_id: str) -> Dict:
+    def get_ingestion_cursor(self) -> IngestionCursorModel:
+        """Curseur d'ingestion de la région Bondoukou pour la collection Sentinel-2 configurée"""
+        cursor, _ = IngestionCursorModel.objects.get_or_create(
+            region=self._get_bondoukou_region(),
+            collection=GEEConfig.SENTINEL2_COLLECTION
+        )
+        return cursor
+
+    def get_new_images(self, months_back: int = 3) -> Tuple[IngestionCursorModel, List[Dict]]:
         """
-        Calcule les indices spectraux NDVI, NDWI, NDTI pour une image
+        Scènes postérieures au curseur d'ingestion (fenêtre months_back au premier scan)
+
+        Returns:
+            (curseur, images au format de get_recent_images)
+        """
+        cursor = self.get_ingestion_cursor()
+        return cursor, self.get_recent_images(months_back, min_time_start=cursor.last_time_start)
+
+    @staticmethod
+    def get_known_image_statuses(gee_asset_ids) -> Dict[str, str]:
+        """Statut de traitement des assets déjà en base, en une seule requête"""
+        return dict(ImageModel.objects
+                    .filter(gee_asset_id__in=list(gee_asset_ids))
+                    .values_list('gee_asset_id', 'processing_status'))
+
+    @staticmethod
+    def advance_ingestion_cursor(cursor: IngestionCursorModel, scenes: List[Dict],
+                                 failed_asset_ids: Optional[set] = None) -> IngestionCursorModel:
+        """
+        Avance le curseur jusqu'à la scène la plus récente traitée
+
+        Le curseur ne dépasse jamais une scène en échec (elle sera relistée au
+        prochain scan) et ne recule jamais (mise à jour conditionnelle, sûre
+        face à des scans concurrents).
+        """
+        failed_asset_ids = failed_asset_ids or set()
+        failed_times = [scene['time_start'] for scene in scenes if scene['gee_asset_id'] in failed_asset_ids]
+        handled = [scene for scene in scenes if scene['gee_asset_id'] not in failed_asset_ids
+                   and (not failed_times or scene['time_start'] < min(failed_times))]
+
+        now = timezone.now()
+        if not handled:
+            IngestionCursorModel.objects.filter(pk=cursor.pk).update(last_scan_at=now)
+            cursor.last_scan_at = now
+            return cursor
+
+        latest = max(handled, key=lambda scene: scene['time_start'])
+        IngestionCursorModel.objects.filter(
+            Q(last_time_start__isnull=True) | Q(last_time_start__lt=latest['time_start']),
+            pk=cursor.pk
+        ).update(
+            last_time_start=latest['time_start'],
+            last_asset_id=latest['gee_asset_id'],
+            last_scan_at=now,
+            scenes_ingested=F('scenes_ingested') + len(handled)
+        )
+        cursor.refresh_from_db()
+        return cursor
+
+    def calculate_spectral_indices(self, gee_asset_id: str, raise_errors: bool = False) -> Dict:
+        """
+        Calcule les indices spectraux configurés (NDVI, NDWI, NDTI...) pour une image
+
+        Tous les indices de GEEConfig.SPECTRAL_INDICES sont calculés par le backend
+        en une seule requête (image multi-bandes réduite par un seul reduceRegion
+        côté GEE).
 
         Args:
             gee_asset_id: ID de l'asset Google Earth Engine
+            raise_errors: Propager les exceptions du backend (tâches Celery, pour
+                          classer l'erreur et choisir la relance) au lieu de retourner {}
 
         Returns:
-            Dictionnaire avec les données des indices
+            Dictionnaire avec les données des indices ({'ndvi_data': {...}, ...})
         """
         try:
-            # Chargement image
-            image = ee.Image(gee_asset_id)
-            bondoukou_geom = GEEConfig.get_bondoukou_geometry()
-
-            # Clip sur zone Bondoukou
-            image_clipped = image.clip(bondoukou_geom)
-
-            # Calcul NDVI = (NIR - Red) / (NIR + Red)
-            ndvi = image_clipped.normalizedDifference(['B8', 'B4']).rename('NDVI')
-
-            # Calcul NDWI = (Green - NIR) / (Green + NIR)
-            ndwi = image_clipped.normalizedDifference(['B3', 'B8']).rename('NDWI')
-
-            # Calcul NDTI = (SWIR1 - SWIR2) / (SWIR1 + SWIR2)
-            ndti = image_clipped.normalizedDifference(['B11', 'B12']).rename('NDTI')
-
-            # Statistiques des indices sur la zone
-            ndvi_stats = ndvi.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    ee.Reducer.stdDev(), sharedInputs=True
-                ),
-                geometry=bondoukou_geom,
-                scale=10,
-                maxPixels=1e9
-            ).getInfo()
-
-            ndwi_stats = ndwi.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    ee.Reducer.stdDev(), sharedInputs=True
-                ),
-                geometry=bondoukou_geom,
-                scale=10,
-                maxPixels=1e9
-            ).getInfo()
-
-            ndti_stats = ndti.reduceRegion(
-                reducer=ee.Reducer.mean().combine(
-                    ee.Reducer.stdDev(), sharedInputs=True
-                ),
-                geometry=bondoukou_geom,
-                scale=10,
-                maxPixels=1e9
-            ).getInfo()
+            stats = self.backend.compute_index_statistics(gee_asset_id)
+            return self._format_index_stats(stats)
 
-            return {
-                'ndvi_data': {
-                    'mean': ndvi_stats.get('NDVI_mean'),
-                    'stddev': ndvi_stats.get('NDVI_stdDev'),
-                    'computed_at': timezone.now().isoformat()
-                },
-                'ndwi_data': {
-                    'mean': ndwi_stats.get('NDWI_mean'),
-                    'stddev': ndwi_stats.get('NDWI_stdDev'),
-                    'computed_at': timezone.now().isoformat()
+        except Exception as e:
+            print(f"Erreur calcul indices spectraux: {e}")
+            if raise_errors:
+                raise
+            return {}
+
+    @staticmethod
+    def _format_index_stats(stats: Dict, computed_at: Optional[str] = None) -> Dict:
+        """
+        Convertit la sortie à plat de reduceRegion (NDVI_mean, NDVI_p50...) en
+        dictionnaire par indice
+
+        Args:
+            stats: Résultat de reduceRegion sur l'image multi-bandes
+            computed_at: Horodatage ISO du calcul (défaut: maintenant)
+
+        Returns:
+            {'ndvi_data': {'mean', 'stddev', 'min', 'max', 'percentiles', 'pixel_count', 'computed_at'}, ...}
+        """
+        computed_at = computed_at or timezone.now().isoformat()
+        indices_data = {}
+
+        for name in GEEConfig.SPECTRAL_INDICES:
+            indices_data[f'{name.lower()}_data'] = {
+                'mean': stats.get(f'{name}_mean'),
+                'stddev': stats.get(f'{name}_stdDev'),
+                'min': stats.get(f'{name}_min'),
+                'max': stats.get(f'{name}_max'),
+                'percentiles': {
+                    f'p{p}': stats.get(f'{name}_p{p}') for p in GEEConfig.STATS_PERCENTILES
                 },
-                'ndti_data': {
-                    'mean': ndti_stats.get('NDTI_mean'),
-                    'stddev': ndti_stats.get('NDTI_stdDev'),
-                    'computed_at': timezone.now().isoformat()
-                }
+                'pixel_count': stats.get(f'{name}_count'),
+                'computed_at': computed_at
             }
 
+        return indices_data
+
+    def get_collection_indices(self, months_back: int = 3,
+                               exclude_asset_ids: Optional[set] = None,
+                               min_time_start: Optional[int] = None) -> List[Dict]:
+        """
+        Calcule côté GEE les indices de toutes les scènes récentes en une passe
+
+        Avec le backend GEE, le reducer des indices est appliqué par map() sur
+        l'ImageCollection filtrée ; chaque scène devient une Feature (métadonnées
+        + statistiques) rapatriée par pages de GEEConfig.BATCH_PAGE_SIZE.
+
+        Args:
+            months_back: Nombre de mois en arrière (défaut: 3)
+            exclude_asset_ids: Assets déjà connus à ne pas recalculer
+            min_time_start: Curseur d'ingestion (ms) ; seules les scènes plus récentes sont calculées
+
+        Returns:
+            Liste de dictionnaires {'gee_asset_id', 'capture_date', 'cloud_coverage',
+            'time_start', 'indices'} pour chaque nouvelle scène
+        """
+        try:
+            end_date = datetime.now()
+            if min_time_start is not None:
+                start_date = datetime.fromtimestamp(min_time_start / 1000)
+            else:
+                start_date = end_date - timedelta(days=months_back * 30)
+            rows = self.backend.compute_collection_index_statistics(
+                start_date, end_date, exclude_asset_ids, min_time_start
+            )
+
+            computed_at = timezone.now().isoformat()
+            scenes = []
+            for properties in rows:
+                time_start = properties['time_start']
+                scenes.append({
+                    'gee_asset_id': properties['gee_asset_id'],
+                    'time_start': time_start,
+                    'capture_date': datetime.fromtimestamp(time_start / 1000).date(),
+                    'cloud_coverage': properties.get('cloud_coverage') or 0,
+                    'indices': self._format_index_stats(properties, computed_at),
+                })
+
+            return scenes
+
         except Exception as e:
-            print(f"Erreur calcul indices spectraux: {e}")
-            return {}
+            print(f"Erreur calcul groupé des indices: {e}")
+            return []
+
+    def ingest_collection_batch(self, months_back: int = 3, user_id: int = None) -> Dict:
+        """
+        Ingestion groupée : indices calculés sur toute la collection puis
+        insertion en masse des ImageModel (statut COMPLETED)
+
+        Args:
+            months_back: Nombre de mois en arrière
+            user_id: ID utilisateur ayant demandé l'ingestion
+
+        Returns:
+            Compteurs {'created', 'updated', 'skipped_existing', 'incomplete', 'detections_queued'}
+        """
+        summary = {'created': 0, 'updated': 0, 'skipped_existing': 0, 'incomplete': 0, 'detections_queued': 0}
+        cursor = self.get_ingestion_cursor()
+
+        # Images déjà connues dans la fenêtre du curseur (une requête) : seules celles en erreur
+        # sont recalculées
+        known_images = ImageModel.objects.all()
+        if cursor.last_time_start is not None:
+            cursor_date = datetime.fromtimestamp(cursor.last_time_start / 1000).date()
+            known_images = known_images.filter(capture_date__gte=cursor_date - timedelta(days=1))
+        existing = dict(known_images.values_list('gee_asset_id', 'processing_status'))
+        errored_ids = {asset_id for asset_id, status in existing.items()
+                       if status == ImageModel.ProcessingStatus.ERROR}
+        summary['skipped_existing'] = len(existing) - len(errored_ids)
+
+        scenes = self.get_collection_indices(
+            months_back=months_back,
+            exclude_asset_ids=set(existing) - errored_ids,
+            min_time_start=cursor.last_time_start
+        )
+        if not scenes:
+            self.advance_ingestion_cursor(cursor, [])
+            return summary
+
+        bondoukou_region = self._get_bondoukou_region()
+        now = timezone.now()
+
+        to_create = []
+        to_update = []
+        errored_records = {
+            image.gee_asset_id: image
+            for image in ImageModel.objects.filter(gee_asset_id__in=errored_ids)
+        }
+
+        for scene in scenes:
+            indices = scene['indices']
+            if not all(indices.get(f'{name}_data', {}).get('mean') is not None
+                       for name in ('ndvi', 'ndwi', 'ndti')):
+                # Scène entièrement masquée sur la zone : rien d'exploitable
+                summary['incomplete'] += 1
+                continue
+
+            fields = {
+                'ndvi_data': indices['ndvi_data'],
+                'ndwi_data': indices['ndwi_data'],
+                'ndti_data': indices['ndti_data'],
+                'ndvi_mean': indices['ndvi_data']['mean'],
+                'ndwi_mean': indices['ndwi_data']['mean'],
+                'ndti_mean': indices['ndti_data']['mean'],
+                'processing_status': ImageModel.ProcessingStatus.COMPLETED,
+                'processed_at': now,
+                'processing_error': None,
+            }
+
+            image_record = errored_records.get(scene['gee_asset_id'])
+            if image_record:
+                for field, value in fields.items():
+                    setattr(image_record, field, value)
+                to_update.append(image_record)
+                continue
+
+            capture_datetime = datetime.fromtimestamp(scene['time_start'] / 1000)
+            to_create.append(ImageModel(
+                name=f"Sentinel2_{capture_datetime.strftime('%Y%m%d_%H%M%S')}",
+                region=bondoukou_region,
+                capture_date=scene['capture_date'],
+                satellite_source='SENTINEL2',
+                cloud_coverage=scene['cloud_coverage'],
+                resolution=10,
+                gee_asset_id=scene['gee_asset_id'],
+                gee_collection=GEEConfig.SENTINEL2_COLLECTION,
+                center_lat=GEEConfig.BONDOUKOU_CENTER[1],
+                center_lon=GEEConfig.BONDOUKOU_CENTER[0],
+                requested_by_id=user_id,
+                **fields
+            ))
+
+        insert_started_at = timezone.now()
+        with transaction.atomic():
+            # ignore_conflicts : une ingestion concurrente a pu créer le même asset entre-temps
+            ImageModel.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_update:
+                ImageModel.objects.bulk_update(to_update, fields=[
+                    'ndvi_data', 'ndwi_data', 'ndti_data',
+                    'ndvi_mean', 'ndwi_mean', 'ndti_mean',
+                    'processing_status', 'processed_at', 'processing_error'
+                ])
+
+        # Lignes réellement insérées : les conflits ignorés n'en font pas partie
+        summary['created'] = ImageModel.objects.filter(
+            gee_asset_id__in=[image.gee_asset_id for image in to_create],
+            created_at__gte=insert_started_at
+        ).count() if to_create else 0
+        summary['skipped_existing'] += len(to_create) - summary['created']
+        summary['updated'] = len(to_update)
+
+        # Détection lancée dès l'ingestion pour chaque image exploitable (idempotente par image)
+        ingested_asset_ids = [image.gee_asset_id for image in to_create + to_update]
+        image_ids = list(ImageModel.objects.filter(
+            gee_asset_id__in=ingested_asset_ids,
+            processing_status=ImageModel.ProcessingStatus.COMPLETED,
+            detection_status=ImageModel.DetectionStatus.PENDING
+        ).values_list('id', flat=True))
+        for image_id in image_ids:
+            detect_mining_activity_task.delay(image_id)
+        summary['detections_queued'] = len(image_ids)
+
+        # Scènes sans pixel exploitable comprises : elles ne deviendront pas exploitables plus tard
+        self.advance_ingestion_cursor(cursor, scenes)
+        return summary
+
+    @staticmethod
+    def _get_bondoukou_region() -> RegionModel:
+        """Récupère la région Bondoukou (ou la crée si elle n'existe pas)"""
+        bondoukou_region, _ = RegionModel.objects.get_or_create(
+            name='BONDOUKOU',
+            defaults={
+                'code': 'BDK', 'area_km2': 12000, # Valeurs par défaut
+                'center_lat': GEEConfig.BONDOUKOU_CENTER[1],
+                'center_lon': GEEConfig.BONDOUKOU_CENTER[0]
+            }
+        )
+        return bondoukou_region
 
     def detect_anomalies(self, current_indices: Dict, reference_indices: Dict) -> Dict:
         """
@@ -187,6 +408,26 @@ class EarthEngineService:
             print(f"Erreur détection anomalies: {e}")
             return {}
 
+    def detect_change_zones(self, gee_asset_id: str) -> Optional[List[Dict]]:
+        """
+        Zones de changement par pixel de la scène sur la zone Bondoukou
+
+        Returns:
+            Zones triées par surface décroissante (voir BaseImageryBackend.detect_change_zones),
+            ou None si la détection de changement est désactivée, impossible faute de
+            scènes de référence, ou en erreur
+        """
+        if not DetectionConfig.CHANGE_DETECTION_ENABLED:
+            return None
+
+        try:
+            return self.backend.detect_change_zones(
+                gee_asset_id, GEEConfig.BONDOUKOU_BOUNDS, DetectionConfig.CHANGE_SCALE_METERS
+            )
+        except Exception as e:
+            print(f"Erreur détection de changement ({gee_asset_id}): {e}")
+            return None
+
     def generate_spectral_maps(self, gee_asset_id: str) -> Dict:
         """
         Génère les cartes de visualisation des indices spectraux
@@ -196,34 +437,37 @@ class EarthEngineService:
 
         Returns:
             URLs des cartes de visualisation
+
+        Les URLs sont mises en cache (SpectralMapCache) pour la durée de vie des
+        jetons GEE ; en cas d'absence, les appels getMapId partent en parallèle.
         """
         try:
-            # Chargement image
-            image = ee.Image(gee_asset_id)
-            bondoukou_geom = GEEConfig.get_bondoukou_geometry()
-
-            # Clip sur zone Bondoukou
-            image_clipped = image.clip(bondoukou_geom)
-
-            # Calcul indices
-            ndvi = image_clipped.normalizedDifference(['B8', 'B4']).rename('NDVI')
-            ndwi = image_clipped.normalizedDifference(['B3', 'B8']).rename('NDWI')
-            ndti = image_clipped.normalizedDifference(['B11', 'B12']).rename('NDTI')
-
             # Paramètres de visualisation
             ndvi_vis = {'min': -1, 'max': 1, 'palette': ['red', 'yellow', 'green']}
             ndwi_vis = {'min': -1, 'max': 1, 'palette': ['white', 'blue']}
             ndti_vis = {'min': -1, 'max': 1, 'palette': ['blue', 'white', 'red']}
+            map_specs = [('NDVI', ndvi_vis), ('NDWI', ndwi_vis), ('NDTI', ndti_vis)]
+
+            # Génération URLs de tuiles (cache, sinon getMapId concurrents)
+            map_cache = SpectralMapCache()
+            urls = {index_name: map_cache.get(gee_asset_id, index_name, vis) for index_name, vis in map_specs}
+            missing = [(index_name, vis) for index_name, vis in map_specs if urls[index_name] is None]
+
+            if missing:
+                def fetch(spec):
+                    index_name, vis = spec
+                    return index_name, map_cache.get_or_create(
+                        gee_asset_id, index_name, vis,
+                        lambda: self.backend.get_map_url(gee_asset_id, index_name, vis)
+                    )
 
-            # Génération URLs de tuiles
-            ndvi_url = ndvi.getMapId(ndvi_vis)['tile_fetcher'].url_format
-            ndwi_url = ndwi.getMapId(ndwi_vis)['tile_fetcher'].url_format
-            ndti_url = ndti.getMapId(ndti_vis)['tile_fetcher'].url_format
+                with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                    urls.update(executor.map(fetch, missing))
 
             return {
-                'ndvi_map_url': ndvi_url,
-                'ndwi_map_url': ndwi_url,
-                'ndti_map_url': ndti_url,
+                'ndvi_map_url': urls['NDVI'],
+                'ndwi_map_url': urls['NDWI'],
+                'ndti_map_url': urls['NDTI'],
                 'bounds': {
                     'north': GEEConfig.BONDOUKOU_BOUNDS['lat_max'],
                     'south': GEEConfig.BONDOUKOU_BOUNDS['lat_min'],
@@ -258,48 +502,189 @@ class EarthEngineService:
             return None
 
         try:
-            image = ee.Image(image_asset_id)
-
-            # Définir le point central
-            point = ee.Geometry.Point(point_coords)
+            return self.backend.get_spectral_patch(
+                point_coords, image_asset_id,
+                patch_size_pixels=patch_size_pixels,
+                scale=scale
+            )
 
-            # Calculer la taille du buffer en mètres pour obtenir un carré
-            # La moitié de la taille totale du patch en mètres
-            buffer_radius_meters = (patch_size_pixels * scale) / 2
+        except Exception as e:
+            print(f"Erreur lors de l'extraction du patch: {e}")
+            return None
 
-            # Créer une géométrie carrée (patch)
-            # buffer().bounds() est une bonne approximation pour un carré autour d'un point.
-            patch_geometry = point.buffer(buffer_radius_meters).bounds(proj='EPSG:4326', maxError=1)
+    def get_spectral_patch_array(self, point_coords: Tuple[float, float],
+                                 image_asset_id: str,
+                                 patch_size_pixels: int = 48,
+                                 scale: int = 10) -> Optional[np.ndarray]:
+        """
+        Patch spectral sous forme de tableau (taille, taille, 3) float32 [NDVI, NDWI, NDTI]
 
-            # Calculer les indices spectraux (sans clip initial à une grande région)
-            # Les bandes sont nommées Bx pour Sentinel-2. S'adapter si autre source.
-            ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI')
-            ndwi = image.normalizedDifference(['B3', 'B8']).rename('NDWI') # Standard NDWI: (Green - NIR) / (Green + NIR)
-            ndti = image.normalizedDifference(['B11', 'B12']).rename('NDTI') # Tirsoreh's NDTI: (SWIR1 - SWIR2) / (SWIR1 + SWIR2)
+        Le patch est d'abord cherché dans le cache disque partagé (voir
+        SpectralPatchCache) ; il n'est extrait du backend qu'en cas d'absence,
+        en bloc binaire NPY ou au format getRegion selon GEEConfig.PATCH_TRANSFER_MODE.
 
-            # Empiler les indices en une seule image à 3 bandes
-            stacked_indices = ee.Image.cat([ndvi, ndwi, ndti])
+        Args:
+            point_coords: Tuple (longitude, latitude) du centre du patch.
+            image_asset_id: ID de l'asset Google Earth Engine.
+            patch_size_pixels: Taille du patch en pixels (défaut: 48).
+            scale: Résolution en mètres par pixel (défaut: 10).
 
-            # Extraire les données pour la région du patch
-            # getRegion retourne une liste de listes, la première ligne est l'en-tête.
-            patch_data = stacked_indices.getRegion(
-                geometry=patch_geometry,
+        Returns:
+            Tableau NumPy du patch, ou None si l'extraction échoue.
+        """
+        lon, lat = point_coords
+        cache = get_patch_cache(patch_size_pixels)
+
+        if cache:
+            cached_patch = cache.get(image_asset_id, lon, lat, patch_size_pixels, scale)
+            if cached_patch is not None:
+                return cached_patch
+
+        if GEEConfig.PATCH_TRANSFER_MODE == 'npy':
+            patch = self._fetch_patch_array(point_coords, image_asset_id, patch_size_pixels, scale)
+        else:
+            raw_patch_data = self.get_spectral_patch(
+                point_coords=point_coords,
+                image_asset_id=image_asset_id,
+                patch_size_pixels=patch_size_pixels,
                 scale=scale
-            ).getInfo() # getInfo() exécute le calcul et récupère les données côté client
+            )
+            patch = self._region_to_array(raw_patch_data, patch_size_pixels)
 
-            return patch_data
+        if patch is not None and cache:
+            cache.put(image_asset_id, lon, lat, patch_size_pixels, scale, patch)
+        return patch
 
-        except ee.EEException as e:
-            print(f"Erreur GEE lors de l'extraction du patch: {e}")
+    def _fetch_patch_array(self, point_coords: Tuple[float, float], image_asset_id: str,
+                           patch_size_pixels: int, scale: int) -> Optional[np.ndarray]:
+        """Extraction binaire du patch via le backend (sans objet Python par pixel)"""
+        try:
+            patch = self.backend.get_spectral_patch_array(
+                point_coords=point_coords,
+                asset_id=image_asset_id,
+                patch_size_pixels=patch_size_pixels,
+                scale=scale
+            )
+        except Exception as e:
+            print(f"Erreur lors de l'extraction binaire du patch spectral: {e}")
             return None
+
+        if patch is None or patch.shape != (patch_size_pixels, patch_size_pixels, 3):
+            print(f"Erreur: Forme du patch spectral incorrecte: {None if patch is None else patch.shape}")
+            return None
+        return patch
+
+    def get_spectral_block(self, image_asset_id: str, lon_min: float, lat_max: float,
+                           tile_rows: int, tile_cols: int, tile_size: int, stride: int,
+                           pixel_width: float, pixel_height: float, scale: int) -> Optional[np.ndarray]:
+        """
+        Bloc (hauteur, largeur, 3) float32 couvrant tile_rows x tile_cols tuiles chevauchantes
+
+        Les tuiles (taille tile_size, pas stride <= tile_size, coin nord-ouest en
+        (lon_min, lat_max)) sont cherchées dans le cache disque partagé : si toutes y
+        sont, le bloc est reconstitué sans appel backend ; sinon il est extrait en un
+        appel (transfert comptabilisé par le backend) et les tuiles absentes sont
+        mises en cache.
+
+        Returns:
+            Tableau NumPy du bloc, ou None si l'extraction échoue.
+        """
+        height = (tile_rows - 1) * stride + tile_size
+        width = (tile_cols - 1) * stride + tile_size
+        rows, cols = np.meshgrid(np.arange(tile_rows), np.arange(tile_cols), indexing='ij')
+        rows, cols = rows.ravel(), cols.ravel()
+        centers = list(zip(lon_min + (cols * stride + tile_size / 2) * pixel_width,
+                           lat_max - (rows * stride + tile_size / 2) * pixel_height))
+
+        cache = get_patch_cache(tile_size)
+        if cache:
+            tiles, found = cache.get_many(image_asset_id, centers, tile_size, scale)
+            if found.all():
+                block = np.empty((height, width, 3), dtype=np.float32)
+                for row, col, tile in zip(rows, cols, tiles):
+                    block[row * stride:row * stride + tile_size, col * stride:col * stride + tile_size] = tile
+                return block
+
+        try:
+            block = self.backend.get_spectral_block(
+                image_asset_id, lon_min=lon_min, lat_max=lat_max, width=width, height=height,
+                pixel_width=pixel_width, pixel_height=pixel_height
+            )
         except Exception as e:
-            print(f"Erreur générale lors de l'extraction du patch: {e}")
+            print(f"Erreur lors de l'extraction du bloc spectral: {e}")
+            return None
+
+        if block is None or block.shape != (height, width, 3):
+            print(f"Erreur: Forme du bloc spectral incorrecte: {None if block is None else block.shape}")
             return None
 
+        if cache:
+            missing = np.flatnonzero(~found)
+            tiles = np.stack([block[rows[i] * stride:rows[i] * stride + tile_size,
+                                    cols[i] * stride:cols[i] * stride + tile_size] for i in missing])
+            try:
+                cache.put_many(image_asset_id, [centers[i] for i in missing], tile_size, scale, tiles)
+            except Exception as e:
+                print(f"Erreur mise en cache des tuiles du bloc: {e}")
+        return block
+
+    def get_patch_transfer_stats(self, since: Optional[Dict] = None) -> Dict:
+        """
+        Statistiques cumulées des transferts binaires (patchs et blocs) du backend
+
+        Args:
+            since: Statistiques relevées plus tôt ; le résultat couvre alors
+                uniquement les transferts effectués depuis
+
+        Returns:
+            Dict avec 'patches', 'bytes', 'decode_seconds' et les moyennes par transfert
+        """
+        stats = self.backend.get_transfer_stats()
+        if since:
+            stats = {key: stats[key] - since[key] for key in ('patches', 'bytes', 'decode_seconds')}
+        count = stats['patches']
+        stats['avg_bytes_per_patch'] = stats['bytes'] / count if count else 0
+        stats['avg_decode_ms'] = stats['decode_seconds'] * 1000 / count if count else 0.0
+        return stats
+
+    @staticmethod
+    def _region_to_array(raw_patch_data: Optional[List], patch_size_pixels: int) -> Optional[np.ndarray]:
+        """Convertit une sortie getRegion (en-tête + lignes) en tableau (taille, taille, 3)"""
+        if not raw_patch_data or len(raw_patch_data) < 2:
+            print("Erreur: Impossible de récupérer les données du patch spectral.")
+            return None
+
+        header = raw_patch_data[0]
+        pixel_values_list = raw_patch_data[1:]
+
+        expected_pixels = patch_size_pixels * patch_size_pixels
+        if len(pixel_values_list) != expected_pixels:
+            # getRegion peut retourner moins de pixels si le patch est au bord de l'image source ;
+            # pour ce modèle, une taille fixe est cruciale.
+            print(f"Erreur: Nombre de pixels incorrect. Attendu {expected_pixels}, reçu {len(pixel_values_list)}.")
+            return None
+
+        try:
+            columns = [header.index('NDVI'), header.index('NDWI'), header.index('NDTI')]
+        except ValueError as e:
+            print(f"Erreur: Une ou plusieurs colonnes d'indice manquantes dans l'en-tête GEE: {header}. Détail: {e}")
+            return None
+
+        # Les pixels masqués (None) deviennent NaN puis 0
+        values = np.array([[row[i] for i in columns] for row in pixel_values_list], dtype=np.float32)
+        values = np.nan_to_num(values, nan=0.0)
+        return values.reshape((patch_size_pixels, patch_size_pixels, 3))
+
     def process_image_complete(self, gee_asset_id: str, user_id: int = None) -> Optional[ImageModel]:
         """
         Traitement complet d'une image : calcul indices + sauvegarde DB
 
+        Les soumissions concurrentes d'un même asset (scans d'ingestion, analyses
+        API) sont fusionnées : un verrou de soumission par asset sérialise la
+        vérification et la création, et une image en erreur n'est remise en file
+        que par un UPDATE conditionnel. Le doublon reçoit l'enregistrement du
+        traitement déjà lancé.
+
         Args:
             gee_asset_id: ID asset Google Earth Engine
             user_id: ID utilisateur ayant demandé l'analyse
@@ -307,6 +692,77 @@ class EarthEngineService:
         Returns:
             Instance ImageModel créée (avec statut PENDING) ou existante, ou None si erreur de création initiale.
         """
+        submit_lock = AssetLock(gee_asset_id, 'submit', GEEConfig.IMAGE_SUBMIT_LOCK_TIMEOUT)
+        if not submit_lock.acquire():
+            print(f"Soumission concurrente en cours pour {gee_asset_id} : rattachement au traitement existant")
+            return wait_for(lambda: ImageModel.objects.filter(gee_asset_id=gee_asset_id).first(),
+                            timeout=GEEConfig.IMAGE_SUBMIT_WAIT_SECONDS)
+
+        try:
+            image_record, created = self.get_or_create_image_record(gee_asset_id, user_id)
+            if image_record is None:
+                return None
+
+            if created or self.requeue_errored_image(image_record.id):
+                # Lancement de la tâche Celery pour le traitement asynchrone
+                result = process_gee_image_task.delay(image_record.id)
+                ImageModel.objects.filter(id=image_record.id).update(processing_task_id=result.id)
+                image_record.processing_status = ImageModel.ProcessingStatus.PENDING
+                image_record.processing_task_id = result.id
+                print(f"Tâche Celery process_gee_image_task lancée pour l'image ID: {image_record.id}")
+
+            return image_record
+        finally:
+            submit_lock.release()
+
+    @staticmethod
+    def requeue_errored_image(image_id: int) -> bool:
+        """Repasse une image en erreur à PENDING (UPDATE conditionnel : un seul appelant réussit)"""
+        return ImageModel.objects.filter(
+            id=image_id, processing_status=ImageModel.ProcessingStatus.ERROR
+        ).update(
+            processing_status=ImageModel.ProcessingStatus.PENDING,
+            processing_error=None,
+            updated_at=timezone.now()
+        ) == 1
+
+    @staticmethod
+    def claim_image_for_processing(image_id: int, task_id: Optional[str] = None,
+                                   include_completed: bool = False) -> bool:
+        """
+        Réserve une image pour le calcul des indices (UPDATE ... WHERE processing_status IN (...))
+
+        Seules les images PENDING ou ERROR (ou PROCESSING dont la réservation a
+        dépassé IMAGE_TASK_LEASE_SECONDS : worker perdu) peuvent être réservées ;
+        include_completed autorise un recalcul explicite.
+        """
+        statuses = [ImageModel.ProcessingStatus.PENDING, ImageModel.ProcessingStatus.ERROR]
+        if include_completed:
+            statuses.append(ImageModel.ProcessingStatus.COMPLETED)
+
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=GEEConfig.IMAGE_TASK_LEASE_SECONDS)
+        return ImageModel.objects.filter(
+            Q(processing_status__in=statuses) |
+            Q(processing_status=ImageModel.ProcessingStatus.PROCESSING, updated_at__lt=stale_before),
+            id=image_id,
+        ).update(
+            processing_status=ImageModel.ProcessingStatus.PROCESSING,
+            processing_error=None,
+            processing_task_id=task_id,
+            updated_at=now
+        ) == 1
+
+    def get_or_create_image_record(self, gee_asset_id: str, user_id: int = None) -> Tuple[Optional[ImageModel], bool]:
+        """
+        Enregistrement ImageModel d'un asset : existant (complété, en attente ou en cours) ou créé en PENDING
+
+        Ne lance aucune tâche : l'appelant choisit comment calculer les indices
+        (tâche isolée ou pipeline d'analyse).
+
+        Returns:
+            (image_record, created) ; image_record vaut None si la création initiale échoue
+        """
         try:
             # VÉRIFICATION SI IMAGE EXISTE DÉJÀ ET EST COMPLÉTÉE
             existing_image = ImageModel.objects.filter(
@@ -316,7 +772,7 @@ class EarthEngineService:
 
             if existing_image:
                 print(f"Image {gee_asset_id} déjà COMPLETED, récupération...")
-                return existing_image
+                return existing_image, False
 
             # Vérifier si une image PENDING ou PROCESSING existe déjà pour éviter les doublons de tâches
             # On pourrait ajouter une logique pour vérifier l'âge de ces tâches ici.
@@ -327,24 +783,28 @@ class EarthEngineService:
 
             if pending_or_processing_image:
                 print(f"Image {gee_asset_id} est déjà en cours de traitement ou en attente. ID: {pending_or_processing_image.id}")
-                # Optionnel: relancer la tâche si elle semble bloquée (ex: trop vieille)
-                # For now, just return the existing record.
-                return pending_or_processing_image
+                return pending_or_processing_image, False
 
+            # Image en erreur : même enregistrement (gee_asset_id est unique), la remise en file revient à l'appelant
+            errored_image = ImageModel.objects.filter(
+                gee_asset_id=gee_asset_id,
+                processing_status=ImageModel.ProcessingStatus.ERROR
+            ).first()
 
-            # Récupération métadonnées image depuis GEE
-            image_ee = ee.Image(gee_asset_id)
-            properties = image_ee.getInfo()['properties'] # Peut lever une ee.EEException
+            if errored_image:
+                print(f"Image {gee_asset_id} précédemment en erreur. ID: {errored_image.id}")
+                return errored_image, False
+
+            # Récupération métadonnées image depuis le backend (GEE ou local)
+            try:
+                properties = self.backend.get_image_properties(gee_asset_id)
+            except Exception as e:
+                print(f"Erreur lors de la récupération des métadonnées pour {gee_asset_id}: {e}")
+                # Pas de image_record créé ici si la lecture échoue, donc pas de statut d'erreur à sauvegarder.
+                return None, False
 
             # Récupération région Bondoukou (ou création si n'existe pas)
-            bondoukou_region, _ = RegionModel.objects.get_or_create(
-                name='BONDOUKOU',
-                defaults={
-                    'code': 'BDK', 'area_km2': 12000, # Valeurs par défaut
-                    'center_lat': GEEConfig.BONDOUKOU_CENTER[1],
-                    'center_lon': GEEConfig.BONDOUKOU_CENTER[0]
-                }
-            )
+            bondoukou_region = self._get_bondoukou_region()
 
             # Création de l'enregistrement ImageModel avec statut PENDING
             image_record = ImageModel.objects.create(
@@ -363,17 +823,13 @@ class EarthEngineService:
                 # Les champs ndvi_data, processed_at etc. seront remplis par la tâche Celery
             )
             print(f"Image record {image_record.id} créé avec statut PENDING pour GEE ID {gee_asset_id}.")
+            return image_record, True
 
-            # Lancement de la tâche Celery pour le traitement asynchrone
-            process_gee_image_task.delay(image_record.id)
-            print(f"Tâche Celery process_gee_image_task lancée pour l'image ID: {image_record.id}")
-
-            return image_record
+        except IntegrityError:
+            # Créé entre-temps par un autre processus (gee_asset_id unique) : on rejoint cet enregistrement
+            print(f"Image {gee_asset_id} créée par une soumission concurrente, rattachement.")
+            return ImageModel.objects.filter(gee_asset_id=gee_asset_id).first(), False
 
-        except ee.EEException as e:
-            print(f"Erreur GEE lors de la récupération des métadonnées pour {gee_asset_id}: {e}")
-            # Pas de image_record créé ici si getInfo() échoue, donc pas de statut d'erreur à sauvegarder sur un objet.
-            return None
         except Exception as e:
             print(f"Erreur générale lors de la création de l'enregistrement image pour {gee_asset_id}: {e}")
             # Si image_record a été créé avant l'erreur (peu probable ici, mais par sécurité)
@@ -381,4 +837,4 @@ class EarthEngineService:
                 image_record.processing_status = ImageModel.ProcessingStatus.ERROR
                 image_record.processing_error = f"Erreur de création initiale: {str(e)}"
                 image_record.save()
-            return None
\ No newline at end of file
+            return None, False
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+from gee.config import GEEConfig
+
+
+class EarthEngineSession:
+    """
+    Session Google Earth Engine partagée par le processus
+
+    L'authentification (lecture de la clé du compte de service + ee.Initialize)
+    est faite au premier besoin puis réutilisée par tous les services, viewsets
+    et tâches du processus. Après un fork (workers Celery prefork) ou un échec du
+    contrôle de santé, la session est réinitialisée au prochain appel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._initialized_pid = None
+        self.init_count = 0
+        self.initialized_at = None
+        self.last_error = None
+        self._last_failure = 0.0
+        self.last_health_check = None
+        self.last_health_ok = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized_pid == os.getpid()
+
+    def ensure_initialized(self) -> bool:
+        """Initialise Earth Engine si nécessaire ; retourne True si la session est utilisable"""
+        if self.initialized:
+            return True
+
+        with self._lock:
+            if self.initialized:
+                return True
+
+            # Après un échec, pas de nouvelle tentative avant EE_INIT_RETRY_SECONDS
+            if self.last_error and time.monotonic() - self._last_failure < GEEConfig.EE_INIT_RETRY_SECONDS:
+                return False
+
+            started = time.perf_counter()
+            if GEEConfig.initialize_ee():
+                self._initialized_pid = os.getpid()
+                self.init_count += 1
+                self.initialized_at = time.time()
+                self.last_error = None
+                print(f"Session GEE initialisée en {time.perf_counter() - started:.2f}s "
+                      f"(pid {os.getpid()}, initialisation n°{self.init_count})")
+                return True
+
+            self.last_error = "Échec de l'initialisation Google Earth Engine"
+            self._last_failure = time.monotonic()
+            return False
+
+    def health_check(self, force: bool = False) -> Dict:
+        """
+        Vérifie la session par une requête minimale (au plus une fois par EE_HEALTH_CHECK_INTERVAL)
+
+        Une session en échec est invalidée : le prochain ensure_initialized()
+        ré-authentifie.
+        """
+        now = time.time()
+        due = (force or self.last_health_check is None or
+               now - self.last_health_check >= GEEConfig.EE_HEALTH_CHECK_INTERVAL)
+
+        if due and self.ensure_initialized():
+            import ee
+            from gee.services.quota_governor import get_quota_governor
+
+            try:
+                get_quota_governor().call('health_check', ee.Number(1).getInfo)
+                self.last_health_ok = True
+            except Exception as e:
+                self.last_health_ok = False
+                self.last_error = f"Contrôle de santé GEE échoué: {e}"
+                self.invalidate()
+            self.last_health_check = now
+        elif due:
+            self.last_health_ok = False
+            self.last_health_check = now
+
+        return self.stats()
+
+    def invalidate(self):
+        """Force une nouvelle authentification au prochain appel"""
+        with self._lock:
+            self._initialized_pid = None
+
+    def stats(self) -> Dict:
+        return {
+            'initialized': self.initialized,
+            'init_count': self.init_count,
+            'initialized_at': self.initialized_at,
+            'last_health_check': self.last_health_check,
+            'healthy': self.last_health_ok,
+            'last_error': self.last_error,
+            'pid': os.getpid(),
+        }
+
+
+_session: Optional[EarthEngineSession] = None
+_session_lock = threading.Lock()
+
+
+def get_ee_session() -> EarthEngineSession:
+    """Session Earth Engine unique du processus"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = EarthEngineSession()
+    return _session
@@ -0,0 +1,135 @@
+from collections import Counter
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from alert.models.financial_risk_model import FinancialRiskModel
+from config.financial_settings import FinancialSettings
+
+# Colonnes lues par lot (une requête avec jointure sur la détection, sans instancier de modèle)
+_COLUMNS = (
+    'id', 'area_hectares', 'sensitive_zone_distance_km', 'occurrence_count',
+    'cost_per_hectare', 'estimated_loss', 'risk_level',
+    'detection__ndvi_anomaly_score', 'detection__ndwi_anomaly_score', 'detection__ndti_anomaly_score',
+)
+
+
+class FinancialRiskRepricingService:
+    """
+    Recalcul des pertes estimées et niveaux de risque après une modification de FinancialSettings
+
+    Les risques sont lus par lots (pagination sur la clé primaire), recalculés en tableaux NumPy
+    (FinancialSettings.estimate_losses) et seules les lignes modifiées sont réécrites par bulk_update.
+    """
+
+    # Écart relatif de perte en deçà duquel un risque est considéré inchangé
+    LOSS_TOLERANCE = 1e-9
+
+    @classmethod
+    def reprice(cls, chunk_size: int = 10000, dry_run: bool = False, region_id: Optional[int] = None,
+                sample_size: int = 10) -> Dict:
+        """
+        Args:
+            dry_run: Calcule le différentiel sans rien écrire
+            sample_size: Nombre de plus forts écarts de perte conservés dans le rapport
+
+        Returns:
+            {'scanned', 'changed', 'loss_before', 'loss_after', 'level_changes' {(ancien, nouveau): n},
+             'largest_changes' [{'id', 'loss_before', 'loss_after', 'level_before', 'level_after'}]}
+        """
+        report = {
+            'scanned': 0,
+            'changed': 0,
+            'loss_before': 0.0,
+            'loss_after': 0.0,
+            'level_changes': Counter(),
+            'largest_changes': [],
+        }
+
+        for chunk in cls._chunks(chunk_size, region_id):
+            ids = chunk['id']
+            old_losses = np.nan_to_num(chunk['estimated_loss'])
+            new_losses = FinancialSettings.estimate_losses(
+                chunk['area_hectares'],
+                chunk['detection__ndvi_anomaly_score'], chunk['detection__ndwi_anomaly_score'],
+                chunk['detection__ndti_anomaly_score'],
+                chunk['sensitive_zone_distance_km'], chunk['occurrence_count'],
+            )
+            new_levels = FinancialSettings.determine_risk_levels_from_losses(new_losses)
+            old_levels = chunk['risk_level']
+
+            changed = (
+                ~np.isclose(old_losses, new_losses, rtol=cls.LOSS_TOLERANCE, atol=0.0)
+                | np.isnan(chunk['estimated_loss'])
+                | (old_levels != new_levels)
+                | (chunk['cost_per_hectare'] != FinancialSettings.DEFAULT_COST_PER_HECTARE)
+            )
+
+            report['scanned'] += ids.size
+            report['changed'] += int(changed.sum())
+            report['loss_before'] += float(old_losses.sum())
+            report['loss_after'] += float(new_losses.sum())
+            level_moved = old_levels != new_levels
+            report['level_changes'].update(zip(old_levels[level_moved].tolist(), new_levels[level_moved].tolist()))
+            cls._keep_largest(report, ids, old_losses, new_losses, old_levels, new_levels, sample_size)
+
+            if not dry_run and changed.any():
+                now = timezone.now()
+                risks = [
+                    FinancialRiskModel(id=risk_id, estimated_loss=loss, risk_level=level,
+                                       cost_per_hectare=FinancialSettings.DEFAULT_COST_PER_HECTARE, updated_at=now)
+                    for risk_id, loss, level in zip(ids[changed].tolist(), new_losses[changed].tolist(),
+                                                    new_levels[changed].tolist())
+                ]
+                with transaction.atomic():
+                    FinancialRiskModel.objects.bulk_update(
+                        risks, ['estimated_loss', 'risk_level', 'cost_per_hectare', 'updated_at'], batch_size=2000
+                    )
+
+            print(f"Re-tarification: {report['scanned']} risques parcourus, {report['changed']} modifiés"
+                  f"{' (simulation)' if dry_run else ''}")
+
+        report['level_changes'] = dict(report['level_changes'])
+        return report
+
+    @staticmethod
+    def _chunks(chunk_size: int, region_id: Optional[int]) -> Iterator[Dict[str, np.ndarray]]:
+        """Lots de risques en colonnes NumPy, pagination par clé primaire croissante"""
+        queryset = FinancialRiskModel.objects.order_by('id')
+        if region_id is not None:
+            queryset = queryset.filter(detection__region_id=region_id)
+
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).values_list(*_COLUMNS)[:chunk_size])
+            if not rows:
+                return
+            columns = dict(zip(_COLUMNS, zip(*rows)))
+            chunk = {name: np.asarray(columns[name], dtype=np.float64) for name in _COLUMNS
+                     if name not in ('id', 'risk_level')}
+            chunk['id'] = np.asarray(columns['id'], dtype=np.int64)
+            chunk['risk_level'] = np.asarray(columns['risk_level'], dtype=object)
+            yield chunk
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _keep_largest(report: Dict, ids: np.ndarray, old_losses: np.ndarray, new_losses: np.ndarray,
+                      old_levels: np.ndarray, new_levels: np.ndarray, sample_size: int):
+        if sample_size <= 0:
+            return
+        deltas = np.abs(new_losses - old_losses)
+        top = np.argsort(deltas)[::-1][:sample_size]
+        candidates = report['largest_changes'] + [
+            {
+                'id': int(ids[i]),
+                'loss_before': float(old_losses[i]),
+                'loss_after': float(new_losses[i]),
+                'level_before': old_levels[i],
+                'level_after': str(new_levels[i]),
+            }
+            for i in top if deltas[i] > 0 or old_levels[i] != new_levels[i]
+        ]
+        candidates.sort(key=lambda change: abs(change['loss_after'] - change['loss_before']), reverse=True)
+        report['largest_changes'] = candidates[:sample_size]
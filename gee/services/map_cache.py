@@ -0,0 +1,86 @@
+import json
+import time
+import uuid
+import hashlib
+from typing import Callable, Dict, Optional
+
+from django.core.cache import caches
+
+from gee.config import GEEConfig
+
+
+class SpectralMapCache:
+    """
+    Cache TTL des URLs de tuiles (map IDs) par (asset, indice, paramètres de visualisation)
+
+    La durée de vie des entrées suit celle des jetons de carte GEE (moins une
+    marge de sécurité). En cas d'absence, un seul appelant par clé calcule
+    l'URL (verrou posé avec cache.add) ; les autres attendent qu'elle soit
+    publiée plutôt que de relancer getMapId.
+    """
+
+    KEY_PREFIX = 'gee:mapid'
+
+    def __init__(self, cache_alias: str = 'default'):
+        self.cache = caches[cache_alias]
+        self.ttl = max(GEEConfig.MAP_ID_TOKEN_LIFETIME - GEEConfig.MAP_ID_EXPIRY_MARGIN, 0)
+
+    @classmethod
+    def make_key(cls, asset_id: str, index_name: str, vis_params: Dict) -> str:
+        digest = hashlib.sha1(
+            json.dumps([asset_id, index_name, vis_params], sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        return f"{cls.KEY_PREFIX}:{digest}"
+
+    def get(self, asset_id: str, index_name: str, vis_params: Dict) -> Optional[str]:
+        return self.cache.get(self.make_key(asset_id, index_name, vis_params))
+
+    def get_or_create(self, asset_id: str, index_name: str, vis_params: Dict,
+                      create: Callable[[], str]) -> str:
+        """
+        URL en cache, sinon calculée par `create` avec protection contre les calculs concurrents
+
+        Si le détenteur du verrou n'a rien publié au bout de MAP_ID_LOCK_WAIT
+        secondes (échec ou lenteur), l'appelant calcule lui-même l'URL.
+        """
+        key = self.make_key(asset_id, index_name, vis_params)
+        url = self.cache.get(key)
+        if url is not None:
+            return url
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if self.cache.add(lock_key, token, timeout=GEEConfig.MAP_ID_LOCK_TIMEOUT):
+            try:
+                # Relecture : le détenteur précédent a pu publier et libérer entre get et add
+                url = self.cache.get(key)
+                if url is None:
+                    url = create()
+                    self.cache.set(key, url, timeout=self.ttl)
+                return url
+            finally:
+                if self.cache.get(lock_key) == token:
+                    self.cache.delete(lock_key)
+
+        url = self._wait_for(key, lock_key)
+        if url is not None:
+            return url
+
+        url = create()
+        self.cache.set(key, url, timeout=self.ttl)
+        return url
+
+    def _wait_for(self, key: str, lock_key: str) -> Optional[str]:
+        """Attend la publication de l'URL par le détenteur du verrou (délai croissant entre lectures)"""
+        deadline = time.monotonic() + GEEConfig.MAP_ID_LOCK_WAIT
+        delay = 0.05
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            url = self.cache.get(key)
+            if url is not None:
+                return url
+            if self.cache.get(lock_key) is None:
+                # Verrou libéré sans publication : le calcul a échoué
+                return self.cache.get(key)
+            delay = min(delay * 2, 0.5)
+        return None
@@ -1,17 +1,20 @@
+from datetime import timedelta
 from typing import List, Dict, Optional
+from django.contrib.gis.geos import Polygon
+from django.db.models import Q
 from django.utils import timezone
-import tensorflow as tf
-import numpy as np
-import os
-from django.conf import settings
 
-from config.financial_settings import FinancialSettings
 from image.models.image_model import ImageModel
 from detection.models.detection_model import DetectionModel
-from alert.models.alert_model import AlertModel
-from alert.models.financial_risk_model import FinancialRiskModel
 
+from gee.config import GEEConfig
+from gee.backends.base_backend import pixel_size_degrees
 from gee.services.earth_engine_service import EarthEngineService
+from gee.services.tile_scan_service import TileScanService
+from gee.services.batch_inference_service import get_inference_service
+from gee.services.detection_sink import DetectionSink
+from gee.services.model_registry import get_model_registry
+from gee.services.spectral_baseline_service import SpectralBaselineService
 from report.services.event_log_service import EventLogService
 from config.detection_settings import DetectionConfig # Import DetectionConfig
 
@@ -19,102 +22,69 @@ from config.detection_settings import DetectionConfig # Import DetectionConfig
 class MiningDetectionService:
     """Service de détection d'activités d'orpaillage"""
 
+    MODEL_NAME = 'ghana_mining_detector'
+    CHANGE_ZONES_ALGORITHM = 'PIXEL_ZSCORE_ZONES_v1.0'
+
     def __init__(self):
         self.gee_service = EarthEngineService()
-        self.model = self._load_tensorflow_model()
+        self.last_scan_metrics = None
 
-    def _load_tensorflow_model(self):
-        """Charge le modèle TensorFlow pour la détection"""
-        try:
-            model_path = os.path.join(settings.BASE_DIR, 'ai', 'models', 'ghana_mining_detector.h5')
-            if os.path.exists(model_path):
-                model = tf.keras.models.load_model(model_path)
-                print(f"Modèle TensorFlow chargé: {model_path}")
-                return model
-            else:
-                print(f"Modèle non trouvé: {model_path}")
-                return None
-        except Exception as e:
-            print(f"Erreur chargement modèle TensorFlow: {e}")
-            return None
+    @property
+    def model(self):
+        """Modèle TensorFlow de détection (chargé une fois par processus, au premier usage)"""
+        return get_model_registry().get_model(self.MODEL_NAME)
 
-    def _predict_with_tensorflow(self, latitude: float, longitude: float, image_asset_id: str) -> float:
-        """Utilise le modèle TensorFlow pour prédire la probabilité d'orpaillage à partir d'un patch spectral."""
-        if not self.model:
-            print("Modèle TensorFlow non chargé. Skipping prediction.")
-            return 0.0
+    @property
+    def inference(self):
+        """File d'inférence par micro-lots partagée du modèle, ou None si le modèle est indisponible"""
+        model = self.model
+        return get_inference_service(self.MODEL_NAME, model) if model is not None else None
+
+    @staticmethod
+    def claim_image_for_detection(image_id: int) -> bool:
+        """
+        Réserve une image pour la détection (UPDATE conditionnel, une seule tâche gagnante)
+
+        Seules les images aux indices calculés et jamais analysées (ou en erreur, ou
+        dont la réservation a expiré) peuvent être réservées.
+        """
+        stale_before = timezone.now() - timedelta(seconds=DetectionConfig.DETECTION_CLAIM_TIMEOUT_SECONDS)
+        claimed = ImageModel.objects.filter(
+            Q(detection_status__in=[ImageModel.DetectionStatus.PENDING, ImageModel.DetectionStatus.ERROR]) |
+            Q(detection_status=ImageModel.DetectionStatus.RUNNING, detection_started_at__lt=stale_before),
+            id=image_id,
+            processing_status=ImageModel.ProcessingStatus.COMPLETED,
+        ).update(detection_status=ImageModel.DetectionStatus.RUNNING, detection_started_at=timezone.now())
+        return claimed == 1
+
+    def analyze_image_once(self, image_record: 'ImageModel') -> Optional[List[DetectionModel]]:
+        """
+        Analyse une image au plus une fois
+
+        Returns:
+            Détections créées, ou None si l'image est déjà analysée (ou en cours
+            d'analyse par une autre tâche)
+        """
+        if not self.claim_image_for_detection(image_record.id):
+            return None
 
         try:
-            # 1. Obtenir le patch spectral de GEE
-            raw_patch_data = self.gee_service.get_spectral_patch(
-                point_coords=(longitude, latitude),
-                image_asset_id=image_asset_id,
-                patch_size_pixels=48, # Doit correspondre à l'attente du modèle
-                scale=10 # Résolution Sentinel-2 typique pour ces bandes
-            )
+            detections = self.analyze_for_mining_activity(image_record)
+        except Exception:
+            ImageModel.objects.filter(id=image_record.id).update(detection_status=ImageModel.DetectionStatus.ERROR)
+            raise
 
-            if not raw_patch_data:
-                print("Erreur: Impossible de récupérer les données du patch spectral depuis GEE.")
-                return 0.0
-
-            if len(raw_patch_data) < 2: # Header + au moins une ligne de données (en fait, on en attend 48*48)
-                print(f"Erreur: Données de patch insuffisantes. Reçu {len(raw_patch_data)} lignes.")
-                return 0.0
-
-            # 2. Traiter les données brutes en un tableau NumPy (48, 48, 3)
-            header = raw_patch_data[0]
-            pixel_values_list = raw_patch_data[1:]
-
-            expected_pixels = 48 * 48
-            if len(pixel_values_list) != expected_pixels:
-                print(f"Erreur: Nombre de pixels incorrect. Attendu {expected_pixels}, reçu {len(pixel_values_list)}.")
-                # Tenter de voir si c'est un problème de géométrie/bordure
-                # Parfois getRegion peut retourner moins si le patch est au bord de l'image source
-                # Pour ce modèle, une taille fixe est cruciale.
-                return 0.0
-
-            # Trouver les indices des colonnes NDVI, NDWI, NDTI
-            try:
-                ndvi_idx = header.index('NDVI')
-                ndwi_idx = header.index('NDWI')
-                ndti_idx = header.index('NDTI')
-            except ValueError as e:
-                print(f"Erreur: Une ou plusieurs colonnes d'indice manquantes dans l'en-tête GEE: {header}. Détail: {e}")
-                return 0.0
-
-            # Extraire et remodeler chaque bande
-            # GEE peut retourner None pour les pixels masqués ou en dehors de la couverture image.
-            # Il faut gérer ces None, par exemple en les remplaçant par 0 ou une valeur spécifique.
-            # Le defaultValue=0 dans getRegion devrait gérer ça, mais vérifions.
-            def extract_band(idx):
-                band_flat = []
-                for p in pixel_values_list:
-                    val = p[idx]
-                    band_flat.append(float(val) if val is not None else 0.0) # Gérer les None potentiels
-                return np.array(band_flat, dtype=np.float32).reshape((48, 48))
-
-            ndvi_array = extract_band(ndvi_idx)
-            ndwi_array = extract_band(ndwi_idx)
-            ndti_array = extract_band(ndti_idx)
-
-            # Empiler les bandes pour former l'image (48, 48, 3)
-            spectral_patch_np = np.stack([ndvi_array, ndwi_array, ndti_array], axis=-1)
-
-            if spectral_patch_np.shape != (48, 48, 3):
-                print(f"Erreur: La forme du patch spectral final est incorrecte: {spectral_patch_np.shape}")
-                return 0.0
-
-            # 3. Préparer l'entrée du modèle et prédire
-            model_input = np.expand_dims(spectral_patch_np, axis=0)  # Ajoute la dimension du batch -> (1, 48, 48, 3)
-
-            prediction = self.model.predict(model_input, verbose=0)
-            confidence = float(prediction[0][0]) # Supposant que le modèle sort une seule valeur par item de batch
-
-            return min(max(confidence, 0.0), 1.0)  # Clamp entre 0 et 1
+        ImageModel.objects.filter(id=image_record.id).update(
+            detection_status=ImageModel.DetectionStatus.COMPLETED,
+            detected_at=timezone.now()
+        )
 
+        # La scène rejoint la référence saisonnière après avoir été comparée à celle-ci
+        try:
+            SpectralBaselineService.add_image(image_record)
         except Exception as e:
-            print(f"Erreur lors de la prédiction TensorFlow avec patch spectral: {e}")
-            return 0.0
+            print(f"Erreur mise à jour référence spectrale (image {image_record.id}): {e}")
+        return detections
 
     def analyze_for_mining_activity(self, image_record: 'ImageModel') -> List[DetectionModel]:
         """
@@ -125,21 +95,18 @@ class MiningDetectionService:
 
         Returns:
             Liste des détections trouvées
+
+        Raises:
+            Toute erreur d'analyse ou d'écriture, après journalisation (SYSTEM_ERROR) : la
+            réservation de l'image passe alors en ERROR et la tâche est relancée ou mise au rebut
         """
-        detections = []
+        self.last_scan_metrics = None
 
         try:
-            # Récupération image de référence (plus ancienne disponible)
-            reference_image = (ImageModel.objects
-                               .filter(region=image_record.region,
-                                       processing_status='COMPLETED')
-                               .exclude(id=image_record.id)
-                               .order_by('capture_date')
-                               .first())
-
-            if not reference_image:
-                print("Pas d'image de référence trouvée")
-                return detections
+            # Référence saisonnière de la région (mois de la scène, sinon tous mois confondus)
+            reference_indices = SpectralBaselineService.reference_indices(
+                image_record.region_id, image_record.capture_date
+            )
 
             # Comparaison indices spectraux
             current_indices = {
@@ -148,28 +115,19 @@ class MiningDetectionService:
                 'ndti_data': image_record.ndti_data,
             }
 
-            reference_indices = {
-                'ndvi_data': reference_image.ndvi_data,
-                'ndwi_data': reference_image.ndwi_data,
-                'ndti_data': reference_image.ndti_data,
-            }
-
-            # Détection anomalies
-            anomaly_scores = self.gee_service.detect_anomalies(current_indices, reference_indices)
-
-            # Prédiction TensorFlow en utilisant le centre de l'image pour le patch
-            # Idéalement, on itérerait sur des points d'intérêt ou des grilles.
-            # Pour l'instant, on utilise le centre de l'image comme point pour le patch.
-            tf_confidence = 0.0
-            if image_record.center_lat is not None and image_record.center_lon is not None and image_record.gee_asset_id:
-                tf_confidence = self._predict_with_tensorflow(
-                    latitude=image_record.center_lat,
-                    longitude=image_record.center_lon,
-                    image_asset_id=image_record.gee_asset_id
-                )
+            # Détection anomalies (sans référence : première image de la région, seul le balayage TF s'applique)
+            if reference_indices:
+                anomaly_scores = self.gee_service.detect_anomalies(current_indices, reference_indices)
             else:
-                print(f"Avertissement: Coordonnées du centre ou GEE asset ID manquants pour l'image {image_record.id}. Skipping TF prediction.")
+                print(f"Pas de référence spectrale pour la région {image_record.region_id}")
+                anomaly_scores = {f'{name}_anomaly_score': 0.0 for name in ('ndvi', 'ndwi', 'ndti')}
 
+            # Balayage TensorFlow de toute l'emprise par tuiles chevauchantes
+            hot_tiles = []
+            if image_record.gee_asset_id:
+                hot_tiles = self._scan_image_tiles(image_record)
+            else:
+                print(f"Avertissement: GEE asset ID manquant pour l'image {image_record.id}. Skipping TF scan.")
 
             # Utilisation des seuils depuis DetectionConfig
             anomaly_detected = (
@@ -178,45 +136,77 @@ class MiningDetectionService:
                 anomaly_scores.get('ndti_anomaly_score', 0) > DetectionConfig.SPECTRAL_NDTI_THRESHOLD
             )
 
-            tf_detected = tf_confidence > DetectionConfig.TENSORFLOW_SCORE_THRESHOLD
-
-            if anomaly_detected or tf_detected:
-                # Création détection
-                detection = DetectionModel.objects.create(
+            candidates = []
+
+            # Une détection par zone de changement (polygone, surface réelle) ; les tuiles TF
+            # qui recouvrent une zone lui apportent leur score au lieu de créer leur propre détection
+            change_zones = None
+            if image_record.gee_asset_id:
+                change_zones = self.gee_service.detect_change_zones(image_record.gee_asset_id)
+            for zone in change_zones or []:
+                longitude, latitude = zone['centroid']
+                candidates.append({
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'tf_confidence': self._pop_overlapping_tiles_score(latitude, longitude, hot_tiles),
+                    'anomaly_scores': self._zone_anomaly_scores(zone),
+                    'area_hectares': zone['area_hectares'],
+                    'zone_geometry': Polygon(*zone['rings'], srid=4326),
+                    'algorithm_version': self.CHANGE_ZONES_ALGORITHM,
+                })
+
+            # Une détection par tuile au-dessus du seuil TF (coordonnées réelles de la tuile)
+            for tile in hot_tiles:
+                candidates.append({
+                    'latitude': tile['latitude'],
+                    'longitude': tile['longitude'],
+                    'tf_confidence': tile['score'],
+                    'anomaly_scores': anomaly_scores,
+                    'area_hectares': tile['area_hectares'],
+                })
+
+            # Sans zone ni tuile chaude, et sans détection de changement possible, une anomalie
+            # spectrale globale reste signalée au centre de l'image (non localisée : surface non mesurée)
+            if not candidates and change_zones is None and anomaly_detected:
+                candidates.append({
+                    'latitude': image_record.center_lat,
+                    'longitude': image_record.center_lon,
+                    'tf_confidence': 0.0,
+                    'anomaly_scores': anomaly_scores,
+                    'area_hectares': 0.0,
+                })
+
+            # Détections construites en mémoire puis écrites en lot avec leurs effets de bord
+            sink = DetectionSink()
+            for candidate in candidates:
+                candidate_scores = candidate['anomaly_scores']
+                optional_fields = {key: candidate[key] for key in ('zone_geometry', 'algorithm_version') if key in candidate}
+
+                detection = DetectionModel(
                     image=image_record,
                     region=image_record.region,
-                    latitude=image_record.center_lat,
-                    longitude=image_record.center_lon,
+                    latitude=candidate['latitude'],
+                    longitude=candidate['longitude'],
                     detection_type='MINING_SITE',  # Type principal
                     confidence_score=0,  # Calculé ci-dessous
-                    area_hectares=self._estimate_affected_area(anomaly_scores),
-                    ndvi_anomaly_score=anomaly_scores.get('ndvi_anomaly_score'),
-                    ndwi_anomaly_score=anomaly_scores.get('ndwi_anomaly_score'),
-                    ndti_anomaly_score=anomaly_scores.get('ndti_anomaly_score'),
-                    validation_status='DETECTED'
+                    area_hectares=candidate['area_hectares'],
+                    ndvi_anomaly_score=candidate_scores.get('ndvi_anomaly_score'),
+                    ndwi_anomaly_score=candidate_scores.get('ndwi_anomaly_score'),
+                    ndti_anomaly_score=candidate_scores.get('ndti_anomaly_score'),
+                    validation_status='DETECTED',
+                    **optional_fields
                 )
 
                 # Calcul score confiance combiné (anomalies + TensorFlow) en utilisant DetectionConfig
                 anomaly_confidence = detection.calculate_confidence_score() # This is the anomaly-only score from the model
                 combined_confidence = (
                     anomaly_confidence * DetectionConfig.COMBINED_CONFIDENCE_WEIGHT_ANOMALY +
-                    tf_confidence * DetectionConfig.COMBINED_CONFIDENCE_WEIGHT_TF
+                    candidate['tf_confidence'] * DetectionConfig.COMBINED_CONFIDENCE_WEIGHT_TF
                 )
                 detection.confidence_score = min(max(combined_confidence, 0.0), 1.0)
-                detection.save()
-
-                detections.append(detection)
+                sink.add(detection)
 
-                # Génération alerte et risque financier
-                self._generate_alert_and_risk(detection)
-
-                # LOG ÉVÉNEMENT
-                EventLogService.log_detection_created(detection)
-
-                detections.append(detection)
-                self._generate_alert_and_risk(detection)
-
-            return detections
+            return sink.flush()
 
         except Exception as e:
             EventLogService.log_event(
@@ -224,96 +214,62 @@ class MiningDetectionService:
                 f"Erreur analyse activité minière: {str(e)}",
                 metadata={'image_id': image_record.id}
             )
-            return detections
-
-    def _estimate_affected_area(self, anomaly_scores: Dict) -> float:
-        """Estime la surface affectée basée sur les scores d'anomalie"""
-        # Logique simplifiée - à améliorer avec données réelles
-        max_score = max(anomaly_scores.values())
-        # Surface proportionnelle au score (1-50 hectares)
-        return min(max_score * 50, 50)
-
-    # Dans detection/services/mining_detection_service.py
-    def _generate_alert_and_risk(self, detection: DetectionModel):
-        """Génère alerte, risque financier ET investigation automatiquement"""
-        try:
-            # 1. Détermination type d'alerte selon score en utilisant DetectionConfig
-            if detection.confidence_score >= DetectionConfig.ALERT_CRITICALITY_THRESHOLD_CRITICAL:
-                alert_type = 'CLANDESTINE_SITE'
-                criticality = 'CRITICAL'
-            elif detection.confidence_score >= DetectionConfig.ALERT_CRITICALITY_THRESHOLD_HIGH:
-                alert_type = 'SUSPICIOUS_ACTIVITY'
-                criticality = 'HIGH'
-            else:
-                alert_type = 'SUSPICIOUS_ACTIVITY' # Default for scores below HIGH threshold
-                criticality = 'MEDIUM'
-
-            # 2. Création alerte
-            alert = AlertModel.objects.create(
-                name=f"Détection orpaillage - {detection.detection_date.strftime('%Y-%m-%d')}",
-                detection=detection,
-                region=detection.region,
-                level=criticality,
-                alert_type=alert_type,
-                message=f"Activité d'orpaillage détectée avec un score de confiance de {detection.confidence_score:.2f}. "
-                        f"Surface estimée: {detection.area_hectares:.1f} hectares.",
-                alert_status='ACTIVE'
-            )
+            raise
 
-            # LOG ALERTE
-            EventLogService.log_event(
-                'ALERT_GENERATED',
-                f"Alerte {criticality} générée pour détection {detection.id}",
-                detection=detection,
-                alert=alert
-            )
-
-            # 3. Création risque financier
-            financial_risk = FinancialRiskModel.objects.create(
-                detection=detection,
-                area_hectares=detection.area_hectares,
-                cost_per_hectare=FinancialSettings.DEFAULT_COST_PER_HECTARE,
-                sensitive_zone_distance_km=2.0,
-                occurrence_count=1
-            )
-
-            # LOG RISQUE
-            EventLogService.log_event(
-                'FINANCIAL_RISK_CALCULATED',
-                f"Risque financier calculé: {financial_risk.estimated_loss:,.0f} FCFA",
-                detection=detection,
-                metadata={'risk_level': financial_risk.risk_level, 'amount': financial_risk.estimated_loss}
-            )
-
-            # Calculs automatiques
-            financial_risk.calculate_estimated_loss()
-            financial_risk.risk_level = financial_risk.determine_risk_level()
-            financial_risk.save()
-
-            # 4. NOUVEAU : Création automatique investigation
-            from detection.models.investigation_model import InvestigationModel
-
-            investigation = InvestigationModel.objects.create(
-                detection=detection,
-                target_coordinates=f"{detection.latitude:.4f}, {detection.longitude:.4f}",
-                access_instructions=f"Zone Bondoukou - Coordonnées GPS: {detection.latitude:.4f}, {detection.longitude:.4f}. "
-                                    f"Surface estimée: {detection.area_hectares:.1f} hectares. "
-                                    f"Confidence IA: {detection.confidence_score:.2f}",
-                status='PENDING'
-            )
-
-            print(f"Alerte, risque financier et investigation créés pour détection {detection.id}")
-            # LOG INVESTIGATION
-            EventLogService.log_event(
-                'INVESTIGATION_CREATED',
-                f"Investigation créée automatiquement pour détection {detection.id}",
-                detection=detection,
-                metadata={'investigation_id': investigation.id}
-            )
-
-        except Exception as e:
-            EventLogService.log_event(
-                'SYSTEM_ERROR',
-                f"Erreur génération alerte/risque/investigation: {str(e)}",
-                detection=detection
-            )
\ No newline at end of file
+    def _scan_image_tiles(self, image_record: 'ImageModel') -> List[Dict]:
+        """Balaye l'emprise de la scène par tuiles et retourne les tuiles chaudes (score décroissant)"""
+        if not self.model:
+            print("Modèle TensorFlow non chargé. Skipping scan.")
+            return []
+
+        scanner = TileScanService(self.gee_service, self.inference)
+        transfer_before = self.gee_service.get_patch_transfer_stats()
+        scan_results = scanner.scan(
+            image_record.gee_asset_id,
+            GEEConfig.BONDOUKOU_BOUNDS,
+            threshold=DetectionConfig.TENSORFLOW_SCORE_THRESHOLD,
+            max_hot_tiles=DetectionConfig.SCAN_MAX_HOT_TILES
+        )
+
+        hot_tiles = scan_results.pop('hot_tiles')
+        # Transferts backend du balayage (blocs absents du cache disque)
+        transfer = self.gee_service.get_patch_transfer_stats(since=transfer_before)
+        self.last_scan_metrics = dict(scan_results, hot_tiles=len(hot_tiles), inference=self.inference.stats(),
+                                      transfer=transfer)
+        print(f"Balayage {image_record.gee_asset_id}: {scan_results['tiles_total']} tuiles, "
+              f"{len(hot_tiles)} chaudes, {scan_results['tiles_per_second']} tuiles/s, "
+              f"{transfer['patches']} blocs transférés ({transfer['bytes']} octets)")
+
+        EventLogService.log_event(
+            'IMAGE_PROCESSED',
+            f"Balayage par tuiles de l'image {image_record.name}: {scan_results['tiles_total']} tuiles "
+            f"({scan_results['tiles_per_second']} tuiles/s), {len(hot_tiles)} tuiles au-dessus du seuil",
+            region=image_record.region,
+            metadata={'image_id': image_record.id, 'scan': self.last_scan_metrics}
+        )
+        return hot_tiles
+
+    @staticmethod
+    def _zone_anomaly_scores(zone: Dict) -> Dict:
+        """Scores d'anomalie 0-1 d'une zone : |z| moyen par indice rapporté à CHANGE_Z_SATURATION"""
+        return {
+            f'{index_name}_anomaly_score': min(zone['z_scores'].get(index_name, 0.0) / DetectionConfig.CHANGE_Z_SATURATION, 1.0)
+            for index_name in ('ndvi', 'ndwi', 'ndti')
+        }
+
+    @staticmethod
+    def _pop_overlapping_tiles_score(latitude: float, longitude: float, hot_tiles: List[Dict]) -> float:
+        """
+        Meilleur score TF des tuiles chaudes dont l'emprise contient le point ; ces
+        tuiles sont retirées de hot_tiles (rattachées à la zone)
+        """
+        pixel_width, pixel_height = pixel_size_degrees(latitude, DetectionConfig.SCAN_SCALE_METERS)
+        half_width = pixel_width * DetectionConfig.SCAN_TILE_SIZE_PIXELS / 2
+        half_height = pixel_height * DetectionConfig.SCAN_TILE_SIZE_PIXELS / 2
+
+        overlapping = [tile for tile in hot_tiles
+                       if abs(tile['longitude'] - longitude) <= half_width
+                       and abs(tile['latitude'] - latitude) <= half_height]
+        for tile in overlapping:
+            hot_tiles.remove(tile)
+        return max((tile['score'] for tile in overlapping), default=0.0)
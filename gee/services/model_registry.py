@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+from typing import List, Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+
+class ModelRegistry:
+    """
+    Registre des modèles Keras de ai/models/, partagé par le processus
+
+    Chaque modèle (<nom>.h5) est chargé au premier usage, une seule fois par
+    processus, puis préchauffé avec un lot factice pour que la première vraie
+    prédiction ne paie pas la construction du graphe. TensorFlow n'est importé
+    qu'au premier chargement : les processus web qui n'exécutent pas d'inférence
+    ne l'importent jamais.
+    """
+
+    def __init__(self, models_dir: Optional[str] = None):
+        self.models_dir = models_dir or settings.AI_MODELS_DIR
+        self._models = {}
+        self._load_info = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def get_model(self, name: str):
+        """Retourne le modèle `name` (chargé et préchauffé si nécessaire), ou None s'il est indisponible"""
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock_for(name):
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def preload(self, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Charge explicitement des modèles (défaut: tous ceux de ai/models/)"""
+        return {name: self.get_model(name) is not None for name in (names or self.available_models())}
+
+    def available_models(self) -> List[str]:
+        if not os.path.isdir(self.models_dir):
+            return []
+        return sorted(filename[:-3] for filename in os.listdir(self.models_dir) if filename.endswith('.h5'))
+
+    def is_loaded(self, name: str) -> bool:
+        return self._models.get(name) is not None
+
+    def stats(self) -> Dict:
+        """Modèles chargés dans ce processus avec leurs temps de chargement et de préchauffage"""
+        return {name: dict(info) for name, info in self._load_info.items()}
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _load(self, name: str):
+        model_path = os.path.join(self.models_dir, f'{name}.h5')
+        if not os.path.exists(model_path):
+            print(f"Modèle non trouvé: {model_path}")
+            self._load_info[name] = {'loaded': False, 'error': 'not_found'}
+            return None
+
+        try:
+            import tensorflow as tf
+
+            started = time.perf_counter()
+            model = tf.keras.models.load_model(model_path)
+            load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            self._warm_up(model)
+            warmup_seconds = time.perf_counter() - started
+
+            print(f"Modèle TensorFlow chargé: {model_path} "
+                  f"(chargement {load_seconds:.2f}s, préchauffage {warmup_seconds:.2f}s, pid {os.getpid()})")
+            self._load_info[name] = {
+                'loaded': True,
+                'path': model_path,
+                'load_seconds': round(load_seconds, 3),
+                'warmup_seconds': round(warmup_seconds, 3),
+                'pid': os.getpid(),
+            }
+            return model
+        except Exception as e:
+            print(f"Erreur chargement modèle TensorFlow {name}: {e}")
+            self._load_info[name] = {'loaded': False, 'error': str(e)}
+            return None
+
+    @staticmethod
+    def _warm_up(model):
+        """Prédiction sur un lot de zéros à la forme d'entrée du modèle (dimensions inconnues -> 1)"""
+        input_shape = model.input_shape
+        if isinstance(input_shape, list):
+            input_shape = input_shape[0]
+        dummy_batch = np.zeros([dimension or 1 for dimension in input_shape], dtype=np.float32)
+        model.predict_on_batch(dummy_batch)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registre unique du processus"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,238 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gee.config import GEEConfig
+
+
+class SpectralPatchCache:
+    """
+    Cache disque persistant des patchs spectraux (NDVI, NDWI, NDTI)
+
+    Les patchs sont stockés dans un fichier float32 en mémoire mappée de forme
+    (capacité, taille, taille, canaux) ; un index SQLite associe chaque clé
+    (asset, lon, lat, taille, échelle) à un emplacement et à sa date de dernier
+    accès. Au-delà de la capacité, l'emplacement le moins récemment utilisé est
+    réattribué (LRU). Les verrous SQLite rendent le cache sûr entre les workers
+    Celery d'un même hôte.
+    """
+
+    CHANNELS = 3
+    # Délai au-delà duquel un emplacement réservé mais jamais publié (writer tué) est réattribuable
+    PENDING_TIMEOUT_SECONDS = 60
+    # Clés par requête IN (limite de variables SQLite)
+    SQL_BATCH_SIZE = 500
+
+    def __init__(self, cache_dir: Optional[str] = None, max_patches: Optional[int] = None,
+                 patch_size: int = 48):
+        self.cache_dir = cache_dir or GEEConfig.PATCH_CACHE_DIR
+        self.max_patches = max_patches or GEEConfig.PATCH_CACHE_MAX_PATCHES
+        self.patch_size = patch_size
+        self.shape = (self.max_patches, patch_size, patch_size, self.CHANNELS)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.data_path = os.path.join(self.cache_dir, f'patches_{patch_size}.f32')
+        self.index_path = os.path.join(self.cache_dir, f'patches_{patch_size}.sqlite3')
+
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._initialize_storage()
+        self._data = np.memmap(self.data_path, dtype=np.float32, mode='r+', shape=self.shape)
+
+    @staticmethod
+    def make_key(asset_id: str, lon: float, lat: float, patch_size: int, scale: int) -> str:
+        return f"{asset_id}|{lon:.6f}|{lat:.6f}|{patch_size}|{scale}"
+
+    def get(self, asset_id: str, lon: float, lat: float, patch_size: int, scale: int) -> Optional[np.ndarray]:
+        """Retourne une copie du patch en cache, ou None"""
+        patches, found = self.get_many(asset_id, [(lon, lat)], patch_size, scale)
+        return patches[0] if found[0] else None
+
+    def get_many(self, asset_id: str, centers: Sequence[Tuple[float, float]], patch_size: int,
+                 scale: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Patchs en cache d'une liste de centres (lon, lat), lus dans une seule transaction
+
+        Returns:
+            (patchs (n, taille, taille, canaux), masque (n,) des patchs trouvés) ; les absents sont à 0
+        """
+        keys = [self.make_key(asset_id, lon, lat, patch_size, scale) for lon, lat in centers]
+        positions = {key: position for position, key in enumerate(keys)}
+        patches = np.zeros((len(keys),) + self.shape[1:], dtype=np.float32)
+        found = np.zeros(len(keys), dtype=bool)
+        connection = self._connection()
+
+        # Lecture de l'index et copie des données dans la même transaction : un writer
+        # ne peut pas libérer l'emplacement (commit) tant que ce verrou partagé est tenu
+        with connection:
+            connection.execute('BEGIN')
+            rows = self._select_keys(connection, 'SELECT key, slot FROM patches WHERE key IN ({})', keys)
+            if rows:
+                hits = [positions[key] for key, _ in rows]
+                patches[hits] = self._data[[slot for _, slot in rows]]
+                found[hits] = True
+
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        if rows:
+            try:
+                with connection:
+                    connection.executemany('UPDATE patches SET last_access = ? WHERE slot = ? AND key = ?',
+                                           [(time.time(), slot, key) for key, slot in rows])
+            except sqlite3.OperationalError:
+                pass  # Mise à jour LRU best-effort, sans bloquer la lecture
+        return patches, found
+
+    def put(self, asset_id: str, lon: float, lat: float, patch_size: int, scale: int, patch: np.ndarray):
+        """Enregistre un patch (réattribue l'emplacement LRU si le cache est plein)"""
+        self.put_many(asset_id, [(lon, lat)], patch_size, scale, patch[np.newaxis])
+
+    def put_many(self, asset_id: str, centers: Sequence[Tuple[float, float]], patch_size: int, scale: int,
+                 patches: np.ndarray):
+        """
+        Enregistre un lot de patchs (n, taille, taille, canaux) alignés sur centers
+
+        Une transaction réserve les emplacements (libres, sinon les moins récemment utilisés),
+        les données sont écrites en une fois puis les clés publiées. Faute d'emplacement
+        disponible, le surplus du lot n'est pas mis en cache.
+        """
+        if patches.shape[1:] != self.shape[1:] or len(patches) != len(centers):
+            return
+
+        keys = [self.make_key(asset_id, lon, lat, patch_size, scale) for lon, lat in centers]
+        connection = self._connection()
+
+        # 1. Réservation des emplacements (les anciennes clés disparaissent de l'index avant l'écriture)
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            cached = {row[0] for row in self._select_keys(connection, 'SELECT key FROM patches WHERE key IN ({})',
+                                                          keys)}
+            positions = list({key: position for position, key in enumerate(keys) if key not in cached}.values())
+            if not positions:
+                return
+
+            now = time.time()
+            used = connection.execute('SELECT COUNT(*) FROM patches').fetchone()[0]
+            new_slots = list(range(used, min(used + len(positions), self.max_patches)))
+            evicted_slots = []
+            if len(new_slots) < len(positions):
+                # Une réservation plus ancienne que PENDING_TIMEOUT_SECONDS est celle d'un writer disparu
+                evicted_slots = [row[0] for row in connection.execute(
+                    "SELECT slot FROM patches WHERE key NOT LIKE 'pending:%' OR last_access < ? "
+                    "ORDER BY last_access LIMIT ?",
+                    (now - self.PENDING_TIMEOUT_SECONDS, len(positions) - len(new_slots))
+                )]
+
+            slots = new_slots + evicted_slots
+            if not slots:
+                return  # Tous les emplacements sont en cours d'écriture : lot non mis en cache
+            positions = positions[:len(slots)]
+            pending_keys = [f"pending:{uuid.uuid4().hex}" for _ in slots]
+            connection.executemany('INSERT INTO patches (slot, key, last_access) VALUES (?, ?, ?)',
+                                   [(slot, pending_key, now) for slot, pending_key in zip(new_slots, pending_keys)])
+            connection.executemany('UPDATE patches SET key = ?, last_access = ? WHERE slot = ?',
+                                   [(pending_key, now, slot)
+                                    for slot, pending_key in zip(evicted_slots, pending_keys[len(new_slots):])])
+
+        # 2. Écriture des données hors transaction, puis publication des clés
+        try:
+            self._data[slots] = patches[positions].astype(np.float32, copy=False)
+            self._data.flush()
+        except Exception:
+            # Emplacements rendus immédiatement réattribuables (derniers de l'ordre LRU)
+            with connection:
+                connection.executemany('UPDATE patches SET key = ?, last_access = 0 WHERE slot = ? AND key = ?',
+                                       [(f"free:{slot}", slot, pending_key)
+                                        for slot, pending_key in zip(slots, pending_keys)])
+            raise
+
+        now = time.time()
+        with connection:
+            connection.executemany('UPDATE patches SET key = ?, last_access = ? WHERE slot = ? AND key = ?',
+                                   [(keys[position], now, slot, pending_key)
+                                    for position, slot, pending_key in zip(positions, slots, pending_keys)])
+
+    @classmethod
+    def _select_keys(cls, connection: sqlite3.Connection, query: str, keys: List[str]) -> List[tuple]:
+        """Exécute query ('... WHERE key IN ({})') par tranches de SQL_BATCH_SIZE clés"""
+        rows = []
+        for start in range(0, len(keys), cls.SQL_BATCH_SIZE):
+            batch = keys[start:start + cls.SQL_BATCH_SIZE]
+            rows.extend(connection.execute(query.format(','.join('?' * len(batch))), batch).fetchall())
+        return rows
+
+    def stats(self) -> dict:
+        used = self._connection().execute('SELECT COUNT(*) FROM patches').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'size': used, 'capacity': self.max_patches}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par thread ; isolation_level=None : transactions explicites
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def _initialize_storage(self):
+        """Crée l'index et le fichier de données ; réinitialise si la capacité a changé"""
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+            connection.execute('CREATE TABLE IF NOT EXISTS patches '
+                               '(slot INTEGER PRIMARY KEY, key TEXT UNIQUE, last_access REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS patches_last_access ON patches (last_access)')
+
+            row = connection.execute("SELECT value FROM meta WHERE name = 'capacity'").fetchone()
+            expected_bytes = int(np.prod(self.shape)) * 4
+            file_ok = os.path.exists(self.data_path) and os.path.getsize(self.data_path) == expected_bytes
+
+            if not row or row[0] != self.max_patches or not file_ok:
+                connection.execute('DELETE FROM patches')
+                connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('capacity', ?)",
+                                   (self.max_patches,))
+                # Fichier creux : l'espace disque n'est consommé qu'à l'écriture des patchs
+                with open(self.data_path, 'wb') as f:
+                    f.truncate(expected_bytes)
+
+
+_patch_caches = {}
+_patch_cache_failures = {}  # Taille de patch -> instant du dernier échec d'ouverture
+_patch_caches_lock = threading.Lock()
+
+
+def get_patch_cache(patch_size: int = 48) -> Optional[SpectralPatchCache]:
+    """
+    Cache partagé du processus pour une taille de patch (None si désactivé ou indisponible)
+
+    Un échec d'ouverture (disque plein, répertoire non monté...) n'est pas mémorisé définitivement :
+    l'ouverture est retentée après GEEConfig.PATCH_CACHE_RETRY_SECONDS.
+    """
+    if not GEEConfig.PATCH_CACHE_ENABLED:
+        return None
+
+    with _patch_caches_lock:
+        cache = _patch_caches.get(patch_size)
+        if cache is not None:
+            return cache
+
+        failed_at = _patch_cache_failures.get(patch_size)
+        if failed_at is not None and time.monotonic() - failed_at < GEEConfig.PATCH_CACHE_RETRY_SECONDS:
+            return None
+
+        try:
+            cache = SpectralPatchCache(patch_size=patch_size)
+        except Exception as e:
+            print(f"Cache de patchs indisponible: {e}")
+            _patch_cache_failures[patch_size] = time.monotonic()
+            return None
+
+        _patch_caches[patch_size] = cache
+        _patch_cache_failures.pop(patch_size, None)
+        return cache
@@ -0,0 +1,417 @@
+import re
+import time
+import uuid
+import random
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+
+from gee.config import GEEConfig
+
+
+# Messages Earth Engine / HTTP signalant un dépassement de quota ou de concurrence
+QUOTA_ERROR_MARKERS = (
+    'too many concurrent',
+    'too many requests',
+    'quota exceeded',
+    'rate limit',
+    'resource_exhausted',
+)
+
+# Code HTTP cité dans un message d'erreur ("HttpError 429 ...", "status code: 503", "Error 500") ;
+# ancré sur le mot qui le précède pour ignorer les chiffres d'un identifiant ou d'une date
+# (ex: .../20240429T...)
+_HTTP_STATUS_PATTERN = re.compile(r'\b(?:httperror|http|status(?: code)?|code|error)[\s:=(]*([1-5]\d\d)\b')
+
+WAIT_BUCKETS_SECONDS = [0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60]
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """
+    Code HTTP d'une exception : attribut de l'exception ou de sa réponse
+    (googleapiclient HttpError.resp.status, requests response.status_code), sinon code cité dans le message
+    """
+    for source in (error, getattr(error, 'resp', None), getattr(error, 'response', None)):
+        if source is None:
+            continue
+        for attribute in ('status_code', 'status', 'code'):
+            value = getattr(source, attribute, None)
+            if isinstance(value, int) and not isinstance(value, bool) and 100 <= value <= 599:
+                return value
+    match = _HTTP_STATUS_PATTERN.search(str(error).lower())
+    return int(match.group(1)) if match else None
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Vrai si l'exception EE correspond à un dépassement de quota ou de requêtes simultanées"""
+    if isinstance(error, EEQuotaExceeded):
+        return True
+    if http_status(error) == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in QUOTA_ERROR_MARKERS)
+
+
+class EEQuotaExceeded(Exception):
+    """Quota Earth Engine atteint : l'appel peut être retenté après retry_after secondes"""
+
+    def __init__(self, operation: str, retry_after: float, message: str = ''):
+        self.operation = operation
+        self.retry_after = retry_after
+        super().__init__(f"Quota Earth Engine atteint ({operation}), nouvel essai dans {retry_after:.0f}s"
+                         + (f": {message}" if message else ''))
+
+
+# Seau à jetons : renvoie 0 si un jeton est pris, sinon l'attente (s) avant le prochain jeton
+_TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+# Sémaphore à bail : un créneau expire seul si son détenteur disparaît (worker tué)
+_ACQUIRE_SLOT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease) + 60)
+    return 1
+end
+return 0
+"""
+
+# Erreur de quota : niveau de recul +1 (expire après une période calme) et pause globale
+_QUOTA_ERROR_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local base = tonumber(ARGV[1])
+local max_pause = tonumber(ARGV[2])
+local max_level = tonumber(ARGV[3])
+local level = math.min(redis.call('INCR', KEYS[1]), max_level)
+redis.call('EXPIRE', KEYS[1], math.ceil(max_pause * 2))
+local pause = math.min(base * 2 ^ (level - 1), max_pause)
+local until_ts = now + pause
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+if until_ts > current then
+    redis.call('SET', KEYS[2], tostring(until_ts), 'EX', math.ceil(pause) + 1)
+end
+return {level, tostring(pause)}
+"""
+
+# Créneaux actifs (baux expirés purgés à l'heure du serveur Redis)
+_ACTIVE_SLOTS_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# Niveau de recul et pause restante, comparée à l'heure du serveur Redis qui a fixé pause_until
+_BACKOFF_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local level = tonumber(redis.call('GET', KEYS[1]) or '0')
+local pause_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+return {level, tostring(math.max(pause_until - now, 0))}
+"""
+
+_RECORD_WAIT_SCRIPT = """
+local wait = tonumber(ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'calls', 1)
+redis.call('HINCRBYFLOAT', KEYS[1], 'wait_seconds_total', wait)
+if tonumber(ARGV[2]) == 1 then redis.call('HINCRBY', KEYS[1], 'throttled', 1) end
+redis.call('HINCRBY', KEYS[1], ARGV[3], 1)
+local current = tonumber(redis.call('HGET', KEYS[1], 'wait_seconds_max') or '0')
+if wait > current then redis.call('HSET', KEYS[1], 'wait_seconds_max', wait) end
+redis.call('SADD', KEYS[2], ARGV[4])
+return 1
+"""
+
+
+class _RedisQuotaStore:
+    """État du gouverneur partagé par tous les workers (Redis)"""
+
+    def __init__(self, redis_url: str, prefix: str):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.prefix = prefix
+        self._take_token = self.client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._acquire_slot = self.client.register_script(_ACQUIRE_SLOT_SCRIPT)
+        self._quota_error = self.client.register_script(_QUOTA_ERROR_SCRIPT)
+        self._record_wait = self.client.register_script(_RECORD_WAIT_SCRIPT)
+        self._active_slots = self.client.register_script(_ACTIVE_SLOTS_SCRIPT)
+        self._backoff = self.client.register_script(_BACKOFF_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def take_token(self, rate: float, capacity: int) -> float:
+        return float(self._take_token(keys=[self._key('bucket')], args=[rate, capacity]))
+
+    def acquire_slot(self, token: str, limit: int, lease: float) -> bool:
+        return bool(self._acquire_slot(keys=[self._key('slots')], args=[limit, lease, token]))
+
+    def release_slot(self, token: str):
+        self.client.zrem(self._key('slots'), token)
+
+    def active_slots(self) -> int:
+        return int(self._active_slots(keys=[self._key('slots')]))
+
+    def backoff(self):
+        """(niveau de recul, secondes restantes de pause globale)"""
+        level, remaining = self._backoff(keys=[self._key('backoff_level'), self._key('pause_until')])
+        return int(level), float(remaining)
+
+    def record_quota_error(self, base: float, max_pause: float, max_level: int) -> float:
+        _, pause = self._quota_error(keys=[self._key('backoff_level'), self._key('pause_until')],
+                                     args=[base, max_pause, max_level])
+        return float(pause)
+
+    def record_wait(self, operation: str, wait: float, throttled: bool, bucket: str):
+        self._record_wait(keys=[self._key(f'metrics:{operation}'), self._key('operations')],
+                          args=[wait, int(throttled), bucket, operation])
+
+    def record_counter(self, operation: str, field: str):
+        self.client.hincrby(self._key(f'metrics:{operation}'), field, 1)
+        self.client.sadd(self._key('operations'), operation)
+
+    def metrics(self) -> Dict[str, Dict]:
+        operations = sorted(name.decode() for name in self.client.smembers(self._key('operations')))
+        return {
+            operation: {key.decode(): float(value)
+                        for key, value in self.client.hgetall(self._key(f'metrics:{operation}')).items()}
+            for operation in operations
+        }
+
+
+class _LocalQuotaStore:
+    """Même état, limité au processus (développement sans Redis)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._tokens_ts = None
+        self._slots = {}
+        self._level = 0
+        self._level_expires = 0.0
+        self._pause_until = 0.0
+        self._metrics = {}
+
+    def take_token(self, rate: float, capacity: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self._tokens is None:
+                self._tokens, self._tokens_ts = float(capacity), now
+            self._tokens = min(capacity, self._tokens + (now - self._tokens_ts) * rate)
+            self._tokens_ts = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / rate
+
+    def acquire_slot(self, token: str, limit: int, lease: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._slots = {key: expires for key, expires in self._slots.items() if expires > now}
+            if len(self._slots) < limit:
+                self._slots[token] = now + lease
+                return True
+            return False
+
+    def release_slot(self, token: str):
+        with self._lock:
+            self._slots.pop(token, None)
+
+    def active_slots(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for expires in self._slots.values() if expires > now)
+
+    def backoff(self):
+        now = time.monotonic()
+        with self._lock:
+            level = self._level if now < self._level_expires else 0
+            return level, max(self._pause_until - now, 0.0)
+
+    def record_quota_error(self, base: float, max_pause: float, max_level: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._level_expires:
+                self._level = 0
+            self._level = min(self._level + 1, max_level)
+            self._level_expires = now + max_pause * 2
+            pause = min(base * 2 ** (self._level - 1), max_pause)
+            self._pause_until = max(self._pause_until, now + pause)
+            return pause
+
+    def _metrics_for(self, operation: str) -> Dict:
+        return self._metrics.setdefault(operation, {'calls': 0, 'wait_seconds_total': 0.0,
+                                                    'wait_seconds_max': 0.0, 'throttled': 0})
+
+    def record_wait(self, operation: str, wait: float, throttled: bool, bucket: str):
+        with self._lock:
+            metrics = self._metrics_for(operation)
+            metrics['calls'] += 1
+            metrics['wait_seconds_total'] += wait
+            metrics['wait_seconds_max'] = max(metrics['wait_seconds_max'], wait)
+            metrics['throttled'] += int(throttled)
+            metrics[bucket] = metrics.get(bucket, 0) + 1
+
+    def record_counter(self, operation: str, field: str):
+        with self._lock:
+            metrics = self._metrics_for(operation)
+            metrics[field] = metrics.get(field, 0) + 1
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {operation: dict(values) for operation, values in sorted(self._metrics.items())}
+
+
+class EEQuotaGovernor:
+    """
+    Régulation des appels Earth Engine partagée par tous les workers
+
+    Chaque appel EE prend un jeton (débit soutenu EE_REQUESTS_PER_SECOND, rafale
+    EE_BURST) puis un créneau parmi EE_MAX_CONCURRENT requêtes simultanées. Une
+    erreur de quota ("Too many concurrent aggregations", HTTP 429, ...) suspend
+    tous les appels pendant une pause exponentielle et divise le débit par deux
+    par niveau de recul ; le niveau retombe après une période sans erreur. Les
+    temps d'attente sont comptés par opération.
+
+    L'état est dans Redis si REDIS_URL est défini, sinon local au processus.
+    """
+
+    KEY_PREFIX = 'gee:quota'
+
+    def __init__(self, store=None):
+        self.store = store or self._default_store()
+        self.enabled = GEEConfig.EE_QUOTA_ENABLED
+
+    @classmethod
+    def _default_store(cls):
+        redis_url = getattr(settings, 'REDIS_URL', None)
+        if redis_url:
+            return _RedisQuotaStore(redis_url, cls.KEY_PREFIX)
+        return _LocalQuotaStore()
+
+    def call(self, operation: str, fn: Callable, *args, **kwargs):
+        """Exécute un appel EE sous contrôle du gouverneur ; une erreur de quota devient EEQuotaExceeded"""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        with self.slot(operation):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_quota_error(e) or isinstance(e, EEQuotaExceeded):
+                    raise
+                pause = self.store.record_quota_error(
+                    GEEConfig.EE_BACKOFF_BASE_SECONDS, GEEConfig.EE_BACKOFF_MAX_SECONDS, GEEConfig.EE_BACKOFF_MAX_LEVEL
+                )
+                self.store.record_counter(operation, 'quota_errors')
+                print(f"Quota Earth Engine atteint ({operation}) : pause globale de {pause:.1f}s")
+                raise EEQuotaExceeded(operation, pause, str(e)) from e
+
+    @contextmanager
+    def slot(self, operation: str):
+        """Attend la pause globale, un jeton puis un créneau de concurrence ; libère le créneau en sortie"""
+        started = time.monotonic()
+        deadline = started + GEEConfig.EE_ACQUIRE_TIMEOUT_SECONDS
+        token = uuid.uuid4().hex
+        throttled = False
+
+        while True:
+            level, pause = self.store.backoff()
+            if pause <= 0:
+                rate = GEEConfig.EE_REQUESTS_PER_SECOND / (2 ** level)
+                pause = self.store.take_token(rate, GEEConfig.EE_BURST)
+                if pause <= 0:
+                    break
+            throttled = True
+            self._sleep_until(operation, deadline, pause)
+
+        delay = 0.05
+        while not self.store.acquire_slot(token, GEEConfig.EE_MAX_CONCURRENT, GEEConfig.EE_CONCURRENCY_LEASE_SECONDS):
+            throttled = True
+            self._sleep_until(operation, deadline, delay)
+            delay = min(delay * 2, 1.0)
+
+        wait = time.monotonic() - started
+        self.store.record_wait(operation, wait, throttled, self._bucket(wait))
+        try:
+            yield
+        finally:
+            self.store.release_slot(token)
+
+    def _sleep_until(self, operation: str, deadline: float, delay: float):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.store.record_counter(operation, 'acquire_timeouts')
+            raise EEQuotaExceeded(operation, GEEConfig.EE_BACKOFF_BASE_SECONDS, "attente d'un créneau expirée")
+        # Gigue pour que les workers en attente ne repartent pas tous au même instant
+        time.sleep(min(delay * random.uniform(1.0, 1.25), remaining))
+
+    @staticmethod
+    def _bucket(wait: float) -> str:
+        for bound in WAIT_BUCKETS_SECONDS:
+            if wait <= bound:
+                return f"wait_le_{bound:g}"
+        return 'wait_inf'
+
+    def stats(self) -> Dict:
+        """Configuration, état de recul courant et métriques d'attente par opération"""
+        level, pause = self.store.backoff()
+        operations = {}
+        for operation, metrics in self.store.metrics().items():
+            calls = metrics.get('calls', 0)
+            operations[operation] = dict(
+                metrics,
+                wait_seconds_mean=round(metrics.get('wait_seconds_total', 0.0) / calls, 4) if calls else 0.0,
+            )
+        return {
+            'enabled': self.enabled,
+            'shared': isinstance(self.store, _RedisQuotaStore),
+            'requests_per_second': GEEConfig.EE_REQUESTS_PER_SECOND,
+            'effective_requests_per_second': GEEConfig.EE_REQUESTS_PER_SECOND / (2 ** level),
+            'burst': GEEConfig.EE_BURST,
+            'max_concurrent': GEEConfig.EE_MAX_CONCURRENT,
+            'active_requests': self.store.active_slots(),
+            'backoff_level': level,
+            'pause_remaining_seconds': round(pause, 3),
+            'operations': operations,
+        }
+
+
+_governor: Optional[EEQuotaGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_quota_governor() -> EEQuotaGovernor:
+    """Gouverneur unique du processus (état partagé via Redis entre processus)"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = EEQuotaGovernor()
+    return _governor
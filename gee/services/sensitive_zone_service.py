@@ -0,0 +1,101 @@
+import json
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, transaction
+
+from config.financial_settings import FinancialSettings
+from region.models.sensitive_zone_model import SensitiveZoneModel
+
+# Une requête pour tous les points du lot : chaque point interroge l'index GiST (opérateur KNN <->,
+# en degrés) pour ses zones candidates, puis la distance géodésique exacte départage les candidates
+_NEAREST_DISTANCE_SQL = """
+    SELECT nearest.distance_m
+    FROM unnest(%s::double precision[], %s::double precision[]) WITH ORDINALITY AS pt(lon, lat, idx)
+    LEFT JOIN LATERAL (
+        SELECT MIN(ST_Distance(candidate.geometry::geography,
+                               ST_SetSRID(ST_MakePoint(pt.lon, pt.lat), 4326)::geography)) AS distance_m
+        FROM (
+            SELECT sz.geometry
+            FROM sensitive_zones AS sz
+            WHERE sz.status {kind_filter}
+            ORDER BY sz.geometry <-> ST_SetSRID(ST_MakePoint(pt.lon, pt.lat), 4326)
+            LIMIT %s
+        ) AS candidate
+    ) AS nearest ON TRUE
+    ORDER BY pt.idx
+"""
+
+
+class SensitiveZoneService:
+    """Couches de zones sensibles : import GeoJSON et distance au plus proche par lot de points"""
+
+    # Zones candidates par point issues de l'index (l'ordre KNN en degrés diffère légèrement de l'ordre en mètres)
+    KNN_CANDIDATES = 8
+    # Points par requête
+    BATCH_SIZE = 5000
+
+    @classmethod
+    def nearest_distances_km(cls, latitudes: Iterable[float], longitudes: Iterable[float],
+                             kinds: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Distance (km) de chaque point à la zone sensible la plus proche
+
+        Returns:
+            Tableau aligné sur les points ; FinancialSettings.DEFAULT_SENSITIVE_ZONE_DISTANCE_KM
+            partout si aucune couche n'est importée, inf pour un point sans zone des types demandés
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64).ravel()
+        longitudes = np.asarray(longitudes, dtype=np.float64).ravel()
+        distances = np.full(latitudes.shape, FinancialSettings.DEFAULT_SENSITIVE_ZONE_DISTANCE_KM)
+        if not latitudes.size or not SensitiveZoneModel.objects.filter(status=True).exists():
+            return distances
+
+        kind_filter, kind_params = '', []
+        if kinds:
+            kind_filter, kind_params = 'AND sz.kind = ANY(%s)', [list(kinds)]
+        sql = _NEAREST_DISTANCE_SQL.format(kind_filter=kind_filter)
+
+        with connection.cursor() as cursor:
+            for start in range(0, latitudes.size, cls.BATCH_SIZE):
+                stop = start + cls.BATCH_SIZE
+                cursor.execute(sql, [longitudes[start:stop].tolist(), latitudes[start:stop].tolist(),
+                                     *kind_params, cls.KNN_CANDIDATES])
+                distances_m = [row[0] if row[0] is not None else np.inf for row in cursor.fetchall()]
+                distances[start:stop] = np.asarray(distances_m, dtype=np.float64) / 1000.0
+        return distances
+
+    @staticmethod
+    def load_geojson(path: str, kind: str, name_property: str = 'name', replace: bool = False) -> int:
+        """
+        Importe les entités d'un fichier GeoJSON (FeatureCollection, WGS84) comme zones sensibles
+
+        Args:
+            replace: Supprime d'abord les zones de ce type importées du même fichier
+
+        Returns:
+            Nombre de zones importées
+        """
+        with open(path, encoding='utf-8') as geojson_file:
+            collection = json.load(geojson_file)
+
+        features = collection.get('features', []) if collection.get('type') == 'FeatureCollection' else [collection]
+        zones = []
+        for position, feature in enumerate(features):
+            if not feature.get('geometry'):
+                continue
+            geometry = GEOSGeometry(json.dumps(feature['geometry']), srid=4326)
+            properties = feature.get('properties') or {}
+            zones.append(SensitiveZoneModel(
+                name=str(properties.get(name_property) or f"{kind} {position + 1}")[:150],
+                kind=kind,
+                geometry=geometry,
+                source=str(path)[-255:],
+            ))
+
+        with transaction.atomic():
+            if replace:
+                SensitiveZoneModel.objects.filter(kind=kind, source=str(path)[-255:]).delete()
+            SensitiveZoneModel.objects.bulk_create(zones, batch_size=1000)
+        return len(zones)
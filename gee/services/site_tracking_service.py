@@ -0,0 +1,165 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.utils import timezone
+
+from config.detection_settings import DetectionConfig
+from detection.models.detection_model import DetectionModel
+from detection.models.mining_site_model import MiningSiteModel
+from gee.backends.base_backend import METERS_PER_DEGREE
+from region.models.region_model import RegionModel
+
+EARTH_RADIUS_METERS = 6_371_000.0
+
+# Décalage des indices de rangée / colonne (positifs) et largeur d'un champ de la clé de cellule
+_GRID_OFFSET = 1 << 21
+_GRID_SHIFT = 22
+
+
+class SiteTrackingService:
+    """
+    Rattachement des détections aux sites miniers connus (grille de hachage spatial)
+
+    Les sites sont indexés par cellule d'une grille régulière en degrés (MiningSiteModel.grid_key,
+    index BDD (region, grid_key)). Une cellule mesure deux rayons de rapprochement en latitude,
+    donc au moins un rayon en longitude jusqu'à 60° : tout site à moins d'un rayon d'une détection
+    est dans l'une des 9 cellules voisines de la sienne. Une requête charge les sites de toutes ces
+    cellules pour un lot de détections, les distances sont ensuite calculées en NumPy.
+    """
+
+    def __init__(self, match_radius_meters: float = DetectionConfig.SITE_MATCH_RADIUS_METERS):
+        self.match_radius_meters = match_radius_meters
+        self.cell_degrees = 2 * match_radius_meters / METERS_PER_DEGREE
+        self.cells: Dict[Tuple[int, int], List[MiningSiteModel]] = defaultdict(list)
+
+    def grid_key(self, latitude: float, longitude: float) -> int:
+        row, col = self._cell(latitude, longitude)
+        return self._key(row, col)
+
+    def assign(self, detections: List[DetectionModel]) -> List[bool]:
+        """
+        Rattache chaque détection (non enregistrée) au site le plus proche de sa région dans le rayon,
+        ou à un nouveau site ; crée et met à jour les sites. À appeler dans une transaction.
+
+        Returns:
+            Pour chaque détection, True si elle ouvre un nouveau site
+        """
+        if not detections:
+            return []
+
+        # Verrou des régions : deux analyses parallèles d'une même région n'ouvrent pas deux fois le même site
+        region_ids = sorted({detection.region_id for detection in detections})
+        list(RegionModel.objects.select_for_update().filter(id__in=region_ids).order_by('id').values_list('id', flat=True))
+
+        keys = {
+            key
+            for detection in detections
+            for key in self._neighbour_keys(detection.latitude, detection.longitude)
+        }
+        self.cells.clear()
+        for site in MiningSiteModel.objects.filter(region_id__in=region_ids, grid_key__in=keys):
+            self._index(site)
+
+        new_sites, updated_sites, opened = [], {}, []
+        for detection in detections:
+            site = self._nearest(detection)
+            is_new = site is None
+            if is_new:
+                site = self._open_site(detection)
+                new_sites.append(site)
+            elif site.pk is not None:
+                site.updated_at = timezone.now()  # bulk_update ne déclenche pas auto_now
+                updated_sites[site.pk] = site
+            self._observe(site, detection)
+            detection.site = site
+            opened.append(is_new)
+
+        MiningSiteModel.objects.bulk_create(new_sites)
+        MiningSiteModel.objects.bulk_update(
+            list(updated_sites.values()),
+            ['latitude', 'longitude', 'grid_key', 'first_seen_date', 'last_seen_date', 'occurrence_count', 'last_image',
+             'max_confidence_score', 'max_area_hectares', 'updated_at']
+        )
+
+        print(f"Suivi des sites: {len(new_sites)} nouveaux sites, {len(updated_sites)} sites revus")
+        return opened
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    @staticmethod
+    def _key(row: int, col: int) -> int:
+        return ((row + _GRID_OFFSET) << _GRID_SHIFT) | (col + _GRID_OFFSET)
+
+    def _neighbour_keys(self, latitude: float, longitude: float) -> List[int]:
+        row, col = self._cell(latitude, longitude)
+        return [self._key(row + d_row, col + d_col) for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)]
+
+    def _index(self, site: MiningSiteModel):
+        self.cells[self._cell(site.latitude, site.longitude)].append(site)
+
+    def _unindex(self, site: MiningSiteModel):
+        self.cells[self._cell(site.latitude, site.longitude)].remove(site)
+
+    def _nearest(self, detection: DetectionModel) -> Optional[MiningSiteModel]:
+        row, col = self._cell(detection.latitude, detection.longitude)
+        candidates = [
+            site
+            for d_row in (-1, 0, 1)
+            for d_col in (-1, 0, 1)
+            for site in self.cells.get((row + d_row, col + d_col), ())
+            if site.region_id == detection.region_id
+        ]
+        if not candidates:
+            return None
+
+        latitudes = np.radians([site.latitude for site in candidates])
+        longitudes = np.radians([site.longitude for site in candidates])
+        distances = self._haversine(math.radians(detection.latitude), math.radians(detection.longitude),
+                                    latitudes, longitudes)
+        nearest = int(np.argmin(distances))
+        return candidates[nearest] if distances[nearest] <= self.match_radius_meters else None
+
+    @staticmethod
+    def _haversine(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Distances (m) d'un point à un ensemble de points, coordonnées en radians"""
+        a = (np.sin((latitudes - latitude) / 2) ** 2
+             + math.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2)
+        return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def _open_site(self, detection: DetectionModel) -> MiningSiteModel:
+        capture_date = detection.image.capture_date
+        site = MiningSiteModel(
+            region_id=detection.region_id,
+            latitude=detection.latitude,
+            longitude=detection.longitude,
+            grid_key=self.grid_key(detection.latitude, detection.longitude),
+            first_seen_date=capture_date,
+            last_seen_date=capture_date,
+        )
+        self._index(site)
+        return site
+
+    def _observe(self, site: MiningSiteModel, detection: DetectionModel):
+        """Ajoute la détection à la série temporelle du site"""
+        site.max_confidence_score = max(site.max_confidence_score, detection.confidence_score)
+        site.max_area_hectares = max(site.max_area_hectares, detection.area_hectares or 0.0)
+
+        # Une occurrence par image : plusieurs détections d'une même scène sur le site ne comptent qu'une fois
+        if site.last_image_id == detection.image_id and site.occurrence_count:
+            return
+
+        capture_date = detection.image.capture_date
+        site.occurrence_count += 1
+        site.last_image_id = detection.image_id
+        site.first_seen_date = min(site.first_seen_date, capture_date)
+        site.last_seen_date = max(site.last_seen_date, capture_date)
+
+        # Centroïde : moyenne courante des positions, une par image ; réindexé s'il change de cellule
+        self._unindex(site)
+        site.latitude += (detection.latitude - site.latitude) / site.occurrence_count
+        site.longitude += (detection.longitude - site.longitude) / site.occurrence_count
+        site.grid_key = self.grid_key(site.latitude, site.longitude)
+        self._index(site)
@@ -0,0 +1,151 @@
+import random
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from config.detection_settings import DetectionConfig
+from gee.config import GEEConfig
+from gee.models.spectral_baseline_model import SpectralBaselineModel
+from image.models.image_model import ImageModel
+
+# Facteur de cohérence MAD -> écart-type pour une distribution normale
+MAD_TO_STDDEV = 1.4826
+
+
+class SpectralBaselineService:
+    """
+    Références saisonnières des indices spectraux par région et mois calendaire
+
+    Chaque image analysée est intégrée une seule fois (ImageModel.baseline_applied_at)
+    aux statistiques de son mois et du mois 0 (tous mois confondus) ; le score
+    d'anomalie d'une scène se calcule ensuite en une requête, sans relire d'image.
+    """
+
+    INDEX_NAMES = sorted(name.lower() for name in GEEConfig.SPECTRAL_INDICES)
+
+    @classmethod
+    def scene_statistics(cls, image_record: ImageModel) -> Dict[str, Tuple[float, Optional[float]]]:
+        """{indice: (moyenne de la scène, écart-type intra-scène)} pour les indices calculés"""
+        statistics = {}
+        for index_name in cls.INDEX_NAMES:
+            data = getattr(image_record, f'{index_name}_data', None) or {}
+            if data.get('mean') is not None:
+                statistics[index_name] = (float(data['mean']), data.get('stddev'))
+        return statistics
+
+    @classmethod
+    def add_image(cls, image_record: ImageModel) -> bool:
+        """
+        Intègre la scène aux références de sa région
+
+        Returns:
+            False si la scène n'a pas d'indices ou est déjà intégrée
+        """
+        statistics = cls.scene_statistics(image_record)
+        if not statistics:
+            return False
+
+        months = sorted({SpectralBaselineModel.ALL_MONTHS, image_record.capture_date.month})
+        with transaction.atomic():
+            # Réservation de l'image : une relance ou un retraitement ne la compte pas deux fois
+            claimed = ImageModel.objects.filter(id=image_record.id, baseline_applied_at__isnull=True).update(
+                baseline_applied_at=timezone.now()
+            )
+            if not claimed:
+                return False
+
+            # Verrous de ligne pris toujours dans le même ordre (mois, indice) : pas d'interblocage
+            for month in months:
+                for index_name, (scene_mean, scene_stddev) in sorted(statistics.items()):
+                    baseline, _ = SpectralBaselineModel.objects.select_for_update().get_or_create(
+                        region_id=image_record.region_id, month=month, index_name=index_name
+                    )
+                    cls._update(baseline, scene_mean, scene_stddev)
+                    baseline.last_image_id = image_record.id
+                    baseline.save()
+        return True
+
+    @staticmethod
+    def _update(baseline: SpectralBaselineModel, value: float, pixel_stddev: Optional[float]):
+        """Mise à jour en ligne : Welford, réservoir (algorithme R), médiane et MAD du réservoir"""
+        baseline.sample_count += 1
+        delta = value - baseline.mean
+        baseline.mean += delta / baseline.sample_count
+        baseline.m2 += delta * (value - baseline.mean)
+
+        if pixel_stddev is not None:
+            if baseline.pixel_stddev_mean is None:
+                baseline.pixel_stddev_mean = float(pixel_stddev)
+            else:
+                baseline.pixel_stddev_mean += (float(pixel_stddev) - baseline.pixel_stddev_mean) / baseline.sample_count
+
+        reservoir = list(baseline.reservoir or [])
+        if len(reservoir) < DetectionConfig.BASELINE_RESERVOIR_SIZE:
+            reservoir.append(round(value, 6))
+        else:
+            slot = random.randrange(baseline.sample_count)
+            if slot < DetectionConfig.BASELINE_RESERVOIR_SIZE:
+                reservoir[slot] = round(value, 6)
+        baseline.reservoir = reservoir
+
+        values = np.asarray(reservoir, dtype=np.float64)
+        baseline.median = float(np.median(values))
+        baseline.mad = float(np.median(np.abs(values - baseline.median)))
+
+    @classmethod
+    def reference_indices(cls, region_id: int, capture_date: date) -> Optional[Dict]:
+        """
+        Référence d'une scène au format attendu par EarthEngineService.detect_anomalies
+
+        Returns:
+            {'ndvi_data': {'mean', 'stddev', 'sample_count', 'month'}, ...}, ou None
+            si la région n'a encore aucune image intégrée
+        """
+        month = capture_date.month
+        rows = SpectralBaselineModel.objects.filter(
+            region_id=region_id,
+            month__in=[month, SpectralBaselineModel.ALL_MONTHS],
+            index_name__in=cls.INDEX_NAMES,
+            sample_count__gt=0,
+        )
+        by_key = {(row.month, row.index_name): row for row in rows}
+
+        reference = {}
+        for index_name in cls.INDEX_NAMES:
+            baseline = by_key.get((month, index_name))
+            if baseline is None or baseline.sample_count < DetectionConfig.BASELINE_MIN_SAMPLES:
+                baseline = by_key.get((SpectralBaselineModel.ALL_MONTHS, index_name)) or baseline
+            if baseline is None:
+                continue
+
+            robust_spread = MAD_TO_STDDEV * (baseline.mad or 0.0)
+            reference[f'{index_name}_data'] = {
+                'mean': baseline.median if baseline.median is not None else baseline.mean,
+                'stddev': max(baseline.pixel_stddev_mean or 0.0, robust_spread, DetectionConfig.BASELINE_MIN_SCALE),
+                'sample_count': baseline.sample_count,
+                'month': baseline.month,
+            }
+
+        return reference or None
+
+    @classmethod
+    def rebuild(cls, region_id: Optional[int] = None) -> int:
+        """Recalcule les références à partir des images dont les indices sont calculés ; retourne le nombre d'images intégrées"""
+        baselines = SpectralBaselineModel.objects.all()
+        images = ImageModel.objects.filter(processing_status=ImageModel.ProcessingStatus.COMPLETED)
+        if region_id is not None:
+            baselines = baselines.filter(region_id=region_id)
+            images = images.filter(region_id=region_id)
+
+        with transaction.atomic():
+            baselines.delete()
+            images.update(baseline_applied_at=None)
+
+        added = 0
+        for image_record in images.order_by('capture_date').iterator():
+            if cls.add_image(image_record):
+                added += 1
+        return added
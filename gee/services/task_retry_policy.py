@@ -0,0 +1,183 @@
+import random
+import traceback
+from typing import Dict, Optional, Sequence, Tuple
+
+from celery import current_app
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import InterfaceError, OperationalError
+from django.utils import timezone
+
+from gee.config import GEEConfig
+from gee.models.dead_letter_task_model import DeadLetterTaskModel
+from gee.services.quota_governor import EEQuotaExceeded, get_quota_governor, http_status, is_quota_error
+
+ErrorClass = DeadLetterTaskModel.ErrorClassChoices
+
+# Erreurs de logique ou de données : une relance donnerait le même résultat
+PERMANENT_ERROR_TYPES = (
+    ObjectDoesNotExist, ValueError, TypeError, KeyError, AttributeError, IndexError,
+    ZeroDivisionError, NotImplementedError, FileNotFoundError, PermissionError,
+)
+
+# Réseau, base de données ou service EE momentanément indisponible
+TRANSIENT_ERROR_TYPES = (ConnectionError, TimeoutError, OperationalError, InterfaceError, OSError)
+
+PERMANENT_MESSAGE_MARKERS = (
+    'not found',
+    'does not exist',
+    'did not match any bands',
+    'no band named',
+    'permission denied',
+    'not authorized',
+    'invalid argument',
+    'user memory limit exceeded',
+)
+
+TRANSIENT_MESSAGE_MARKERS = (
+    'timed out',
+    'timeout',
+    'deadline exceeded',
+    'service unavailable',
+    'internal error',
+    'backend error',
+    'connection reset',
+    'connection aborted',
+    'temporarily',
+)
+
+# Codes HTTP d'une indisponibilité passagère (lus par http_status, jamais comme sous-chaîne du message)
+TRANSIENT_HTTP_STATUSES = (500, 502, 503, 504)
+
+
+def _message_has(error: Exception, markers: Sequence[str]) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in markers)
+
+
+def _is_ee_exception(error: Exception) -> bool:
+    error_type = type(error)
+    return error_type.__name__ == 'EEException' or error_type.__module__.split('.')[0] in ('ee', 'googleapiclient')
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classe d'une exception levée par une tâche GEE : QUOTA, TRANSIENT ou PERMANENT
+
+    Les exceptions Earth Engine (EEException, HttpError) sont classées d'après
+    leur message ; une exception EE non reconnue est considérée transitoire.
+    Toute autre exception non reconnue est une erreur de code : permanente.
+    """
+    if isinstance(error, EEQuotaExceeded) or is_quota_error(error):
+        return ErrorClass.QUOTA
+    if isinstance(error, PERMANENT_ERROR_TYPES):
+        return ErrorClass.PERMANENT
+    if isinstance(error, TRANSIENT_ERROR_TYPES) or http_status(error) in TRANSIENT_HTTP_STATUSES:
+        return ErrorClass.TRANSIENT
+    if _is_ee_exception(error):
+        return ErrorClass.PERMANENT if _message_has(error, PERMANENT_MESSAGE_MARKERS) else ErrorClass.TRANSIENT
+    if _message_has(error, TRANSIENT_MESSAGE_MARKERS):
+        return ErrorClass.TRANSIENT
+    return ErrorClass.PERMANENT
+
+
+def retry_delay(error_class: str, retries: int, error: Exception) -> float:
+    """
+    Délai avant relance (secondes)
+
+    TRANSIENT : backoff exponentiel plafonné, avec gigue (moitié fixe, moitié
+    aléatoire) pour étaler les relances simultanées. QUOTA : fin de la fenêtre
+    de quota (retry_after ou pause globale du gouverneur), plus une gigue.
+    """
+    if error_class == ErrorClass.QUOTA:
+        window = getattr(error, 'retry_after', 0.0)
+        window = max(window, get_quota_governor().store.backoff()[1], GEEConfig.TASK_QUOTA_MIN_DELAY_SECONDS)
+        return window + random.uniform(0, GEEConfig.TASK_QUOTA_MIN_DELAY_SECONDS)
+
+    cap = min(GEEConfig.TASK_RETRY_BASE_SECONDS * 2 ** retries, GEEConfig.TASK_RETRY_MAX_SECONDS)
+    return cap / 2 + random.uniform(0, cap / 2)
+
+
+def plan_retry(task, error: Exception) -> Tuple[str, Optional[float]]:
+    """
+    (classe d'erreur, délai de relance) pour une tâche liée (bind=True) ;
+    délai None : erreur permanente ou relances épuisées
+    """
+    error_class = classify_error(error)
+    max_retries = {
+        ErrorClass.TRANSIENT: GEEConfig.TASK_MAX_TRANSIENT_RETRIES,
+        ErrorClass.QUOTA: GEEConfig.TASK_MAX_QUOTA_RETRIES,
+    }.get(error_class, 0)
+
+    retries = task.request.retries
+    if retries >= max_retries:
+        return error_class, None
+    return error_class, retry_delay(error_class, retries, error)
+
+
+def retry_or_dead_letter(task, error: Exception, args: Sequence = (), kwargs: Optional[Dict] = None,
+                         plan: Optional[Tuple[str, Optional[float]]] = None) -> str:
+    """
+    Relance la tâche selon la classe d'erreur, sinon l'enregistre en dead-letter
+
+    Lève celery.exceptions.Retry quand une relance est programmée ; retourne la
+    classe d'erreur quand la tâche est abandonnée.
+    """
+    error_class, countdown = plan or plan_retry(task, error)
+    if countdown is not None:
+        print(f"{task.name}: erreur {error_class} ({type(error).__name__}), "
+              f"relance {task.request.retries + 1} dans {countdown:.0f}s")
+        # Budget de relances géré par plan_retry (par classe d'erreur)
+        raise task.retry(exc=error, countdown=countdown, max_retries=None)
+
+    DeadLetterService.record(task, error, error_class, args, kwargs)
+    return error_class
+
+
+class DeadLetterService:
+    """Enregistrement, inspection et relance groupée des tâches abandonnées"""
+
+    @staticmethod
+    def record(task, error: Exception, error_class: str, args: Sequence = (),
+               kwargs: Optional[Dict] = None, task_name: Optional[str] = None) -> DeadLetterTaskModel:
+        """
+        Enregistre l'abandon de `task` ; task_name permet de désigner une autre
+        tâche à relancer (ex: tâche isolée équivalente à une étape de pipeline)
+        """
+        dead_letter = DeadLetterTaskModel.objects.create(
+            task_name=task_name or task.name,
+            task_id=task.request.id,
+            args=list(args),
+            kwargs=kwargs or {},
+            error_class=error_class,
+            exception_type=f"{type(error).__module__}.{type(error).__name__}",
+            error_message=str(error)[:5000],
+            traceback=''.join(traceback.format_exception(type(error), error, error.__traceback__))[-20000:],
+            retries=task.request.retries,
+        )
+        print(f"{dead_letter.task_name}{list(args)} abandonnée ({error_class}) : dead-letter {dead_letter.id}")
+        return dead_letter
+
+    @staticmethod
+    def replay(queryset) -> int:
+        """Renvoie en file chaque tâche PENDING du queryset ; retourne le nombre de tâches relancées"""
+        now = timezone.now()
+        replayed = []
+        for dead_letter in queryset.filter(status=DeadLetterTaskModel.StatusChoices.PENDING):
+            result = current_app.send_task(dead_letter.task_name, args=dead_letter.args, kwargs=dead_letter.kwargs)
+            dead_letter.status = DeadLetterTaskModel.StatusChoices.REPLAYED
+            dead_letter.replay_count += 1
+            dead_letter.replayed_at = now
+            dead_letter.replay_task_id = result.id
+            dead_letter.updated_at = now
+            replayed.append(dead_letter)
+
+        DeadLetterTaskModel.objects.bulk_update(
+            replayed, fields=['status', 'replay_count', 'replayed_at', 'replay_task_id', 'updated_at']
+        )
+        return len(replayed)
+
+    @staticmethod
+    def discard(queryset) -> int:
+        return queryset.filter(status=DeadLetterTaskModel.StatusChoices.PENDING).update(
+            status=DeadLetterTaskModel.StatusChoices.DISCARDED, updated_at=timezone.now()
+        )
@@ -0,0 +1,218 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config.detection_settings import DetectionConfig
+from gee.backends.base_backend import pixel_size_degrees
+from gee.services.area_measurement import disturbed_ground_mask, measure_components, row_pixel_area_hectares
+from gee.services.batch_inference_service import gather_scores
+
+
+class TileScanService:
+    """
+    Balayage d'une scène entière par tuiles chevauchantes
+
+    L'emprise est découpée en une grille de tuiles (taille du modèle) avec un
+    recouvrement configurable. Les pixels sont récupérés par blocs couvrant
+    plusieurs tuiles (EarthEngineService.get_spectral_block : tuiles en cache disque,
+    sinon un appel backend par bloc ; plusieurs blocs en parallèle),
+    les tuiles sont découpées dans chaque bloc sans copie pixel par pixel puis
+    soumises au service d'inférence par micro-lots (BatchedInferenceService),
+    qui les évalue pendant que les blocs suivants sont récupérés.
+    """
+
+    def __init__(self, gee_service, inference,
+                 tile_size: int = None, scale: int = None, overlap: float = None,
+                 tiles_per_block: int = None, fetch_workers: int = None):
+        self.gee_service = gee_service
+        self.inference = inference
+        self.tile_size = tile_size or DetectionConfig.SCAN_TILE_SIZE_PIXELS
+        self.scale = scale or DetectionConfig.SCAN_SCALE_METERS
+        self.overlap = DetectionConfig.SCAN_TILE_OVERLAP if overlap is None else overlap
+        self.tiles_per_block = tiles_per_block or DetectionConfig.SCAN_TILES_PER_BLOCK
+        self.fetch_workers = fetch_workers or DetectionConfig.SCAN_FETCH_WORKERS
+
+        if not 0 <= self.overlap < 1:
+            raise ValueError(f"Recouvrement invalide: {self.overlap} (attendu 0 <= overlap < 1)")
+        self.stride = max(1, int(round(self.tile_size * (1 - self.overlap))))
+
+    def build_grid(self, bounds: Dict) -> Dict:
+        """
+        Grille de tuiles couvrant l'emprise (lat_min, lat_max, lon_min, lon_max)
+
+        Les pixels sont de taille constante en degrés (calculée à la latitude
+        médiane) ; la dernière rangée/colonne de tuiles peut déborder légèrement
+        de l'emprise.
+        """
+        mid_lat = (bounds['lat_min'] + bounds['lat_max']) / 2
+        pixel_width, pixel_height = pixel_size_degrees(mid_lat, self.scale)
+
+        height = int(math.ceil((bounds['lat_max'] - bounds['lat_min']) / pixel_height))
+        width = int(math.ceil((bounds['lon_max'] - bounds['lon_min']) / pixel_width))
+
+        return {
+            'lon_min': bounds['lon_min'],
+            'lat_max': bounds['lat_max'],
+            'pixel_width': pixel_width,
+            'pixel_height': pixel_height,
+            'tile_rows': max(1, int(math.ceil(max(height - self.tile_size, 0) / self.stride)) + 1),
+            'tile_cols': max(1, int(math.ceil(max(width - self.tile_size, 0) / self.stride)) + 1),
+        }
+
+    def scan(self, asset_id: str, bounds: Dict, threshold: float,
+             max_hot_tiles: Optional[int] = None) -> Dict:
+        """
+        Évalue toutes les tuiles d'une scène
+
+        Args:
+            asset_id: ID de la scène
+            bounds: Emprise à balayer
+            threshold: Score minimal pour qu'une tuile soit retenue
+            max_hot_tiles: Nombre maximal de tuiles retenues (meilleurs scores)
+
+        Returns:
+            Dict avec 'hot_tiles' (latitude, longitude, score, area_hectares, row, col ;
+            score décroissant) et les métriques 'tiles_total', 'tiles_scored',
+            'blocks_fetched', 'elapsed_seconds' et 'tiles_per_second'
+        """
+        started = time.perf_counter()
+        grid = self.build_grid(bounds)
+        blocks = self._block_ranges(grid)
+
+        submitted = []
+
+        # Récupération des blocs en parallèle ; les tuiles de chaque bloc partent en inférence
+        # dès réception (ordre des blocs préservé)
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            fetched = executor.map(lambda block: (block, self._fetch_block(asset_id, grid, block)), blocks)
+
+            for block, pixels in fetched:
+                if pixels is None:
+                    continue
+
+                tiles, positions = self._cut_tiles(pixels, block)
+                if len(tiles):
+                    areas = self._tile_areas(pixels, block, grid, positions)
+                    submitted.append((self.inference.submit_many(tiles), positions, areas))
+
+        hot_tiles = []
+        tiles_scored = 0
+        for futures, positions, areas in submitted:
+            scores = gather_scores(futures)
+            tiles_scored += len(scores)
+            hot_tiles.extend(self._hot_tiles(scores, positions, areas, grid, threshold))
+
+        hot_tiles.sort(key=lambda tile: tile['score'], reverse=True)
+        if max_hot_tiles is not None:
+            hot_tiles = hot_tiles[:max_hot_tiles]
+
+        elapsed = time.perf_counter() - started
+        tiles_total = grid['tile_rows'] * grid['tile_cols']
+        return {
+            'hot_tiles': hot_tiles,
+            'tiles_total': tiles_total,
+            'tiles_scored': tiles_scored,
+            'blocks_fetched': len(blocks),
+            'elapsed_seconds': round(elapsed, 3),
+            'tiles_per_second': round(tiles_total / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _block_ranges(self, grid: Dict) -> List[Tuple[int, int, int, int]]:
+        """Découpe la grille de tuiles en blocs (row0, row1, col0, col1) en indices de tuiles"""
+        step = self.tiles_per_block
+        return [
+            (row0, min(row0 + step, grid['tile_rows']), col0, min(col0 + step, grid['tile_cols']))
+            for row0 in range(0, grid['tile_rows'], step)
+            for col0 in range(0, grid['tile_cols'], step)
+        ]
+
+    def _fetch_block(self, asset_id: str, grid: Dict, block: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """Pixels d'un bloc : toutes ses tuiles, recouvrement compris"""
+        row0, row1, col0, col1 = block
+        return self.gee_service.get_spectral_block(
+            asset_id,
+            lon_min=grid['lon_min'] + col0 * self.stride * grid['pixel_width'],
+            lat_max=grid['lat_max'] - row0 * self.stride * grid['pixel_height'],
+            tile_rows=row1 - row0,
+            tile_cols=col1 - col0,
+            tile_size=self.tile_size,
+            stride=self.stride,
+            pixel_width=grid['pixel_width'],
+            pixel_height=grid['pixel_height'],
+            scale=self.scale
+        )
+
+    def _cut_tiles(self, pixels: np.ndarray, block: Tuple[int, int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tuiles d'un bloc -> (n, taille, taille, 3) et leurs positions (n, 2) (rangée, colonne)
+
+        Les tuiles sans donnée (entièrement à 0) sont écartées avant l'évaluation.
+        """
+        row0, row1, col0, col1 = block
+        windows = sliding_window_view(pixels, (self.tile_size, self.tile_size), axis=(0, 1))
+        # (rangées, colonnes, 3, taille, taille) -> (rangées, colonnes, taille, taille, 3)
+        windows = windows[::self.stride, ::self.stride][:row1 - row0, :col1 - col0]
+        tiles = np.moveaxis(windows, 2, -1).reshape(-1, self.tile_size, self.tile_size, 3)
+
+        rows, cols = np.meshgrid(np.arange(row0, row1), np.arange(col0, col1), indexing='ij')
+        positions = np.stack([rows.ravel(), cols.ravel()], axis=-1)
+
+        has_data = tiles.any(axis=(1, 2, 3))
+        return np.ascontiguousarray(tiles[has_data]), positions[has_data]
+
+    def _tile_areas(self, pixels: np.ndarray, block: Tuple[int, int, int, int], grid: Dict,
+                    positions: np.ndarray) -> np.ndarray:
+        """
+        Surface (ha) de sol remanié de chaque tuile du bloc
+
+        Composantes connexes du masque de sol remanié sur tout le bloc (un seul
+        étiquetage, composantes limitées au bloc) : une tuile reçoit la surface de
+        la composante sous son centre, à défaut celle des pixels remaniés qu'elle
+        contient (table de sommes cumulées).
+        """
+        row0, _, col0, _ = block
+        mask = disturbed_ground_mask(pixels)
+
+        block_lat_max = grid['lat_max'] - row0 * self.stride * grid['pixel_height']
+        latitudes = block_lat_max - (np.arange(pixels.shape[0]) + 0.5) * grid['pixel_height']
+        row_area = row_pixel_area_hectares(latitudes, grid['pixel_width'], grid['pixel_height'])
+        components = measure_components(mask, row_area)
+
+        top = (positions[:, 0] - row0) * self.stride
+        left = (positions[:, 1] - col0) * self.stride
+        center = self.tile_size // 2
+        areas = components['areas_hectares'][components['labels'][top + center, left + center]]
+
+        # Centre hors sol remanié : pixels remaniés de la tuile
+        integral = cv2.integral(mask.astype(np.uint8))
+        bottom, right = top + self.tile_size, left + self.tile_size
+        disturbed_pixels = integral[bottom, right] - integral[top, right] - integral[bottom, left] + integral[top, left]
+        return np.where(areas > 0, areas, disturbed_pixels * row_area[top + center])
+
+    def _hot_tiles(self, scores: np.ndarray, positions: np.ndarray, areas: np.ndarray, grid: Dict,
+                   threshold: float) -> List[Dict]:
+        """Tuiles au-dessus du seuil avec les coordonnées de leur centre"""
+        hot = np.flatnonzero(scores > threshold)
+
+        # Coordonnées du centre des tuiles retenues
+        center_offset = self.tile_size / 2
+        rows, cols = positions[hot, 0], positions[hot, 1]
+        latitudes = grid['lat_max'] - (rows * self.stride + center_offset) * grid['pixel_height']
+        longitudes = grid['lon_min'] + (cols * self.stride + center_offset) * grid['pixel_width']
+
+        return [
+            {
+                'latitude': float(lat),
+                'longitude': float(lon),
+                'score': float(score),
+                'area_hectares': float(area),
+                'row': int(row),
+                'col': int(col),
+            }
+            for lat, lon, score, area, row, col in zip(latitudes, longitudes, scores[hot], areas[hot], rows, cols)
+        ]
@@ -1,22 +1,26 @@
-from celery import shared_task
+import time
+
+from celery import shared_task, chord
 from django.utils import timezone
 from image.models.image_model import ImageModel
+from gee.config import GEEConfig
+from gee.services.asset_lock import AssetLock
 # To avoid circular import if EarthEngineService itself imports tasks directly or indirectly,
 # it's sometimes safer to instantiate it within the task or ensure no top-level imports create loops.
 # from .services.earth_engine_service import EarthEngineService
 # For now, assuming direct import is fine based on typical Celery structure.
 # If circular dependency error occurs, will need to adjust.
 
-@shared_task(bind=True, autoretry_for=(Exception,), max_retries=3, default_retry_delay=5*60) # Updated decorator
+@shared_task(bind=True) # Relances choisies par task_retry_policy selon la classe d'erreur
 def process_gee_image_task(self, image_record_id: int): # Signature already correct for bind=True
     """
     Celery task to process a GEE image asynchronously.
     Calculates spectral indices and updates the ImageModel.
-    """
-    # Import service here to avoid potential Django app loading issues with Celery workers
-    # and to manage dependencies more locally if needed.
-    from gee.services.earth_engine_service import EarthEngineService
 
+    Failures are classified (task_retry_policy): transient EE/network errors are
+    retried with exponential backoff and jitter, quota errors after the quota
+    window, permanent errors fail fast into a DeadLetterTaskModel record.
+    """
     try:
         image_record = ImageModel.objects.get(id=image_record_id)
     except ImageModel.DoesNotExist:
@@ -24,71 +28,69 @@ def process_gee_image_task(self, image_record_id: int): # Signature already corr
         # No need for self.update_state for DoesNotExist, as this is not a retryable GEE error.
         return f"Image record {image_record_id} not found. Task aborted."
 
-    # Check if the task should run, e.g. if it was manually re-queued despite being COMPLETED
-    # or if it's already PROCESSING by another worker (though Celery deduplication might handle some of this)
-    if image_record.processing_status == ImageModel.ProcessingStatus.COMPLETED and not self.request.called_directly:
-        print(f"Image {image_record_id} is already COMPLETED. Skipping task unless called directly.")
-        return f"Image {image_record_id} already processed."
-
-    # Mark as PROCESSING
-    image_record.processing_status = ImageModel.ProcessingStatus.PROCESSING
-    image_record.processing_error = None # Clear previous errors
-    image_record.save(update_fields=['processing_status', 'processing_error'])
-    print(f"Task started: Processing image {image_record_id} ({image_record.gee_asset_id})")
+    # One worker per asset: duplicate submissions or redelivered messages stop here
+    run_lock = AssetLock(image_record.gee_asset_id, 'run', GEEConfig.IMAGE_TASK_LEASE_SECONDS)
+    if not run_lock.acquire():
+        print(f"Image {image_record_id} is already being processed by another worker. Collapsing duplicate task.")
+        return f"Image {image_record_id} already being processed."
 
     try:
-        service = EarthEngineService() # Initialize GEE service
-        indices_data = service.calculate_spectral_indices(image_record.gee_asset_id)
-
-        if indices_data and not isinstance(indices_data, dict): # Ensure it's a dict, not an error indicator
-            # This check might be redundant if calculate_spectral_indices always returns a dict or throws error
-            print(f"Warning: indices_data for image {image_record_id} might not be a dictionary. Type: {type(indices_data)}")
-
-        if indices_data and \
-           indices_data.get('ndvi_data') and \
-           indices_data.get('ndwi_data') and \
-           indices_data.get('ndti_data'):
-
-            image_record.ndvi_data = indices_data.get('ndvi_data')
-            image_record.ndwi_data = indices_data.get('ndwi_data')
-            image_record.ndti_data = indices_data.get('ndti_data')
-
-            image_record.ndvi_mean = indices_data.get('ndvi_data', {}).get('mean')
-            image_record.ndwi_mean = indices_data.get('ndwi_data', {}).get('mean')
-            image_record.ndti_mean = indices_data.get('ndti_data', {}).get('mean')
-
-            image_record.processing_status = ImageModel.ProcessingStatus.COMPLETED
-            image_record.processed_at = timezone.now()
-            image_record.processing_error = None
-            print(f"Successfully processed image {image_record_id}. Status: COMPLETED.")
-        else:
-            image_record.processing_status = ImageModel.ProcessingStatus.ERROR
-            error_message = "Erreur calcul indices spectraux durant tâche asynchrone."
-            if isinstance(indices_data, dict) and indices_data.get('error'):
-                 error_message = indices_data.get('error')
-            elif not indices_data:
-                 error_message = "No data returned from calculate_spectral_indices."
+        return _process_claimed_image(self, image_record)
+    finally:
+        run_lock.release()
+
+
+def _process_claimed_image(task, image_record: ImageModel) -> str:
+    """
+    Body of process_gee_image_task, run under the asset's execution lock
 
-            image_record.processing_error = error_message
-            print(f"Error processing image {image_record_id}. Status: ERROR. Reason: {error_message}")
+    The image is claimed with a conditional UPDATE (PENDING/ERROR, or a stale
+    PROCESSING claim, -> PROCESSING): if the claim fails the image is already
+    COMPLETED or owned by another task and nothing is done. A COMPLETED image is
+    only recomputed when the task is called directly.
+    """
+    from gee.services.earth_engine_service import EarthEngineService
+
+    image_record_id = image_record.id
+    if not EarthEngineService.claim_image_for_processing(
+            image_record_id, task.request.id, include_completed=bool(task.request.called_directly)):
+        image_record.refresh_from_db(fields=['processing_status'])
+        print(f"Image {image_record_id} is already {image_record.processing_status}. Skipping duplicate task.")
+        return f"Image {image_record_id} already {image_record.processing_status}."
 
-        image_record.save()
+    image_record.refresh_from_db()
+    print(f"Task started: Processing image {image_record_id} ({image_record.gee_asset_id})")
+
+    try:
+        status = _compute_image_indices(image_record)
+        if status == ImageModel.ProcessingStatus.COMPLETED:
+            # Indices enregistrés : la détection suit immédiatement, sans attendre une analyse complète
+            detect_mining_activity_task.delay(image_record_id)
         return f"Image {image_record_id} processing finished with status: {image_record.processing_status}"
 
     except Exception as e:
-        print(f"Exception in process_gee_image_task for image {image_record_id}: {e}")
-        # This block is reached if an exception occurs in the main try block above.
-        # The autoretry_for mechanism will handle retries for 'Exception' types.
-        # Log the error and update the model state to ERROR.
-        # If this is the last retry, the task will be marked as FAILED by Celery.
-        error_message_for_db = f"Tâche asynchrone échouée après {self.request.retries + 1} tentatives: {type(e).__name__} - {str(e)}"
-        print(f"Exception in process_gee_image_task for image {image_record_id} (attempt {self.request.retries + 1}/{self.max_retries}): {e}")
+        from gee.services.task_retry_policy import plan_retry, retry_or_dead_letter
+
+        error_class, countdown = plan_retry(task, e)
+        print(f"Exception in process_gee_image_task for image {image_record_id} "
+              f"(attempt {task.request.retries + 1}, {error_class}): {e}")
 
         try:
             # Re-fetch to ensure we have the latest version before updating, though image_record should be fine.
             image_record_on_failure = ImageModel.objects.get(id=image_record_id)
-            image_record_on_failure.processing_status = ImageModel.ProcessingStatus.ERROR
-            image_record_on_failure.processing_error = error_message_for_db
+            if countdown is not None:
+                # Relance programmée : l'image reste en attente (pas de nouvelle tâche lancée entre-temps)
+                image_record_on_failure.processing_status = ImageModel.ProcessingStatus.PENDING
+                image_record_on_failure.processing_error = (
+                    f"Tentative {task.request.retries + 1} échouée ({error_class}), nouvel essai dans "
+                    f"{countdown:.0f}s: {type(e).__name__} - {str(e)}"
+                )
+            else:
+                image_record_on_failure.processing_status = ImageModel.ProcessingStatus.ERROR
+                image_record_on_failure.processing_error = (
+                    f"Tâche asynchrone échouée après {task.request.retries + 1} tentatives ({error_class}): "
+                    f"{type(e).__name__} - {str(e)}"
+                )
             image_record_on_failure.save(update_fields=['processing_status', 'processing_error'])
         except ImageModel.DoesNotExist:
             # This shouldn't happen if we found it at the start of the task.
@@ -96,6 +98,324 @@ def process_gee_image_task(self, image_record_id: int): # Signature already corr
         except Exception as e_save:
             print(f"CRITICAL: Failed to save error status for image {image_record_id} after task failure: {e_save}")
 
-        # Re-raise the exception. This is crucial for autoretry_for to work.
-        # Celery will catch this and schedule a retry if conditions are met.
-        raise e
+        # Relance (celery Retry levée) ou enregistrement en dead-letter
+        retry_or_dead_letter(task, e, args=[image_record_id], plan=(error_class, countdown))
+        return f"Image {image_record_id} processing failed ({error_class})."
+
+
+def _compute_image_indices(image_record: ImageModel, service=None) -> str:
+    """
+    Calcule les indices spectraux d'une image et met à jour son enregistrement
+
+    Partagé par process_gee_image_task et le pipeline d'analyse ; les exceptions
+    du backend sont propagées à la tâche appelante (qui gère les relances).
+
+    Returns:
+        Statut final de l'image (COMPLETED ou ERROR)
+    """
+    # Import service here to avoid potential Django app loading issues with Celery workers
+    # and to manage dependencies more locally if needed.
+    from gee.services.earth_engine_service import EarthEngineService
+
+    image_record_id = image_record.id
+    service = service or EarthEngineService() # Initialize GEE service
+    indices_data = service.calculate_spectral_indices(image_record.gee_asset_id, raise_errors=True)
+
+    if indices_data and not isinstance(indices_data, dict): # Ensure it's a dict, not an error indicator
+        # This check might be redundant if calculate_spectral_indices always returns a dict or throws error
+        print(f"Warning: indices_data for image {image_record_id} might not be a dictionary. Type: {type(indices_data)}")
+
+    if indices_data and \
+       indices_data.get('ndvi_data') and \
+       indices_data.get('ndwi_data') and \
+       indices_data.get('ndti_data'):
+
+        image_record.ndvi_data = indices_data.get('ndvi_data')
+        image_record.ndwi_data = indices_data.get('ndwi_data')
+        image_record.ndti_data = indices_data.get('ndti_data')
+
+        image_record.ndvi_mean = indices_data.get('ndvi_data', {}).get('mean')
+        image_record.ndwi_mean = indices_data.get('ndwi_data', {}).get('mean')
+        image_record.ndti_mean = indices_data.get('ndti_data', {}).get('mean')
+
+        image_record.processing_status = ImageModel.ProcessingStatus.COMPLETED
+        image_record.processed_at = timezone.now()
+        image_record.processing_error = None
+        print(f"Successfully processed image {image_record_id}. Status: COMPLETED.")
+    else:
+        image_record.processing_status = ImageModel.ProcessingStatus.ERROR
+        error_message = "Erreur calcul indices spectraux durant tâche asynchrone."
+        if isinstance(indices_data, dict) and indices_data.get('error'):
+             error_message = indices_data.get('error')
+        elif not indices_data:
+             error_message = "No data returned from calculate_spectral_indices."
+
+        image_record.processing_error = error_message
+        print(f"Error processing image {image_record_id}. Status: ERROR. Reason: {error_message}")
+
+    image_record.save()
+    return image_record.processing_status
+
+
+@shared_task(bind=True)
+def detect_mining_activity_task(self, image_record_id: int):
+    """
+    Détection d'orpaillage sur une image dont les indices viennent d'être calculés
+
+    Idempotente : l'image est réservée par un UPDATE conditionnel
+    (ImageModel.detection_status), une image déjà analysée ou en cours
+    d'analyse par un autre worker est ignorée.
+    """
+    from gee.services.mining_detection_service import MiningDetectionService
+
+    try:
+        image_record = ImageModel.objects.get(id=image_record_id)
+    except ImageModel.DoesNotExist:
+        print(f"Error: ImageModel with id {image_record_id} not found in detect_mining_activity_task.")
+        return f"Image record {image_record_id} not found. Task aborted."
+
+    try:
+        detections = MiningDetectionService().analyze_image_once(image_record)
+    except Exception as e:
+        from gee.services.task_retry_policy import retry_or_dead_letter
+
+        error_class = retry_or_dead_letter(self, e, args=[image_record_id])
+        return f"Image {image_record_id} detection failed ({error_class})."
+
+    if detections is None:
+        print(f"Image {image_record_id} already analysed or being analysed. Skipping detection.")
+        return f"Image {image_record_id} already analysed."
+
+    print(f"Detection finished for image {image_record_id}: {len(detections)} detections.")
+    return f"Image {image_record_id} detection finished: {len(detections)} detections"
+
+
+# ---------------------------------------------------------------------------
+# Pipeline d'analyse complète (POST /api/analysis/run/)
+#
+#   start_analysis_run_task (récupération des images)
+#     -> chord[analysis_image_indices_task par image]
+#     -> start_detection_stage_task
+#     -> chord[analysis_image_detection_task par image complétée]
+#     -> finalize_analysis_run_task (alertes, investigations, résultats)
+#
+# Les tâches par image ne lèvent jamais d'exception après leur dernière
+# tentative : l'échec est compté dans l'exécution (et enregistré en
+# dead-letter sous forme de tâche isolée) et le chord se poursuit.
+# ---------------------------------------------------------------------------
+
+@shared_task(bind=True)
+def start_analysis_run_task(self, run_id: int):
+    """Étape FETCH : liste les images récentes, crée leurs enregistrements puis lance le calcul des indices"""
+    from gee.config import GEEConfig
+    from gee.models.analysis_run_model import AnalysisRunModel
+    from gee.services.analysis_run_service import AnalysisRunService
+    from gee.services.earth_engine_service import EarthEngineService
+    from report.services.event_log_service import EventLogService
+
+    run = AnalysisRunModel.objects.select_related('requested_by').get(id=run_id)
+    run.status = AnalysisRunModel.StatusChoices.RUNNING
+    run.started_at = timezone.now()
+    run.save(update_fields=['status', 'started_at', 'updated_at'])
+    EventLogService.log_analysis_started(run.requested_by, run.months_back)
+
+    AnalysisRunService.start_stage(run, AnalysisRunModel.StageChoices.FETCH)
+    try:
+        service = EarthEngineService()
+        recent_images = service.get_recent_images(run.months_back)[-GEEConfig.ANALYSIS_MAX_IMAGES:]
+
+        image_ids = []
+        for img_data in recent_images:
+            image_record, _ = service.get_or_create_image_record(img_data['gee_asset_id'], run.requested_by_id)
+            if image_record:
+                image_ids.append(image_record.id)
+            else:
+                run.errors.append(f"Erreur traitement {img_data['gee_asset_id']}")
+    except Exception as e:
+        print(f"Erreur récupération images pour l'analyse {run_id}: {e}")
+        AnalysisRunService.fail(run, f"Erreur récupération images: {e}")
+        return f"Analysis run {run_id} failed during fetch"
+
+    if not recent_images:
+        run.errors.append("Aucune image satellite trouvée")
+
+    run.image_ids = image_ids
+    run.images_total = len(image_ids)
+    run.save(update_fields=['image_ids', 'images_total', 'errors', 'updated_at'])
+    AnalysisRunService.finish_stage(run, AnalysisRunModel.StageChoices.FETCH)
+    print(f"Analyse {run_id}: {len(image_ids)} images à traiter")
+
+    AnalysisRunService.start_stage(run, AnalysisRunModel.StageChoices.INDICES)
+    if not image_ids:
+        start_detection_stage_task.delay(run_id)
+    else:
+        chord(
+            analysis_image_indices_task.si(run_id, image_id) for image_id in image_ids
+        )(start_detection_stage_task.si(run_id))
+
+    return f"Analysis run {run_id}: {len(image_ids)} images dispatched"
+
+
+@shared_task(bind=True)
+def analysis_image_indices_task(self, run_id: int, image_record_id: int):
+    """Étape INDICES pour une image (déjà complétée : rien à recalculer)"""
+    from gee.services.analysis_run_service import AnalysisRunService
+    from gee.services.earth_engine_service import EarthEngineService
+    from gee.services.task_retry_policy import DeadLetterService, plan_retry
+
+    started = time.perf_counter()
+    busy = False
+    try:
+        image_record = ImageModel.objects.get(id=image_record_id)
+        if image_record.processing_status == ImageModel.ProcessingStatus.COMPLETED:
+            status = image_record.processing_status
+        else:
+            # Même verrou et même réservation que process_gee_image_task : jamais deux calculs pour un asset
+            run_lock = AssetLock(image_record.gee_asset_id, 'run', GEEConfig.IMAGE_TASK_LEASE_SECONDS)
+            if run_lock.acquire():
+                try:
+                    if EarthEngineService.claim_image_for_processing(image_record_id, self.request.id):
+                        image_record.refresh_from_db()
+                        status = _compute_image_indices(image_record)
+                    else:
+                        busy = True
+                finally:
+                    run_lock.release()
+            else:
+                busy = True
+    except Exception as e:
+        error_class, countdown = plan_retry(self, e)
+        if countdown is not None:
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        ImageModel.objects.filter(id=image_record_id).update(
+            processing_status=ImageModel.ProcessingStatus.ERROR,
+            processing_error=f"Tâche asynchrone échouée après {self.request.retries + 1} tentatives ({error_class}): "
+                             f"{type(e).__name__} - {str(e)}"
+        )
+        status = ImageModel.ProcessingStatus.ERROR
+        AnalysisRunService.add_error(run_id, f"Erreur traitement image {image_record_id} ({error_class}): {e}")
+        # Relance possible hors exécution : traitement isolé de l'image (suivi de sa détection)
+        DeadLetterService.record(self, e, error_class, args=[image_record_id], task_name=process_gee_image_task.name)
+
+    if busy:
+        # Indices en cours de calcul par une autre tâche (ingestion, autre exécution) : on attend son résultat
+        raise self.retry(countdown=GEEConfig.IMAGE_DUPLICATE_POLL_SECONDS, max_retries=None)
+
+    elapsed = time.perf_counter() - started
+    if status == ImageModel.ProcessingStatus.COMPLETED:
+        AnalysisRunService.increment(run_id, images_indexed=1, indices_seconds=elapsed)
+    else:
+        AnalysisRunService.increment(run_id, images_failed=1, indices_seconds=elapsed)
+    return status
+
+
+@shared_task(bind=True)
+def start_detection_stage_task(self, run_id: int):
+    """Fin de l'étape INDICES : lance la détection sur les images complétées"""
+    from gee.models.analysis_run_model import AnalysisRunModel
+    from gee.services.analysis_run_service import AnalysisRunService
+
+    run = AnalysisRunModel.objects.get(id=run_id)
+    AnalysisRunService.finish_stage(run, AnalysisRunModel.StageChoices.INDICES)
+
+    completed_ids = list(ImageModel.objects.filter(
+        id__in=run.image_ids, processing_status=ImageModel.ProcessingStatus.COMPLETED
+    ).values_list('id', flat=True))
+
+    AnalysisRunService.start_stage(run, AnalysisRunModel.StageChoices.DETECTION)
+    if not completed_ids:
+        finalize_analysis_run_task.delay(run_id)
+    else:
+        chord(
+            analysis_image_detection_task.si(run_id, image_id) for image_id in completed_ids
+        )(finalize_analysis_run_task.si(run_id))
+
+    return f"Analysis run {run_id}: detection dispatched for {len(completed_ids)} images"
+
+
+@shared_task(bind=True)
+def analysis_image_detection_task(self, run_id: int, image_record_id: int):
+    """Étape DETECTION pour une image : balayage, détections et alertes associées (une seule fois par image)"""
+    from gee.services.analysis_run_service import AnalysisRunService
+    from gee.services.mining_detection_service import MiningDetectionService
+    from gee.services.task_retry_policy import DeadLetterService, plan_retry
+
+    started = time.perf_counter()
+    try:
+        image_record = ImageModel.objects.get(id=image_record_id)
+        detection_service = MiningDetectionService()
+        detections = detection_service.analyze_image_once(image_record)
+    except Exception as e:
+        error_class, countdown = plan_retry(self, e)
+        if countdown is not None:
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        AnalysisRunService.add_error(run_id, f"Erreur détection image {image_record_id} ({error_class}): {e}")
+        DeadLetterService.record(self, e, error_class, args=[image_record_id],
+                                 task_name=detect_mining_activity_task.name)
+        return 0
+
+    if detections is None:
+        # Déjà analysée (détection déclenchée à l'ingestion ou par une autre exécution)
+        AnalysisRunService.increment(run_id, images_analyzed=1)
+        return 0
+
+    scan_metrics = detection_service.last_scan_metrics or {}
+    AnalysisRunService.increment(
+        run_id,
+        images_analyzed=1,
+        detections_found=len(detections),
+        tiles_scanned=scan_metrics.get('tiles_total', 0),
+        detection_seconds=time.perf_counter() - started,
+    )
+    print(f"Analyse {run_id}: image {image_record_id} → {len(detections)} détections")
+    return len(detections)
+
+
+@shared_task(bind=True)
+def finalize_analysis_run_task(self, run_id: int):
+    """Étape ALERTING : comptage des alertes et investigations, résultats finaux"""
+    from detection.models.detection_model import DetectionModel
+    from detection.models.investigation_model import InvestigationModel
+    from gee.models.analysis_run_model import AnalysisRunModel
+    from gee.services.analysis_run_service import AnalysisRunService
+    from report.models.event_log_model import EventLogModel
+    from report.services.event_log_service import EventLogService
+
+    run = AnalysisRunModel.objects.select_related('requested_by').get(id=run_id)
+    AnalysisRunService.finish_stage(run, AnalysisRunModel.StageChoices.DETECTION)
+    AnalysisRunService.start_stage(run, AnalysisRunModel.StageChoices.ALERTING)
+
+    # Détections produites par cette exécution
+    detections = DetectionModel.objects.filter(image_id__in=run.image_ids, detection_date__gte=run.started_at)
+    # Investigations créées par DetectionSink, une par nouveau site (pas pour les détections revues)
+    investigations_created = InvestigationModel.objects.filter(detection__in=detections).count()
+    # Alertes ouvertes et escaladées par ces détections (événements écrits par DetectionSink) : une détection
+    # regroupée dans une alerte existante ou dans l'alerte de synthèse régionale n'est pas la détection de l'alerte
+    run_alert_events = EventLogModel.objects.filter(detection__in=detections)
+    alerts_generated = run_alert_events.filter(event_type='ALERT_GENERATED').values('alert_id').distinct().count()
+    alerts_escalated = run_alert_events.filter(event_type='ALERT_ESCALATED').values('alert_id').distinct().count()
+
+    AnalysisRunService.finish_stage(run, AnalysisRunModel.StageChoices.ALERTING)
+
+    run.refresh_from_db()
+    detection_seconds = run.detection_seconds
+    run.results = {
+        'success': True,
+        'images_processed': run.images_indexed,
+        'detections_found': run.detections_found,
+        'alerts_generated': alerts_generated,
+        'alerts_escalated': alerts_escalated,
+        'investigations_created': investigations_created,
+        'tiles_scanned': run.tiles_scanned,
+        'scan_tiles_per_second': round(run.tiles_scanned / detection_seconds, 1) if detection_seconds > 0 else 0.0,
+        'errors_count': len(run.errors),
+    }
+    run.status = AnalysisRunModel.StatusChoices.COMPLETED
+    run.current_stage = AnalysisRunModel.StageChoices.DONE
+    run.finished_at = timezone.now()
+    run.save(update_fields=['results', 'status', 'current_stage', 'finished_at', 'updated_at'])
+
+    EventLogService.log_analysis_completed(run.requested_by, {'run_id': run.id, **run.results})
+    print(f"Analyse {run_id} terminée: {run.detections_found} détections, {alerts_generated} alertes, "
+          f"{alerts_escalated} escaladées")
+    return run.results
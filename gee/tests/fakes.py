@@ -0,0 +1,28 @@
+class EEException(Exception):
+    """Même nom que ee.EEException, sans dépendre du client Earth Engine"""
+
+
+class FakeClock:
+    """Remplace un module time : sleep() avance l'horloge au lieu d'attendre"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class DirectGovernor:
+    """Gouverneur de quota transparent : exécute l'appel EE directement"""
+
+    def call(self, operation, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
@@ -0,0 +1,108 @@
+from collections import Counter
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from alert.models.alert_model import AlertModel
+from config.detection_settings import DetectionConfig
+from detection.models.detection_model import DetectionModel
+from detection.models.mining_site_model import MiningSiteModel
+from gee.services.alert_aggregation_service import CREATED, ESCALATED, FOLDED, AlertAggregationService
+from region.models.region_model import RegionModel
+
+
+class AlertAggregationServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.region = RegionModel(id=1, name='BONDOUKOU')
+        self.sites = {site_id: MiningSiteModel(id=site_id, region=self.region) for site_id in range(1, 10)}
+        self.service = AlertAggregationService()
+        self.open_alerts, self.summary_alerts, self.created_counts = {}, {}, Counter()
+        for name, value in (('_open_site_alerts', self.open_alerts), ('_open_summary_alerts', self.summary_alerts),
+                            ('_alerts_created_last_hour', self.created_counts)):
+            patcher = mock.patch.object(self.service, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(AlertModel, 'objects')
+        self.objects = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _detection(self, site_id, confidence_score):
+        return DetectionModel(id=100 + site_id, region=self.region, site=self.sites[site_id],
+                              confidence_score=confidence_score, area_hectares=1.5)
+
+    def _open_alert(self, site_id, level='MEDIUM', max_confidence_score=0.5):
+        alert = AlertModel(id=70 + site_id, name='Détection orpaillage', region=self.region, site=self.sites[site_id],
+                           level=level, alert_type='SUSPICIOUS_ACTIVITY', alert_status='ACTIVE', detection_count=3,
+                           max_confidence_score=max_confidence_score, is_read=True)
+        self.open_alerts[site_id] = alert
+        return alert
+
+    def _created(self):
+        return self.objects.bulk_create.call_args.args[0]
+
+    def _updated(self):
+        return self.objects.bulk_update.call_args.args[0]
+
+    def test_detection_is_folded_into_the_open_alert_of_its_site(self):
+        alert = self._open_alert(9)
+        outcomes = self.service.aggregate([self._detection(9, 0.55)])
+
+        self.assertEqual(outcomes, [(alert, FOLDED)])
+        self.assertEqual((alert.detection_count, alert.max_confidence_score, alert.level), (4, 0.55, 'MEDIUM'))
+        self.assertTrue(alert.is_read)  # Pas de nouvelle notification sans escalade
+        self.assertEqual(self._created(), [])
+        self.assertEqual(self._updated(), [alert])
+
+    def test_higher_score_escalates_the_alert(self):
+        alert = self._open_alert(9)
+        outcomes = self.service.aggregate([self._detection(9, 0.85), self._detection(9, 0.4)])
+
+        self.assertEqual(outcomes, [(alert, ESCALATED), (alert, FOLDED)])
+        self.assertEqual((alert.level, alert.alert_type), ('CRITICAL', 'CLANDESTINE_SITE'))
+        self.assertEqual((alert.detection_count, alert.max_confidence_score), (5, 0.85))
+        self.assertFalse(alert.is_read)
+        self.assertEqual(self._updated(), [alert])
+
+    def test_one_alert_is_opened_per_new_site(self):
+        outcomes = self.service.aggregate([self._detection(1, 0.7), self._detection(1, 0.65), self._detection(2, 0.9)])
+
+        created = self._created()
+        self.assertEqual(len(created), 2)
+        site_alert = outcomes[0][0]
+        self.assertEqual([outcome for _, outcome in outcomes], [CREATED, FOLDED, CREATED])
+        self.assertIs(outcomes[1][0], site_alert)
+        self.assertEqual((site_alert.site_id, site_alert.detection_count, site_alert.level), (1, 2, 'HIGH'))
+        self.assertEqual(outcomes[2][0].level, 'CRITICAL')
+        self.assertEqual(self._updated(), [])  # Alertes nouvelles : insérées par bulk_create uniquement
+
+    def test_hourly_cap_sends_extra_detections_to_the_region_summary_alert(self):
+        self.created_counts[1] = 1
+        with mock.patch.object(DetectionConfig, 'ALERT_MAX_NEW_PER_REGION_PER_HOUR', 2):
+            outcomes = self.service.aggregate([
+                self._detection(1, 0.65), self._detection(2, 0.9), self._detection(3, 0.3), self._detection(4, 0.7),
+            ])
+
+        # Le plafond retient la détection la plus sévère, les autres rejoignent l'alerte de synthèse
+        site_alert, summary_alert = outcomes[1][0], outcomes[3][0]
+        self.assertEqual(site_alert.site_id, 2)
+        self.assertIsNone(summary_alert.site_id)
+        self.assertEqual([outcome for _, outcome in outcomes], [FOLDED, CREATED, FOLDED, CREATED])
+        self.assertIs(outcomes[0][0], summary_alert)
+        self.assertIs(outcomes[2][0], summary_alert)
+        self.assertEqual((summary_alert.detection_count, summary_alert.max_confidence_score), (3, 0.7))
+        self.assertEqual(len(self._created()), 2)
+
+    def test_open_summary_alert_is_reused_while_capped(self):
+        summary_alert = AlertModel(id=50, name='Détections groupées', region=self.region, site=None, level='HIGH',
+                                   alert_type='SUSPICIOUS_ACTIVITY', alert_status='ACTIVE', detection_count=6,
+                                   max_confidence_score=0.75, is_read=True)
+        self.summary_alerts[1] = summary_alert
+        self.created_counts[1] = DetectionConfig.ALERT_MAX_NEW_PER_REGION_PER_HOUR
+
+        outcomes = self.service.aggregate([self._detection(5, 0.95), self._detection(6, 0.5)])
+
+        self.assertEqual(outcomes, [(summary_alert, ESCALATED), (summary_alert, FOLDED)])
+        self.assertEqual((summary_alert.detection_count, summary_alert.level), (8, 'CRITICAL'))
+        self.assertEqual(self._created(), [])
+        self.assertEqual(self._updated(), [summary_alert])
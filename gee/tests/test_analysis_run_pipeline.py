@@ -0,0 +1,121 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from config.celery import app
+from gee.config import GEEConfig
+from gee.models.analysis_run_model import AnalysisRunModel
+from gee.services.analysis_run_service import AnalysisRunService
+from gee.tasks import start_analysis_run_task
+from image.models.image_model import ImageModel
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'analysis-run'}
+}
+Stage = AnalysisRunModel.StageChoices
+
+
+def scene(day):
+    time_start = int(datetime(2025, 1, day, 10, tzinfo=dt_timezone.utc).timestamp() * 1000)
+    return {'gee_asset_id': f'{GEEConfig.SENTINEL2_COLLECTION}/202501{day:02d}T100000_T30NVN',
+            'time_start': time_start, 'cloud_coverage': 5.0, 'properties': {}}
+
+
+class SceneBackend:
+    """Backend de listage et de métadonnées pour des scènes fixes"""
+
+    name = 'scenes'
+    initialized = True
+
+    def __init__(self, scenes):
+        self.scenes = {s['gee_asset_id']: s for s in scenes}
+
+    def list_images(self, start_date, end_date, exclude_asset_ids=None, min_time_start=None):
+        return list(self.scenes.values())
+
+    def get_image_properties(self, asset_id):
+        return {'system:time_start': self.scenes[asset_id]['time_start'], 'CLOUDY_PIXEL_PERCENTAGE': 5.0}
+
+
+def compute_indices(image_record, service=None):
+    """Calcul des indices simulé : la scène du 11 a des bandes illisibles"""
+    if image_record.gee_asset_id == scene(11)['gee_asset_id']:
+        raise ValueError('Band B11 not found')
+    ImageModel.objects.filter(id=image_record.id).update(processing_status=ImageModel.ProcessingStatus.COMPLETED)
+    return ImageModel.ProcessingStatus.COMPLETED
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('gee.tasks._compute_image_indices', side_effect=compute_indices)
+@mock.patch('gee.services.mining_detection_service.MiningDetectionService')
+class AnalysisRunPipelineTests(TestCase):
+    """Exécution complète du pipeline (tâches et chords exécutés en mode eager)"""
+
+    def setUp(self):
+        always_eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, 'task_always_eager', always_eager)
+
+    def run_pipeline(self, scenes):
+        run = AnalysisRunModel.objects.create(months_back=3)
+        with mock.patch('gee.services.earth_engine_service.get_imagery_backend', return_value=SceneBackend(scenes)):
+            start_analysis_run_task.delay(run.id)
+        run.refresh_from_db()
+        return run
+
+    def detection_service(self, detection_service_class, detections_per_image=2, tiles_per_image=100):
+        detection_service = detection_service_class.return_value
+        detection_service.analyze_image_once.return_value = [mock.Mock()] * detections_per_image
+        detection_service.last_scan_metrics = {'tiles_total': tiles_per_image}
+        return detection_service
+
+    def test_run_goes_through_every_stage(self, detection_service_class, compute):
+        self.detection_service(detection_service_class)
+
+        run = self.run_pipeline([scene(1), scene(6)])
+
+        self.assertEqual(run.status, AnalysisRunModel.StatusChoices.COMPLETED)
+        self.assertEqual(run.current_stage, Stage.DONE)
+        self.assertEqual((run.images_total, run.images_indexed, run.images_analyzed), (2, 2, 2))
+        self.assertEqual((run.detections_found, run.tiles_scanned), (4, 200))
+        self.assertEqual(run.results['images_processed'], 2)
+        self.assertEqual(run.errors, [])
+
+        progress = AnalysisRunService.progress(run)
+        self.assertEqual([stage['status'] for stage in progress['stages']], ['COMPLETED'] * 4)
+        self.assertTrue(all('duration_seconds' in stage for stage in progress['stages']))
+        self.assertEqual(progress['stages'][1]['done'], 2)
+
+    def test_failed_image_is_counted_and_skipped_by_detection(self, detection_service_class, compute):
+        detection_service = self.detection_service(detection_service_class)
+
+        run = self.run_pipeline([scene(1), scene(11)])
+
+        self.assertEqual(run.status, AnalysisRunModel.StatusChoices.COMPLETED)
+        self.assertEqual((run.images_indexed, run.images_failed, run.images_analyzed), (1, 1, 1))
+        self.assertEqual(detection_service.analyze_image_once.call_count, 1)
+        self.assertEqual(len(run.errors), 1)
+        self.assertIn('PERMANENT', run.errors[0])
+        self.assertEqual(ImageModel.objects.get(gee_asset_id=scene(11)['gee_asset_id']).processing_status,
+                         ImageModel.ProcessingStatus.ERROR)
+
+    def test_image_already_analysed_is_not_counted_twice(self, detection_service_class, compute):
+        detection_service = self.detection_service(detection_service_class)
+        detection_service.analyze_image_once.return_value = None
+
+        run = self.run_pipeline([scene(1)])
+
+        self.assertEqual((run.images_analyzed, run.detections_found, run.tiles_scanned), (1, 0, 0))
+
+    def test_fetch_error_fails_the_run(self, detection_service_class, compute):
+        run = AnalysisRunModel.objects.create(months_back=3)
+        no_backend = mock.patch('gee.services.earth_engine_service.get_imagery_backend',
+                                side_effect=Exception('no credentials'))
+        with no_backend:
+            start_analysis_run_task.delay(run.id)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, AnalysisRunModel.StatusChoices.ERROR)
+        self.assertIn('no credentials', run.errors[-1])
+        detection_service_class.assert_not_called()
@@ -0,0 +1,92 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.backends.base_backend import METERS_PER_DEGREE, pixel_size_degrees
+from gee.services.area_measurement import disturbed_ground_mask, measure_components, row_pixel_area_hectares
+from gee.services.tile_scan_service import TileScanService
+
+VEGETATION = [0.6, -0.3, 0.1]
+BARE_GROUND = [0.05, 0.0, 0.3]
+OPEN_WATER = [0.0, 0.5, -0.1]
+PIXEL_HECTARES = 0.01  # Pixel de 10 m x 10 m
+
+
+def block(height, width, *areas):
+    """Bloc [NDVI, NDWI, NDTI] végétalisé, avec des zones (ligne0, ligne1, colonne0, colonne1, pixel)"""
+    pixels = np.tile(np.array(VEGETATION, dtype=np.float32), (height, width, 1))
+    for row0, row1, col0, col1, value in areas:
+        pixels[row0:row1, col0:col1] = value
+    return pixels
+
+
+class RowPixelAreaTests(SimpleTestCase):
+
+    def test_pixel_area_shrinks_with_the_cosine_of_latitude(self):
+        pixel_width, pixel_height = 10 / METERS_PER_DEGREE, 10 / METERS_PER_DEGREE
+        areas = row_pixel_area_hectares(np.array([0.0, 60.0]), pixel_width, pixel_height)
+        np.testing.assert_allclose(areas, [PIXEL_HECTARES, PIXEL_HECTARES / 2], rtol=1e-9)
+
+    def test_grid_pixel_sized_at_its_latitude_measures_its_nominal_area(self):
+        pixel_width, pixel_height = pixel_size_degrees(8.0, 10)
+        self.assertAlmostEqual(float(row_pixel_area_hectares(np.array([8.0]), pixel_width, pixel_height)[0]),
+                               PIXEL_HECTARES)
+
+
+class MeasureComponentsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.mask = np.zeros((10, 10), dtype=bool)
+        self.mask[1:4, 1:4] = True      # 9 pixels
+        self.mask[4, 4] = True          # Voisin diagonal du premier bloc
+        self.mask[7:9, 6:9] = True      # 6 pixels
+
+    def test_diagonal_neighbours_are_joined_with_8_connectivity(self):
+        components = measure_components(self.mask, PIXEL_HECTARES)
+
+        self.assertEqual(components['count'], 2)
+        self.assertEqual(sorted(components['pixel_counts'][1:]), [6, 10])
+        np.testing.assert_allclose(sorted(components['areas_hectares'][1:]), [0.06, 0.10])
+        self.assertEqual(components['areas_hectares'][0], 0.0)
+        self.assertEqual(components['labels'][1, 1], components['labels'][4, 4])
+
+    def test_4_connectivity_separates_diagonal_neighbours(self):
+        self.assertEqual(measure_components(self.mask, PIXEL_HECTARES, connectivity=4)['count'], 3)
+
+    def test_area_is_weighted_by_the_area_of_each_row(self):
+        row_area = np.linspace(0.01, 0.02, self.mask.shape[0])
+        components = measure_components(self.mask, row_area)
+
+        label = components['labels'][8, 8]
+        self.assertAlmostEqual(components['areas_hectares'][label], 3 * (row_area[7] + row_area[8]))
+
+
+class DisturbedGroundMaskTests(SimpleTestCase):
+
+    def test_only_bare_ground_with_data_is_disturbed(self):
+        pixels = block(2, 4, (0, 2, 1, 2, BARE_GROUND), (0, 2, 2, 3, OPEN_WATER), (0, 2, 3, 4, [0.0, 0.0, 0.0]))
+        np.testing.assert_array_equal(disturbed_ground_mask(pixels), [[False, True, False, False]] * 2)
+
+
+class TileAreaTests(SimpleTestCase):
+    """Surfaces par tuile d'un bloc de 2 x 2 tuiles de 8 pixels sans recouvrement, à l'équateur"""
+
+    def setUp(self):
+        self.scan = TileScanService(mock.Mock(), mock.Mock(), tile_size=8, scale=10, overlap=0)
+        pixel_width, pixel_height = pixel_size_degrees(0.0, 10)
+        self.grid = {'lon_min': 0.0, 'lat_max': 0.001, 'pixel_width': pixel_width, 'pixel_height': pixel_height}
+        self.positions = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+
+    def tile_areas(self, pixels):
+        return self.scan._tile_areas(pixels, (0, 2, 0, 2), self.grid, self.positions)
+
+    def test_site_spanning_two_tiles_is_measured_whole_under_its_centre(self):
+        # Site de 5 x 9 pixels sous le centre de la tuile (0, 0), débordant sur la tuile (0, 1)
+        areas = self.tile_areas(block(16, 16, (2, 7, 3, 12, BARE_GROUND)))
+
+        np.testing.assert_allclose(areas, [45 * PIXEL_HECTARES, 20 * PIXEL_HECTARES, 0.0, 0.0], rtol=1e-4)
+
+    def test_water_is_not_counted_as_disturbed_ground(self):
+        areas = self.tile_areas(block(16, 16, (8, 16, 8, 16, OPEN_WATER)))
+        np.testing.assert_array_equal(areas, np.zeros(4))
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from gee.services.asset_lock import AssetLock, wait_for
+from gee.tests.fakes import FakeClock
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'asset-lock'}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AssetLockTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_only_one_concurrent_caller_acquires_the_lock(self):
+        locks = [AssetLock(ASSET, 'run', 60) for _ in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            acquired = list(executor.map(AssetLock.acquire, locks))
+
+        self.assertEqual(acquired.count(True), 1)
+        self.assertEqual(locks[0].holder(), locks[acquired.index(True)].token)
+
+    def test_only_the_holder_releases_the_lock(self):
+        holder = AssetLock(ASSET, 'run', 60)
+        other = AssetLock(ASSET, 'run', 60)
+        self.assertTrue(holder.acquire())
+        self.assertFalse(other.acquire())
+
+        other.release()
+        self.assertEqual(other.holder(), holder.token)
+        holder.release()
+        self.assertIsNone(other.holder())
+        self.assertTrue(other.acquire())
+
+    def test_scopes_of_an_asset_are_independent(self):
+        with AssetLock(ASSET, 'submit', 60) as submit_lock:
+            self.assertTrue(submit_lock.acquired)
+            self.assertTrue(AssetLock(ASSET, 'run', 60).acquire())
+            self.assertFalse(AssetLock(ASSET, 'submit', 60).acquire())
+        self.assertTrue(AssetLock(ASSET, 'submit', 60).acquire())
+
+    def test_lock_of_a_lost_holder_expires_with_its_lease(self):
+        self.assertTrue(AssetLock(ASSET, 'run', 1).acquire())
+        time.sleep(1.1)
+        self.assertTrue(AssetLock(ASSET, 'run', 1).acquire())
+
+
+class RecordingClock(FakeClock):
+    """Horloge factice qui garde les attentes demandées"""
+
+    def __init__(self):
+        super().__init__()
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        super().sleep(seconds)
+
+
+class WaitForTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = RecordingClock()
+        patcher = mock.patch('gee.services.asset_lock.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_the_first_result_with_growing_delays(self):
+        results = iter([None, None, None, 'image-42'])
+
+        self.assertEqual(wait_for(lambda: next(results), timeout=10), 'image-42')
+        self.assertEqual(self.clock.sleeps, [0.05, 0.1, 0.2])
+
+    def test_gives_up_at_the_deadline(self):
+        predicate = mock.Mock(return_value=None)
+
+        self.assertIsNone(wait_for(predicate, timeout=2))
+        self.assertAlmostEqual(self.clock.now, 1002.0)
+        self.assertGreater(predicate.call_count, 2)
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.services.batch_inference_service import BatchedInferenceService, gather_scores
+
+
+class BlockingModel:
+    """Modèle factice : score = valeur du premier pixel ; le premier lot attend release"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.first_batch_started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_on_batch(self, inputs):
+        self.batch_sizes.append(len(inputs))
+        if len(self.batch_sizes) == 1:
+            self.first_batch_started.set()
+            self.release.wait(timeout=5)
+        return inputs[:, 0, 0, :1]
+
+
+def patches(*values):
+    return np.array(values, dtype=np.float32)[:, None, None, None] * np.ones((len(values), 4, 4, 3), np.float32)
+
+
+class BatchedInferenceServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.model = BlockingModel()
+        self.model.release.set()
+        self.service = BatchedInferenceService(self.model, max_batch_size=8, max_wait_ms=1)
+
+    def test_scores_are_returned_in_submission_order_and_clipped(self):
+        scores = self.service.predict_many(patches(0.2, 0.9, 1.7, -0.5), timeout=5)
+        np.testing.assert_allclose(scores, [0.2, 0.9, 1.0, 0.0], rtol=1e-6)
+        self.assertAlmostEqual(self.service.predict(patches(0.4)[0], timeout=5), 0.4, places=6)
+
+    def test_batches_are_capped_at_max_batch_size(self):
+        self.service.predict_many(patches(*np.linspace(0, 1, 20)), timeout=5)
+        self.assertTrue(all(size <= 8 for size in self.model.batch_sizes))
+        self.assertEqual(sum(self.model.batch_sizes), 20)
+        self.assertEqual(self.service.stats()['batch_size']['count'], len(self.model.batch_sizes))
+
+    def test_model_error_is_raised_by_every_future_of_the_batch(self):
+        self.service.model = mock.Mock(**{'predict_on_batch.side_effect': RuntimeError('OOM')})
+        futures = self.service.submit_many(patches(0.1, 0.2))
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_patches_of_concurrent_tasks_share_a_forward_pass(self):
+        # Tâches d'un worker en pool threads : même service, donc même file de micro-lots
+        self.model.release.clear()
+        first = self.service.submit(patches(0.5)[0])
+        self.assertTrue(self.model.first_batch_started.wait(timeout=5))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tasks = [executor.submit(self.service.submit_many, patches(*values))
+                     for values in ((0.1, 0.2, 0.3), (0.6, 0.7))]
+            futures = [task.result() for task in tasks]
+        self.model.release.set()
+
+        self.assertAlmostEqual(first.result(timeout=5), 0.5, places=6)
+        np.testing.assert_allclose(gather_scores(futures[0], timeout=5), [0.1, 0.2, 0.3], rtol=1e-6)
+        np.testing.assert_allclose(gather_scores(futures[1], timeout=5), [0.6, 0.7], rtol=1e-6)
+        self.assertEqual(self.model.batch_sizes, [1, 5])
+        self.assertEqual(self.service.stats()['batch_size']['max'], 5)
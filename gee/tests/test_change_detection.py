@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from config.detection_settings import DetectionConfig
+from gee.backends.base_backend import METERS_PER_DEGREE, pixel_size_degrees
+from gee.backends.local_backend import LocalRasterBackend
+from gee.config import GEEConfig
+from gee.services.earth_engine_service import EarthEngineService
+
+SCENE_PIXELS = 40
+SCALE = 20
+LAT_MAX = 8.1
+LAT_MIN = LAT_MAX - SCENE_PIXELS * SCALE / METERS_PER_DEGREE
+LON_MIN = -2.8
+LON_MAX = LON_MIN + SCENE_PIXELS * pixel_size_degrees((LAT_MIN + LAT_MAX) / 2, SCALE)[0]
+BOUNDS = {'lat_min': LAT_MIN, 'lat_max': LAT_MAX, 'lon_min': LON_MIN, 'lon_max': LON_MAX}
+SCENE_DATE = datetime(2025, 6, 1, 10, tzinfo=timezone.utc)
+
+VEGETATION = {'B3': 0.08, 'B4': 0.04, 'B8': 0.40, 'B11': 0.20, 'B12': 0.10}
+BARE_SOIL = {'B3': 0.15, 'B4': 0.20, 'B8': 0.25, 'B11': 0.35, 'B12': 0.30}
+
+# Sol mis à nu dans la scène analysée : (ligne, colonne, hauteur, largeur)
+LARGE_SITE = (10, 20, 8, 6)
+SMALL_SITE = (30, 5, 3, 3)
+SPECKLE = (2, 2, 2, 2)  # Sous CHANGE_MIN_PIXELS
+
+
+class LocalChangeZonesTests(SimpleTestCase):
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+        self.noise = np.random.default_rng(0)
+
+    def record_scene(self, days_before, sites=(), cloud_coverage=5.0):
+        """Enregistre une scène végétalisée acquise `days_before` jours avant SCENE_DATE"""
+        acquisition = SCENE_DATE - timedelta(days=days_before)
+        scene_id = acquisition.strftime('%Y%m%dT%H%M%S_T30NVN')
+        scene_dir = os.path.join(self.data_dir, scene_id)
+        os.makedirs(scene_dir)
+
+        for band, reflectance in VEGETATION.items():
+            values = reflectance + self.noise.normal(0, 0.003, (SCENE_PIXELS, SCENE_PIXELS))
+            for row, col, height, width in sites:
+                values[row:row + height, col:col + width] = BARE_SOIL[band]
+            np.save(os.path.join(scene_dir, f'{band}.npy'), values.astype(np.float32))
+
+        with open(os.path.join(scene_dir, 'metadata.json'), 'w') as f:
+            json.dump({'time_start': int(acquisition.timestamp() * 1000), 'cloud_coverage': cloud_coverage,
+                       'bounds': BOUNDS}, f)
+        return f'{GEEConfig.SENTINEL2_COLLECTION}/{scene_id}'
+
+    def detect(self, asset_id):
+        return LocalRasterBackend(data_dir=self.data_dir).detect_change_zones(asset_id, BOUNDS, SCALE)
+
+    def test_new_bare_soil_is_vectorised_into_zones_sorted_by_size(self):
+        for days_before in (300, 200, 100, 60):
+            self.record_scene(days_before)
+        asset_id = self.record_scene(0, sites=(LARGE_SITE, SMALL_SITE, SPECKLE))
+
+        zones = self.detect(asset_id)
+
+        self.assertEqual([zone['pixel_count'] for zone in zones], [48, 9])
+        pixel_hectares = SCALE * SCALE / 10_000
+        self.assertAlmostEqual(zones[0]['area_hectares'], 48 * pixel_hectares, delta=0.01)
+
+        pixel_width, pixel_height = pixel_size_degrees((LAT_MIN + LAT_MAX) / 2, SCALE)
+        row, col, height, width = LARGE_SITE
+        longitude, latitude = zones[0]['centroid']
+        self.assertAlmostEqual(longitude, LON_MIN + (col + width / 2) * pixel_width, places=6)
+        self.assertAlmostEqual(latitude, LAT_MAX - (row + height / 2) * pixel_height, places=6)
+
+        for zone in zones:
+            ring, = zone['rings']
+            self.assertEqual(ring[0], ring[-1])
+            self.assertGreaterEqual(len(ring), 4)
+            self.assertGreaterEqual(zone['z_scores']['ndvi'], DetectionConfig.CHANGE_Z_THRESHOLD)
+
+    def test_recent_and_cloudy_scenes_are_kept_out_of_the_reference(self):
+        for days_before in (300, 200, 100):
+            self.record_scene(days_before)
+        # Site déjà ouvert 10 jours plus tôt (hors fenêtre) et scène nuageuse : le site reste un changement
+        self.record_scene(10, sites=(LARGE_SITE,))
+        self.record_scene(60, sites=(LARGE_SITE,), cloud_coverage=GEEConfig.MAX_CLOUD_COVERAGE + 10)
+        asset_id = self.record_scene(0, sites=(LARGE_SITE,))
+
+        self.assertEqual([zone['pixel_count'] for zone in self.detect(asset_id)], [48])
+
+    def test_too_few_reference_scenes_disable_change_detection(self):
+        for days_before in (200, 100):
+            self.record_scene(days_before)
+        asset_id = self.record_scene(0, sites=(LARGE_SITE,))
+
+        self.assertIsNone(self.detect(asset_id))
+
+    def test_unchanged_scene_has_no_zone(self):
+        for days_before in (300, 200, 100, 60):
+            self.record_scene(days_before)
+
+        self.assertEqual(self.detect(self.record_scene(0)), [])
+
+
+class DetectChangeZonesServiceTests(SimpleTestCase):
+
+    def test_disabled_change_detection_skips_the_backend(self):
+        backend = mock.Mock()
+        with mock.patch.object(DetectionConfig, 'CHANGE_DETECTION_ENABLED', False):
+            self.assertIsNone(EarthEngineService(backend=backend).detect_change_zones('asset'))
+        backend.detect_change_zones.assert_not_called()
+
+    def test_backend_error_is_reported_as_no_change_detection(self):
+        backend = mock.Mock(**{'detect_change_zones.side_effect': RuntimeError('computation timed out')})
+        self.assertIsNone(EarthEngineService(backend=backend).detect_change_zones('asset'))
+        backend.detect_change_zones.assert_called_once_with(
+            'asset', GEEConfig.BONDOUKOU_BOUNDS, DetectionConfig.CHANGE_SCALE_METERS
+        )
@@ -0,0 +1,133 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from gee.config import GEEConfig
+from gee.models.ingestion_cursor_model import IngestionCursorModel
+from gee.services.earth_engine_service import EarthEngineService
+from image.models.image_model import ImageModel
+
+DAY_MS = 24 * 3600 * 1000
+JANUARY_MS = 1735725600000  # 2025-01-01T10:00:00Z
+
+
+def scene_row(day, ndvi_mean=0.4):
+    """Ligne de compute_collection_index_statistics pour la scène du jour `day` de janvier"""
+    row = {
+        'gee_asset_id': f'{GEEConfig.SENTINEL2_COLLECTION}/202501{day:02d}T100000_T30NVN',
+        'time_start': JANUARY_MS + (day - 1) * DAY_MS,
+        'cloud_coverage': 5.0,
+    }
+    for name, mean in (('NDVI', ndvi_mean), ('NDWI', -0.1), ('NDTI', 0.2)):
+        row.update({f'{name}_mean': mean, f'{name}_stdDev': 0.05, f'{name}_min': -1, f'{name}_max': 1})
+    return row
+
+
+class FakeCollectionBackend:
+    """Backend de collection : applique l'exclusion et le curseur comme les backends réels"""
+
+    initialized = True
+
+    def __init__(self, rows, before_compute=None):
+        self.rows = rows
+        self.before_compute = before_compute
+
+    def compute_collection_index_statistics(self, start_date, end_date, exclude_asset_ids=None, min_time_start=None):
+        if self.before_compute:
+            self.before_compute()
+        return [row for row in self.rows
+                if row['gee_asset_id'] not in (exclude_asset_ids or set())
+                and (min_time_start is None or row['time_start'] > min_time_start)]
+
+
+@mock.patch('gee.services.earth_engine_service.detect_mining_activity_task')
+class IngestCollectionBatchTests(TestCase):
+
+    def service(self, rows, before_compute=None):
+        return EarthEngineService(backend=FakeCollectionBackend(rows, before_compute))
+
+    def test_batch_creates_completed_images_and_advances_the_cursor(self, detect_task):
+        rows = [scene_row(1), scene_row(6), scene_row(11, ndvi_mean=None)]
+        summary = self.service(rows).ingest_collection_batch()
+
+        self.assertEqual(summary, {'created': 2, 'updated': 0, 'skipped_existing': 0, 'incomplete': 1,
+                                   'detections_queued': 2})
+        self.assertEqual(ImageModel.objects.filter(processing_status=ImageModel.ProcessingStatus.COMPLETED).count(), 2)
+        self.assertEqual(detect_task.delay.call_count, 2)
+
+        cursor = IngestionCursorModel.objects.get()
+        self.assertEqual(cursor.last_time_start, rows[2]['time_start'])  # Scène masquée comprise
+        self.assertEqual(cursor.scenes_ingested, 3)
+
+    def test_rerun_of_the_same_batch_creates_nothing(self, detect_task):
+        rows = [scene_row(1), scene_row(6)]
+        self.service(rows).ingest_collection_batch()
+        summary = self.service(rows).ingest_collection_batch()
+
+        self.assertEqual(summary['created'], 0)
+        self.assertEqual(ImageModel.objects.count(), 2)
+        self.assertEqual(detect_task.delay.call_count, 2)
+
+    def test_scene_created_by_a_concurrent_ingestion_is_counted_as_existing(self, detect_task):
+        rows = [scene_row(1), scene_row(6), scene_row(11)]
+        concurrent = self.service([rows[1]])
+
+        # L'autre ingestion insère la scène du 6 pendant le calcul des indices de celle-ci
+        summary = self.service(rows, before_compute=concurrent.ingest_collection_batch).ingest_collection_batch()
+
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual(summary['skipped_existing'], 1)
+        self.assertEqual(ImageModel.objects.filter(gee_asset_id=rows[1]['gee_asset_id']).count(), 1)
+        self.assertEqual(ImageModel.objects.count(), 3)
+
+    def test_errored_image_is_recomputed_in_place(self, detect_task):
+        rows = [scene_row(1)]
+        self.service(rows).ingest_collection_batch()
+        image = ImageModel.objects.get()
+        ImageModel.objects.filter(id=image.id).update(processing_status=ImageModel.ProcessingStatus.ERROR,
+                                                      processing_error='quota')
+        IngestionCursorModel.objects.update(last_time_start=None)
+
+        summary = self.service(rows).ingest_collection_batch()
+        self.assertEqual((summary['created'], summary['updated']), (0, 1))
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ImageModel.ProcessingStatus.COMPLETED)
+        self.assertIsNone(image.processing_error)
+
+
+class AdvanceIngestionCursorTests(TestCase):
+
+    def setUp(self):
+        self.cursor = EarthEngineService(backend=mock.Mock()).get_ingestion_cursor()
+
+    @staticmethod
+    def scenes(*days):
+        return [{'gee_asset_id': scene_row(day)['gee_asset_id'], 'time_start': scene_row(day)['time_start']}
+                for day in days]
+
+    def test_concurrent_advances_never_move_the_cursor_back(self):
+        stale_cursor = IngestionCursorModel.objects.get(pk=self.cursor.pk)
+
+        EarthEngineService.advance_ingestion_cursor(self.cursor, self.scenes(1, 6, 11))
+        # Scan concurrent parti du même état, plus lent et sur des scènes plus anciennes
+        cursor = EarthEngineService.advance_ingestion_cursor(stale_cursor, self.scenes(1, 6))
+
+        self.assertEqual(cursor.last_time_start, scene_row(11)['time_start'])
+        self.assertEqual(cursor.last_asset_id, scene_row(11)['gee_asset_id'])
+        self.assertEqual(cursor.scenes_ingested, 3)
+
+    def test_cursor_stops_before_the_first_failed_scene(self):
+        failed = {scene_row(6)['gee_asset_id']}
+        cursor = EarthEngineService.advance_ingestion_cursor(self.cursor, self.scenes(1, 6, 11), failed)
+
+        self.assertEqual(cursor.last_time_start, scene_row(1)['time_start'])
+        self.assertEqual(cursor.scenes_ingested, 1)
+
+    def test_scan_without_new_scene_only_records_the_scan_time(self):
+        EarthEngineService.advance_ingestion_cursor(self.cursor, self.scenes(1))
+        cursor = EarthEngineService.advance_ingestion_cursor(self.cursor, [])
+
+        self.assertEqual(cursor.last_time_start, scene_row(1)['time_start'])
+        self.assertIsNotNone(cursor.last_scan_at)
+        self.assertEqual(IngestionCursorModel.objects.get().scenes_ingested, 1)
@@ -0,0 +1,92 @@
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from alert.models.alert_model import AlertModel
+from alert.models.financial_risk_model import FinancialRiskModel
+from config.financial_settings import FinancialSettings
+from detection.models.detection_model import DetectionModel
+from detection.models.investigation_model import InvestigationModel
+from detection.models.mining_site_model import MiningSiteModel
+from gee.services.detection_sink import DetectionSink
+from image.models.image_model import ImageModel
+from region.models.region_model import RegionModel
+from report.models.event_log_model import EventLogModel
+
+
+class DetectionSinkTests(TestCase):
+
+    def setUp(self):
+        self.region = RegionModel.objects.create(name='BONDOUKOU', code='BDK', area_km2=10000)
+        self.january = self.create_image(1)
+        self.march = self.create_image(3)
+
+    def create_image(self, month):
+        return ImageModel.objects.create(
+            name=f'S2 {month}', region=self.region, capture_date=date(2025, month, 1), satellite_source='SENTINEL2',
+            cloud_coverage=5.0, gee_asset_id=f'COPERNICUS/S2_SR/2025{month:02d}01T102021_T30NVN'
+        )
+
+    def detection(self, latitude, longitude, image=None, confidence_score=0.7):
+        return DetectionModel(region=self.region, image=image or self.january, latitude=latitude, longitude=longitude,
+                              confidence_score=confidence_score, area_hectares=2.0,
+                              ndvi_anomaly_score=0.8, ndwi_anomaly_score=0.1, ndti_anomaly_score=0.6)
+
+    def flush(self, *detections):
+        sink = DetectionSink()
+        for detection in detections:
+            sink.add(detection)
+        return sink.flush()
+
+    def test_flush_writes_detections_and_their_side_effects(self):
+        created = self.flush(self.detection(8.04, -2.80, confidence_score=0.85), self.detection(8.10, -2.70))
+
+        self.assertEqual(len(created), 2)
+        self.assertTrue(all(detection.pk for detection in created))
+        self.assertEqual(MiningSiteModel.objects.count(), 2)
+        self.assertEqual(AlertModel.objects.count(), 2)
+        self.assertEqual(InvestigationModel.objects.get(detection=created[0]).priority, 'HIGH')
+        self.assertEqual(InvestigationModel.objects.get(detection=created[1]).priority, 'MEDIUM')
+
+        risk = FinancialRiskModel.objects.get(detection=created[0])
+        expected_loss = FinancialSettings.estimate_losses([2.0], [0.8], [0.1], [0.6], [risk.sensitive_zone_distance_km],
+                                                          [1])[0]
+        self.assertAlmostEqual(risk.estimated_loss, expected_loss)
+        self.assertEqual(risk.risk_level, FinancialSettings.determine_risk_level_from_loss(expected_loss))
+
+        event_types = sorted(EventLogModel.objects.values_list('event_type', flat=True))
+        self.assertEqual(event_types, sorted(['DETECTION_CREATED', 'ALERT_GENERATED', 'FINANCIAL_RISK_CALCULATED',
+                                              'INVESTIGATION_CREATED'] * 2))
+
+    def test_detection_on_a_tracked_site_opens_no_investigation(self):
+        first, = self.flush(self.detection(8.04, -2.80))
+        second, = self.flush(self.detection(8.0401, -2.8001, image=self.march))
+
+        self.assertEqual(second.site_id, first.site_id)
+        self.assertEqual(InvestigationModel.objects.count(), 1)
+        self.assertEqual(MiningSiteModel.objects.get().occurrence_count, 2)
+        self.assertEqual(FinancialRiskModel.objects.get(detection=second).occurrence_count, 2)
+        self.assertEqual(AlertModel.objects.count(), 1)  # Détection rattachée à l'alerte ouverte du site
+
+    def test_failure_rolls_back_every_write(self):
+        with mock.patch('gee.services.detection_sink.EventLogService.log_events', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                self.flush(self.detection(8.04, -2.80), self.detection(8.10, -2.70))
+
+        for model in (DetectionModel, MiningSiteModel, AlertModel, FinancialRiskModel, InvestigationModel):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_query_count_does_not_depend_on_the_number_of_detections(self):
+        with CaptureQueriesContext(connection) as small_batch:
+            self.flush(*[self.detection(8.0 + 0.01 * i, -2.80) for i in range(2)])
+        with CaptureQueriesContext(connection) as large_batch:
+            self.flush(*[self.detection(8.0 + 0.01 * i, -2.60) for i in range(12)])
+
+        self.assertEqual(len(large_batch), len(small_batch))
+
+    def test_empty_flush_writes_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(DetectionSink().flush(), [])
@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from gee.config import GEEConfig
+from gee.services.ee_session import EarthEngineSession
+from gee.tests.fakes import DirectGovernor, EEException, FakeClock
+
+
+class EarthEngineSessionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.initialize_ee = mock.Mock(return_value=True)
+        self.ee = mock.Mock()
+        self.ee.Number.return_value.getInfo.return_value = 1
+        for patcher in (
+            mock.patch('gee.services.ee_session.time', self.clock),
+            mock.patch.object(GEEConfig, 'initialize_ee', self.initialize_ee),
+            mock.patch.dict('sys.modules', {'ee': self.ee}),
+            mock.patch('gee.services.quota_governor.get_quota_governor', return_value=DirectGovernor()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.session = EarthEngineSession()
+
+    def test_concurrent_callers_authenticate_once(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: self.session.ensure_initialized(), range(8)))
+
+        self.assertTrue(all(results))
+        self.initialize_ee.assert_called_once()
+        self.assertEqual(self.session.stats()['init_count'], 1)
+
+    def test_forked_child_authenticates_again(self):
+        self.session.ensure_initialized()
+        with mock.patch('gee.services.ee_session.os.getpid', return_value=os.getpid() + 1):
+            self.assertFalse(self.session.initialized)
+            self.assertTrue(self.session.ensure_initialized())
+        self.assertEqual(self.initialize_ee.call_count, 2)
+
+    def test_failed_initialization_is_retried_after_the_back_off(self):
+        self.initialize_ee.return_value = False
+        self.assertFalse(self.session.ensure_initialized())
+        self.assertFalse(self.session.ensure_initialized())
+        self.assertEqual(self.initialize_ee.call_count, 1)
+
+        self.initialize_ee.return_value = True
+        self.clock.sleep(GEEConfig.EE_INIT_RETRY_SECONDS)
+        self.assertTrue(self.session.ensure_initialized())
+        self.assertIsNone(self.session.last_error)
+
+    def test_health_check_runs_at_most_once_per_interval(self):
+        self.assertTrue(self.session.health_check()['healthy'])
+        self.session.health_check()
+        self.assertEqual(self.ee.Number.call_count, 1)
+
+        self.clock.sleep(GEEConfig.EE_HEALTH_CHECK_INTERVAL)
+        self.session.health_check()
+        self.session.health_check(force=True)
+        self.assertEqual(self.ee.Number.call_count, 3)
+
+    def test_failed_health_check_invalidates_the_session(self):
+        self.ee.Number.return_value.getInfo.side_effect = EEException('Invalid JWT: token expired')
+
+        stats = self.session.health_check()
+        self.assertFalse(stats['healthy'])
+        self.assertFalse(stats['initialized'])
+        self.assertIn('token expired', stats['last_error'])
+
+        self.ee.Number.return_value.getInfo.side_effect = None
+        self.assertTrue(self.session.health_check(force=True)['healthy'])
+        self.assertEqual(self.initialize_ee.call_count, 2)
@@ -0,0 +1,65 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from alert.models.financial_risk_model import FinancialRiskModel
+from config.financial_settings import FinancialSettings
+from gee.services.financial_risk_repricing_service import FinancialRiskRepricingService
+
+
+class FinancialRiskRepricingServiceTests(SimpleTestCase):
+
+    @staticmethod
+    def _chunk():
+        """Quatre risques : à jour, perte périmée, perte manquante, ancien coût par hectare"""
+        current_loss = float(FinancialSettings.estimate_losses([1.0], [0.8], [None], [None], [0.5], [1])[0])
+        rows = [
+            (1, 1.0, 0.5, 1, FinancialSettings.DEFAULT_COST_PER_HECTARE, current_loss, 'CRITICAL', 0.8, None, None),
+            (2, 0.2, 8.0, 1, FinancialSettings.DEFAULT_COST_PER_HECTARE, 9_000_000.0, 'HIGH', None, None, None),
+            (3, 0.5, 8.0, 0, FinancialSettings.DEFAULT_COST_PER_HECTARE, None, 'LOW', None, None, None),
+            (4, 1.0, 0.5, 1, 8_000_000, current_loss, 'CRITICAL', 0.8, None, None),
+        ]
+        names = ('id', 'area_hectares', 'sensitive_zone_distance_km', 'occurrence_count', 'cost_per_hectare',
+                 'estimated_loss', 'risk_level', 'detection__ndvi_anomaly_score', 'detection__ndwi_anomaly_score',
+                 'detection__ndti_anomaly_score')
+        columns = dict(zip(names, zip(*rows)))
+        chunk = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()
+                 if name not in ('id', 'risk_level')}
+        chunk['id'] = np.asarray(columns['id'], dtype=np.int64)
+        chunk['risk_level'] = np.asarray(columns['risk_level'], dtype=object)
+        return chunk
+
+    def _reprice(self, dry_run):
+        chunks = mock.patch.object(FinancialRiskRepricingService, '_chunks',
+                                   side_effect=lambda *args: iter([self._chunk()]))
+        with chunks, \
+                mock.patch.object(FinancialRiskModel, 'objects') as objects, \
+                mock.patch('gee.services.financial_risk_repricing_service.transaction.atomic'):
+            report = FinancialRiskRepricingService.reprice(chunk_size=100, dry_run=dry_run)
+        return report, objects.bulk_update
+
+    def test_dry_run_reports_without_writing(self):
+        report, bulk_update = self._reprice(dry_run=True)
+
+        bulk_update.assert_not_called()
+        self.assertEqual(report['scanned'], 4)
+        self.assertEqual(report['changed'], 3)
+        new_loss = 0.2 * FinancialSettings.DEFAULT_COST_PER_HECTARE * 1.2
+        self.assertAlmostEqual(report['loss_after'] - report['loss_before'], new_loss - 9_000_000.0
+                               + 0.5 * FinancialSettings.DEFAULT_COST_PER_HECTARE)
+        self.assertEqual(report['level_changes'], {('HIGH', 'MEDIUM'): 1, ('LOW', 'MEDIUM'): 1})
+        self.assertEqual([change['id'] for change in report['largest_changes']], [2, 3])
+
+    def test_write_updates_only_changed_risks(self):
+        dry_report, _ = self._reprice(dry_run=True)
+        report, bulk_update = self._reprice(dry_run=False)
+
+        self.assertEqual(report, dry_report)
+        bulk_update.assert_called_once()
+        risks, fields = bulk_update.call_args.args
+        self.assertEqual(fields, ['estimated_loss', 'risk_level', 'cost_per_hectare', 'updated_at'])
+        self.assertEqual([risk.id for risk in risks], [2, 3, 4])
+        self.assertEqual([risk.risk_level for risk in risks], ['MEDIUM', 'MEDIUM', 'CRITICAL'])
+        self.assertTrue(all(risk.cost_per_hectare == FinancialSettings.DEFAULT_COST_PER_HECTARE for risk in risks))
+        self.assertAlmostEqual(risks[1].estimated_loss, 0.5 * FinancialSettings.DEFAULT_COST_PER_HECTARE)
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gee.config import GEEConfig
+from gee.services.asset_lock import AssetLock
+from gee.services.earth_engine_service import EarthEngineService
+from gee.tasks import process_gee_image_task
+from image.models.image_model import ImageModel
+from region.models.region_model import RegionModel
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'image-processing'}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImageProcessingTestCase(TestCase):
+
+    def setUp(self):
+        region = RegionModel.objects.create(name='BONDOUKOU', code='BDK', area_km2=10000)
+        self.image = ImageModel.objects.create(
+            name='S2 janvier', region=region, capture_date=date(2025, 1, 1), satellite_source='SENTINEL2',
+            cloud_coverage=5.0, gee_asset_id=ASSET
+        )
+
+    def set_status(self, status, age_seconds=0):
+        ImageModel.objects.filter(id=self.image.id).update(
+            processing_status=status, updated_at=timezone.now() - timedelta(seconds=age_seconds)
+        )
+
+    def reload(self):
+        self.image.refresh_from_db()
+        return self.image
+
+
+class ClaimImageForProcessingTests(ImageProcessingTestCase):
+
+    def test_only_the_first_claim_succeeds(self):
+        self.assertTrue(EarthEngineService.claim_image_for_processing(self.image.id, 'task-1'))
+        self.assertFalse(EarthEngineService.claim_image_for_processing(self.image.id, 'task-2'))
+        self.assertEqual(self.reload().processing_status, ImageModel.ProcessingStatus.PROCESSING)
+        self.assertEqual(self.image.processing_task_id, 'task-1')
+
+    def test_errored_image_is_claimed_and_its_error_cleared(self):
+        ImageModel.objects.filter(id=self.image.id).update(processing_status=ImageModel.ProcessingStatus.ERROR,
+                                                           processing_error='quota')
+        self.assertTrue(EarthEngineService.claim_image_for_processing(self.image.id, 'task-1'))
+        self.assertIsNone(self.reload().processing_error)
+
+    def test_completed_image_is_only_claimed_for_an_explicit_recompute(self):
+        self.set_status(ImageModel.ProcessingStatus.COMPLETED)
+        self.assertFalse(EarthEngineService.claim_image_for_processing(self.image.id, 'task-1'))
+        self.assertTrue(EarthEngineService.claim_image_for_processing(self.image.id, 'task-1', include_completed=True))
+
+    def test_stale_processing_claim_is_taken_over(self):
+        self.set_status(ImageModel.ProcessingStatus.PROCESSING, age_seconds=GEEConfig.IMAGE_TASK_LEASE_SECONDS - 60)
+        self.assertFalse(EarthEngineService.claim_image_for_processing(self.image.id, 'task-2'))
+
+        self.set_status(ImageModel.ProcessingStatus.PROCESSING, age_seconds=GEEConfig.IMAGE_TASK_LEASE_SECONDS + 60)
+        self.assertTrue(EarthEngineService.claim_image_for_processing(self.image.id, 'task-2'))
+        self.assertEqual(self.reload().processing_task_id, 'task-2')
+        self.assertFalse(EarthEngineService.claim_image_for_processing(self.image.id, 'task-3'))
+
+
+@mock.patch('gee.tasks.detect_mining_activity_task')
+@mock.patch('gee.tasks._compute_image_indices', return_value=ImageModel.ProcessingStatus.COMPLETED)
+class ProcessGeeImageTaskTests(ImageProcessingTestCase):
+
+    def test_duplicate_task_does_not_recompute_a_claimed_image(self, compute, detect_task):
+        process_gee_image_task.apply(args=[self.image.id]).get()
+        self.assertEqual(compute.call_count, 1)
+        detect_task.delay.assert_called_once_with(self.image.id)
+        self.assertEqual(self.reload().processing_status, ImageModel.ProcessingStatus.PROCESSING)  # compute simulé
+
+        result = process_gee_image_task.apply(args=[self.image.id]).get()
+        self.assertIn('already PROCESSING', result)
+        self.assertEqual(compute.call_count, 1)
+
+    def test_task_collapses_while_another_worker_holds_the_run_lock(self, compute, detect_task):
+        with AssetLock(ASSET, 'run', GEEConfig.IMAGE_TASK_LEASE_SECONDS):
+            result = process_gee_image_task.apply(args=[self.image.id]).get()
+        self.assertIn('already being processed', result)
+        compute.assert_not_called()
+        self.assertEqual(self.reload().processing_status, ImageModel.ProcessingStatus.PENDING)
+
+        # Verrou libéré par son détenteur : la tâche suivante traite l'image
+        process_gee_image_task.apply(args=[self.image.id]).get()
+        self.assertEqual(compute.call_count, 1)
+
+
+@mock.patch('gee.services.earth_engine_service.process_gee_image_task')
+class ProcessImageCompleteTests(ImageProcessingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = EarthEngineService(backend=mock.Mock())
+
+    def test_concurrent_submission_joins_the_existing_record(self, image_task):
+        with AssetLock(ASSET, 'submit', GEEConfig.IMAGE_SUBMIT_LOCK_TIMEOUT):
+            self.assertEqual(self.service.process_image_complete(ASSET).id, self.image.id)
+        image_task.delay.assert_not_called()
+
+    def test_errored_image_is_requeued_once(self, image_task):
+        image_task.delay.return_value.id = 'task-1'
+        self.set_status(ImageModel.ProcessingStatus.ERROR)
+
+        self.assertEqual(self.service.process_image_complete(ASSET).processing_status,
+                         ImageModel.ProcessingStatus.PENDING)
+        self.service.process_image_complete(ASSET)  # Déjà PENDING : pas de seconde tâche
+        image_task.delay.assert_called_once_with(self.image.id)
+        self.assertEqual(self.reload().processing_task_id, 'task-1')
+        self.assertIsNone(AssetLock(ASSET, 'submit', 1).holder())
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from gee.backends.local_backend import LocalRasterBackend
+from gee.config import GEEConfig
+from gee.models.ingestion_cursor_model import IngestionCursorModel
+from gee.services.earth_engine_service import EarthEngineService
+from image.models.image_model import ImageModel
+
+DAY_MS = 24 * 3600 * 1000
+JANUARY_MS = 1735725600000  # 2025-01-01T10:00:00Z
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'incremental-ingestion'}
+}
+
+
+def scene(day):
+    return {
+        'gee_asset_id': f'{GEEConfig.SENTINEL2_COLLECTION}/202501{day:02d}T100000_T30NVN',
+        'time_start': JANUARY_MS + (day - 1) * DAY_MS,
+        'cloud_coverage': 5.0,
+        'properties': {},
+    }
+
+
+class ListingBackend:
+    """Backend de listage : applique le curseur comme les backends réels et garde les appels"""
+
+    name = 'listing'
+    initialized = True
+
+    def __init__(self, scenes, broken_asset_ids=()):
+        self.scenes = scenes
+        self.broken_asset_ids = set(broken_asset_ids)
+        self.listed_after = []
+
+    def list_images(self, start_date, end_date, exclude_asset_ids=None, min_time_start=None):
+        self.listed_after.append(min_time_start)
+        return [s for s in self.scenes if min_time_start is None or s['time_start'] > min_time_start]
+
+    def get_image_properties(self, asset_id):
+        if asset_id in self.broken_asset_ids:
+            raise RuntimeError('Image.load: asset not found')
+        time_start = next(s['time_start'] for s in self.scenes if s['gee_asset_id'] == asset_id)
+        return {'system:time_start': time_start, 'CLOUDY_PIXEL_PERCENTAGE': 5.0}
+
+
+class LocalListingTests(SimpleTestCase):
+
+    def test_cursor_lists_only_newer_scenes_whatever_the_window(self):
+        service = EarthEngineService(backend=LocalRasterBackend(data_dir='/nonexistent'))
+        anchor_ms = int(GEEConfig.LOCAL_SYNTHETIC_ANCHOR.timestamp() * 1000)
+        cursor_ms = anchor_ms + 10 * LocalRasterBackend.SYNTHETIC_REVISIT_DAYS * DAY_MS
+
+        images = service.get_recent_images(months_back=1, min_time_start=cursor_ms)
+
+        self.assertTrue(images)
+        self.assertTrue(all(image['time_start'] > cursor_ms for image in images))
+        # Scènes antérieures à la fenêtre months_back : le curseur prime
+        self.assertLess(min(image['capture_date'] for image in images), (datetime.now() - timedelta(days=30)).date())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('gee.services.earth_engine_service.process_gee_image_task')
+class IngestNewImagesCommandTests(TestCase):
+
+    def run_command(self, backend):
+        with mock.patch('gee.services.earth_engine_service.get_imagery_backend', return_value=backend):
+            call_command('ingest_new_gee_images', stdout=StringIO(), stderr=StringIO())
+        return IngestionCursorModel.objects.get()
+
+    def test_second_scan_only_lists_scenes_after_the_cursor(self, image_task):
+        image_task.delay.return_value.id = 'task-1'
+        backend = ListingBackend([scene(1), scene(6)])
+
+        cursor = self.run_command(backend)
+        self.assertEqual(cursor.last_time_start, scene(6)['time_start'])
+        self.assertEqual(image_task.delay.call_count, 2)
+
+        backend.scenes.append(scene(11))
+        cursor = self.run_command(backend)
+
+        self.assertEqual(backend.listed_after, [None, scene(6)['time_start']])
+        self.assertEqual(cursor.last_time_start, scene(11)['time_start'])
+        self.assertEqual(image_task.delay.call_count, 3)
+        self.assertEqual(ImageModel.objects.count(), 3)
+
+    def test_failed_scene_is_listed_again_on_the_next_scan(self, image_task):
+        image_task.delay.return_value.id = 'task-1'
+        backend = ListingBackend([scene(1), scene(6), scene(11)], broken_asset_ids={scene(6)['gee_asset_id']})
+
+        cursor = self.run_command(backend)
+        self.assertEqual(cursor.last_time_start, scene(1)['time_start'])
+
+        backend.broken_asset_ids.clear()
+        cursor = self.run_command(backend)
+
+        self.assertEqual(cursor.last_time_start, scene(11)['time_start'])
+        self.assertEqual(ImageModel.objects.count(), 3)
+        self.assertEqual(image_task.delay.call_count, 3)  # La scène du 11, déjà en file, n'est pas relancée
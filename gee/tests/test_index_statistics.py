@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.backends.local_backend import LocalRasterBackend
+from gee.config import GEEConfig
+from gee.services.earth_engine_service import EarthEngineService
+
+INDEX_KEYS = ['ndti_data', 'ndvi_data', 'ndwi_data']
+
+
+def reduce_region_output(name, mean):
+    """Sortie à plat de reduceRegion pour un indice"""
+    output = {f'{name}_mean': mean, f'{name}_stdDev': 0.1, f'{name}_min': -0.2, f'{name}_max': 0.9,
+              f'{name}_count': 1200}
+    output.update({f'{name}_p{p}': p / 100 for p in GEEConfig.STATS_PERCENTILES})
+    return output
+
+
+class FormatIndexStatsTests(SimpleTestCase):
+
+    def test_flat_statistics_are_grouped_by_index(self):
+        stats = {**reduce_region_output('NDVI', 0.45), **reduce_region_output('NDWI', -0.1)}
+        indices = EarthEngineService._format_index_stats(stats, computed_at='2025-01-01T10:00:00+00:00')
+
+        self.assertEqual(sorted(indices), INDEX_KEYS)
+        self.assertEqual(indices['ndvi_data']['mean'], 0.45)
+        self.assertEqual(indices['ndvi_data']['stddev'], 0.1)
+        self.assertEqual(indices['ndvi_data']['pixel_count'], 1200)
+        self.assertEqual(indices['ndvi_data']['percentiles']['p50'], 0.5)
+        self.assertEqual(indices['ndwi_data']['computed_at'], '2025-01-01T10:00:00+00:00')
+        # Indice absent de la réduction (scène entièrement masquée) : valeurs nulles
+        self.assertIsNone(indices['ndti_data']['mean'])
+        self.assertEqual(set(indices['ndti_data']['percentiles']), {f'p{p}' for p in GEEConfig.STATS_PERCENTILES})
+
+
+class CalculateSpectralIndicesTests(SimpleTestCase):
+
+    def test_every_index_comes_from_a_single_backend_request(self):
+        backend = mock.Mock()
+        backend.compute_index_statistics.return_value = {
+            **reduce_region_output('NDVI', 0.45), **reduce_region_output('NDWI', -0.1),
+            **reduce_region_output('NDTI', 0.2)
+        }
+
+        indices = EarthEngineService(backend=backend).calculate_spectral_indices('asset')
+
+        backend.compute_index_statistics.assert_called_once_with('asset')
+        self.assertEqual(sorted(indices), INDEX_KEYS)
+        self.assertEqual(indices['ndti_data']['mean'], 0.2)
+
+    def test_backend_error_is_raised_only_on_request(self):
+        backend = mock.Mock(**{'compute_index_statistics.side_effect': RuntimeError('User memory limit exceeded')})
+        service = EarthEngineService(backend=backend)
+
+        self.assertEqual(service.calculate_spectral_indices('asset'), {})
+        with self.assertRaises(RuntimeError):
+            service.calculate_spectral_indices('asset', raise_errors=True)
+
+
+class LocalIndexStatisticsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+
+        rng = np.random.default_rng(0)
+        self.bands = {band: rng.uniform(0.02, 0.5, (30, 40)).astype(np.float32)
+                      for band in ('B3', 'B4', 'B8', 'B11', 'B12')}
+        self.bands['B8'][:5, :5] = np.nan  # Pixels sans donnée
+        scene_dir = os.path.join(self.data_dir, '20250101T102021_T30NVN')
+        os.makedirs(scene_dir)
+        for band, values in self.bands.items():
+            np.save(os.path.join(scene_dir, f'{band}.npy'), values)
+        with open(os.path.join(scene_dir, 'metadata.json'), 'w') as f:
+            json.dump({'time_start': 1735725621000, 'cloud_coverage': 5.0,
+                       'bounds': {'lat_min': 8.0, 'lat_max': 8.003, 'lon_min': -2.8, 'lon_max': -2.796}}, f)
+        self.asset_id = f'{GEEConfig.SENTINEL2_COLLECTION}/20250101T102021_T30NVN'
+
+    @mock.patch.object(GEEConfig, 'LOCAL_CHUNK_PIXELS', 100)
+    def test_chunked_statistics_match_the_whole_scene(self):
+        stats = LocalRasterBackend(data_dir=self.data_dir).compute_index_statistics(self.asset_id)
+
+        ndvi = (self.bands['B8'] - self.bands['B4']) / (self.bands['B8'] + self.bands['B4'])
+        ndvi = ndvi[~np.isnan(ndvi)].astype(np.float64)
+        self.assertEqual(stats['NDVI_count'], ndvi.size)
+        self.assertAlmostEqual(stats['NDVI_mean'], ndvi.mean(), places=6)
+        self.assertAlmostEqual(stats['NDVI_stdDev'], ndvi.std(), places=5)
+        self.assertAlmostEqual(stats['NDVI_min'], ndvi.min(), places=6)
+        self.assertAlmostEqual(stats['NDVI_max'], ndvi.max(), places=6)
+        for p in GEEConfig.STATS_PERCENTILES:
+            self.assertAlmostEqual(stats[f'NDVI_p{p}'], np.percentile(ndvi, p), delta=0.002)
+        self.assertEqual(stats['NDTI_count'], 30 * 40)
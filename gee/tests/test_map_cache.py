@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from gee.config import GEEConfig
+from gee.services.earth_engine_service import EarthEngineService
+from gee.services.map_cache import SpectralMapCache
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+NDVI_VIS = {'min': -1, 'max': 1, 'palette': ['red', 'yellow', 'green']}
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'map-cache'}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SpectralMapCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.map_cache = SpectralMapCache()
+        self.lock_key = f"{SpectralMapCache.make_key(ASSET, 'NDVI', NDVI_VIS)}:lock"
+
+    def test_concurrent_misses_compute_the_url_once(self):
+        release = threading.Event()
+        create = mock.Mock(side_effect=lambda: release.wait(timeout=5) and 'https://tiles/ndvi')
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = [executor.submit(self.map_cache.get_or_create, ASSET, 'NDVI', NDVI_VIS, create)
+                       for _ in range(6)]
+            release.set()
+            urls = [result.result(timeout=10) for result in results]
+
+        self.assertEqual(urls, ['https://tiles/ndvi'] * 6)
+        create.assert_called_once()
+        self.assertEqual(self.map_cache.get(ASSET, 'NDVI', NDVI_VIS), 'https://tiles/ndvi')
+        self.assertIsNone(caches['default'].get(self.lock_key))
+
+    def test_key_depends_on_the_visualisation_parameters(self):
+        self.map_cache.get_or_create(ASSET, 'NDVI', NDVI_VIS, lambda: 'https://tiles/ndvi')
+        self.assertIsNone(self.map_cache.get(ASSET, 'NDVI', dict(NDVI_VIS, max=0.8)))
+        self.assertEqual(self.map_cache.get(ASSET, 'NDVI', dict(reversed(list(NDVI_VIS.items())))),
+                         'https://tiles/ndvi')
+
+    def test_failed_computation_releases_the_lock(self):
+        with self.assertRaises(RuntimeError):
+            self.map_cache.get_or_create(ASSET, 'NDVI', NDVI_VIS, mock.Mock(side_effect=RuntimeError('quota')))
+
+        self.assertIsNone(caches['default'].get(self.lock_key))
+        self.assertEqual(self.map_cache.get_or_create(ASSET, 'NDVI', NDVI_VIS, lambda: 'https://tiles/ndvi'),
+                         'https://tiles/ndvi')
+
+    @mock.patch.object(GEEConfig, 'MAP_ID_LOCK_WAIT', 0.2)
+    def test_waiter_computes_the_url_when_the_holder_never_publishes(self):
+        caches['default'].add(self.lock_key, 'stuck-worker', timeout=GEEConfig.MAP_ID_LOCK_TIMEOUT)
+        create = mock.Mock(return_value='https://tiles/ndvi')
+
+        self.assertEqual(self.map_cache.get_or_create(ASSET, 'NDVI', NDVI_VIS, create), 'https://tiles/ndvi')
+        create.assert_called_once()
+        self.assertEqual(caches['default'].get(self.lock_key), 'stuck-worker')  # Verrou d'autrui conservé
+
+    def test_generate_spectral_maps_reuses_cached_urls(self):
+        backend = mock.Mock()
+        backend.get_map_url.side_effect = lambda asset_id, index_name, vis: f'https://tiles/{index_name}'
+        service = EarthEngineService(backend=backend)
+
+        first = service.generate_spectral_maps(ASSET)
+        second = service.generate_spectral_maps(ASSET)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['ndwi_map_url'], 'https://tiles/NDWI')
+        self.assertEqual(backend.get_map_url.call_count, 3)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from gee.services.model_registry import ModelRegistry
+
+
+class SlowKerasModel:
+    """Modèle Keras factice : entrée (None, 48, 48, 3), lots reçus conservés"""
+
+    input_shape = (None, 48, 48, 3)
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_on_batch(self, inputs):
+        self.batches.append(inputs.shape)
+        return inputs[:, 0, 0, :1]
+
+
+class ModelRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.models_dir)
+        for name in ('ghana_mining_detector', 'water_classifier'):
+            open(os.path.join(self.models_dir, f'{name}.h5'), 'wb').close()
+        open(os.path.join(self.models_dir, 'README.md'), 'w').close()
+
+        self.load_model = mock.Mock(side_effect=self.slow_load)
+        tensorflow = mock.Mock()
+        tensorflow.keras.models.load_model = self.load_model
+        patcher = mock.patch.dict('sys.modules', {'tensorflow': tensorflow})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.registry = ModelRegistry(models_dir=self.models_dir)
+
+    @staticmethod
+    def slow_load(path):
+        time.sleep(0.05)
+        return SlowKerasModel()
+
+    def test_concurrent_first_uses_load_the_model_once(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(lambda _: self.registry.get_model('ghana_mining_detector'), range(8)))
+
+        self.assertEqual(self.load_model.call_count, 1)
+        self.assertTrue(all(model is models[0] for model in models))
+        self.assertTrue(self.registry.is_loaded('ghana_mining_detector'))
+
+    def test_model_is_warmed_up_with_a_single_zero_batch(self):
+        model = self.registry.get_model('ghana_mining_detector')
+
+        self.assertEqual(model.batches, [(1, 48, 48, 3)])
+        info = self.registry.stats()['ghana_mining_detector']
+        self.assertTrue(info['loaded'])
+        self.assertEqual(info['pid'], os.getpid())
+
+    def test_missing_model_is_reported_without_importing_tensorflow(self):
+        self.assertIsNone(self.registry.get_model('unknown_model'))
+        self.load_model.assert_not_called()
+        self.assertEqual(self.registry.stats()['unknown_model'], {'loaded': False, 'error': 'not_found'})
+
+    def test_load_error_leaves_the_model_unavailable(self):
+        self.load_model.side_effect = OSError('truncated file')
+
+        self.assertIsNone(self.registry.get_model('ghana_mining_detector'))
+        self.assertFalse(self.registry.is_loaded('ghana_mining_detector'))
+        self.assertEqual(self.registry.stats()['ghana_mining_detector']['error'], 'truncated file')
+
+    def test_preload_defaults_to_every_model_file(self):
+        self.assertEqual(self.registry.available_models(), ['ghana_mining_detector', 'water_classifier'])
+        self.assertEqual(self.registry.preload(), {'ghana_mining_detector': True, 'water_classifier': True})
+        self.assertEqual(self.registry.preload(['ghana_mining_detector', 'unknown_model']),
+                         {'ghana_mining_detector': True, 'unknown_model': False})
+        self.assertEqual(self.load_model.call_count, 2)
@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.config import GEEConfig
+from gee.services import patch_cache
+from gee.services.patch_cache import SpectralPatchCache, get_patch_cache
+from gee.tests.fakes import FakeClock
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+
+
+class SpectralPatchCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.clock = FakeClock()
+        patcher = mock.patch('gee.services.patch_cache.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SpectralPatchCache(cache_dir=self.cache_dir, max_patches=3, patch_size=4)
+
+    def put(self, lon, value):
+        self.clock.now += 1
+        self.cache.put(ASSET, lon, 8.0, 4, 10, np.full((4, 4, 3), value, dtype=np.float32))
+
+    def get(self, lon):
+        self.clock.now += 1
+        return self.cache.get(ASSET, lon, 8.0, 4, 10)
+
+    def keys(self):
+        rows = self.cache._connection().execute('SELECT key FROM patches ORDER BY slot').fetchall()
+        return [row[0] for row in rows]
+
+    def test_put_then_get(self):
+        self.put(-2.8, 0.25)
+        np.testing.assert_array_equal(self.get(-2.8), np.full((4, 4, 3), 0.25, dtype=np.float32))
+        self.assertIsNone(self.get(-2.9))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'size': 1, 'capacity': 3})
+
+    def test_least_recently_used_patch_is_evicted(self):
+        for position, lon in enumerate((-2.1, -2.2, -2.3)):
+            self.put(lon, position)
+        self.get(-2.1)  # -2.2 devient le moins récemment utilisé
+
+        self.put(-2.4, 9)
+        self.assertIsNone(self.get(-2.2))
+        self.assertEqual(self.get(-2.1)[0, 0, 0], 0)
+        self.assertEqual(self.get(-2.4)[0, 0, 0], 9)
+
+    def test_wrong_shape_is_ignored(self):
+        self.cache.put(ASSET, -2.8, 8.0, 4, 10, np.zeros((5, 5, 3), dtype=np.float32))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_batch_larger_than_the_cache_keeps_what_fits(self):
+        centers = [(-2.1 - 0.1 * position, 8.0) for position in range(5)]
+        patches = np.arange(5, dtype=np.float32)[:, None, None, None] * np.ones((5, 4, 4, 3), dtype=np.float32)
+        self.cache.put_many(ASSET, centers, 4, 10, patches)
+        self.assertEqual(self.cache.stats()['size'], 3)
+        self.assertFalse(any(key.startswith('pending:') for key in self.keys()))
+
+        found_patches, found = self.cache.get_many(ASSET, centers, 4, 10)
+        self.assertEqual(found.tolist(), [True, True, True, False, False])
+        np.testing.assert_array_equal(found_patches[:, 0, 0, 0], [0, 1, 2, 0, 0])
+
+    def test_pending_slots_of_dead_writers_are_reclaimed_after_the_timeout(self):
+        for lon in (-2.1, -2.2, -2.3):
+            self.put(lon, 1)
+        # Trois writers tués entre la réservation et la publication
+        with self.cache._connection() as connection:
+            connection.execute("UPDATE patches SET key = 'pending:' || slot, last_access = ?", (self.clock.now,))
+
+        self.put(-2.4, 4)  # Aucun emplacement libre : patch ignoré, sans erreur
+        self.assertIsNone(self.get(-2.4))
+
+        self.clock.now += SpectralPatchCache.PENDING_TIMEOUT_SECONDS
+        self.put(-2.4, 4)
+        self.assertEqual(self.get(-2.4)[0, 0, 0], 4)
+        self.assertEqual(sum(key.startswith('pending:') for key in self.keys()), 2)
+
+    def test_failed_write_frees_its_slot(self):
+        for lon in (-2.1, -2.2, -2.3):
+            self.put(lon, 1)
+
+        data = self.cache._data
+        self.cache._data = mock.MagicMock()
+        self.cache._data.__setitem__.side_effect = OSError('No space left on device')
+        with self.assertRaises(OSError):
+            self.put(-2.4, 4)
+        self.cache._data = data
+
+        self.assertEqual(sum(key.startswith('free:') for key in self.keys()), 1)
+        self.put(-2.5, 5)  # L'emplacement libéré passe avant le moins récemment utilisé
+        self.assertEqual(self.get(-2.5)[0, 0, 0], 5)
+        self.assertFalse(any(key.startswith(('free:', 'pending:')) for key in self.keys()))
+        self.assertEqual(self.cache.stats()['size'], 3)
+
+
+class GetPatchCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for target, value in (('time', self.clock), ('_patch_caches', {}), ('_patch_cache_failures', {})):
+            patcher = mock.patch.object(patch_cache, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(GEEConfig, 'PATCH_CACHE_ENABLED', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_open_failure_is_retried_after_the_delay(self):
+        cache = mock.Mock()
+        with mock.patch.object(patch_cache, 'SpectralPatchCache', side_effect=[OSError('read-only'), cache]) as opened:
+            self.assertIsNone(get_patch_cache(48))
+            self.assertIsNone(get_patch_cache(48))  # Pas de nouvelle tentative avant le délai
+            self.assertEqual(opened.call_count, 1)
+
+            self.clock.now += GEEConfig.PATCH_CACHE_RETRY_SECONDS
+            self.assertIs(get_patch_cache(48), cache)
+            self.assertIs(get_patch_cache(48), cache)
+            self.assertEqual(opened.call_count, 2)
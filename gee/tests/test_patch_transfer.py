@@ -0,0 +1,93 @@
+import io
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.backends.earth_engine_backend import EarthEngineBackend
+from gee.config import GEEConfig
+from gee.services.earth_engine_service import EarthEngineService
+from gee.tests.fakes import DirectGovernor
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+
+
+def npy_bytes(bands, field_order=('NDTI', 'NDVI', 'NDWI')):
+    """Bloc NPY structuré tel que renvoyé par computePixels (un champ float32 par bande)"""
+    height, width = bands['NDVI'].shape
+    structured = np.empty((height, width), dtype=[(name, np.float32) for name in field_order])
+    for name in field_order:
+        structured[name] = bands[name]
+    buffer = io.BytesIO()
+    np.save(buffer, structured, allow_pickle=False)
+    return buffer.getvalue()
+
+
+class NpyTransferTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.bands = {name: rng.uniform(-1, 1, (6, 4)).astype(np.float32) for name in ('NDVI', 'NDWI', 'NDTI')}
+        self.bands['NDWI'][0, 0] = np.nan  # Pixel masqué
+
+    def test_decoded_bands_follow_the_requested_order(self):
+        patch = EarthEngineBackend.decode_npy_patch(npy_bytes(self.bands), ['NDVI', 'NDWI', 'NDTI'])
+
+        self.assertEqual(patch.shape, (6, 4, 3))
+        self.assertEqual(patch.dtype, np.float32)
+        np.testing.assert_array_equal(patch[..., 0], self.bands['NDVI'])
+        np.testing.assert_array_equal(patch[..., 2], self.bands['NDTI'])
+        self.assertEqual(patch[0, 0, 1], 0.0)
+
+    def test_block_is_fetched_in_one_compute_pixels_call(self):
+        raw_bytes = npy_bytes(self.bands)
+        session = mock.Mock(**{'ensure_initialized.return_value': True})
+        with mock.patch('gee.backends.earth_engine_backend.get_ee_session', return_value=session), \
+                mock.patch('gee.backends.earth_engine_backend.get_quota_governor', return_value=DirectGovernor()), \
+                mock.patch('gee.backends.earth_engine_backend.ee') as ee, \
+                mock.patch.object(EarthEngineBackend, 'build_indices_image'):
+            ee.data.computePixels.return_value = raw_bytes
+            backend = EarthEngineBackend()
+            block = backend.get_spectral_block(ASSET, lon_min=-2.8, lat_max=8.1, width=4, height=6,
+                                               pixel_width=1e-4, pixel_height=9e-5)
+
+        request, = ee.data.computePixels.call_args.args
+        self.assertEqual(request['fileFormat'], 'NPY')
+        self.assertEqual(request['grid']['dimensions'], {'width': 4, 'height': 6})
+        self.assertEqual(request['grid']['affineTransform']['scaleY'], -9e-5)
+        self.assertEqual(request['grid']['affineTransform']['translateX'], -2.8)
+        self.assertEqual(block.shape, (6, 4, 3))
+        stats = backend.get_transfer_stats()
+        self.assertEqual((stats['patches'], stats['bytes']), (1, len(raw_bytes)))
+
+
+@mock.patch('gee.services.earth_engine_service.get_patch_cache', return_value=None)
+class PatchTransferModeTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.patch = rng.uniform(-1, 1, (4, 4, 3)).astype(np.float32)
+        header = ['id', 'longitude', 'latitude', 'time', 'NDTI', 'NDVI', 'NDWI']
+        rows = [[f'{i}', 0.0, 0.0, 0, float(ndti), float(ndvi), float(ndwi)]
+                for i, (ndvi, ndwi, ndti) in enumerate(self.patch.reshape(-1, 3))]
+        self.backend = mock.Mock(**{'get_spectral_patch_array.return_value': self.patch,
+                                    'get_spectral_patch.return_value': [header] + rows})
+        self.service = EarthEngineService(backend=self.backend)
+
+    def fetch(self):
+        return self.service.get_spectral_patch_array((-2.8, 8.1), ASSET, patch_size_pixels=4, scale=10)
+
+    def test_npy_mode_uses_the_binary_path(self, get_patch_cache):
+        with mock.patch.object(GEEConfig, 'PATCH_TRANSFER_MODE', 'npy'):
+            np.testing.assert_array_equal(self.fetch(), self.patch)
+        self.backend.get_spectral_patch.assert_not_called()
+
+    def test_getregion_mode_returns_the_same_patch(self, get_patch_cache):
+        with mock.patch.object(GEEConfig, 'PATCH_TRANSFER_MODE', 'getregion'):
+            np.testing.assert_array_equal(self.fetch(), self.patch)
+        self.backend.get_spectral_patch_array.assert_not_called()
+
+    def test_wrong_block_shape_is_rejected(self, get_patch_cache):
+        self.backend.get_spectral_patch_array.return_value = self.patch[:3]
+        with mock.patch.object(GEEConfig, 'PATCH_TRANSFER_MODE', 'npy'):
+            self.assertIsNone(self.fetch())
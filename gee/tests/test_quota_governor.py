@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from gee.config import GEEConfig
+from gee.services.quota_governor import EEQuotaExceeded, EEQuotaGovernor, _LocalQuotaStore, http_status, is_quota_error
+from gee.tests.fakes import EEException, FakeClock
+
+
+class QuotaGovernorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('gee.services.quota_governor.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = _LocalQuotaStore()
+
+    def test_http_status(self):
+        self.assertEqual(http_status(Exception('HttpError 429 when requesting')), 429)
+        self.assertEqual(http_status(Exception('status code: 503')), 503)
+        self.assertIsNone(http_status(Exception("asset 'COPERNICUS/S2_SR/20240429T102021' not found")))
+        error = Exception('Request failed')
+        error.response = SimpleNamespace(status_code=500)
+        self.assertEqual(http_status(error), 500)
+        self.assertFalse(is_quota_error(Exception("asset 'COPERNICUS/S2_SR/20240429T102021' not found")))
+
+    def test_token_bucket_allows_a_burst_then_the_sustained_rate(self):
+        for _ in range(3):
+            self.assertEqual(self.store.take_token(rate=2.0, capacity=3), 0.0)
+        self.assertAlmostEqual(self.store.take_token(rate=2.0, capacity=3), 0.5)
+
+        self.clock.now += 0.5
+        self.assertEqual(self.store.take_token(rate=2.0, capacity=3), 0.0)
+
+        # Le seau ne se remplit pas au-delà de sa capacité
+        self.clock.now += 60
+        for _ in range(3):
+            self.assertEqual(self.store.take_token(rate=2.0, capacity=3), 0.0)
+        self.assertGreater(self.store.take_token(rate=2.0, capacity=3), 0.0)
+
+    def test_concurrency_slots_expire_with_their_lease(self):
+        self.assertTrue(self.store.acquire_slot('a', limit=2, lease=10))
+        self.assertTrue(self.store.acquire_slot('b', limit=2, lease=10))
+        self.assertFalse(self.store.acquire_slot('c', limit=2, lease=10))
+        self.store.release_slot('a')
+        self.assertTrue(self.store.acquire_slot('c', limit=2, lease=10))
+
+        self.clock.now += 11  # Détenteurs disparus sans libérer leur créneau
+        self.assertEqual(self.store.active_slots(), 0)
+        self.assertTrue(self.store.acquire_slot('d', limit=2, lease=10))
+
+    def test_quota_errors_double_the_global_pause_up_to_the_cap(self):
+        pauses = [self.store.record_quota_error(base=2.0, max_pause=10.0, max_level=6) for _ in range(5)]
+        self.assertEqual(pauses, [2.0, 4.0, 8.0, 10.0, 10.0])
+        self.assertEqual(self.store.backoff(), (5, 10.0))
+
+        self.clock.now += 4
+        self.assertEqual(self.store.backoff(), (5, 6.0))
+        # Le niveau de recul retombe après une période calme
+        self.clock.now += 20
+        self.assertEqual(self.store.backoff(), (0, 0.0))
+
+    def test_call_turns_a_quota_error_into_a_global_pause(self):
+        governor = EEQuotaGovernor(store=self.store)
+        governor.enabled = True
+
+        def rejected():
+            raise EEException('Too many concurrent aggregations.')
+
+        with self.assertRaises(EEQuotaExceeded) as raised:
+            governor.call('getInfo', rejected)
+        self.assertEqual(raised.exception.retry_after, GEEConfig.EE_BACKOFF_BASE_SECONDS)
+        self.assertEqual(self.store.active_slots(), 0)
+        self.assertEqual(self.store.metrics()['getInfo']['quota_errors'], 1)
+
+        # L'appel suivant attend la fin de la pause avant de partir
+        started = self.clock.now
+        self.assertEqual(governor.call('getInfo', lambda: 'ok'), 'ok')
+        self.assertGreaterEqual(self.clock.now - started, GEEConfig.EE_BACKOFF_BASE_SECONDS)
+        self.assertEqual(self.store.metrics()['getInfo']['throttled'], 1)
+
+    def test_other_errors_are_not_throttled(self):
+        governor = EEQuotaGovernor(store=self.store)
+        governor.enabled = True
+
+        def failing():
+            raise EEException("Image.select: Pattern 'B13' did not match any bands.")
+
+        with self.assertRaises(EEException):
+            governor.call('getInfo', failing)
+        self.assertEqual(self.store.backoff(), (0, 0.0))
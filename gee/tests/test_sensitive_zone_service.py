@@ -0,0 +1,73 @@
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+from django.contrib.gis.geos import LineString, Point
+from django.test import TestCase
+
+from config.financial_settings import FinancialSettings
+from gee.services.sensitive_zone_service import SensitiveZoneService
+from region.models.sensitive_zone_model import SensitiveZoneModel
+
+KM_PER_DEGREE_LON_AT_8N = 111.32 * math.cos(math.radians(8.0))
+
+
+class SensitiveZoneServiceTests(TestCase):
+
+    def add_river(self, lon=-2.80, status=True):
+        return SensitiveZoneModel.objects.create(
+            name='Comoé', kind=SensitiveZoneModel.KindChoices.RIVER, status=status,
+            geometry=LineString((lon, 7.9), (lon, 8.2), srid=4326)
+        )
+
+    def test_default_distance_without_zones(self):
+        distances = SensitiveZoneService.nearest_distances_km([8.0, 8.1], [-2.8, -2.7])
+        self.assertEqual(distances.tolist(), [FinancialSettings.DEFAULT_SENSITIVE_ZONE_DISTANCE_KM] * 2)
+
+    def test_geodesic_distance_to_the_nearest_zone(self):
+        self.add_river(lon=-2.80)
+        SensitiveZoneModel.objects.create(name='Bondoukou', kind=SensitiveZoneModel.KindChoices.VILLAGE,
+                                          geometry=Point(-2.70, 8.05, srid=4326))
+
+        distances = SensitiveZoneService.nearest_distances_km([8.05, 8.05, 8.05], [-2.79, -2.705, -2.80])
+        self.assertAlmostEqual(distances[0], 0.01 * KM_PER_DEGREE_LON_AT_8N, delta=0.01)
+        self.assertAlmostEqual(distances[1], 0.005 * KM_PER_DEGREE_LON_AT_8N, delta=0.01)
+        self.assertAlmostEqual(distances[2], 0.0, places=3)
+
+    def test_kind_filter_and_inactive_zones(self):
+        self.add_river(lon=-2.80, status=False)
+        self.add_river(lon=-2.75)
+
+        distances = SensitiveZoneService.nearest_distances_km([8.0], [-2.79])
+        self.assertAlmostEqual(distances[0], 0.04 * KM_PER_DEGREE_LON_AT_8N, delta=0.02)
+
+        distances = SensitiveZoneService.nearest_distances_km([8.0], [-2.79], kinds=['VILLAGE'])
+        self.assertEqual(distances.tolist(), [np.inf])
+
+    def test_points_beyond_one_batch_keep_their_order(self):
+        self.add_river(lon=-2.80)
+        longitudes = np.linspace(-2.85, -2.75, 11)
+        original_batch_size = SensitiveZoneService.BATCH_SIZE
+        SensitiveZoneService.BATCH_SIZE = 4
+        self.addCleanup(setattr, SensitiveZoneService, 'BATCH_SIZE', original_batch_size)
+
+        distances = SensitiveZoneService.nearest_distances_km(np.full(11, 8.0), longitudes)
+        np.testing.assert_allclose(distances, np.abs(longitudes + 2.80) * KM_PER_DEGREE_LON_AT_8N, atol=0.02)
+
+    def test_load_geojson_replaces_zones_of_the_same_file(self):
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'name': 'Village A'},
+             'geometry': {'type': 'Point', 'coordinates': [-2.80, 8.04]}},
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Point', 'coordinates': [-2.70, 8.10]}},
+            {'type': 'Feature', 'properties': {'name': 'Sans géométrie'}, 'geometry': None},
+        ]}
+        handle, path = tempfile.mkstemp(suffix='.geojson')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as geojson_file:
+            json.dump(collection, geojson_file)
+
+        self.assertEqual(SensitiveZoneService.load_geojson(path, 'VILLAGE'), 2)
+        self.assertEqual(SensitiveZoneService.load_geojson(path, 'VILLAGE', replace=True), 2)
+        self.assertEqual(sorted(SensitiveZoneModel.objects.values_list('name', flat=True)), ['VILLAGE 2', 'Village A'])
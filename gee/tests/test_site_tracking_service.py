@@ -0,0 +1,90 @@
+import math
+import random
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from detection.models.detection_model import DetectionModel
+from detection.models.mining_site_model import MiningSiteModel
+from gee.services.site_tracking_service import EARTH_RADIUS_METERS, SiteTrackingService
+from image.models.image_model import ImageModel
+from region.models.region_model import RegionModel
+
+
+def haversine_meters(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+class SiteTrackingServiceTests(SimpleTestCase):
+    """Rapprochement et série temporelle des sites, sur des modèles non enregistrés"""
+
+    def setUp(self):
+        self.service = SiteTrackingService(match_radius_meters=250.0)
+        self.region = RegionModel(id=1, name='BONDOUKOU')
+        self.january = ImageModel(id=1, name='S2 janvier', capture_date=date(2025, 1, 1))
+        self.march = ImageModel(id=2, name='S2 mars', capture_date=date(2025, 3, 1))
+
+    def index_site(self, latitude, longitude, region=None):
+        site = MiningSiteModel(region=region or self.region, latitude=latitude, longitude=longitude,
+                               grid_key=self.service.grid_key(latitude, longitude),
+                               first_seen_date=date(2025, 1, 1), last_seen_date=date(2025, 1, 1))
+        self.service._index(site)
+        return site
+
+    def detect(self, latitude, longitude, image=None, confidence_score=0.5, area_hectares=1.0):
+        return DetectionModel(region=self.region, image=image or self.january, latitude=latitude,
+                              longitude=longitude, confidence_score=confidence_score, area_hectares=area_hectares)
+
+    def test_nearest_site_within_radius(self):
+        near = self.index_site(8.0400, -2.8000)
+        far = self.index_site(8.0400, -2.8060)  # ~660 m à l'ouest
+
+        self.assertIs(self.service._nearest(self.detect(8.0401, -2.8005)), near)
+        self.assertIs(self.service._nearest(self.detect(8.0400, -2.8045)), far)
+        self.assertIsNone(self.service._nearest(self.detect(8.0400, -2.8030)))  # ~330 m de chacun
+        self.assertIsNone(self.service._nearest(self.detect(8.0500, -2.8000)))
+
+    def test_nearest_ignores_sites_of_other_regions(self):
+        self.index_site(8.0400, -2.8000, region=RegionModel(id=2, name='BOUNA'))
+        self.assertIsNone(self.service._nearest(self.detect(8.0400, -2.8000)))
+
+    def test_nearest_matches_brute_force_across_cell_boundaries(self):
+        rng = random.Random(7)
+        sites = [self.index_site(8.0 + rng.uniform(0, 0.05), -2.8 + rng.uniform(0, 0.05)) for _ in range(300)]
+
+        for _ in range(500):
+            detection = self.detect(8.0 + rng.uniform(0, 0.05), -2.8 + rng.uniform(0, 0.05))
+            closest = min(sites, key=lambda site: haversine_meters(detection.latitude, detection.longitude,
+                                                                   site.latitude, site.longitude))
+            within = haversine_meters(detection.latitude, detection.longitude,
+                                      closest.latitude, closest.longitude) <= 250.0
+            self.assertIs(self.service._nearest(detection), closest if within else None)
+
+    def test_observe_counts_one_occurrence_per_image(self):
+        site = self.index_site(8.0400, -2.8000)
+
+        self.service._observe(site, self.detect(8.0400, -2.8000, confidence_score=0.6))
+        self.service._observe(site, self.detect(8.0410, -2.8000, confidence_score=0.9, area_hectares=3.0))
+        self.assertEqual(site.occurrence_count, 1)
+        self.assertEqual(site.latitude, 8.0400)  # Deuxième détection de la même scène : centroïde inchangé
+        self.assertEqual((site.max_confidence_score, site.max_area_hectares), (0.9, 3.0))
+
+        self.service._observe(site, self.detect(8.0410, -2.8010, image=self.march))
+        self.assertEqual(site.occurrence_count, 2)
+        self.assertEqual(site.last_image_id, self.march.id)
+        self.assertEqual((site.first_seen_date, site.last_seen_date), (date(2025, 1, 1), date(2025, 3, 1)))
+        self.assertAlmostEqual(site.latitude, 8.0405)
+        self.assertAlmostEqual(site.longitude, -2.8005)
+
+    def test_observe_reindexes_a_site_whose_centroid_changes_cell(self):
+        cell = self.service.cell_degrees
+        site = self.index_site(cell * 99.99, cell * 50.5)
+        self.service._observe(site, self.detect(site.latitude, site.longitude))
+
+        self.service._observe(site, self.detect(cell * 100.05, site.longitude, image=self.march))
+        self.assertEqual(self.service._cell(site.latitude, site.longitude), (100, 50))
+        self.assertEqual(self.service.cells[(99, 50)], [])
+        self.assertEqual(self.service.cells[(100, 50)], [site])
+        self.assertEqual(site.grid_key, self.service.grid_key(site.latitude, site.longitude))
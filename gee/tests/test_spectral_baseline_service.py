@@ -0,0 +1,97 @@
+from datetime import date
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from config.detection_settings import DetectionConfig
+from gee.models.spectral_baseline_model import SpectralBaselineModel
+from gee.services.spectral_baseline_service import MAD_TO_STDDEV, SpectralBaselineService
+from image.models.image_model import ImageModel
+from region.models.region_model import RegionModel
+
+
+class OnlineUpdateTests(SimpleTestCase):
+
+    def update(self, baseline, values, pixel_stddev=None):
+        for value in values:
+            SpectralBaselineService._update(baseline, value, pixel_stddev)
+        return baseline
+
+    def test_welford_statistics_match_the_batch_statistics(self):
+        values = np.random.default_rng(0).normal(0.45, 0.08, 40)
+        baseline = self.update(SpectralBaselineModel(), values, pixel_stddev=0.1)
+
+        self.assertEqual(baseline.sample_count, 40)
+        self.assertAlmostEqual(baseline.mean, values.mean())
+        self.assertAlmostEqual(baseline.stddev, values.std(ddof=1))
+        self.assertAlmostEqual(baseline.pixel_stddev_mean, 0.1)
+        self.assertAlmostEqual(baseline.median, np.median(np.round(values, 6)), places=6)
+
+    def test_median_and_mad_ignore_an_outlier_scene(self):
+        baseline = self.update(SpectralBaselineModel(), [0.40, 0.42, 0.44, 0.46, -0.9])
+
+        self.assertAlmostEqual(baseline.median, 0.42)
+        self.assertAlmostEqual(baseline.mad, 0.02)
+        self.assertLess(baseline.mean, 0.2)
+
+    @mock.patch.object(DetectionConfig, 'BASELINE_RESERVOIR_SIZE', 8)
+    def test_reservoir_stays_bounded(self):
+        baseline = self.update(SpectralBaselineModel(), np.linspace(0, 1, 100))
+
+        self.assertEqual(len(baseline.reservoir), 8)
+        self.assertEqual(baseline.sample_count, 100)
+
+
+class SpectralBaselineServiceTests(TestCase):
+
+    def setUp(self):
+        self.region = RegionModel.objects.create(name='BONDOUKOU', code='BDK', area_km2=10000)
+
+    def create_image(self, capture_date, ndvi_mean, ndvi_stddev=0.05):
+        return ImageModel.objects.create(
+            name=f'S2 {capture_date}', region=self.region, capture_date=capture_date, satellite_source='SENTINEL2',
+            cloud_coverage=5.0, gee_asset_id=f"COPERNICUS/S2_SR/{capture_date:%Y%m%d}T102021_T30NVN",
+            processing_status=ImageModel.ProcessingStatus.COMPLETED,
+            ndvi_data={'mean': ndvi_mean, 'stddev': ndvi_stddev}, ndwi_data={'mean': -0.1, 'stddev': 0.02},
+            ndti_data={'mean': None}
+        )
+
+    def test_image_is_added_once_to_its_month_and_to_all_months(self):
+        image = self.create_image(date(2025, 1, 5), 0.5)
+
+        self.assertTrue(SpectralBaselineService.add_image(image))
+        self.assertFalse(SpectralBaselineService.add_image(image))
+
+        baselines = SpectralBaselineModel.objects.filter(region=self.region)
+        self.assertEqual(sorted(baselines.values_list('month', 'index_name')),
+                         [(0, 'ndvi'), (0, 'ndwi'), (1, 'ndvi'), (1, 'ndwi')])
+        self.assertTrue(all(baseline.sample_count == 1 for baseline in baselines))
+
+    def test_month_with_too_few_scenes_falls_back_to_all_months(self):
+        for day, ndvi_mean in ((5, 0.50), (10, 0.52), (15, 0.54)):
+            SpectralBaselineService.add_image(self.create_image(date(2025, 1, day), ndvi_mean))
+        SpectralBaselineService.add_image(self.create_image(date(2025, 3, 5), 0.30))
+
+        january = SpectralBaselineService.reference_indices(self.region.id, date(2026, 1, 20))
+        march = SpectralBaselineService.reference_indices(self.region.id, date(2026, 3, 20))
+
+        self.assertEqual(january['ndvi_data']['month'], 1)
+        self.assertAlmostEqual(january['ndvi_data']['mean'], 0.52)
+        self.assertAlmostEqual(january['ndvi_data']['stddev'], max(0.05, MAD_TO_STDDEV * 0.02))
+        self.assertEqual(march['ndvi_data']['month'], SpectralBaselineModel.ALL_MONTHS)
+        self.assertEqual(march['ndvi_data']['sample_count'], 4)
+        self.assertNotIn('ndti_data', january)
+
+    def test_region_without_baseline_has_no_reference(self):
+        self.assertIsNone(SpectralBaselineService.reference_indices(self.region.id, date(2025, 1, 1)))
+
+    def test_rebuild_recounts_every_completed_image(self):
+        for day in (5, 10):
+            SpectralBaselineService.add_image(self.create_image(date(2025, 1, day), 0.5))
+        self.create_image(date(2025, 1, 15), 0.6)
+
+        self.assertEqual(SpectralBaselineService.rebuild(self.region.id), 3)
+        baseline = SpectralBaselineModel.objects.get(region=self.region, month=1, index_name='ndvi')
+        self.assertEqual(baseline.sample_count, 3)
+        self.assertFalse(ImageModel.objects.filter(baseline_applied_at__isnull=True).exists())
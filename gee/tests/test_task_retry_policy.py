@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from gee.config import GEEConfig
+from gee.services.quota_governor import EEQuotaExceeded
+from gee.services.task_retry_policy import ErrorClass, classify_error, retry_delay
+from gee.tests.fakes import EEException
+
+
+class TaskRetryPolicyTests(SimpleTestCase):
+
+    def test_quota_errors(self):
+        self.assertEqual(classify_error(EEQuotaExceeded('getInfo', 4.0)), ErrorClass.QUOTA)
+        self.assertEqual(classify_error(EEException('Too many concurrent aggregations.')), ErrorClass.QUOTA)
+        self.assertEqual(classify_error(EEException('HttpError 429 when requesting ...')), ErrorClass.QUOTA)
+
+    def test_status_attribute_is_read_before_the_message(self):
+        error = EEException('Request failed')
+        error.resp = SimpleNamespace(status=503)
+        self.assertEqual(classify_error(error), ErrorClass.TRANSIENT)
+
+        error = Exception('Request failed')
+        error.resp = SimpleNamespace(status=429)
+        self.assertEqual(classify_error(error), ErrorClass.QUOTA)
+
+    def test_digits_in_asset_ids_are_not_http_statuses(self):
+        error = EEException("Image.load: Image asset 'COPERNICUS/S2_SR/20240429T102021_20240429T102513_T30NVN' "
+                            "not found.")
+        self.assertEqual(classify_error(error), ErrorClass.PERMANENT)
+        self.assertEqual(classify_error(Exception('Tile of 12502 pixels rejected')), ErrorClass.PERMANENT)
+        self.assertEqual(classify_error(Exception('Scene 20240503 has 5000 pixels')), ErrorClass.PERMANENT)
+
+    def test_transient_errors(self):
+        self.assertEqual(classify_error(ConnectionError('reset by peer')), ErrorClass.TRANSIENT)
+        self.assertEqual(classify_error(TimeoutError()), ErrorClass.TRANSIENT)
+        self.assertEqual(classify_error(Exception('HttpError 502 Bad Gateway')), ErrorClass.TRANSIENT)
+        self.assertEqual(classify_error(Exception('Deadline exceeded while waiting')), ErrorClass.TRANSIENT)
+        # Exception EE non reconnue : transitoire
+        self.assertEqual(classify_error(EEException('Computation failed unexpectedly')), ErrorClass.TRANSIENT)
+
+    def test_permanent_errors(self):
+        self.assertEqual(classify_error(ValueError('bad bounds')), ErrorClass.PERMANENT)
+        self.assertEqual(classify_error(KeyError('ndvi_data')), ErrorClass.PERMANENT)
+        self.assertEqual(classify_error(EEException("Image.select: Pattern 'B13' did not match any bands.")),
+                         ErrorClass.PERMANENT)
+        self.assertEqual(classify_error(Exception('unexpected state')), ErrorClass.PERMANENT)
+
+    def test_transient_delay_is_capped_exponential_backoff_with_jitter(self):
+        for retries in range(8):
+            cap = min(GEEConfig.TASK_RETRY_BASE_SECONDS * 2 ** retries, GEEConfig.TASK_RETRY_MAX_SECONDS)
+            with mock.patch('gee.services.task_retry_policy.random.uniform', side_effect=lambda low, high: low):
+                self.assertEqual(retry_delay(ErrorClass.TRANSIENT, retries, Exception()), cap / 2)
+            with mock.patch('gee.services.task_retry_policy.random.uniform', side_effect=lambda low, high: high):
+                self.assertEqual(retry_delay(ErrorClass.TRANSIENT, retries, Exception()), cap)
+
+    def test_quota_delay_waits_for_the_end_of_the_quota_window(self):
+        governor = SimpleNamespace(store=SimpleNamespace(backoff=lambda: (2, 90.0)))
+        with mock.patch('gee.services.task_retry_policy.get_quota_governor', return_value=governor), \
+                mock.patch('gee.services.task_retry_policy.random.uniform', side_effect=lambda low, high: low):
+            # Pause globale plus longue que le retry_after de l'exception
+            self.assertEqual(retry_delay(ErrorClass.QUOTA, 0, EEQuotaExceeded('getInfo', 10.0)), 90.0)
+            governor.store.backoff = lambda: (0, 0.0)
+            self.assertEqual(retry_delay(ErrorClass.QUOTA, 0, EEQuotaExceeded('getInfo', 300.0)), 300.0)
+            # Jamais moins que le report minimal
+            self.assertEqual(retry_delay(ErrorClass.QUOTA, 0, Exception('quota exceeded')),
+                             GEEConfig.TASK_QUOTA_MIN_DELAY_SECONDS)
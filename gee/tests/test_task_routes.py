@@ -0,0 +1,41 @@
+import os
+import re
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from config.celery import app
+
+
+class TaskRoutingTests(SimpleTestCase):
+    """Files Celery (CELERY_TASK_ROUTES) et services worker de docker-compose.yml"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        app.loader.import_default_modules()
+        with open(os.path.join(settings.BASE_DIR, 'docker-compose.yml')) as f:
+            cls.consumed_queues = {queue for queues in re.findall(r'-Q (\S+)', f.read()) for queue in queues.split(',')}
+
+    def test_every_route_names_a_registered_task(self):
+        for name in settings.CELERY_TASK_ROUTES:
+            self.assertIn(name, app.tasks, name)
+
+    def test_pipeline_and_report_tasks_are_routed(self):
+        for name, task in app.tasks.items():
+            if task.__module__ in ('gee.tasks', 'report.tasks'):
+                self.assertIn(name, settings.CELERY_TASK_ROUTES, name)
+
+    def test_every_routed_queue_is_consumed_by_a_worker_service(self):
+        routed_queues = {route['queue'] for route in settings.CELERY_TASK_ROUTES.values()}
+        self.assertEqual(routed_queues - self.consumed_queues, set())
+
+    def test_tasks_are_published_on_their_queue(self):
+        router = app.amqp.router
+        self.assertEqual(router.route({}, 'gee.tasks.detect_mining_activity_task')['queue'].name, 'inference')
+        self.assertEqual(router.route({}, 'gee.tasks.process_gee_image_task')['queue'].name, 'gee_io')
+        self.assertEqual(router.route({}, 'report.tasks.generate_report_task')['queue'].name, 'reports')
+
+    def test_scheduled_tasks_run_on_the_maintenance_queue(self):
+        for entry in settings.CELERY_BEAT_SCHEDULE.values():
+            self.assertEqual(settings.CELERY_TASK_ROUTES[entry['task']]['queue'], 'maintenance', entry['task'])
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from gee.services.batch_inference_service import BatchedInferenceService
+from gee.services.earth_engine_service import EarthEngineService
+from gee.services.patch_cache import SpectralPatchCache
+from gee.services.tile_scan_service import TileScanService
+
+ASSET = 'COPERNICUS/S2_SR/20250101T102021_20250101T102513_T30NVN'
+BOUNDS = {'lat_min': 8.0, 'lat_max': 8.003, 'lon_min': -2.8, 'lon_max': -2.797}
+
+
+class GradientBackend:
+    """Backend déterministe : NDVI fonction de la position, NDWI/NDTI constants"""
+
+    initialized = True
+
+    def __init__(self):
+        self.blocks_fetched = 0
+
+    def get_spectral_block(self, asset_id, lon_min, lat_max, width, height, pixel_width, pixel_height):
+        self.blocks_fetched += 1
+        lons, lats = np.meshgrid(lon_min + (np.arange(width) + 0.5) * pixel_width,
+                                 lat_max - (np.arange(height) + 0.5) * pixel_height)
+        ndvi = np.sin(lons * 4000) * np.cos(lats * 3000)
+        return np.stack([ndvi, np.full_like(ndvi, 0.1), np.full_like(ndvi, -0.2)], axis=-1).astype(np.float32)
+
+    def get_transfer_stats(self):
+        return {'patches': self.blocks_fetched, 'bytes': self.blocks_fetched * 2352, 'decode_seconds': 0.0}
+
+
+class MeanNdviModel:
+    """Modèle factice : score = NDVI moyen de la tuile ramené entre 0 et 1"""
+
+    def predict_on_batch(self, inputs):
+        return (inputs[..., 0].mean(axis=(1, 2)) + 1) / 2
+
+
+class CachedBlockTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache = SpectralPatchCache(cache_dir=self.cache_dir, max_patches=100, patch_size=8)
+        patcher = mock.patch('gee.services.earth_engine_service.get_patch_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = GradientBackend()
+        self.gee_service = EarthEngineService(backend=self.backend)
+
+
+class GetSpectralBlockTests(CachedBlockTestCase):
+
+    def block(self, col0=0, tile_cols=2):
+        return self.gee_service.get_spectral_block(
+            ASSET, lon_min=-2.8 + col0 * 6 * 1e-4, lat_max=8.003, tile_rows=2, tile_cols=tile_cols,
+            tile_size=8, stride=6, pixel_width=1e-4, pixel_height=1e-4, scale=10
+        )
+
+    def test_fully_cached_block_is_rebuilt_without_backend_call(self):
+        fetched = self.block()
+        self.assertEqual(fetched.shape, (14, 14, 3))
+        self.assertEqual(self.cache.stats()['size'], 4)
+
+        np.testing.assert_array_equal(self.block(), fetched)
+        self.assertEqual(self.backend.blocks_fetched, 1)
+
+    def test_partially_cached_block_is_fetched_and_only_missing_tiles_are_cached(self):
+        self.block()
+        shifted = self.block(col0=1)  # Colonne 1 du premier bloc déjà en cache
+        self.assertEqual(self.backend.blocks_fetched, 2)
+        self.assertEqual(self.cache.stats()['size'], 6)
+
+        np.testing.assert_array_equal(self.block(col0=1), shifted)
+        np.testing.assert_array_equal(self.block(tile_cols=3)[:, 6:], shifted)
+        self.assertEqual(self.backend.blocks_fetched, 2)
+
+    def test_backend_error_returns_none(self):
+        self.backend.get_spectral_block = mock.Mock(side_effect=RuntimeError('computePixels quota'))
+        self.assertIsNone(self.block())
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+class TileScanServiceTests(CachedBlockTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.inference = BatchedInferenceService(MeanNdviModel(), max_batch_size=16, max_wait_ms=1)
+        self.scanner = TileScanService(self.gee_service, self.inference, tile_size=8, scale=10,
+                                       overlap=0.25, tiles_per_block=2, fetch_workers=2)
+
+    def test_scan_scores_every_tile_and_rescan_uses_the_cache(self):
+        results = self.scanner.scan(ASSET, BOUNDS, threshold=0.5)
+        grid = self.scanner.build_grid(BOUNDS)
+        self.assertEqual(results['tiles_total'], grid['tile_rows'] * grid['tile_cols'])
+        self.assertEqual(results['tiles_scored'], results['tiles_total'])
+        self.assertEqual(self.backend.blocks_fetched, results['blocks_fetched'])
+
+        scores = [tile['score'] for tile in results['hot_tiles']]
+        self.assertTrue(scores)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(all(score > 0.5 for score in scores))
+
+        rescan = self.scanner.scan(ASSET, BOUNDS, threshold=0.5)
+        self.assertEqual(self.backend.blocks_fetched, results['blocks_fetched'])
+        self.assertEqual(rescan['hot_tiles'], results['hot_tiles'])
+
+    def test_transfer_stats_since_cover_only_the_later_transfers(self):
+        before = self.gee_service.get_patch_transfer_stats()
+        first = self.scanner.scan(ASSET, BOUNDS, threshold=0.5)
+        self.assertEqual(self.gee_service.get_patch_transfer_stats(since=before)['patches'], first['blocks_fetched'])
+
+        before = self.gee_service.get_patch_transfer_stats()
+        self.scanner.scan(ASSET, BOUNDS, threshold=0.5)
+        self.assertEqual(self.gee_service.get_patch_transfer_stats(since=before),
+                         {'patches': 0, 'bytes': 0, 'decode_seconds': 0.0,
+                          'avg_bytes_per_patch': 0, 'avg_decode_ms': 0.0})
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2025-06-14 08:41
+
+from django.db import migrations, models
+
+
+def mark_already_analyzed_images(apps, schema_editor):
+    """Les images ayant déjà des détections ne doivent pas être ré-analysées"""
+    ImageModel = apps.get_model('image', 'ImageModel')
+    ImageModel.objects.filter(detections__isnull=False).update(detection_status='COMPLETED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('detection', '0001_initial'),
+        ('image', '0002_remove_imagemodel_image_file_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemodel',
+            name='detection_status',
+            field=models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'Détection en cours'), ('COMPLETED', 'Terminée'), ('ERROR', 'Erreur')], default='PENDING', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='imagemodel',
+            name='detection_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imagemodel',
+            name='detected_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='imagemodel',
+            index=models.Index(fields=['processing_status', 'detection_status'], name='satellite_i_process_2216b0_idx'),
+        ),
+        migrations.RunPython(mark_already_analyzed_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2025-06-16 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image', '0003_imagemodel_detection_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemodel',
+            name='processing_task_id',
+            field=models.CharField(blank=True, help_text='Tâche Celery détenant le traitement (déduplication)', max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2025-06-17 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image', '0004_imagemodel_processing_task_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemodel',
+            name='baseline_applied_at',
+            field=models.DateTimeField(blank=True, help_text='Intégration aux références saisonnières (SpectralBaselineModel)', null=True),
+        ),
+    ]
@@ -10,12 +10,19 @@ class ImageModel(NamedDateTimeModel):
         ('LANDSAT9', 'Landsat-9'),
     ]
 
-    PROCESSING_STATUS = [
-        ('PENDING', 'En attente'),
-        ('PROCESSING', 'Traitement en cours'),
-        ('COMPLETED', 'Terminé'),
-        ('ERROR', 'Erreur'),
-    ]
+    class ProcessingStatus(models.TextChoices):
+        PENDING = 'PENDING', 'En attente'
+        PROCESSING = 'PROCESSING', 'Traitement en cours'
+        COMPLETED = 'COMPLETED', 'Terminé'
+        ERROR = 'ERROR', 'Erreur'
+
+    PROCESSING_STATUS = ProcessingStatus.choices
+
+    class DetectionStatus(models.TextChoices):
+        PENDING = 'PENDING', 'En attente'
+        RUNNING = 'RUNNING', 'Détection en cours'
+        COMPLETED = 'COMPLETED', 'Terminée'
+        ERROR = 'ERROR', 'Erreur'
 
     region = models.ForeignKey('region.RegionModel', on_delete=models.CASCADE)
 
@@ -48,6 +55,15 @@ class ImageModel(NamedDateTimeModel):
     processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS, default='PENDING')
     processed_at = models.DateTimeField(null=True, blank=True)
     processing_error = models.TextField(blank=True, null=True)
+    processing_task_id = models.CharField(max_length=255, null=True, blank=True,
+                                          help_text="Tâche Celery détenant le traitement (déduplication)")
+
+    # Détection d'orpaillage (déclenchée une seule fois par image, à la fin du calcul des indices)
+    detection_status = models.CharField(max_length=20, choices=DetectionStatus.choices, default='PENDING')
+    detection_started_at = models.DateTimeField(null=True, blank=True)
+    detected_at = models.DateTimeField(null=True, blank=True)
+    baseline_applied_at = models.DateTimeField(null=True, blank=True,
+                                               help_text="Intégration aux références saisonnières (SpectralBaselineModel)")
 
     # Utilisateur ayant demandé l'analyse
     requested_by = models.ForeignKey('account.UserModel', on_delete=models.SET_NULL, null=True, blank=True)
@@ -58,6 +74,7 @@ class ImageModel(NamedDateTimeModel):
         indexes = [
             models.Index(fields=['capture_date', 'processing_status']),
             models.Index(fields=['gee_asset_id']),
+            models.Index(fields=['processing_status', 'detection_status']),
         ]
 
     def __str__(self):
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2025-06-21 08:12
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('region', '0003_remove_regionmodel_geographic_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensitiveZoneModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=150)),
+                ('kind', models.CharField(choices=[('RIVER', "Cours d'eau"), ('PROTECTED_FOREST', 'Forêt classée'), ('VILLAGE', 'Village')], max_length=20)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+                ('source', models.CharField(blank=True, help_text="Fichier GeoJSON d'origine", max_length=255)),
+            ],
+            options={
+                'db_table': 'sensitive_zones',
+                'indexes': [models.Index(fields=['kind'], name='sensitive_zone_kind_idx')],
+            },
+        ),
+    ]
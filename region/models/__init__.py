@@ -1 +1,2 @@
-from . import  region_model
\ No newline at end of file
+from . import  region_model
+from . import sensitive_zone_model
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db import models
+from django.contrib.gis.db import models as gis_models
+from base.models.helpers.named_date_time_model import NamedDateTimeModel
+
+
+class SensitiveZoneModel(NamedDateTimeModel):
+    """
+    Zone sensible (cours d'eau, forêt classée, village) importée d'une couche GeoJSON
+
+    La distance d'une détection à la zone sensible la plus proche fixe le facteur
+    de distance de son risque financier (FinancialSettings.get_distance_factor).
+    Géométrie quelconque (ligne, polygone, point), index spatial GiST.
+    """
+
+    class KindChoices(models.TextChoices):
+        RIVER = 'RIVER', "Cours d'eau"
+        PROTECTED_FOREST = 'PROTECTED_FOREST', 'Forêt classée'
+        VILLAGE = 'VILLAGE', 'Village'
+
+    kind = models.CharField(max_length=20, choices=KindChoices.choices)
+    geometry = gis_models.GeometryField(srid=4326)
+    source = models.CharField(max_length=255, blank=True, help_text="Fichier GeoJSON d'origine")
+
+    class Meta:
+        db_table = 'sensitive_zones'
+        indexes = [
+            models.Index(fields=['kind'], name='sensitive_zone_kind_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.name}"
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2025-06-22 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0005_alter_dashboardstatistic_statistic_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventlogmodel',
+            name='event_type',
+            field=models.CharField(choices=[('DETECTION_CREATED', 'New Detection Created'), ('ALERT_GENERATED', 'New Alert Generated'), ('ALERT_ESCALATED', 'Alert Escalated'), ('ALERT_ACKNOWLEDGED', 'Alert Acknowledged'), ('ALERT_RESOLVED', 'Alert Resolved'), ('DETECTION_VALIDATED', 'Detection Validated'), ('INVESTIGATION_CREATED', 'Investigation Created'), ('INVESTIGATION_ASSIGNED', 'Investigation Assigned'), ('INVESTIGATION_COMPLETED', 'Investigation Completed'), ('ANALYSIS_STARTED', 'Analysis Started'), ('ANALYSIS_COMPLETED', 'Analysis Completed'), ('USER_LOGIN', 'User Logged In'), ('REPORT_GENERATED', 'Report Generated'), ('IMAGE_PROCESSED', 'Image Processed'), ('SYSTEM_ERROR', 'System Error'), ('FINANCIAL_RISK_CALCULATED', 'Financial Risk Calculated'), ('FEEDBACK_CREATED', 'Detection Feedback Created')], help_text='Type of system event', max_length=50),
+        ),
+    ]
@@ -14,6 +14,7 @@ class EventLogModel(DateTimeModel):
     EVENT_TYPES = [
         ('DETECTION_CREATED', 'New Detection Created'),
         ('ALERT_GENERATED', 'New Alert Generated'),
+        ('ALERT_ESCALATED', 'Alert Escalated'),
         ('ALERT_ACKNOWLEDGED', 'Alert Acknowledged'),
         ('ALERT_RESOLVED', 'Alert Resolved'),
         ('DETECTION_VALIDATED', 'Detection Validated'),
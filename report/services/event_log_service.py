@@ -1,5 +1,5 @@
 from report.models.event_log_model import EventLogModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class EventLogService:
@@ -23,6 +23,25 @@ class EventLogService:
             print(f"Erreur enregistrement event log: {e}")
             return None
 
+    @staticmethod
+    def build_event(event_type: str, message: str, user=None, detection=None,
+                    alert=None, region=None, metadata: Dict[str, Any] = None) -> EventLogModel:
+        """Événement non enregistré, à écrire en lot avec log_events"""
+        return EventLogModel(
+            event_type=event_type,
+            message=message,
+            user=user,
+            detection=detection,
+            alert=alert,
+            region=region,
+            metadata=metadata
+        )
+
+    @staticmethod
+    def log_events(events: List[EventLogModel]) -> List[EventLogModel]:
+        """Enregistre plusieurs événements en une seule requête"""
+        return EventLogModel.objects.bulk_create(events)
+
     @staticmethod
     def log_analysis_started(user=None, months_back: int = 3):
         """Log début d'analyse"""
@@ -11,6 +11,9 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+import numpy as np
+
+from config.detection_settings import DetectionConfig
 from gee.services.mining_detection_service import MiningDetectionService
 from gee.services.earth_engine_service import EarthEngineService
 from image.models.image_model import ImageModel
@@ -23,14 +26,11 @@ def test_tensorflow_model():
         if service.model:
             print("✅ Modèle TensorFlow chargé avec succès")
             
-            # Test de prédiction avec des données factices
-            test_data = {
-                'ndvi_data': {'mean': 0.5, 'stddev': 0.1},
-                'ndwi_data': {'mean': 0.2, 'stddev': 0.05},
-                'ndti_data': {'mean': 0.1, 'stddev': 0.02}
-            }
+            # Test de prédiction sur une tuile factice (NDVI, NDWI, NDTI)
+            tile_size = DetectionConfig.SCAN_TILE_SIZE_PIXELS
+            test_tile = np.full((tile_size, tile_size, 3), [0.5, 0.2, 0.1], dtype=np.float32)
             
-            confidence = service._predict_with_tensorflow(test_data)
+            confidence = service.inference.predict(test_tile)
             print(f"✅ Prédiction test: {confidence:.3f}")
         else:
             print("⚠️ Modèle TensorFlow non chargé")